@@ -0,0 +1,125 @@
+"""
+Per-call overhead of the Python wrapper classes.
+
+Before, ``AtomSpec``, ``BondSpec`` and ``Molecule`` were Python
+subclasses of the PyO3 classes, which converted their arguments with an
+``isinstance`` chain and forwarded each method to the base class. Now
+they're the PyO3 classes, which convert their arguments in Rust. This
+times the old wrappers (reproduced here) against the classes
+``oxmol`` exports.
+
+Usage::
+
+    python benchmarks/call_overhead.py [--number N]
+
+"""
+import argparse
+import timeit
+
+from oxmol import AtomSpec, BondSpec, Molecule
+from oxmol.oxmol import (
+    PyAtomSpec,
+    PyBondOrder,
+    PyBondSpec,
+    PyDefaultMolecule,
+    PyElement,
+    PyParity,
+)
+
+
+class LegacyAtomSpec(PyAtomSpec):
+    """The previous Python ``AtomSpec``."""
+    def __new__(cls, element, hydrogens=0, ion=0, isotope=None, parity=None):
+        if isinstance(element, PyElement):
+            pass
+        elif isinstance(element, int):
+            element = PyElement(element)
+        elif isinstance(element, str):
+            element = PyElement.from_symbol(element)
+        else:
+            raise TypeError("Can't convert {} to PyElement".format(element))
+
+        if isinstance(parity, bool):
+            parity = PyParity(parity)
+
+        return PyAtomSpec.__new__(cls, element, hydrogens, ion, isotope, parity)
+
+
+class LegacyBondSpec(PyBondSpec):
+    """The previous Python ``BondSpec``."""
+    def __new__(cls, sid, tid, order, parity=None):
+        if isinstance(order, int):
+            order = PyBondOrder(order)
+
+        if isinstance(parity, bool):
+            parity = PyParity(parity)
+
+        return PyBondSpec.__new__(cls, sid, tid, order, parity)
+
+
+class LegacyMolecule(PyDefaultMolecule):
+    """The previous Python ``Molecule``, with its forwarding methods."""
+    def __new__(cls, atoms, bonds):
+        return PyDefaultMolecule.__new__(cls, atoms, bonds)
+
+    def order(self):
+        return super().order()
+
+    def neighbors(self, atom_id):
+        return super().neighbors(atom_id)
+
+    def element(self, atom_id):
+        return super().element(atom_id)
+
+    def bond_order(self, sid, tid):
+        return super().bond_order(sid, tid)
+
+
+def ethanol(atom_spec, bond_spec, molecule):
+    """Build ethanol with the given classes."""
+    atoms = [atom_spec('C', 3), atom_spec(6, 2), atom_spec('O', 1)]
+    bonds = [bond_spec(0, 1, 1), bond_spec(1, 2, 1)]
+    return molecule(atoms, bonds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--number', type=int, default=200000)
+    args = parser.parse_args()
+
+    legacy = ethanol(LegacyAtomSpec, LegacyBondSpec, LegacyMolecule)
+    native = ethanol(AtomSpec, BondSpec, Molecule)
+    cases = [
+        ("AtomSpec('C', 4)", "atom_spec('C', 4)"),
+        ("AtomSpec(6, parity=True)", "atom_spec(6, parity=True)"),
+        ("BondSpec(0, 1, 2)", "bond_spec(0, 1, 2)"),
+        ("Molecule(atoms, bonds)", "ethanol(atom_spec, bond_spec, molecule)"),
+        ("molecule.order()", "mol.order()"),
+        ("molecule.neighbors(1)", "mol.neighbors(1)"),
+        ("molecule.element(2)", "mol.element(2)"),
+        ("molecule.bond_order(0, 1)", "mol.bond_order(0, 1)"),
+    ]
+    contexts = {
+        'legacy': {
+            'atom_spec': LegacyAtomSpec, 'bond_spec': LegacyBondSpec,
+            'molecule': LegacyMolecule, 'mol': legacy, 'ethanol': ethanol,
+        },
+        'native': {
+            'atom_spec': AtomSpec, 'bond_spec': BondSpec,
+            'molecule': Molecule, 'mol': native, 'ethanol': ethanol,
+        },
+    }
+
+    print('{:<28} {:>12} {:>12} {:>8}'.format('call', 'legacy (ns)', 'native (ns)', 'speedup'))
+    for name, statement in cases:
+        timings = {}
+        for label, context in contexts.items():
+            seconds = min(timeit.repeat(statement, globals=context, number=args.number, repeat=5))
+            timings[label] = 1e9 * seconds / args.number
+        print('{:<28} {:>12.1f} {:>12.1f} {:>7.2f}x'.format(
+            name, timings['legacy'], timings['native'], timings['legacy'] / timings['native']
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Memory held by ``Molecule`` objects.
+
+Molecules store their atoms and bonds as packed records, with ``uint32``
+atom and bond indices, and keep anything computed from them (hashes,
+rings, distance matrices and so on) in one allocation made on first
+use. This builds many copies of a few molecules (or of the SMILES in a
+file, one per line) and reports the bytes ``sys.getsizeof`` gives per
+molecule, per atom and per bond, before and after computing the cached
+values, with the growth in the peak resident set size.
+
+Usage::
+
+    python benchmarks/memory.py [--number N] [--smiles FILE]
+
+"""
+import argparse
+import resource
+import sys
+
+from oxmol import Molecule
+
+SMILES = [
+    'CCO',
+    'CC(=O)Oc1ccccc1C(=O)O',
+    'CN1C=NC2=C1C(=O)N(C(=O)N2C)C',
+    'CC(C)Cc1ccc(cc1)[C@@H](C)C(=O)O',
+    'C1CCC(CC1)NC(=O)c1ccc[nH]1',
+    'OC[C@H]1OC(O)[C@H](O)[C@@H](O)[C@@H]1O',
+]
+
+
+def peak_rss():
+    """The peak resident set size of this process, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == 'darwin' else 1024 * peak
+
+
+def report(label, molecules, n_atoms, n_bonds):
+    """Print the average sizes of some molecules."""
+    total = sum(sys.getsizeof(molecule) for molecule in molecules)
+    print('{:<16} {:>12.1f} {:>10.1f} {:>10.1f}'.format(
+        label, total / len(molecules), total / n_atoms, total / n_bonds
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--number', type=int, default=100000)
+    parser.add_argument('--smiles', help='a file of SMILES, one per line')
+    args = parser.parse_args()
+
+    smiles = SMILES
+    if args.smiles is not None:
+        with open(args.smiles) as smiles_file:
+            smiles = [line.split()[0] for line in smiles_file if line.strip()]
+
+    rss_before = peak_rss()
+    molecules = [Molecule.from_smiles(smiles[index % len(smiles)]) for index in range(args.number)]
+    rss_growth = peak_rss() - rss_before
+    n_atoms = sum(molecule.order() for molecule in molecules)
+    n_bonds = sum(molecule.size() for molecule in molecules)
+
+    print('{} molecules, {} atoms, {} bonds'.format(len(molecules), n_atoms, n_bonds))
+    print('{:<16} {:>12} {:>10} {:>10}'.format('', 'B/molecule', 'B/atom', 'B/bond'))
+    report('built', molecules, n_atoms, n_bonds)
+    print('{:<16} {:>12.1f} {:>10.1f} {:>10.1f}'.format(
+        'peak RSS growth', rss_growth / len(molecules), rss_growth / n_atoms, rss_growth / n_bonds
+    ))
+
+    for molecule in molecules:
+        hash(molecule)
+        molecule.rings()
+        molecule.distance_matrix()
+    report('with caches', molecules, n_atoms, n_bonds)
+
+
+if __name__ == '__main__':
+    main()
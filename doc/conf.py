@@ -46,6 +46,9 @@ extensions = [
     "sphinx_rtd_theme"
 ]
 
+# The docs are built without the runtime dependencies installed.
+autodoc_mock_imports = ["numpy"]
+
 # Add any paths that contain templates here, relative to this directory.
 templates_path = ['_templates']
 
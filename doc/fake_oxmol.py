@@ -1,3 +1,8 @@
+DESCRIPTOR_NAMES = []
+FRAGMENT_SIZES = []
+ERROR_MESSAGES = []
+
+
 class PyElement:
     pass
 
@@ -20,3 +25,83 @@ class PyBondSpec:
 
 class PyDefaultMolecule:
     pass
+
+
+class PySmilesReader:
+    pass
+
+
+class PyQuery:
+    pass
+
+
+class PyScreenIndex:
+    pass
+
+
+class PySearchResult:
+    pass
+
+
+class PyFingerprintDatabase:
+    pass
+
+
+class PyMoleculeStore:
+    pass
+
+
+class PyMoleculeStoreIterator:
+    pass
+
+
+class PySdfReader:
+    pass
+
+
+class PyMoleculeBuilder:
+    pass
+
+
+def read_smiles(*args, **kwargs):
+    pass
+
+
+def write_smiles(*args, **kwargs):
+    pass
+
+
+def morgan_fingerprints(*args, **kwargs):
+    pass
+
+
+def write_fingerprints(*args, **kwargs):
+    pass
+
+
+def read_sdf(*args, **kwargs):
+    pass
+
+
+def write_sdf(*args, **kwargs):
+    pass
+
+
+def parse_sd_data(*args, **kwargs):
+    pass
+
+
+def compute_descriptors(*args, **kwargs):
+    pass
+
+
+def largest_fragments(*args, **kwargs):
+    pass
+
+
+def distance_matrices(*args, **kwargs):
+    pass
+
+
+def validate(*args, **kwargs):
+    pass
@@ -7,19 +7,17 @@ post`__.
 This package is currently a work in progress, it is missing some of the
 following key pieces:
 
-- A fully-featured SMILES parser (`this is being worked on, but isn't \
-yet in oxmol`__)
-- Substructure matching
 - Coordinate representations and embedding
-- Descriptor generation
 
 These will be expanded upon in future versions. At present, molecules
-can be instantiated and their 'minimal molecule' functionality works.
+can be instantiated (directly, or from SMILES and SD files), their
+'minimal molecule' functionality works, they can be written as
+canonical SMILES, fingerprinted, described and searched for
+substructures.
 
 .. _PyO3: https://pyo3.rs
 __ https://github.com/rapodaca/chemcore
 __ https://depth-first.com/articles/2020/04/06/a-minimal-molecule-api/
-__ https://depth-first.com/articles/2020/05/25/lets-build-a-smiles-parser-in-rust/
 
 """
 # All this because it's not possible to mock subpackages in Sphinx...
@@ -42,3 +40,15 @@ from oxmol.parity import Parity
 from oxmol.bond_order import BondOrder
 from oxmol.spec import AtomSpec, BondSpec
 from oxmol.molecule import Molecule
+from oxmol.builder import MoleculeBuilder
+from oxmol.smiles import read_smiles, write_smiles
+from oxmol.sdf import read_sdf, write_sdf
+from oxmol.substructure import Query
+from oxmol.screen import ScreenIndex
+from oxmol.fingerprint import morgan_fingerprints
+from oxmol.descriptors import compute_descriptors
+from oxmol.fragments import largest_fragments
+from oxmol.distances import distance_matrices
+from oxmol.validation import validate
+from oxmol.similarity import FingerprintDatabase, write_fingerprints
+from oxmol.store import MoleculeStore
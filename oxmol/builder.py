@@ -0,0 +1,15 @@
+"""
+Incremental construction and editing of molecules.
+
+``MoleculeBuilder`` is the PyO3 class itself, re-exported under its
+Python name. A builder holds atoms and bonds in mutable Rust storage:
+edits take constant (amortised) time and check only the atoms they
+touch, and ``freeze`` makes a ``Molecule`` from the result. This suits
+enumeration, such as decorating a scaffold with many R-groups, where
+rebuilding atom and bond spec lists in Python for every product would
+dominate.
+
+"""
+from .oxmol import PyMoleculeBuilder
+
+MoleculeBuilder = PyMoleculeBuilder
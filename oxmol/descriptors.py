@@ -0,0 +1,59 @@
+"""
+Molecular descriptors.
+
+Descriptors are computed in Rust from each molecule's atoms and bonds,
+using per-element mass tables (also available as
+``Element.average_mass`` and ``Element.monoisotopic_mass``):
+
+- ``molecular_weight``: the sum of standard atomic weights, including
+  implicit hydrogens.
+- ``exact_mass``: the sum of the masses of each element's most abundant
+  isotope. Atoms with a given isotope are weighed (approximately) as
+  that isotope, in both masses.
+- ``heavy_atoms``: the number of atoms other than hydrogen.
+- ``formal_charge``: the net charge.
+- ``hbd``: the number of nitrogen and oxygen atoms with hydrogens
+  (Lipinski's NHOH count, counting atoms).
+- ``hba``: the number of nitrogen and oxygen atoms (Lipinski's NO count).
+- ``rotatable_bonds``: the number of single bonds outside rings between
+  two non-terminal heavy atoms, neither of which is in a triple bond.
+- ``tpsa``: the topological polar surface area of Ertl et al., from the
+  contributions of nitrogen and oxygen atoms. Aromatic atoms are those
+  ``Molecule.aromatic_atom_flags`` gives: atoms in a ring of the
+  smallest set of smallest rings (or in two such rings sharing a bond)
+  whose atoms are all conjugated, and which has 4n + 2 π electrons.
+
+"""
+from typing import Iterable, Optional, Sequence
+import numpy as np
+from .oxmol import (
+    DESCRIPTOR_NAMES,
+    PyDefaultMolecule,
+    compute_descriptors as _compute_descriptors,
+)
+
+
+def compute_descriptors(
+        molecules: Iterable[PyDefaultMolecule],
+        names: Optional[Sequence[str]] = None,
+        threads: Optional[int] = None
+) -> np.ndarray:
+    """
+    Compute descriptors of many molecules in parallel, without holding
+    the GIL.
+
+    :param molecules: the molecules to describe
+    :param names: the descriptors to compute, by default all of\
+    ``DESCRIPTOR_NAMES``
+    :param threads: the number of threads to use, by default one per\
+    core
+    :return: a ``float64`` array with a row per molecule and a column\
+    per descriptor, in the order of ``names``
+    :raises ValueError: if a name isn't a known descriptor
+
+    """
+    return _compute_descriptors(
+        molecules,
+        None if names is None else list(names),
+        threads
+    )
@@ -0,0 +1,37 @@
+"""
+Topological distances and graph traversal.
+
+Single molecules are traversed with ``Molecule.bfs`` and
+``Molecule.dfs``, and their all-pairs shortest path lengths (in bonds)
+come from ``Molecule.distance_matrix``, which is computed once and
+cached. ``Molecule.atoms_within`` answers neighbourhood queries from the
+same cache. Distance matrices for many molecules are computed in
+parallel with ``distance_matrices``.
+
+"""
+from typing import Iterable, List, Optional
+import numpy as np
+from .oxmol import (
+    PyDefaultMolecule,
+    distance_matrices as _distance_matrices,
+)
+
+
+def distance_matrices(
+        molecules: Iterable[PyDefaultMolecule],
+        threads: Optional[int] = None
+) -> List[np.ndarray]:
+    """
+    Compute the distance matrices of many molecules in parallel,
+    without holding the GIL. Each matrix is also cached on its
+    molecule.
+
+    :param molecules: the molecules
+    :param threads: the number of threads to use, by default one per\
+    core
+    :return: a ``list`` of ``uint16`` arrays of shape (n_atoms,\
+    n_atoms), in the same order, where atoms in different fragments\
+    are ``65535`` apart
+
+    """
+    return _distance_matrices(molecules, threads)
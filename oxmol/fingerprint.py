@@ -0,0 +1,51 @@
+"""
+Circular (Morgan) fingerprints.
+
+Fingerprints are computed in Rust from each molecule's elements,
+charges, hydrogen counts and bond orders, as in the extended
+connectivity fingerprints (ECFP) of Rogers and Hahn. With
+``features=True``, atoms are instead labelled with pharmacophoric
+features (hydrogen bond donor and acceptor, aromatic, halogen, basic
+and acidic), as in FCFP. Aromatic atoms are those
+``Molecule.aromatic_atom_flags`` gives, and ring bonds between them are
+hashed as aromatic rather than by their order, so every Kekulé
+structure of a molecule gives the same fingerprint.
+
+Folded fingerprints are ``uint8`` arrays of packed bits, with the first
+bit in the most significant bit of the first byte, so
+``numpy.unpackbits`` gives a dense bit vector. A ``radius`` of 2 is
+comparable to ECFP4 or FCFP4.
+
+"""
+from typing import Iterable, Optional
+import numpy as np
+from .oxmol import (
+    PyDefaultMolecule,
+    morgan_fingerprints as _morgan_fingerprints,
+)
+
+
+def morgan_fingerprints(
+        molecules: Iterable[PyDefaultMolecule],
+        radius: int = 2,
+        n_bits: int = 2048,
+        features: bool = False,
+        threads: Optional[int] = None
+) -> np.ndarray:
+    """
+    Compute the folded Morgan fingerprints of many molecules in
+    parallel, without holding the GIL.
+
+    :param molecules: the molecules to fingerprint
+    :param radius: the number of bonds out from each atom to consider
+    :param n_bits: the length of the fingerprints, a multiple of 8
+    :param features: whether to compute FCFP-style (rather than\
+    ECFP-style) fingerprints
+    :param threads: the number of threads to use, by default one per\
+    core
+    :return: a contiguous ``uint8`` array of shape\
+    ``(n_molecules, n_bits // 8)``, one packed fingerprint per row
+    :raises ValueError: if ``n_bits`` isn't a positive multiple of 8
+
+    """
+    return _morgan_fingerprints(molecules, radius, n_bits, features, threads)
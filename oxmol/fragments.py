@@ -0,0 +1,37 @@
+"""
+Connected components (fragments) of molecules.
+
+Salts and mixtures are split with ``Molecule.connected_components``,
+``Molecule.fragments`` and ``Molecule.largest_fragment``, or stripped
+from many molecules at once with ``largest_fragments``. Fragments are
+new molecules, whose atoms keep their relative order (so that parities
+are unchanged).
+
+"""
+from typing import Iterable, List, Optional
+from .oxmol import (
+    FRAGMENT_SIZES,
+    PyDefaultMolecule,
+    largest_fragments as _largest_fragments,
+)
+
+
+def largest_fragments(
+        molecules: Iterable[PyDefaultMolecule],
+        by: str = 'heavy_atoms',
+        threads: Optional[int] = None
+) -> List[PyDefaultMolecule]:
+    """
+    Get the largest fragment of many molecules in parallel, without
+    holding the GIL.
+
+    :param molecules: the molecules to strip
+    :param by: how to measure size, one of ``FRAGMENT_SIZES``:\
+    ``'heavy_atoms'`` or ``'atoms'``
+    :param threads: the number of threads to use, by default one per\
+    core
+    :return: a ``list`` of molecules, in the same order
+    :raises ValueError: if ``by`` isn't a known size
+
+    """
+    return _largest_fragments(molecules, by, threads)
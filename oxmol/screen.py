@@ -0,0 +1,22 @@
+"""
+Substructure screening.
+
+Every molecule and query has a screen: a 1024-bit fingerprint of its
+element counts and of the paths of up to five bonds through it. A query
+can only match a molecule if every bit set in the query's screen is set
+in the molecule's, so most non-matching molecules are rejected with a
+few bitwise operations.
+
+A ``ScreenIndex`` holds the screens of a collection of molecules in a
+file, which is memory-mapped rather than read into memory. Searching
+the index tests every screen in parallel, then runs the exact matcher
+only on the molecules which pass.
+
+``ScreenIndex`` and ``SearchResult`` are the PyO3 classes themselves,
+re-exported under their Python names.
+
+"""
+from .oxmol import PyScreenIndex, PySearchResult
+
+ScreenIndex = PyScreenIndex
+SearchResult = PySearchResult
@@ -0,0 +1,129 @@
+"""
+Reading and writing molecules as MDL SD files (V2000 molfiles).
+
+As with SMILES files, the parsing is done in Rust: one thread splits the
+file into records at their ``$$$$`` lines, and chunks of records are
+parsed in parallel without holding the GIL. Files may be
+gzip-compressed, and are streamed, so only the current chunk is held in
+memory.
+
+Molfiles are converted to ``chemcore``'s representation as they are
+read:
+
+- Atoms get implicit hydrogens by their default valence (adjusted for
+  their charge and any radical) unless the atom block gives a valence.
+  Charges, radicals and isotopes in ``M  CHG``, ``M  RAD`` and
+  ``M  ISO`` lines supersede those in the atom block.
+- Aromatic bonds (type 4) are kekulized.
+- Atom parities are taken from wedged and hashed bonds (or 3D
+  coordinates), or from the atom block's parities if a stereocentre has
+  no wedges. Double bond parities are taken from the coordinates, except
+  in rings. Parities are stored relative to atom indices, as described
+  in ``oxmol.smiles``.
+
+V3000 molfiles and query features aren't supported.
+
+Molecules are written without coordinates, so atom parities are written
+to the atom block but double bond parities are lost.
+
+"""
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+from .oxmol import (
+    PyDefaultMolecule,
+    PySdfReader,
+    parse_sd_data as _parse_sd_data,
+    read_sdf as _read_sdf,
+    write_sdf as _write_sdf,
+)
+
+PathLike = Union[str, 'os.PathLike[str]']
+SdfRecord = Union[
+    PyDefaultMolecule,
+    Tuple[PyDefaultMolecule, str],
+    Tuple[PyDefaultMolecule, str, Dict[str, Any]],
+]
+
+
+def read_sdf(
+        path: PathLike,
+        batch_size: Optional[int] = None,
+        names: bool = False,
+        data: Optional[str] = None,
+        skip_invalid: bool = False,
+        threads: Optional[int] = None
+) -> Iterator[Any]:
+    """
+    Lazily read molecules from an SD file, which may be gzip-compressed.
+    Each record is a V2000 molfile, optionally followed by data items,
+    and ends with a ``$$$$`` line.
+
+    :param path: the path to the ``.sdf`` or ``.sdf.gz`` file
+    :param batch_size: if given, yield ``list`` of up to this many\
+    records rather than single records
+    :param names: whether to yield each molecule's name (the first line\
+    of its molfile) after the molecule, in a tuple
+    :param data: how to yield each record's data items after the\
+    molecule (and name), in a tuple: ``"dict"`` for a ``dict`` of item\
+    names to values, or ``"bytes"`` for the raw text of the items, which\
+    can be decoded when it's needed with ``parse_sd_data``. By default,\
+    data items aren't read
+    :param skip_invalid: whether to skip records which can't be parsed,\
+    rather than raising ``ValueError``
+    :param threads: the number of threads to parse with, by default\
+    one per core
+    :return: an iterator over the records in the file
+
+    """
+    return _read_sdf(
+        os.fspath(path),
+        batch_size,
+        names,
+        data,
+        skip_invalid,
+        threads
+    )
+
+
+def parse_sd_data(data: bytes) -> Dict[str, str]:
+    """
+    Decode data items read with ``read_sdf(..., data="bytes")``.
+
+    :param data: the raw data items of a record
+    :return: a ``dict`` of item names to values. Multi-line values are\
+    joined with newlines
+
+    """
+    return _parse_sd_data(data)
+
+
+def write_sdf(
+        molecules: Iterable[SdfRecord],
+        path: PathLike,
+        compress: Optional[bool] = None,
+        threads: Optional[int] = None
+) -> int:
+    """
+    Write molecules to an SD file. Records are formatted and compressed
+    in a background thread, so the iterable can be a generator doing
+    other work.
+
+    :param molecules: the molecules to write, ``(molecule, name)``\
+    tuples, or ``(molecule, name, data)`` tuples where ``data`` is a\
+    mapping of item names to values (which are written with ``str``)
+    :param path: the path to write to. This is overwritten if it exists
+    :param compress: whether to gzip-compress the output. By default,\
+    this is done if ``path`` ends with ``.gz``
+    :param threads: the number of threads to format records with, by\
+    default one per core
+    :return: the number of molecules written
+    :raises ValueError: if a molecule has more than 999 atoms or bonds,\
+    or zero-order bonds
+
+    """
+    return _write_sdf(
+        molecules,
+        os.fspath(path),
+        compress,
+        threads
+    )
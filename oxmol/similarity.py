@@ -0,0 +1,57 @@
+"""
+Similarity search over fingerprint databases.
+
+A fingerprint database is a file of packed fingerprints (such as those
+from ``oxmol.fingerprint.morgan_fingerprints``), stored with the number
+of bits set in each. The file is memory-mapped when opened, so it is
+paged in from disk as it is searched and libraries much larger than
+memory can be searched.
+
+Searches run across every core without holding the GIL, and compare
+each fingerprint to every query in a batch while it is in cache. The
+bit counts bound the best score a fingerprint could reach (for
+Tanimoto, the smaller count over the larger), so fingerprints which
+can't reach the threshold, or beat the current top hits, are skipped
+without being read.
+
+The Tanimoto score of two fingerprints is ``c / (a + b - c)`` and the
+Dice score ``2c / (a + b)``, where ``a`` and ``b`` are the bits set in
+each and ``c`` the bits set in both. Two empty fingerprints score 0.
+
+``FingerprintDatabase`` is the PyO3 class itself, re-exported under its
+Python name.
+
+"""
+import os
+from typing import Any, Iterable, Union
+from .oxmol import (
+    PyFingerprintDatabase,
+    write_fingerprints as _write_fingerprints,
+)
+
+FingerprintDatabase = PyFingerprintDatabase
+PathLike = Union[str, 'os.PathLike[str]']
+#: A ``numpy.ndarray`` of ``uint8`` (or anything
+#: ``numpy.ascontiguousarray`` accepts) of shape (n_fingerprints, n_bytes),
+#: or (n_bytes,) for a single fingerprint.
+Fingerprints = Any
+
+
+def write_fingerprints(
+        fingerprints: Union[Fingerprints, Iterable[Fingerprints]],
+        path: PathLike
+) -> int:
+    """
+    Write packed fingerprints to a database file, overwriting it if it
+    exists.
+
+    :param fingerprints: an array of packed fingerprints, or an\
+    iterable of such arrays (e.g. a generator of batches)
+    :param path: the path to write the database to
+    :return: the number of fingerprints written
+    :raises ValueError: if the fingerprints aren't all the same length,\
+    or there aren't any arrays
+
+    """
+    return _write_fingerprints(fingerprints, os.fspath(path))
+
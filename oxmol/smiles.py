@@ -0,0 +1,106 @@
+"""
+Reading and writing molecules as SMILES files.
+
+The parsing is done in Rust: records are read from the file in large
+chunks, which are parsed and validated in parallel without holding the
+GIL. Only the current chunk is held in memory, so arbitrarily large
+files can be streamed.
+
+Writing is done in a background thread, which converts molecules to
+SMILES (in parallel) and compresses them while the caller carries on
+producing molecules.
+
+Aromatic SMILES are kekulized as they are read, as ``chemcore`` doesn't
+represent aromatic bonds. Stereochemistry is stored relative to atom
+indices:
+
+- An atom's parity refers to its neighbours in ascending order of atom
+  index, preceded by its virtual hydrogen (if it has one). ``True`` means
+  the neighbours after the first are arranged clockwise when viewed from
+  the first (``@@``).
+- A double bond's parity refers to the lowest-indexed neighbour at each
+  end of the bond. ``True`` means these are on the same side (syn).
+
+"""
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from .oxmol import (
+    PyDefaultMolecule,
+    PySmilesReader,
+    read_smiles as _read_smiles,
+    write_smiles as _write_smiles,
+)
+
+PathLike = Union[str, 'os.PathLike[str]']
+SmilesItem = Union[
+    PyDefaultMolecule,
+    Tuple[PyDefaultMolecule, str],
+    List[PyDefaultMolecule],
+    List[Tuple[PyDefaultMolecule, str]],
+]
+SmilesRecord = Union[PyDefaultMolecule, Tuple[PyDefaultMolecule, str]]
+
+
+def read_smiles(
+        path: PathLike,
+        batch_size: Optional[int] = None,
+        names: bool = False,
+        skip_invalid: bool = False,
+        threads: Optional[int] = None
+) -> Iterator[SmilesItem]:
+    """
+    Lazily read molecules from a SMILES file, which may be
+    gzip-compressed. Each non-blank line should hold a SMILES string,
+    optionally followed by whitespace and a name.
+
+    :param path: the path to the ``.smi`` or ``.smi.gz`` file
+    :param batch_size: if given, yield ``list`` of up to this many\
+    molecules rather than single molecules
+    :param names: whether to yield ``(molecule, name)`` tuples
+    :param skip_invalid: whether to skip records which can't be parsed,\
+    rather than raising ``ValueError``
+    :param threads: the number of threads to parse with, by default\
+    one per core
+    :return: an iterator over the molecules in the file
+
+    """
+    return _read_smiles(
+        os.fspath(path),
+        batch_size,
+        names,
+        skip_invalid,
+        threads
+    )
+
+
+def write_smiles(
+        molecules: Iterable[SmilesRecord],
+        path: PathLike,
+        compress: Optional[bool] = None,
+        canonical: bool = True,
+        threads: Optional[int] = None
+) -> int:
+    """
+    Write molecules to a SMILES file, one per line. Molecules are
+    converted to SMILES and compressed in a background thread, so the
+    iterable can be a generator doing other work.
+
+    :param molecules: the molecules to write, or ``(molecule, name)``\
+    tuples to write a name after each SMILES
+    :param path: the path to write to. This is overwritten if it exists
+    :param compress: whether to gzip-compress the output. By default,\
+    this is done if ``path`` ends with ``.gz``
+    :param canonical: whether to write canonical SMILES (see\
+    ``Molecule.to_smiles``)
+    :param threads: the number of threads to write SMILES with, by\
+    default one per core
+    :return: the number of molecules written
+
+    """
+    return _write_smiles(
+        molecules,
+        os.fspath(path),
+        compress,
+        canonical,
+        threads
+    )
@@ -0,0 +1,26 @@
+"""
+An on-disk, random-access store of molecules.
+
+A ``MoleculeStore`` is a directory of columnar arrays (elements,
+hydrogens, charges, isotopes and parities of every atom; atom indices,
+orders and parities of every bond) with the offsets of each molecule's
+atoms and bonds. The files are memory-mapped rather than read, so
+``store[i]`` builds a single molecule in constant time, and slicing or
+iterating reads only the molecules needed. Libraries much larger than
+memory can be stored, and processes reading the same store share the
+operating system's page cache rather than each holding a copy.
+
+Stores are append-only. The offsets are written after the columns, so
+an append which is interrupted leaves the store as it was. Only one
+process should append to a store at a time.
+
+A store pickles as its path, so passing one to ``multiprocessing``
+workers makes each map the same files.
+
+``MoleculeStore`` is the PyO3 class itself, re-exported under its Python
+name.
+
+"""
+from .oxmol import PyMoleculeStore
+
+MoleculeStore = PyMoleculeStore
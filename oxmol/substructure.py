@@ -0,0 +1,17 @@
+"""
+Substructure search.
+
+A ``Query`` is compiled once, in Rust, from a SMILES string or a
+molecule: the atom and bond predicates and the order in which the query
+atoms are matched are worked out up front, so a query can be matched
+against any number of molecules without repeating that work. Matching
+doesn't hold the GIL, and ``match_many`` matches many molecules in
+parallel.
+
+``Query`` is the PyO3 class itself, re-exported under its Python name,
+so method calls go straight to the Rust code.
+
+"""
+from .oxmol import PyQuery
+
+Query = PyQuery
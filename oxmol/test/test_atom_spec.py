@@ -2,6 +2,8 @@
 Test suite for oxmol.spec.AtomSpec / oxmol.oxmol.PyAtomSpec
 
 """
+import pytest
+from oxmol.oxmol import PyAtomSpec
 from oxmol.spec import AtomSpec
 from oxmol.element import Element
 from oxmol.parity import Parity
@@ -66,4 +68,28 @@ def test_no_hydrogens():
     """Test atom with no hydrogens."""
     atom = AtomSpec(5)
     assert atom.hydrogens == 0
-    
\ No newline at end of file
+    
+
+def test_bad_element():
+    """Test that unknown elements and unconvertible types fail."""
+    with pytest.raises(ValueError):
+        AtomSpec('Xx')
+    with pytest.raises(ValueError):
+        AtomSpec(0)
+    with pytest.raises(ValueError):
+        AtomSpec(-6)
+    with pytest.raises(TypeError):
+        AtomSpec(6.0)
+
+
+def test_bad_parity():
+    """Test that parities which aren't a bool or Parity fail."""
+    with pytest.raises(TypeError):
+        AtomSpec('C', parity=1)
+
+
+def test_native_class():
+    """Test that AtomSpec is the native class, so keywords work."""
+    atom = AtomSpec(element='N', hydrogens=3, ion=1)
+    assert isinstance(atom, PyAtomSpec)
+    assert (atom.hydrogens, atom.ion) == (3, 1)
@@ -5,6 +5,7 @@ Test suite for oxmol.spec.BondSpec / oxmol.oxmol.PyElement
 import pytest
 from oxmol.spec import BondSpec
 from oxmol.bond_order import BondOrder
+from oxmol.parity import Parity
 
 
 def test_single_bond():
@@ -38,3 +39,18 @@ def test_quadruple_bond():
         BondSpec(0, 1, 4)
     with pytest.raises(ValueError):
         BondSpec(0, 1, BondOrder(4))
+
+
+def test_bad_order_type():
+    """Test that orders which aren't an int or BondOrder fail."""
+    with pytest.raises(TypeError):
+        BondSpec(0, 1, 'single')
+    with pytest.raises(ValueError):
+        BondSpec(0, 1, -1)
+
+
+def test_parity_variants():
+    """Test that parities can be given as a bool or Parity."""
+    assert BondSpec(0, 1, 2, True).parity == Parity(True)
+    assert BondSpec(0, 1, 2, parity=Parity(False)).parity == Parity(False)
+    assert BondSpec(0, 1, 2).parity is None
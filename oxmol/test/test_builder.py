@@ -0,0 +1,103 @@
+"""
+Test suite for oxmol.builder.MoleculeBuilder
+
+"""
+import pytest
+from oxmol.builder import MoleculeBuilder
+from oxmol.molecule import Molecule
+from oxmol.parity import Parity
+
+
+def _ethanol():
+    """Get a builder holding ethanol with implicit hydrogens."""
+    builder = MoleculeBuilder()
+    carbon = builder.add_atom('C', 3)
+    other = builder.add_atom(6, 2)
+    oxygen = builder.add_atom('O', hydrogens=1)
+    builder.add_bond(carbon, other, 1)
+    builder.add_bond(other, oxygen, 1)
+    return builder
+
+
+def test_build():
+    """Test that a built molecule matches one made from SMILES."""
+    builder = _ethanol()
+    assert (builder.order(), builder.size()) == (3, 2)
+    assert builder.freeze() == Molecule.from_smiles('CCO')
+    assert sorted(builder.neighbors(1)) == [0, 2]
+    assert builder.has_edge(2, 1)
+    assert not builder.has_edge(0, 2)
+
+
+def test_edit():
+    """Test editing a molecule: ethanol to chloroethane to ethene."""
+    builder = MoleculeBuilder.from_molecule(Molecule.from_smiles('CCO'))
+    builder.set_element(2, 'Cl')
+    builder.set_hydrogens(2, 0)
+    assert builder.freeze() == Molecule.from_smiles('CCCl')
+
+    builder.remove_atom(2)
+    builder.set_hydrogens(0, 2)
+    builder.set_hydrogens(1, 2)
+    builder.set_bond_order(0, 1, 2)
+    assert builder.atom_ids() == [0, 1]
+    assert builder.freeze() == Molecule.from_smiles('C=C')
+    assert not builder.has_node(2)
+
+
+def test_renumbering():
+    """Test that atoms keep their order when others are removed."""
+    builder = MoleculeBuilder.from_molecule(Molecule.from_smiles('OC[C@H](N)F'))
+    builder.remove_atom(0)
+    builder.set_hydrogens(1, 3)
+    assert builder.atom_ids() == [1, 2, 3, 4]
+    assert builder.freeze() == Molecule.from_smiles('C[C@H](N)F')
+
+    builder.remove_bond(2, 4)
+    builder.remove_atom(4)
+    builder.set_hydrogens(2, 2)
+    builder.set_atom_parity(2, None)
+    assert builder.freeze() == Molecule.from_smiles('CCN')
+
+
+def test_invalid_edits():
+    """Test that invalid edits fail and leave the builder unchanged."""
+    builder = _ethanol()
+    with pytest.raises(ValueError):
+        builder.add_bond(0, 1, 1)
+    with pytest.raises(ValueError):
+        builder.set_bond_order(0, 1, 2)
+    with pytest.raises(ValueError):
+        builder.set_hydrogens(1, 3)
+    with pytest.raises(ValueError):
+        builder.set_isotope(0, 5)
+    with pytest.raises(ValueError):
+        builder.add_bond(0, 0, 1)
+    with pytest.raises(ValueError):
+        builder.add_bond(0, 3, 1)
+    with pytest.raises(ValueError):
+        builder.remove_bond(0, 2)
+    with pytest.raises(ValueError):
+        builder.add_atom('C', 5)
+    assert builder.freeze() == Molecule.from_smiles('CCO')
+
+
+def test_stereo():
+    """Test setting and clearing parities."""
+    builder = MoleculeBuilder()
+    for _ in range(2):
+        builder.add_atom('C', 2)
+    builder.add_bond(0, 1, 2, parity=True)
+    builder.set_isotope(0, 13)
+    molecule = builder.freeze()
+    assert molecule.bond_parity(0, 1) == Parity(True)
+    assert molecule.isotope(0) == 13
+    builder.set_bond_parity(0, 1, None)
+    assert builder.freeze().bond_parity(0, 1) is None
+
+
+def test_empty():
+    """Test freezing an empty builder."""
+    builder = MoleculeBuilder()
+    assert builder.freeze().is_empty()
+    assert repr(builder) == 'PyMoleculeBuilder with 0 atoms, 0 bonds.'
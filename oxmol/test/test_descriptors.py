@@ -0,0 +1,89 @@
+"""
+Test suite for oxmol.descriptors / Molecule.descriptors
+
+"""
+import numpy as np
+import pytest
+from oxmol.descriptors import DESCRIPTOR_NAMES, compute_descriptors
+from oxmol.element import Element
+from oxmol.molecule import Molecule
+
+ASPIRIN = 'CC(=O)OC1=CC=CC=C1C(=O)O'
+
+
+def test_element_masses():
+    """Test the per-element mass tables."""
+    assert Element(6).average_mass() == pytest.approx(12.011)
+    assert Element(6).monoisotopic_mass() == 12.0
+    assert Element(17).average_mass() == pytest.approx(35.45)
+    assert Element(17).monoisotopic_mass() == pytest.approx(34.96885, abs=1e-5)
+
+
+def test_aspirin():
+    """Test every descriptor of aspirin."""
+    descriptors = Molecule.from_smiles(ASPIRIN).descriptors()
+    assert list(descriptors) == DESCRIPTOR_NAMES
+    assert descriptors['molecular_weight'] == pytest.approx(180.159, abs=1e-3)
+    assert descriptors['exact_mass'] == pytest.approx(180.04226, abs=1e-5)
+    assert descriptors['heavy_atoms'] == 13
+    assert descriptors['formal_charge'] == 0
+    assert descriptors['hbd'] == 1
+    assert descriptors['hba'] == 4
+    assert descriptors['rotatable_bonds'] == 3
+    assert descriptors['tpsa'] == pytest.approx(63.6)
+
+
+def test_tpsa():
+    """Test polar surface areas, with Hückel aromaticity."""
+    for smiles, tpsa in [
+            ('c1ccncc1', 12.89),
+            ('c1cc[nH]c1', 15.79),
+            ('C[N+](=O)[O-]', 43.14),
+            ('CC(=O)[O-]', 40.13),
+            ('CN1C=NC2=C1C(=O)N(C(=O)N2C)C', 61.82),
+            ('CCCC', 0.0),
+            # The nitrogen of a cyclic amine isn't aromatic.
+            ('C1CCNC1', 12.03),
+    ]:
+        descriptors = Molecule.from_smiles(smiles).descriptors(['tpsa'])
+        assert descriptors == {'tpsa': pytest.approx(tpsa)}
+
+
+def test_isotopes_and_charges():
+    """Test masses of isotopes, and formal charges."""
+    labelled = Molecule.from_smiles('[13CH4]').descriptors(['exact_mass'])
+    assert labelled['exact_mass'] == pytest.approx(17.03465, abs=1e-4)
+    ammonium = Molecule.from_smiles('[NH4+]').descriptors()
+    assert ammonium['formal_charge'] == 1
+    assert ammonium['heavy_atoms'] == 1
+
+
+def test_formula():
+    """Test Hill order formulae, with charges."""
+    assert Molecule.from_smiles(ASPIRIN).formula() == 'C9H8O4'
+    assert Molecule.from_smiles('CC(=O)[O-]').formula() == 'C2H3O2-'
+    assert Molecule.from_smiles('[NH4+].[Cl-]').formula() == 'ClH4N'
+    assert Molecule.from_smiles('O').formula() == 'H2O'
+    assert Molecule.from_smiles('[Fe+2]').formula() == 'Fe+2'
+
+
+def test_unknown_descriptor():
+    """Test that unknown descriptor names raise ``ValueError``."""
+    with pytest.raises(ValueError):
+        Molecule.from_smiles('C').descriptors(['logp'])
+    with pytest.raises(ValueError):
+        compute_descriptors([Molecule.from_smiles('C')], ['logp'])
+
+
+def test_compute_descriptors():
+    """Test that batches match single molecules."""
+    molecules = [Molecule.from_smiles(s) for s in [ASPIRIN, 'CCO', 'O']]
+    names = ['tpsa', 'molecular_weight', 'rotatable_bonds']
+    values = compute_descriptors(molecules, names, threads=2)
+    assert values.shape == (3, 3)
+    assert values.dtype == np.float64
+    for row, molecule in zip(values, molecules):
+        assert row.tolist() == list(molecule.descriptors(names).values())
+
+    assert compute_descriptors(molecules).shape == (3, len(DESCRIPTOR_NAMES))
+    assert compute_descriptors([], names).shape == (0, 3)
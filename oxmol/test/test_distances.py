@@ -0,0 +1,59 @@
+"""
+Test suite for oxmol.distances / Molecule.distance_matrix
+
+"""
+import numpy as np
+import pytest
+from oxmol.distances import distance_matrices
+from oxmol.molecule import Molecule
+
+
+def test_distance_matrix():
+    """Test the distances in isobutanol."""
+    molecule = Molecule.from_smiles('CC(C)CO')
+    distances = molecule.distance_matrix()
+    assert distances.dtype == np.uint16
+    assert distances.tolist() == [
+        [0, 1, 2, 2, 3],
+        [1, 0, 1, 1, 2],
+        [2, 1, 0, 2, 3],
+        [2, 1, 2, 0, 1],
+        [3, 2, 3, 1, 0],
+    ]
+    assert np.array_equal(distances, distances.T)
+    assert Molecule([], []).distance_matrix().shape == (0, 0)
+
+
+def test_disconnected():
+    """Test that atoms in different fragments are unreachable."""
+    distances = Molecule.from_smiles('C1CC1.O').distance_matrix()
+    assert distances[0, 3] == distances[3, 0] == 65535
+    assert distances[3, 3] == 0
+
+
+def test_traversal():
+    """Test that breadth- and depth-first orders differ as expected."""
+    molecule = Molecule.from_smiles('CC(CC)C.O')
+    assert molecule.bfs(1).tolist() == [1, 0, 2, 4, 3]
+    assert molecule.dfs(1).tolist() == [1, 0, 2, 3, 4]
+    assert molecule.bfs(5).tolist() == [5]
+    with pytest.raises(ValueError):
+        molecule.dfs(6)
+
+
+def test_atoms_within():
+    """Test neighbourhood queries."""
+    molecule = Molecule.from_smiles('CC(C)CO.O')
+    assert molecule.atoms_within(0, 0).tolist() == [0]
+    assert molecule.atoms_within(0, 2).tolist() == [0, 1, 2, 3]
+    assert molecule.atoms_within(0, 65535).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_distance_matrices():
+    """Test that the batch form matches the single molecule form."""
+    molecules = [Molecule.from_smiles(smiles) for smiles in ('CCO', 'c1ccccc1', 'C.C')]
+    for threads in (None, 1):
+        matrices = distance_matrices(molecules, threads=threads)
+        assert len(matrices) == 3
+        for molecule, distances in zip(molecules, matrices):
+            assert np.array_equal(distances, molecule.distance_matrix())
@@ -2,8 +2,11 @@
 Test suite for oxmol.element.Element / oxmol.oxmol.PyElement
 
 """
+import numpy as np
 import pytest
 from oxmol.element import Element
+from oxmol.molecule import Molecule
+from oxmol.spec import AtomSpec
 
 
 def test_from_number():
@@ -42,3 +45,55 @@ def test_negative():
     """Test that cursed negative elements fail."""
     with pytest.raises(OverflowError):
         Element(-1)
+
+
+def test_interned():
+    """Test that elements from molecules and symbols are shared."""
+    carbon = Element.from_symbol('C')
+    assert Element.from_symbol('C') is carbon
+    assert AtomSpec(6).element is carbon
+    assert Molecule.from_smiles('CC').element(1) is carbon
+    assert Element(6) == carbon
+    assert Element(7) != carbon
+    assert carbon != 6
+
+
+def test_from_symbols():
+    """Test converting columns of symbols."""
+    expected = [6, 8, 17, 1]
+    for symbols in (
+            ['C', 'O', 'Cl', 'H'],
+            ('C', b'O', 'Cl', 'H'),
+            'C O Cl H',
+            b'C\nO\nCl\nH\n',
+            np.array(['C', 'O', 'Cl', 'H']),
+            np.array([b'C', b'O', b'Cl', b'H']),
+            np.array(['C', 'O', 'Cl', 'H'], dtype=object),
+    ):
+        atomic_numbers = Element.from_symbols(symbols)
+        assert atomic_numbers.dtype == np.uint8
+        assert atomic_numbers.tolist() == expected
+
+    elements = Element.from_symbols(['C', 'O'], as_elements=True)
+    assert elements[0] is Element.from_symbol('C')
+    assert elements[1] is Element.from_symbol('O')
+    assert Element.from_symbols([]).tolist() == []
+
+
+def test_from_symbols_invalid():
+    """Test that columns with a bad symbol fail."""
+    for symbols in (['C', 'c'], 'C Xx', np.array(['C', 'CL']), np.array(['Cé'])):
+        with pytest.raises(ValueError):
+            Element.from_symbols(symbols)
+    with pytest.raises(TypeError):
+        Element.from_symbols(['C', 6])
+
+
+def test_from_atomic_numbers():
+    """Test converting columns of atomic numbers."""
+    elements = Element.from_atomic_numbers(np.array([6, 7], dtype=np.uint8))
+    assert elements == [Element(6), Element(7)]
+    assert elements[0] is Element.from_symbol('C')
+    for atomic_numbers in ([0], [119], [-6]):
+        with pytest.raises(ValueError):
+            Element.from_atomic_numbers(atomic_numbers)
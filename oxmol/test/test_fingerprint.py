@@ -0,0 +1,78 @@
+"""
+Test suite for oxmol.fingerprint
+
+"""
+import numpy as np
+import pytest
+from oxmol.fingerprint import morgan_fingerprints
+from oxmol.molecule import Molecule
+
+SMILES = ['CCO', 'c1ccccc1O', 'CC(=O)O', 'C1CC1CC', 'c1cc[nH]c1', 'C.C']
+
+
+def test_morgan_fingerprint():
+    """Test the shape and packing of a folded fingerprint."""
+    fingerprint = Molecule.from_smiles('c1ccccc1O').morgan_fingerprint()
+    assert fingerprint.dtype == np.uint8
+    assert fingerprint.shape == (256,)
+    assert 0 < np.unpackbits(fingerprint).sum() <= 20
+    assert Molecule.from_smiles('CCO').morgan_fingerprint(n_bits=64).shape == (8,)
+    with pytest.raises(ValueError):
+        Molecule.from_smiles('CCO').morgan_fingerprint(n_bits=100)
+
+
+def test_atom_order_independence():
+    """Test that fingerprints don't depend on the atom order."""
+    for first, second in [('CCO', 'OCC'), ('c1ccccc1O', 'Oc1ccccc1'), ('C1CC1CC', 'CCC1CC1')]:
+        for features in [False, True]:
+            first_mol = Molecule.from_smiles(first)
+            second_mol = Molecule.from_smiles(second)
+            assert first_mol.morgan_counts(features=features) == second_mol.morgan_counts(features=features)
+            assert np.array_equal(
+                first_mol.morgan_fingerprint(features=features),
+                second_mol.morgan_fingerprint(features=features)
+            )
+
+
+def test_kekule_independence():
+    """Test that fingerprints don't depend on the Kekulé structure."""
+    for kekule_forms in [
+            ['Cc1ccccc1C', 'CC1=C(C)C=CC=C1', 'CC1=CC=CC=C1C'],
+            ['C1=CC=C2C=CC=CC2=C1', 'C1=CC2=CC=CC=C2C=C1'],
+    ]:
+        for features in [False, True]:
+            counts = [
+                Molecule.from_smiles(smiles).morgan_counts(features=features)
+                for smiles in kekule_forms
+            ]
+            assert all(count == counts[0] for count in counts[1:])
+
+
+def test_morgan_counts():
+    """Test the unfolded fingerprint."""
+    molecule = Molecule.from_smiles('CCO')
+    assert len(molecule.morgan_counts(radius=0)) == 3
+    # Both ends of ethane are the same substructure.
+    counts = Molecule.from_smiles('CC').morgan_counts(radius=0)
+    assert list(counts.values()) == [2]
+    # At radius 1, the environments of the two atoms of ethane both cover
+    # the one bond, so only one of them is kept.
+    assert sum(Molecule.from_smiles('CC').morgan_counts(radius=1).values()) == 3
+    assert molecule.morgan_counts(radius=1) != molecule.morgan_counts(radius=1, features=True)
+
+
+def test_morgan_fingerprints():
+    """Test fingerprinting many molecules at once."""
+    molecules = [Molecule.from_smiles(smiles) for smiles in SMILES]
+    fingerprints = morgan_fingerprints(molecules, n_bits=1024, threads=2)
+    assert fingerprints.dtype == np.uint8
+    assert fingerprints.shape == (len(SMILES), 128)
+    assert fingerprints.flags['C_CONTIGUOUS']
+    for molecule, fingerprint in zip(molecules, fingerprints):
+        assert np.array_equal(molecule.morgan_fingerprint(n_bits=1024), fingerprint)
+
+    features = morgan_fingerprints(iter(molecules), features=True)
+    assert features.shape == (len(SMILES), 256)
+    assert morgan_fingerprints([]).shape == (0, 256)
+    with pytest.raises(ValueError):
+        morgan_fingerprints(molecules, n_bits=0)
@@ -0,0 +1,67 @@
+"""
+Test suite for oxmol.fragments / Molecule.fragments
+
+"""
+import pytest
+from oxmol.fragments import FRAGMENT_SIZES, largest_fragments
+from oxmol.molecule import Molecule
+from oxmol.spec import AtomSpec
+
+SALT = '[Na+].[O-]C(=O)c1ccccc1'
+
+
+def test_connected_components():
+    """Test that components are labelled in order of their lowest atom."""
+    molecule = Molecule.from_smiles('O.C[C@H](N)C(=O)O.Cl')
+    assert molecule.connected_components().tolist() == \
+        [0, 1, 1, 1, 1, 1, 1, 2]
+    assert Molecule.from_smiles('CCO').connected_components().tolist() == \
+        [0, 0, 0]
+    assert Molecule([], []).connected_components().shape == (0,)
+
+
+def test_fragments():
+    """Test that fragments are remapped, keeping their stereochemistry."""
+    molecule = Molecule.from_smiles('O.C[C@H](N)C(=O)O.Cl')
+    fragments = molecule.fragments()
+    assert [fragment.to_smiles(canonical=False) for fragment in fragments] \
+        == ['O', 'C[C@H](N)C(=O)O', 'Cl']
+    assert fragments[1].atom_parities().tolist() == \
+        molecule.atom_parities()[1:7].tolist()
+    assert Molecule([], []).fragments() == []
+
+
+def test_largest_fragment():
+    """Test choosing the largest fragment."""
+    molecule = Molecule.from_smiles(SALT)
+    largest = molecule.largest_fragment()
+    assert largest.to_smiles() == \
+        Molecule.from_smiles('[O-]C(=O)c1ccccc1').to_smiles()
+
+    # By atoms, hydrogen (with two atoms) beats methane (with one).
+    mixture = Molecule.from_smiles('[H][H].C')
+    assert mixture.largest_fragment().order() == 1
+    assert mixture.largest_fragment(by='atoms').order() == 2
+    assert 'atoms' in FRAGMENT_SIZES
+
+    with pytest.raises(ValueError):
+        molecule.largest_fragment(by='mass')
+
+
+def test_largest_fragments():
+    """Test that batches match single molecules."""
+    molecules = [Molecule.from_smiles(s) for s in [SALT, 'CCO', 'O.O.CC#N']]
+    stripped = largest_fragments(molecules, threads=2)
+    assert [mol.to_smiles() for mol in stripped] == \
+        [mol.largest_fragment().to_smiles() for mol in molecules]
+    assert largest_fragments([]) == []
+    with pytest.raises(ValueError):
+        largest_fragments(molecules, by='mass')
+
+
+def test_unvalidated_fragments():
+    """Test that fragments of unvalidated molecules aren't validated."""
+    molecule = Molecule([AtomSpec(6, 4, isotope=5), AtomSpec(8, 2)], [], validate=False)
+    assert [fragment.isotope(0) for fragment in molecule.fragments()] == [5, None]
+    assert molecule.largest_fragment().isotope(0) == 5
+    assert largest_fragments([molecule])[0].isotope(0) == 5
@@ -2,11 +2,16 @@
 Test suite for oxmol.molecule.Molecule / oxmol.oxmol.PyMolecule
 
 """
+import pickle
+import sys
+import zlib
+import numpy as np
 import pytest
 from oxmol.parity import Parity
 from oxmol.spec import AtomSpec, BondSpec
 from oxmol.molecule import Molecule
 from oxmol.bond_order import BondOrder
+from oxmol.element import Element
 
 
 class TestFirstRow:
@@ -725,3 +730,493 @@ class TestMisc:
         """Test the charge."""
         molecule = Molecule([AtomSpec('C', 3, 1)], [])
         assert molecule.charge(0) == 1
+
+
+class TestFromArrays:
+    """Test building molecules from columns of integers."""
+    @staticmethod
+    def test_methane():
+        """Test methane, built from a single atom."""
+        molecule = Molecule.from_arrays([6], hydrogens=[4])
+        assert molecule.order() == 1
+        assert molecule.hydrogens(0) == 4
+        assert molecule.electrons(0) == 0
+
+    @staticmethod
+    def test_ethene():
+        """Test ethene, built with a double bond and a bond parity."""
+        molecule = Molecule.from_arrays(
+            np.array([6, 6], dtype=np.uint8),
+            hydrogens=np.array([2, 2], dtype=np.uint8),
+            bond_src=np.array([0], dtype=np.uint32),
+            bond_dst=np.array([1], dtype=np.uint32),
+            bond_orders=np.array([2], dtype=np.uint8),
+        )
+        assert molecule.size() == 1
+        assert molecule.bond_order(0, 1).as_int() == 2
+        assert molecule.bond_parity(0, 1) is None
+
+    @staticmethod
+    def test_matches_spec():
+        """Test that the arrays give the same molecule as the specs."""
+        atoms = [AtomSpec('C', 3, isotope=13), AtomSpec('O', 1, parity=True)]
+        from_specs = Molecule(atoms, [BondSpec(0, 1, 1)])
+        from_arrays = Molecule.from_arrays(
+            [6, 8], [3, 1], [0, 0], [13, 0], [0, 1], [0], [1], [1]
+        )
+        for atom_id in range(2):
+            assert from_arrays.element(atom_id) == from_specs.element(atom_id)
+            assert from_arrays.isotope(atom_id) == from_specs.isotope(atom_id)
+            assert from_arrays.atom_parity(atom_id) == \
+                from_specs.atom_parity(atom_id)
+
+    @staticmethod
+    def test_mismatched_lengths():
+        """Test that arrays of different lengths produce errors."""
+        with pytest.raises(ValueError):
+            Molecule.from_arrays([6, 6], hydrogens=[4])
+        with pytest.raises(ValueError):
+            Molecule.from_arrays([6, 6], bond_src=[0], bond_dst=[1, 0])
+
+    @staticmethod
+    def test_invalid_values():
+        """Test that invalid elements, orders and parities fail."""
+        with pytest.raises(ValueError):
+            Molecule.from_arrays([119])
+        with pytest.raises(ValueError):
+            Molecule.from_arrays([6, 6], bond_src=[0], bond_dst=[1],
+                                 bond_orders=[4])
+        with pytest.raises(ValueError):
+            Molecule.from_arrays([6], parities=[2])
+
+    @staticmethod
+    def test_out_of_range():
+        """Test that values which don't fit their columns aren't wrapped."""
+        for kwargs, name in [
+                ({'hydrogens': [300]}, 'hydrogens'),
+                ({'charges': [200]}, 'charges'),
+                ({'isotopes': [-1]}, 'isotopes'),
+                ({'bond_src': [0], 'bond_dst': [2 ** 32]}, 'bond_dst'),
+        ]:
+            with pytest.raises(ValueError, match=name):
+                Molecule.from_arrays([6], **kwargs)
+        with pytest.raises(ValueError, match='elements'):
+            Molecule.from_arrays([262])
+
+    @staticmethod
+    def test_hypervalent():
+        """Test that the molecule is still validated."""
+        with pytest.raises(ValueError):
+            Molecule.from_arrays([6], hydrogens=[5])
+
+
+def _ethanol():
+    """Get an ethanol molecule with implicit hydrogens."""
+    atoms = [AtomSpec('C', 3), AtomSpec('C', 2), AtomSpec('O', 1)]
+    bonds = [BondSpec(0, 1, 1), BondSpec(1, 2, 1)]
+    return Molecule(atoms, bonds)
+
+
+class TestNodesEdges:
+    """Test the ``nodes`` and ``edges`` views."""
+    @staticmethod
+    def test_nodes():
+        """Test that the nodes are a range of the atom indices."""
+        molecule = _ethanol()
+        assert molecule.nodes == range(3)
+        assert list(molecule.nodes) == [0, 1, 2]
+
+    @staticmethod
+    def test_edges():
+        """Test the shape, type and contents of the edges."""
+        molecule = _ethanol()
+        edges = molecule.edges
+        assert edges.shape == (2, 2)
+        assert edges.dtype == np.uint32
+        assert {tuple(sorted(edge)) for edge in edges.tolist()} == \
+            {(0, 1), (1, 2)}
+        for (sid, tid) in edges:
+            assert molecule.has_edge(sid, tid)
+
+    @staticmethod
+    def test_edges_cached():
+        """Test that the edges are shared and read-only."""
+        molecule = _ethanol()
+        assert molecule.edges is molecule.edges
+        with pytest.raises(ValueError):
+            molecule.edges[0, 0] = 2
+
+    @staticmethod
+    def test_empty():
+        """Test the views of an empty molecule."""
+        molecule = Molecule([], [])
+        assert len(molecule.nodes) == 0
+        assert molecule.edges.shape == (0, 2)
+
+
+class TestPropertyArrays:
+    """Test the per-atom and per-bond property arrays."""
+    @staticmethod
+    def test_atom_arrays():
+        """Test that the atom arrays match the per-atom accessors."""
+        atoms = [
+            AtomSpec('C', 3, isotope=13),
+            AtomSpec('C', 1, parity=True),
+            AtomSpec('N', 3, 1),
+            AtomSpec('O', 0, -1),
+        ]
+        bonds = [BondSpec(0, 1, 1), BondSpec(1, 2, 1), BondSpec(1, 3, 1)]
+        molecule = Molecule(atoms, bonds)
+
+        assert molecule.atomic_numbers().tolist() == [6, 6, 7, 8]
+        assert molecule.charges().tolist() == [0, 0, 1, -1]
+        assert molecule.hydrogen_counts().tolist() == [3, 1, 3, 0]
+        assert molecule.isotopes().tolist() == [13, 0, 0, 0]
+        assert molecule.atom_parities().tolist() == [0, 1, 0, 0]
+        assert molecule.electron_counts().tolist() == \
+            [molecule.electrons(atom_id) for atom_id in molecule.nodes]
+
+    @staticmethod
+    def test_masked_isotopes():
+        """Test that atoms without isotopes can be masked."""
+        molecule = Molecule([AtomSpec('H', isotope=2), AtomSpec('H')],
+                            [BondSpec(0, 1, 1)])
+        isotopes = molecule.isotopes(masked=True)
+        assert isotopes.mask.tolist() == [False, True]
+        assert isotopes[0] == 2
+
+    @staticmethod
+    def test_bond_arrays():
+        """Test that the bond arrays are aligned with ``edges``."""
+        atoms = [AtomSpec('C', 1), AtomSpec('C', 1), AtomSpec('C', 3),
+                 AtomSpec('C', 3)]
+        bonds = [BondSpec(0, 1, 2, True), BondSpec(0, 2, 1),
+                 BondSpec(1, 3, 1)]
+        molecule = Molecule(atoms, bonds)
+
+        orders = molecule.bond_orders()
+        parities = molecule.bond_parities()
+        assert len(orders) == len(parities) == len(molecule.edges)
+        for (sid, tid), order, parity in zip(molecule.edges, orders,
+                                              parities):
+            assert molecule.bond_order(sid, tid).as_int() == order
+            if {sid, tid} == {0, 1}:
+                assert parity == 1
+            else:
+                assert parity == 0
+
+    @staticmethod
+    def test_empty():
+        """Test the arrays of an empty molecule."""
+        molecule = Molecule([], [])
+        assert molecule.atomic_numbers().shape == (0,)
+        assert molecule.bond_orders().shape == (0,)
+
+
+class TestBuildMany:
+    """Test building molecules in parallel."""
+    @staticmethod
+    def test_order():
+        """Test that molecules are returned in input order."""
+        specs = [([AtomSpec(element, hydrogens)], [])
+                 for element, hydrogens in [('C', 4), ('N', 3), ('O', 2)]]
+        molecules = Molecule.build_many(specs * 100, threads=2)
+        assert len(molecules) == 300
+        assert [mol.element(0).atomic_number() for mol in molecules[:3]] \
+            == [6, 7, 8]
+        assert molecules[-1].hydrogens(0) == 2
+
+    @staticmethod
+    def test_errors():
+        """Test that bad records raise, or are returned."""
+        specs = [([AtomSpec('C', 4)], []), ([AtomSpec('C', 5)], [])]
+        with pytest.raises(ValueError):
+            Molecule.build_many(specs)
+
+        molecules = Molecule.build_many(specs, return_errors=True)
+        assert molecules[0].order() == 1
+        assert isinstance(molecules[1], ValueError)
+
+    @staticmethod
+    def test_from_arrays():
+        """Test building from concatenated columns."""
+        molecules = Molecule.build_many_from_arrays(
+            atom_counts=[1, 2],
+            elements=[6, 6, 8],
+            hydrogens=[4, 3, 1],
+            bond_counts=[0, 1],
+            bond_src=[0],
+            bond_dst=[1],
+        )
+        assert [mol.order() for mol in molecules] == [1, 2]
+        assert molecules[1].has_edge(0, 1)
+
+    @staticmethod
+    def test_from_arrays_errors():
+        """Test that bad counts and records are reported."""
+        with pytest.raises(ValueError):
+            Molecule.build_many_from_arrays([2], [6])
+
+        molecules = Molecule.build_many_from_arrays(
+            [1, 1], [6, 6], hydrogens=[4, 5], return_errors=True
+        )
+        assert molecules[0].hydrogens(0) == 4
+        assert isinstance(molecules[1], ValueError)
+
+
+class TestBinary:
+    """Test the binary encoding and pickling."""
+    @staticmethod
+    def test_round_trip():
+        """Test that molecules survive encoding, with and without checksums."""
+        for smiles in ['CCO', 'C[C@H](N)O', 'F/C=C/F', '[13CH3][NH3+]', 'C.C']:
+            molecule = Molecule.from_smiles(smiles)
+            for checksum in [True, False]:
+                decoded = Molecule.from_bytes(molecule.to_bytes(checksum))
+                assert decoded.to_smiles() == molecule.to_smiles()
+                assert np.array_equal(decoded.isotopes(), molecule.isotopes())
+                assert np.array_equal(decoded.atom_parities(), molecule.atom_parities())
+                assert np.array_equal(decoded.bond_parities(), molecule.bond_parities())
+
+    @staticmethod
+    def test_compact():
+        """Test that the encoding is small."""
+        molecule = Molecule.from_smiles('CCO')
+        assert len(molecule.to_bytes(checksum=False)) == 18
+        assert len(molecule.to_bytes()) == 22
+        assert len(pickle.dumps(molecule)) < 100
+
+    @staticmethod
+    def test_invalid_bytes():
+        """Test that bad data is rejected."""
+        data = Molecule.from_smiles('c1ccccc1O').to_bytes()
+        with pytest.raises(ValueError):
+            Molecule.from_bytes(data[:-1])
+        corrupt = bytearray(data)
+        corrupt[10] ^= 1
+        with pytest.raises(ValueError):
+            Molecule.from_bytes(bytes(corrupt))
+        with pytest.raises(ValueError):
+            Molecule.from_bytes(b'CCO')
+
+    @staticmethod
+    def test_crafted_bytes():
+        """Test that bytes with a matching checksum are still checked."""
+        def with_checksum(payload):
+            return payload + zlib.crc32(payload).to_bytes(4, 'little')
+
+        # No atoms, and 2 ** 62 - 1 bonds.
+        huge = b'OXM\x01\x01\x00' + b'\xff' * 8 + b'\x3f'
+        with pytest.raises(ValueError):
+            Molecule.from_bytes(with_checksum(huge))
+        # A carbon, bonded to atom 5.
+        out_of_range = b'OXM\x01\x01\x01\x01\x06\x04\x00\x05\x01'
+        with pytest.raises(ValueError):
+            Molecule.from_bytes(with_checksum(out_of_range), validate=False)
+
+    @staticmethod
+    def test_pickle():
+        """Test pickling molecules, including as a list."""
+        molecules = [Molecule.from_smiles(smiles) for smiles in ['CCO', 'c1ccccc1O']]
+        unpickled = pickle.loads(pickle.dumps(molecules))
+        assert [mol.to_smiles() for mol in unpickled] == [mol.to_smiles() for mol in molecules]
+
+
+class TestRings:
+    """Test ring perception."""
+    @staticmethod
+    def test_chain():
+        """Test that acyclic molecules have no rings."""
+        molecule = _ethanol()
+        assert molecule.rings() == []
+        assert not molecule.is_in_ring(0)
+        assert molecule.ring_sizes(0) == []
+        assert molecule.ring_bond_flags().tolist() == [False, False]
+
+    @staticmethod
+    def test_fused():
+        """Test naphthalene, with two rings sharing a bond."""
+        molecule = Molecule.from_smiles('c1ccc2ccccc2c1')
+        assert molecule.rings() == [[0, 1, 2, 3, 8, 9], [3, 4, 5, 6, 7, 8]]
+        assert molecule.ring_sizes(3) == [6, 6]
+        assert molecule.ring_sizes(0) == [6]
+        assert molecule.ring_bond_flags().all()
+
+    @staticmethod
+    def test_smallest_rings():
+        """Test that the smallest independent rings are chosen."""
+        norbornane = Molecule.from_smiles('C1CC2CCC1C2')
+        assert [len(ring) for ring in norbornane.rings()] == [5, 5]
+        cubane = Molecule.from_smiles('C12C3C4C1C5C2C3C45')
+        assert [len(ring) for ring in cubane.rings()] == [4] * 5
+
+    @staticmethod
+    def test_substituent():
+        """Test that bonds out of a ring aren't ring bonds."""
+        molecule = Molecule.from_smiles('CC1CC1')
+        assert not molecule.is_in_ring(0)
+        assert molecule.is_in_ring(1)
+        assert molecule.ring_sizes(2) == [3]
+        flags = molecule.ring_bond_flags()
+        for (sid, tid), flag in zip(molecule.edges, flags):
+            assert flag == (0 not in (sid, tid))
+
+    @staticmethod
+    def test_aromaticity():
+        """Test that aromatic atoms are found by Hückel's rule."""
+        for smiles in ['c1ccccc1', 'c1cc[nH]c1', 'c1ccoc1', 'c1ccc2ccccc2c1', 'C1=CC=C2C=CC=CC2=C1']:
+            assert Molecule.from_smiles(smiles).aromatic_atom_flags().all(), smiles
+        for smiles in ['C1=CCCCC1', 'C1=CCC=C1', 'C1=CC=CC=CC1', 'C1CCNCC1', 'CCO']:
+            assert not Molecule.from_smiles(smiles).aromatic_atom_flags().any(), smiles
+        # Only the rings of toluene and 2-pyridone are aromatic.
+        for smiles in ['Cc1ccccc1', 'O=C1C=CC=CN1']:
+            flags = Molecule.from_smiles(smiles).aromatic_atom_flags()
+            assert flags.tolist() == [False] + [True] * 6, smiles
+
+    @staticmethod
+    def test_missing_atom():
+        """Test that unknown atoms raise ``ValueError``."""
+        molecule = _ethanol()
+        with pytest.raises(ValueError):
+            molecule.is_in_ring(3)
+        with pytest.raises(ValueError):
+            molecule.ring_sizes(3)
+
+
+class TestEquality:
+    """Test hashing and comparing molecules."""
+    @staticmethod
+    def test_atom_order():
+        """Test that atom order doesn't matter."""
+        first = Molecule.from_smiles('CCO')
+        second = Molecule.from_smiles('OCC')
+        assert first == second
+        assert hash(first) == hash(second)
+        assert first.graph_hash() == second.graph_hash()
+        assert len({first, second, _ethanol()}) == 1
+
+    @staticmethod
+    def test_different():
+        """Test that molecules differing in any invariant are unequal."""
+        for first, second in [
+                ('CCO', 'CCN'),
+                ('[13CH4]', 'C'),
+                ('C[NH3+]', 'CN'),
+                ('C1CCCCC1', 'C1CC1C1CC1'),
+                ('C=CC', 'C1CC1'),
+        ]:
+            assert Molecule.from_smiles(first) != Molecule.from_smiles(second)
+
+    @staticmethod
+    def test_stereo():
+        """Test that stereoisomers share a hash but aren't equal."""
+        l_alanine = Molecule.from_smiles('N[C@@H](C)C(=O)O')
+        d_alanine = Molecule.from_smiles('N[C@H](C)C(=O)O')
+        assert l_alanine.graph_hash() == d_alanine.graph_hash()
+        assert l_alanine != d_alanine
+        assert l_alanine == Molecule.from_smiles('OC(=O)[C@@H](N)C')
+        assert Molecule.from_smiles('F/C=C/F') == \
+            Molecule.from_smiles('F\\C=C\\F')
+        assert Molecule.from_smiles('F/C=C/F') != \
+            Molecule.from_smiles('F/C=C\\F')
+
+    @staticmethod
+    def test_other_types():
+        """Test comparing with other types."""
+        molecule = Molecule.from_smiles('C')
+        assert molecule != 'C'
+        assert molecule == molecule
+        assert {molecule: 1}[Molecule.from_smiles('C')] == 1
+
+
+class TestNative:
+    """Test that Molecule is the native class."""
+    @staticmethod
+    def test_constructors():
+        """Test that every constructor gives a Molecule."""
+        molecule = Molecule.from_smiles('CO')
+        assert isinstance(molecule, Molecule)
+        assert isinstance(Molecule.from_bytes(molecule.to_bytes()), Molecule)
+        assert isinstance(molecule.largest_fragment(), Molecule)
+
+    @staticmethod
+    def test_keywords():
+        """Test that methods accept their documented keywords."""
+        molecule = Molecule.from_smiles('C[C@H](N)O')
+        assert molecule.has_node(atom_id=0)
+        assert molecule.degree(atom_id=1) == 3
+        assert molecule.element(atom_id=2) == Element(7)
+        assert molecule.atom_parity(atom_id=1) is not None
+        assert molecule.to_smiles(canonical=False)
+
+    @staticmethod
+    def test_interned():
+        """Test that elements, bond orders and parities are shared."""
+        molecule = Molecule.from_smiles(r'C[C@H](N)/C=C/C')
+        assert molecule.element(0) is molecule.element(1)
+        assert molecule.bond_order(0, 1) is molecule.bond_order(1, 2)
+        assert molecule.bond_order(0, 1) is BondSpec(0, 1, 1).order
+        assert molecule.bond_parity(3, 4) is BondSpec(3, 4, 2, molecule.bond_parity(3, 4)).parity
+        assert molecule.bond_order(3, 4) == BondOrder(2)
+
+
+class TestAdjacency:
+    """Test the CSR and matrix forms of the connectivity."""
+    @staticmethod
+    def test_csr():
+        """Test the CSR arrays of propene."""
+        molecule = Molecule.from_smiles('C=CC')
+        indptr, indices, bond_orders = molecule.adjacency_csr()
+        assert indptr.tolist() == [0, 1, 3, 4]
+        assert indices.tolist() == [1, 0, 2, 1]
+        assert bond_orders.tolist() == [2, 2, 1, 1]
+        assert indptr.dtype == np.uint32 and bond_orders.dtype == np.uint8
+        for atom_id in molecule.nodes:
+            neighbors = indices[indptr[atom_id]:indptr[atom_id + 1]]
+            assert neighbors.tolist() == sorted(molecule.neighbors(atom_id))
+
+    @staticmethod
+    def test_csr_cached():
+        """Test that the CSR arrays are shared and read-only."""
+        molecule = Molecule.from_smiles('CC')
+        assert molecule.adjacency_csr()[1] is molecule.adjacency_csr()[1]
+        with pytest.raises(ValueError):
+            molecule.adjacency_csr()[1][0] = 0
+
+    @staticmethod
+    def test_matrix():
+        """Test the dense adjacency matrix."""
+        molecule = Molecule.from_smiles('C=CC')
+        expected = np.array([[0, 2, 0], [2, 0, 1], [0, 1, 0]], dtype=np.uint8)
+        assert np.array_equal(molecule.adjacency_matrix(weighted=True), expected)
+        assert np.array_equal(molecule.adjacency_matrix(), expected > 0)
+        assert Molecule([], []).adjacency_matrix().shape == (0, 0)
+
+    @staticmethod
+    def test_scipy():
+        """Test the SciPy sparse matrix matches the dense one."""
+        pytest.importorskip('scipy.sparse')
+        molecule = Molecule.from_smiles('c1ccccc1C#N')
+        for weighted in (False, True):
+            matrix = molecule.to_scipy_sparse(weighted=weighted)
+            assert matrix.shape == (8, 8)
+            assert np.array_equal(matrix.toarray(), molecule.adjacency_matrix(weighted))
+
+
+class TestSize:
+    """Test the memory reported by ``sys.getsizeof``."""
+    @staticmethod
+    def test_grows_with_atoms():
+        """Test that larger molecules report more memory."""
+        sizes = [sys.getsizeof(Molecule.from_smiles('C' * n_atoms)) for n_atoms in (1, 10, 100)]
+        assert sizes[0] < sizes[1] < sizes[2]
+        # Packed atoms and bonds take tens of bytes each.
+        assert sizes[2] - sizes[1] < 90 * 64
+
+    @staticmethod
+    def test_counts_cache():
+        """Test that cached values are counted."""
+        molecule = Molecule.from_smiles('c1ccccc1CCO')
+        before = sys.getsizeof(molecule)
+        molecule.distance_matrix()
+        assert sys.getsizeof(molecule) >= before + 2 * 9 * 9
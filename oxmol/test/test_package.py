@@ -0,0 +1,26 @@
+"""
+Test suite for the oxmol package
+
+"""
+import oxmol
+from oxmol import oxmol as native
+
+
+def test_classes_are_native():
+    """Test that every class the package exports is the PyO3 class."""
+    exported = {
+        'Element': native.PyElement,
+        'Parity': native.PyParity,
+        'BondOrder': native.PyBondOrder,
+        'AtomSpec': native.PyAtomSpec,
+        'BondSpec': native.PyBondSpec,
+        'Molecule': native.PyDefaultMolecule,
+        'MoleculeBuilder': native.PyMoleculeBuilder,
+        'Query': native.PyQuery,
+        'ScreenIndex': native.PyScreenIndex,
+        'FingerprintDatabase': native.PyFingerprintDatabase,
+        'MoleculeStore': native.PyMoleculeStore,
+    }
+    for name, cls in exported.items():
+        assert getattr(oxmol, name) is cls, name
+        assert cls.__doc__, name
@@ -0,0 +1,75 @@
+"""
+Test suite for oxmol.screen
+
+"""
+import numpy as np
+import pytest
+import oxmol
+from oxmol.oxmol import PyScreenIndex, PySearchResult
+from oxmol.molecule import Molecule
+from oxmol.screen import ScreenIndex
+from oxmol.substructure import Query
+
+SMILES = [
+    'CCO', 'CC(=O)O', 'c1ccccc1', 'c1ccccc1O', 'CC(=O)[O-]',
+    'C[N+](=O)[O-]', 'CCN', 'c1ccc2ccccc2c1', 'CCCCCC', 'OC(=O)c1ccccc1',
+]
+
+
+def test_screen_containment():
+    """Test that a query's screen is contained in its matches' screens."""
+    query = Query('c1ccccc1O')
+    assert query.screen().dtype == np.uint64
+    assert query.screen().shape == (16,)
+    for smiles in SMILES:
+        molecule = Molecule.from_smiles(smiles)
+        screen = molecule.screen()
+        if query.has_match(molecule):
+            assert np.all(screen & query.screen() == query.screen())
+
+
+def test_screen_index(tmp_path):
+    """Test building and searching a screen index."""
+    molecules = [Molecule.from_smiles(smiles) for smiles in SMILES]
+    path = tmp_path / 'library.screens'
+    index = ScreenIndex.build(iter(molecules), str(path), threads=2)
+    assert len(index) == len(molecules)
+    assert len(ScreenIndex(str(path))) == len(molecules)
+
+    query = Query('C(=O)O')
+    expected = [i for i, mol in enumerate(molecules) if query.has_match(mol)]
+    candidates = index.candidates(query)
+    assert set(expected) <= set(candidates.tolist())
+
+    result = index.search(query, molecules)
+    assert result.hits.tolist() == expected
+    assert result.n_hits == len(expected)
+    assert result.n_molecules == len(molecules)
+    assert result.n_candidates == len(candidates)
+    assert result.pruning_ratio == 1 - len(candidates) / len(molecules)
+    assert 0 < result.hit_ratio <= 1
+
+
+def test_screen_index_errors(tmp_path):
+    """Test the errors from a screen index."""
+    molecules = [Molecule.from_smiles(smiles) for smiles in SMILES]
+    path = tmp_path / 'library.screens'
+    index = ScreenIndex.build(molecules, str(path))
+    with pytest.raises(ValueError):
+        index.search(Query('CO'), molecules[:-1])
+
+    bad_path = tmp_path / 'not_an_index'
+    bad_path.write_bytes(b'CCO\n')
+    with pytest.raises(ValueError):
+        ScreenIndex(str(bad_path))
+
+
+def test_package_screen_index(tmp_path):
+    """Test the package's ScreenIndex is the native class, and takes paths."""
+    assert oxmol.ScreenIndex is PyScreenIndex
+    molecules = [Molecule.from_smiles(smiles) for smiles in SMILES]
+    path = tmp_path / 'library.screens'
+    index = oxmol.ScreenIndex.build(molecules, path, threads=1)
+    assert len(oxmol.ScreenIndex(path)) == len(molecules)
+    assert index.candidates(Query('CCO'), threads=1).dtype == np.uint64
+    assert isinstance(index.search(Query('CCO'), molecules), PySearchResult)
@@ -0,0 +1,254 @@
+"""
+Test suite for oxmol.sdf / Molecule.from_molfile / Molecule.to_molfile
+
+"""
+import gzip
+import pytest
+from oxmol.molecule import Molecule
+from oxmol.sdf import parse_sd_data, read_sdf, write_sdf
+
+
+def _atom(x, y, symbol, charge=0, parity=0, z=0.0):
+    """Format an atom block line."""
+    return (
+        f'{x:10.4f}{y:10.4f}{z:10.4f} {symbol:<3} 0{charge:3d}{parity:3d}'
+        '  0  0  0  0  0  0  0  0  0'
+    )
+
+
+def _molfile(name, atoms, bonds, properties=()):
+    """Format a V2000 molfile from atom lines and bond tuples."""
+    lines = [
+        name,
+        '  test',
+        '',
+        f'{len(atoms):3d}{len(bonds):3d}  0  0  0  0  0  0  0  0999 V2000',
+        *atoms,
+        *(''.join(f'{value:3d}' for value in bond) for bond in bonds),
+        *properties,
+        'M  END',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+# D-alanine, with the methyl group below the central carbon.
+ALANINE_ATOMS = [
+    _atom(0.0, 0.0, 'C'),
+    _atom(-1.3, 0.75, 'N'),
+    _atom(0.0, -1.5, 'C'),
+    _atom(1.3, 0.75, 'C'),
+    _atom(2.6, 0.0, 'O'),
+    _atom(1.3, 2.25, 'O'),
+]
+
+
+def _alanine_bonds(methyl_stereo):
+    """Alanine's bonds, with the given stereo on the methyl bond."""
+    return [(1, 2, 1, 0), (1, 3, 1, methyl_stereo), (1, 4, 1, 0),
+            (4, 5, 2, 0), (4, 6, 1, 0)]
+
+
+def test_from_molfile():
+    """Test atoms, bonds and implicit hydrogens."""
+    molfile = _molfile(
+        'acetic acid',
+        [_atom(0, 0, 'C'), _atom(1, 0, 'C'), _atom(2, 0, 'O'),
+         _atom(1, 1, 'O')],
+        [(1, 2, 1, 0), (2, 3, 1, 0), (2, 4, 2, 0)],
+    )
+    molecule = Molecule.from_molfile(molfile)
+    assert molecule.atomic_numbers().tolist() == [6, 6, 8, 8]
+    assert molecule.hydrogen_counts().tolist() == [3, 0, 1, 0]
+    assert molecule.to_smiles() == 'CC(=O)O'
+
+
+def test_charges_and_isotopes():
+    """Test atom block charges, and property lines superseding them."""
+    atoms = [_atom(0, 0, 'N', charge=3), _atom(1, 0, 'O', charge=5)]
+    molecule = Molecule.from_molfile(_molfile('', atoms, [(1, 2, 1, 0)]))
+    assert molecule.charges().tolist() == [1, -1]
+    assert molecule.hydrogen_counts().tolist() == [3, 0]
+
+    molecule = Molecule.from_molfile(_molfile(
+        '', atoms, [(1, 2, 1, 0)], ['M  CHG  1   1   1', 'M  ISO  1   1  15']
+    ))
+    assert molecule.charges().tolist() == [1, 0]
+    assert molecule.hydrogen_counts().tolist() == [3, 1]
+    assert molecule.isotope(0) == 15
+
+
+def test_mass_difference():
+    """Test isotopes given as atom block mass differences."""
+    atom = _atom(0, 0, 'C').replace(' C    0', ' C    1')
+    molecule = Molecule.from_molfile(_molfile('', [atom], []))
+    assert molecule.isotope(0) == 13
+
+
+def test_aromatic_bonds():
+    """Test that aromatic bonds are kekulized."""
+    atoms = [_atom(i, 0, 'C') for i in range(6)]
+    bonds = [(i + 1, (i + 1) % 6 + 1, 4, 0) for i in range(6)]
+    benzene = Molecule.from_molfile(_molfile('benzene', atoms, bonds))
+    assert sorted(benzene.bond_orders().tolist()) == [1, 1, 1, 2, 2, 2]
+    assert benzene.hydrogen_counts().tolist() == [1] * 6
+
+
+def test_wedges():
+    """Test atom parities from wedged and hashed bonds and parities."""
+    d_alanine = Molecule.from_smiles('N[C@H](C)C(=O)O').to_smiles()
+    l_alanine = Molecule.from_smiles('N[C@@H](C)C(=O)O').to_smiles()
+
+    wedged = _molfile('', ALANINE_ATOMS, _alanine_bonds(1))
+    assert Molecule.from_molfile(wedged).to_smiles() == d_alanine
+    hashed = _molfile('', ALANINE_ATOMS, _alanine_bonds(6))
+    assert Molecule.from_molfile(hashed).to_smiles() == l_alanine
+
+    atoms = [_atom(0.0, 0.0, 'C', parity=2)] + ALANINE_ATOMS[1:]
+    with_parity = _molfile('', atoms, _alanine_bonds(0))
+    assert Molecule.from_molfile(with_parity).to_smiles() == d_alanine
+
+    unspecified = _molfile('', ALANINE_ATOMS, _alanine_bonds(0))
+    assert Molecule.from_molfile(unspecified).atom_parity(0) is None
+
+
+def test_double_bond_geometry():
+    """Test double bond parities from 2D coordinates."""
+    atoms = [_atom(0, 0, 'C'), _atom(1.3, 0.75, 'C'), _atom(2.6, 0, 'C')]
+    bonds = [(1, 2, 1, 0), (2, 3, 2, 0), (3, 4, 1, 0)]
+    trans = _molfile('', atoms + [_atom(3.9, 0.75, 'C')], bonds)
+    cis = _molfile('', atoms + [_atom(2.6, -1.5, 'C')], bonds)
+    assert Molecule.from_molfile(trans).to_smiles() == 'C/C=C/C'
+    assert Molecule.from_molfile(cis).to_smiles() == 'C/C=C\\C'
+
+
+def test_symmetric_3d():
+    """Test that 3D coordinates only give stereogenic atoms parities."""
+    def centre(symbols):
+        positions = [(0.9, 0.9, 0.9), (-0.9, -0.9, 0.9), (0.9, -0.9, -0.9)]
+        return [_atom(0, 0, 'C')] + [
+            _atom(x, y, symbol, z=z)
+            for (x, y, z), symbol in zip(positions, symbols)
+        ]
+
+    bonds = [(1, 2, 1, 0), (1, 3, 1, 0), (1, 4, 1, 0)]
+    isopropanol = Molecule.from_molfile(_molfile('', centre('CCO'), bonds))
+    assert isopropanol.atom_parity(0) is None
+    assert isopropanol == Molecule.from_smiles('CC(C)O')
+    chiral = Molecule.from_molfile(_molfile('', centre('CNO'), bonds))
+    assert chiral.atom_parity(0) is not None
+
+
+def test_symmetric_double_bond_3d():
+    """Test that double bonds with two equal substituents at one end have
+    no parity."""
+    atoms = [_atom(0, 0, 'C', z=0.5), _atom(1.3, 0.75, 'C', z=0.5),
+             _atom(2.6, 0, 'C', z=0.5), _atom(3.9, 0.75, 'C', z=0.5)]
+    bonds = [(1, 2, 1, 0), (2, 3, 2, 0), (3, 4, 1, 0), (3, 5, 1, 0)]
+    methylbutene = _molfile('', atoms + [_atom(2.6, -1.5, 'C', z=0.5)], bonds)
+    molecule = Molecule.from_molfile(methylbutene)
+    assert molecule.to_smiles() == 'CC=C(C)C'
+    assert molecule == Molecule.from_smiles('CC=C(C)C')
+    enol = _molfile('', atoms + [_atom(2.6, -1.5, 'O', z=0.5)], bonds)
+    assert '/' in Molecule.from_molfile(enol).to_smiles()
+
+
+def test_invalid():
+    """Test that invalid and unsupported molfiles raise ``ValueError``."""
+    v3000 = 'x\n\n\n  0  0  0  0  0  0  0  0  0  0999 V3000\nM  END\n'
+    bad_bond = _molfile('', [_atom(0, 0, 'C')], [(1, 2, 1, 0)])
+    bad_symbol = _molfile('', [_atom(0, 0, 'Xx')], [])
+    for molfile in [v3000, bad_bond, bad_symbol, 'C\n']:
+        with pytest.raises(ValueError):
+            Molecule.from_molfile(molfile)
+
+
+def test_molfile_round_trip():
+    """Test that molecules survive writing and reading a molfile."""
+    for smiles in ['C[C@H](N)O', 'C[C@@H](N)O', 'N[C@](C)(F)O',
+                   '[NH4+].[Cl-]', 'C[N+](C)(C)[O-]', '[13CH4]',
+                   'O=S(=O)(O)O', 'C1=CC=CC=C1', '[Se]']:
+        molecule = Molecule.from_smiles(smiles)
+        molfile = molecule.to_molfile('name')
+        assert molfile.startswith('name\n')
+        assert molfile.endswith('M  END\n')
+        assert Molecule.from_molfile(molfile).to_smiles() == \
+            molecule.to_smiles()
+
+
+SDF = (
+    _molfile('ethanol', [_atom(0, 0, 'C'), _atom(1, 0, 'C'),
+                         _atom(2, 0, 'O')], [(1, 2, 1, 0), (2, 3, 1, 0)])
+    + '> <ID>\nE1\n\n> <note> (from a test)\nfirst\nsecond\n\n$$$$\n'
+    + _molfile('broken', [_atom(0, 0, 'Xx')], [])
+    + '$$$$\n'
+    + _molfile('water', [_atom(0, 0, 'O')], [])
+    + '> <ID>\nW1\n\n$$$$\n'
+)
+
+
+def test_read_sdf(tmp_path):
+    """Test reading plain and compressed files, with data items."""
+    plain = tmp_path / 'test.sdf'
+    plain.write_text(SDF)
+    compressed = tmp_path / 'test.sdf.gz'
+    with gzip.open(str(compressed), 'wt') as handle:
+        handle.write(SDF)
+
+    with pytest.raises(ValueError, match='Line 23'):
+        list(read_sdf(plain))
+
+    for path in [plain, compressed]:
+        molecules = list(read_sdf(path, skip_invalid=True))
+        assert [mol.order() for mol in molecules] == [3, 1]
+
+    records = list(read_sdf(plain, names=True, data='dict',
+                            skip_invalid=True))
+    assert [name for _, name, _ in records] == ['ethanol', 'water']
+    assert records[0][2] == {'ID': 'E1', 'note': 'first\nsecond'}
+
+    raw = [data for _, data in read_sdf(plain, data='bytes',
+                                        skip_invalid=True)]
+    assert isinstance(raw[1], bytes)
+    assert parse_sd_data(raw[1]) == {'ID': 'W1'}
+
+    with pytest.raises(ValueError):
+        read_sdf(plain, data='list')
+
+
+def test_read_sdf_batches(tmp_path):
+    """Test reading in batches, without a final terminator."""
+    path = tmp_path / 'test.sdf'
+    record = _molfile('methane', [_atom(0, 0, 'C')], [])
+    path.write_text((record + '$$$$\n') * 24 + record)
+    batches = list(read_sdf(path, batch_size=10, threads=2))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+
+def test_write_sdf(tmp_path):
+    """Test writing plain and compressed files, with names and data."""
+    molecules = [Molecule.from_smiles(s) for s in ['OCC', 'C#N', 'O']]
+    plain = tmp_path / 'test.sdf'
+    assert write_sdf(molecules, plain) == 3
+    assert plain.read_text().count('$$$$\n') == 3
+    assert [mol.to_smiles() for mol in read_sdf(plain)] == \
+        ['CCO', 'C#N', 'O']
+
+    compressed = tmp_path / 'test.sdf.gz'
+    records = [
+        (molecules[0], 'ethanol', {'ID': 1, 'note': 'a\nb'}),
+        (molecules[1], 'hcn'),
+        molecules[2],
+    ]
+    assert write_sdf(records, compressed, threads=2) == 3
+    read = list(read_sdf(compressed, names=True, data='dict'))
+    assert [name for _, name, _ in read] == ['ethanol', 'hcn', '']
+    assert read[0][2] == {'ID': '1', 'note': 'a\nb'}
+    assert read[1][2] == {}
+
+
+def test_write_sdf_many(tmp_path):
+    """Test writing more molecules than fit in one batch."""
+    path = tmp_path / 'test.sdf'
+    molecules = (Molecule.from_smiles('OC') for _ in range(2500))
+    assert write_sdf(molecules, path, compress=False) == 2500
+    assert len(list(read_sdf(path, batch_size=1000))) == 3
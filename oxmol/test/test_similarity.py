@@ -0,0 +1,99 @@
+"""
+Test suite for oxmol.similarity
+
+"""
+import numpy as np
+import pytest
+import oxmol
+from oxmol.oxmol import PyFingerprintDatabase
+from oxmol.similarity import FingerprintDatabase, write_fingerprints
+
+
+def _fingerprints(n_fingerprints, n_bytes=16, seed=0):
+    random = np.random.RandomState(seed)
+    bits = random.random_sample((n_fingerprints, 8 * n_bytes)) < random.random_sample((n_fingerprints, 1))
+    return np.packbits(bits, axis=1)
+
+
+def _tanimoto(first, second):
+    common = np.unpackbits(first & second, axis=-1).sum(axis=-1)
+    union = np.unpackbits(first | second, axis=-1).sum(axis=-1)
+    return np.where(union == 0, 0.0, common / np.maximum(union, 1))
+
+
+def test_write_and_open(tmp_path):
+    """Test writing a database from batches and opening it."""
+    fingerprints = _fingerprints(100)
+    path = tmp_path / 'library.fps'
+    assert write_fingerprints(iter([fingerprints[:60], fingerprints[60:]]), path) == 100
+    database = FingerprintDatabase(path)
+    assert len(database) == 100
+    assert database.n_bits == 128
+
+    assert write_fingerprints(fingerprints, path) == 100
+    with pytest.raises(ValueError):
+        write_fingerprints([fingerprints, fingerprints[:, :8]], path)
+
+    bad_path = tmp_path / 'not_a_database'
+    bad_path.write_bytes(b'CCO\n')
+    with pytest.raises(ValueError):
+        FingerprintDatabase(bad_path)
+
+
+def test_top_k(tmp_path):
+    """Test that top-k searches agree with brute force."""
+    fingerprints = _fingerprints(5000)
+    path = tmp_path / 'library.fps'
+    write_fingerprints(fingerprints, path)
+    database = FingerprintDatabase(path)
+
+    queries = fingerprints[[3, 1000, 4999]]
+    indices, scores = database.top_k(queries, k=5, threads=2)
+    assert indices.shape == scores.shape == (3, 5)
+    assert indices.dtype == np.uint64
+    assert indices[:, 0].tolist() == [3, 1000, 4999]
+    for query, query_indices, query_scores in zip(queries, indices, scores):
+        expected = _tanimoto(query, fingerprints)
+        assert np.allclose(np.sort(expected)[::-1][:5], query_scores)
+        assert np.allclose(expected[query_indices.astype(np.int64)], query_scores)
+
+    single_indices, _ = database.top_k(fingerprints[3], k=1, metric='dice')
+    assert single_indices.tolist() == [[3]]
+    assert database.top_k(queries, k=10000)[0].shape == (3, 5000)
+    with pytest.raises(ValueError):
+        database.top_k(queries, metric='cosine')
+    with pytest.raises(ValueError):
+        database.top_k(fingerprints[:, :8])
+
+
+def test_threshold(tmp_path):
+    """Test that threshold searches agree with brute force."""
+    fingerprints = _fingerprints(5000)
+    path = tmp_path / 'library.fps'
+    write_fingerprints(fingerprints, path)
+    database = FingerprintDatabase(path)
+
+    queries = fingerprints[:4]
+    query_indices, indices, scores = database.threshold(queries, threshold=0.5)
+    assert len(query_indices) == len(indices) == len(scores)
+    for query_index, query in enumerate(queries):
+        expected = _tanimoto(query, fingerprints)
+        hits = indices[query_indices == query_index].astype(np.int64)
+        assert sorted(hits.tolist()) == np.flatnonzero(expected >= 0.5).tolist()
+        hit_scores = scores[query_indices == query_index]
+        assert np.all(np.diff(hit_scores) <= 0)
+    with pytest.raises(ValueError):
+        database.threshold(queries, threshold=0)
+
+
+def test_package_database(tmp_path):
+    """Test the package's FingerprintDatabase is the native class."""
+    assert oxmol.FingerprintDatabase is PyFingerprintDatabase
+    fingerprints = _fingerprints(10)
+    path = tmp_path / 'library.fps'
+    oxmol.write_fingerprints(fingerprints, path)
+    database = oxmol.FingerprintDatabase(path)
+    indices, _ = database.top_k(fingerprints[:1], k=1, metric='dice', threads=1)
+    assert indices.tolist() == [[0]]
+    query_indices, _, _ = database.threshold(fingerprints[:1], threshold=1.0)
+    assert query_indices.tolist() == [0]
@@ -0,0 +1,242 @@
+"""
+Test suite for oxmol.smiles / Molecule.from_smiles / Molecule.to_smiles
+
+"""
+import gzip
+import pytest
+from oxmol.molecule import Molecule
+from oxmol.parity import Parity
+from oxmol.smiles import read_smiles, write_smiles
+
+
+def _bond_orders(molecule):
+    """Get a ``dict`` of sorted atom index pairs to bond order."""
+    return {
+        tuple(sorted((int(sid), int(tid)))): int(order)
+        for (sid, tid), order in zip(molecule.edges, molecule.bond_orders())
+    }
+
+
+def test_ethanol():
+    """Test a simple chain, with implicit hydrogens."""
+    molecule = Molecule.from_smiles('CCO')
+    assert molecule.atomic_numbers().tolist() == [6, 6, 8]
+    assert molecule.hydrogen_counts().tolist() == [3, 2, 1]
+    assert _bond_orders(molecule) == {(0, 1): 1, (1, 2): 1}
+
+
+def test_branches_and_bonds():
+    """Test branches and explicit bond orders."""
+    molecule = Molecule.from_smiles('CC(=O)C#N')
+    assert molecule.hydrogen_counts().tolist() == [3, 0, 0, 0, 0]
+    assert _bond_orders(molecule) == {
+        (0, 1): 1, (1, 2): 2, (1, 3): 1, (3, 4): 3
+    }
+
+
+def test_ring_closures():
+    """Test ring closures, including two-digit ring numbers."""
+    for smiles in ['C1CCCCC1', 'C%12CCCCC%12']:
+        molecule = Molecule.from_smiles(smiles)
+        assert molecule.size() == 6
+        assert molecule.has_edge(0, 5)
+        assert molecule.hydrogen_counts().tolist() == [2] * 6
+
+
+def test_kekulization():
+    """Test that aromatic rings are given alternating bonds."""
+    benzene = Molecule.from_smiles('c1ccccc1')
+    assert sorted(_bond_orders(benzene).values()) == [1, 1, 1, 2, 2, 2]
+    assert benzene.hydrogen_counts().tolist() == [1] * 6
+
+    pyridine = Molecule.from_smiles('c1ccncc1')
+    assert pyridine.hydrogens(3) == 0
+
+    pyrrole = Molecule.from_smiles('c1cc[nH]c1')
+    assert sorted(_bond_orders(pyrrole).values()) == [1, 1, 1, 2, 2]
+
+    naphthalene = Molecule.from_smiles('c1ccc2ccccc2c1')
+    assert sorted(_bond_orders(naphthalene).values()).count(2) == 5
+
+
+def test_bad_aromatic_system():
+    """Test that aromatic systems which can't be kekulized fail."""
+    with pytest.raises(ValueError):
+        Molecule.from_smiles('c1cccc1')
+
+
+def test_bracket_atoms():
+    """Test isotopes, hydrogen counts and charges in bracket atoms."""
+    molecule = Molecule.from_smiles('[13CH3][NH3+].[Cl-]')
+    assert molecule.isotope(0) == 13
+    assert molecule.hydrogens(0) == 3
+    assert molecule.hydrogens(1) == 3
+    assert molecule.charges().tolist() == [0, 1, -1]
+    assert molecule.size() == 1
+
+
+def test_atom_parity():
+    """Test that equivalent chiral SMILES give the same parity."""
+    first = Molecule.from_smiles('N[C@@H](C)C(=O)O')
+    second = Molecule.from_smiles('N[C@H](C(=O)O)C')
+    assert first.atom_parity(1) is not None
+    assert first.atom_parity(1) != Molecule.from_smiles(
+        'N[C@H](C)C(=O)O'
+    ).atom_parity(1)
+    # Swapping two neighbours and the chirality gives the same centre,
+    # but the atom indices differ, so the parities differ too.
+    assert second.atom_parity(1) != first.atom_parity(1)
+
+
+def test_bond_parity():
+    """Test cis and trans double bonds."""
+    trans = Molecule.from_smiles('F/C=C/F')
+    cis = Molecule.from_smiles('F/C=C\\F')
+    assert trans.bond_parity(1, 2) == Parity(False)
+    assert cis.bond_parity(1, 2) == Parity(True)
+    assert Molecule.from_smiles('C(/F)=C/F').bond_parity(0, 2) == \
+        Parity(True)
+
+
+def test_invalid():
+    """Test that invalid SMILES raise ``ValueError``."""
+    for smiles in ['C(', 'C)', 'C1CC', 'C=', '[C', 'Xx', 'C$C', '*']:
+        with pytest.raises(ValueError):
+            Molecule.from_smiles(smiles)
+    with pytest.raises(ValueError):
+        Molecule.from_smiles('C(C)(C)(C)(C)C')
+    # Bond orders summing past 255 at one atom don't overflow.
+    with pytest.raises(ValueError):
+        Molecule.from_smiles('C' + '(C)' * 300)
+
+
+def test_read_smiles(tmp_path):
+    """Test reading plain and compressed files."""
+    lines = 'CCO ethanol\n\nc1ccccc1 benzene\nC#N\n'
+    plain = tmp_path / 'test.smi'
+    plain.write_text(lines)
+    compressed = tmp_path / 'test.smi.gz'
+    with gzip.open(str(compressed), 'wt') as handle:
+        handle.write(lines)
+
+    for path in [plain, compressed]:
+        molecules = list(read_smiles(path))
+        assert [mol.order() for mol in molecules] == [3, 6, 2]
+
+    named = list(read_smiles(plain, names=True))
+    assert [name for _, name in named] == ['ethanol', 'benzene', '']
+
+
+def test_read_smiles_batches(tmp_path):
+    """Test reading in batches."""
+    path = tmp_path / 'test.smi'
+    path.write_text('C\n' * 25)
+    batches = list(read_smiles(path, batch_size=10, threads=2))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+
+def test_read_smiles_invalid(tmp_path):
+    """Test that invalid records raise, or are skipped."""
+    path = tmp_path / 'test.smi'
+    path.write_text('C\nC(\nCC\n')
+    with pytest.raises(ValueError, match='Line 2'):
+        list(read_smiles(path))
+    assert len(list(read_smiles(path, skip_invalid=True))) == 2
+
+
+def test_to_smiles():
+    """Test writing SMILES, with and without canonicalisation."""
+    assert Molecule.from_smiles('OCC').to_smiles(canonical=False) == 'OCC'
+    assert Molecule.from_smiles('OCC').to_smiles() == 'CCO'
+    assert Molecule.from_smiles('c1ccccc1O').to_smiles() == 'OC1=CC=CC=C1'
+    assert Molecule.from_smiles('[NH4+].[13CH4]').to_smiles(False) == \
+        '[NH4+].[13CH4]'
+
+
+def test_canonical_smiles():
+    """Test that differently ordered SMILES give the same output."""
+    for smiles_list in [
+            ['CC(=O)O', 'OC(C)=O', 'O=C(O)C'],
+            ['c1ccccc1C(=O)N', 'NC(=O)c1ccccc1', 'O=C(N)C1=CC=CC=C1'],
+            ['C[C@H](N)O', 'N[C@@H](C)O', 'O[C@@H](N)C'],
+            ['F/C=C/Cl', 'Cl/C=C/F', 'F\\C=C\\Cl'],
+            # meso-Butane-2,3-diol, whose centres are only told apart by
+            # their parities.
+            ['C[C@@H](O)[C@H](C)O', 'C[C@H](O)[C@@H](C)O',
+             'O[C@@H](C)[C@H](O)C', 'O[C@H](C)[C@H](C)O'],
+            ['C[C@@H](O)[C@@H](C)O', 'O[C@H](C)[C@@H](C)O'],
+            # Kekulé structures of o-xylene, naphthalene and phenanthrene.
+            ['Cc1ccccc1C', 'CC1=C(C)C=CC=C1', 'CC1=CC=CC=C1C'],
+            ['c1ccc2ccccc2c1', 'C1=CC2=CC=CC=C2C=C1', 'C1=CC=C2C=CC=CC2=C1'],
+            ['c1ccc2c(c1)ccc1ccccc12', 'C1=CC2=C(C=C1)C1=CC=CC=C1C=C2',
+             'C1C=CC2=C(C=1)C=CC1=C2C=CC=C1'],
+    ]:
+        canonical = {Molecule.from_smiles(s).to_smiles() for s in smiles_list}
+        assert len(canonical) == 1
+    meso = Molecule.from_smiles('C[C@@H](O)[C@H](C)O').to_smiles()
+    chiral = Molecule.from_smiles('C[C@@H](O)[C@@H](C)O').to_smiles()
+    assert meso != chiral
+
+
+def test_stereo_round_trip():
+    """Test that stereochemistry survives writing and reading."""
+    for smiles in ['C[C@H](N)O', 'C[C@@H](N)O']:
+        written = Molecule.from_smiles(smiles).to_smiles()
+        assert Molecule.from_smiles(written).to_smiles() == written
+    cis = Molecule.from_smiles('F/C=C\\F').to_smiles()
+    trans = Molecule.from_smiles('F/C=C/F').to_smiles()
+    assert cis != trans
+    assert Molecule.from_smiles(cis).bond_parities().tolist() == [0, 1, 0]
+
+
+def _ladder(rungs):
+    """A ladder of CH atoms: two chains joined at every atom, which has
+    a ring open at every rung but the last when written in index order.
+
+    """
+    rails = [list(range(rungs)), list(range(rungs, 2 * rungs))]
+    bonds = [(rail[i], rail[i + 1]) for rail in rails for i in range(rungs - 1)]
+    bonds += list(zip(*rails))
+    ends = {0, rungs - 1, rungs, 2 * rungs - 1}
+    hydrogens = [2 if atom in ends else 1 for atom in range(2 * rungs)]
+    sids, tids = zip(*bonds)
+    return Molecule.from_arrays([6] * 2 * rungs, hydrogens, bond_src=sids, bond_dst=tids)
+
+
+def test_many_open_rings():
+    """Test ring bond numbers past 9, which are reused once closed."""
+    ladder = _ladder(15)
+    for canonical in [False, True]:
+        written = ladder.to_smiles(canonical)
+        assert Molecule.from_smiles(written) == ladder
+        assert Molecule.from_smiles(written).to_smiles(canonical) == written
+    assert '%14' in ladder.to_smiles(False)
+    assert '%15' not in ladder.to_smiles(False)
+    # Two separate ladders reuse the same numbers.
+    assert '%15' not in Molecule.from_smiles('{0}.{0}'.format(ladder.to_smiles(False))).to_smiles(False)
+    with pytest.raises(ValueError):
+        _ladder(101).to_smiles(False)
+
+
+def test_write_smiles(tmp_path):
+    """Test writing plain and compressed files, with and without names."""
+    molecules = [Molecule.from_smiles(s) for s in ['OCC', 'C#N', 'c1ccccc1']]
+    plain = tmp_path / 'test.smi'
+    assert write_smiles(molecules, plain) == 3
+    assert plain.read_text() == 'CCO\nC#N\nC1=CC=CC=C1\n'
+
+    compressed = tmp_path / 'test.smi.gz'
+    named = zip(molecules, ['ethanol', 'hcn', 'benzene'])
+    assert write_smiles(named, compressed, threads=2) == 3
+    with gzip.open(str(compressed), 'rt') as handle:
+        assert handle.readline() == 'CCO ethanol\n'
+    names = [name for _, name in read_smiles(compressed, names=True)]
+    assert names == ['ethanol', 'hcn', 'benzene']
+
+
+def test_write_smiles_many(tmp_path):
+    """Test writing more molecules than fit in one batch."""
+    path = tmp_path / 'test.smi'
+    molecules = (Molecule.from_smiles('OC') for _ in range(2500))
+    assert write_smiles(molecules, path, compress=False) == 2500
+    assert path.read_text().splitlines() == ['CO'] * 2500
@@ -0,0 +1,86 @@
+"""
+Test suite for oxmol.store
+
+"""
+import pickle
+import pytest
+import oxmol
+from oxmol.oxmol import PyMoleculeStore
+from oxmol.molecule import Molecule
+from oxmol.store import MoleculeStore
+
+SMILES = ['CCO', 'c1ccccc1O', 'C[C@H](N)O', 'F/C=C/F', '[13CH3][NH3+]', 'C.C', '[Na+]']
+
+
+def _store(tmp_path):
+    store = MoleculeStore(tmp_path / 'library.store', create=True)
+    store.append(Molecule.from_smiles(smiles) for smiles in SMILES)
+    return store
+
+
+def _expected():
+    return [Molecule.from_smiles(smiles).to_smiles() for smiles in SMILES]
+
+
+def test_random_access(tmp_path):
+    """Test indexing, slicing and iterating over a store."""
+    store = _store(tmp_path)
+    expected = _expected()
+    assert len(store) == len(SMILES)
+    assert [store[i].to_smiles() for i in range(len(store))] == expected
+    assert store[-1].to_smiles() == expected[-1]
+    assert [mol.to_smiles() for mol in store[1:6:2]] == expected[1:6:2]
+    assert [mol.to_smiles() for mol in store] == expected
+    assert [mol.to_smiles() for mol in store.get_many([3, 0], threads=2)] == [expected[3], expected[0]]
+    with pytest.raises(IndexError):
+        store[len(SMILES)]
+    with pytest.raises(IndexError):
+        store.get_many([0, 100])
+
+
+def test_append_and_reopen(tmp_path):
+    """Test that appending keeps existing molecules, and is persisted."""
+    store = _store(tmp_path)
+    iterator = iter(store)
+    assert store.append([Molecule.from_smiles('CCN')]) == 1
+    assert len(store) == len(SMILES) + 1
+    assert store[-1].to_smiles() == Molecule.from_smiles('CCN').to_smiles()
+    # Iterators see the store as it was when they were created.
+    assert len(list(iterator)) == len(SMILES)
+
+    reopened = MoleculeStore(tmp_path / 'library.store')
+    assert len(reopened) == len(SMILES) + 1
+    assert reopened[0].to_smiles() == _expected()[0]
+
+
+def test_empty_and_invalid(tmp_path):
+    """Test empty stores and paths which aren't stores."""
+    store = MoleculeStore(tmp_path / 'empty.store', create=True)
+    assert len(store) == 0
+    assert list(store) == []
+    assert store[:] == []
+    with pytest.raises(OSError):
+        MoleculeStore(tmp_path / 'missing.store')
+    (tmp_path / 'bad.store').mkdir()
+    (tmp_path / 'bad.store' / 'offsets.bin').write_bytes(b'CCO\n')
+    with pytest.raises(ValueError):
+        MoleculeStore(tmp_path / 'bad.store')
+
+
+def test_pickle(tmp_path):
+    """Test that stores pickle as their path."""
+    store = _store(tmp_path)
+    data = pickle.dumps(store)
+    assert len(data) < 200
+    unpickled = pickle.loads(data)
+    assert len(unpickled) == len(store)
+    assert unpickled[2].to_smiles() == store[2].to_smiles()
+
+
+def test_package_store(tmp_path):
+    """Test the package's MoleculeStore is the native class."""
+    assert oxmol.MoleculeStore is PyMoleculeStore
+    store = oxmol.MoleculeStore(tmp_path / 'library.store', create=True, validate=False)
+    assert store.append([oxmol.Molecule.from_smiles('CCO')]) == 1
+    assert store.get_many([0], threads=1)[0].to_smiles() == _expected()[0]
+    assert store.path == str(tmp_path / 'library.store')
@@ -0,0 +1,91 @@
+"""
+Test suite for oxmol.substructure
+
+"""
+import numpy as np
+import pytest
+import oxmol
+from oxmol.oxmol import PyQuery
+from oxmol.molecule import Molecule
+from oxmol.substructure import Query
+
+
+def test_query_from_smiles():
+    """Test compiling a query from SMILES."""
+    query = Query('C(=O)O')
+    assert query.order() == 3
+    assert query.size() == 2
+    with pytest.raises(ValueError):
+        Query('C(')
+
+
+def test_query_from_molecule():
+    """Test compiling a query from a molecule."""
+    query = Query(Molecule.from_smiles('CO'))
+    assert query.has_match(Molecule.from_smiles('CCO'))
+    assert not query.has_match(Molecule.from_smiles('CCN'))
+
+
+def test_bond_orders():
+    """Test that bond orders must match."""
+    query = Query('C=O')
+    assert query.has_match(Molecule.from_smiles('CC(=O)O'))
+    assert not query.has_match(Molecule.from_smiles('CCO'))
+
+
+def test_charges():
+    """Test that charges only need to match where the query sets them."""
+    assert Query('C(=O)O').has_match(Molecule.from_smiles('CC(=O)[O-]'))
+    assert not Query('C(=O)[O-]').has_match(Molecule.from_smiles('CC(=O)O'))
+
+
+def test_aromatic_queries():
+    """Test that aromatic queries match any Kekulé structure."""
+    benzene = Query('c1ccccc1')
+    assert benzene.has_match(Molecule.from_smiles('c1ccccc1O'))
+    assert not benzene.has_match(Molecule.from_smiles('C1CCCCC1'))
+    naphthalene = Molecule.from_smiles('c1ccc2ccccc2c1')
+    assert len(benzene.matches(naphthalene)) == 2
+    assert benzene.has_match(Molecule.from_smiles('C1=CC=CC=C1'))
+    # Rings with exocyclic double bonds (p-benzoquinone and the
+    # fulvene-type p-quinodimethane) aren't aromatic, but the benzene
+    # ring of benzofulvene is.
+    assert not benzene.has_match(Molecule.from_smiles('O=C1C=CC(=O)C=C1'))
+    assert not benzene.has_match(Molecule.from_smiles('C=C1C=CC(=C)C=C1'))
+    benzofulvene = Molecule.from_smiles('C=C1C=Cc2ccccc21')
+    assert benzene.matches(benzofulvene) == [[4, 5, 6, 7, 8, 9]]
+
+
+def test_matches():
+    """Test finding all matches, with and without symmetry."""
+    query = Query('C(=O)O')
+    molecule = Molecule.from_smiles('OC(=O)CCC(=O)O')
+    assert query.matches(molecule) == [[1, 2, 0], [5, 6, 7]]
+    assert len(query.matches(molecule, max_matches=1)) == 1
+    ethane = Molecule.from_smiles('CC')
+    assert len(Query('CC').matches(ethane)) == 1
+    assert len(Query('CC').matches(ethane, unique=False)) == 2
+
+
+def test_match_many():
+    """Test matching many molecules at once."""
+    query = Query('[N+](=O)[O-]')
+    molecules = [
+        Molecule.from_smiles(smiles)
+        for smiles in ['c1ccccc1[N+](=O)[O-]', 'CCO', 'C[N+](=O)[O-]']
+    ]
+    mask = query.match_many(molecules, threads=2)
+    assert mask.dtype == np.bool_
+    assert mask.tolist() == [True, False, True]
+    matches = query.match_many(molecules, return_matches=True)
+    assert [len(found) for found in matches] == [1, 0, 1]
+
+
+def test_package_query():
+    """Test the Query exported by the package is the native class."""
+    assert oxmol.Query is PyQuery
+    query = oxmol.Query('CO')
+    assert (query.order(), query.size()) == (2, 1)
+    assert query.screen().shape == (16,)
+    assert query.matches(oxmol.Molecule.from_smiles('OCC'), unique=True) == [[1, 0]]
+    assert query.match_many([oxmol.Molecule.from_smiles('CCO')], threads=1).tolist() == [True]
@@ -0,0 +1,79 @@
+"""
+Test suite for oxmol.validation / Molecule(..., validate=False)
+
+"""
+import pickle
+import numpy as np
+import pytest
+from oxmol.molecule import Molecule
+from oxmol.spec import AtomSpec, BondSpec
+from oxmol.store import MoleculeStore
+from oxmol.validation import (
+    DUPLICATE_BOND,
+    ERROR_MESSAGES,
+    HYPERVALENT_ATOM,
+    IMPOSSIBLE_ISOTOPE,
+    VALID,
+    validate,
+)
+
+
+def _invalid_molecules():
+    methyl = AtomSpec(6, 3)
+    methylene = AtomSpec(6, 2)
+    return [
+        Molecule([methyl, methyl], [BondSpec(0, 1, 2)], validate=False),
+        Molecule([methylene, methylene], [BondSpec(0, 1, 1), BondSpec(1, 0, 1)], validate=False),
+        Molecule([AtomSpec(6, 4, isotope=5)], [], validate=False),
+    ]
+
+
+def test_unvalidated():
+    """Test that invalid molecules can be built without validation."""
+    hypervalent, duplicate, isotope = _invalid_molecules()
+    assert hypervalent.bond_order(0, 1).as_int() == 2
+    assert hypervalent.electrons(0) == 0
+    assert duplicate.size() == 2
+    assert isotope.isotope(0) == 5
+
+    molecule = Molecule.from_smiles('C[C@H](N)O')
+    spec = ([AtomSpec(molecule.element(i), molecule.hydrogens(i), parity=molecule.atom_parity(i))
+             for i in molecule.nodes],
+            [BondSpec(int(sid), int(tid), 1) for sid, tid in molecule.edges])
+    assert Molecule(*spec, validate=False) == molecule
+    assert Molecule.build_many([spec], validate=False) == [molecule]
+
+
+def test_bonds_always_checked():
+    """Test that bonds must join two different atoms regardless."""
+    carb = AtomSpec(6, 3)
+    with pytest.raises(ValueError):
+        Molecule([carb], [BondSpec(0, 1, 1)], validate=False)
+    with pytest.raises(ValueError):
+        Molecule([carb], [BondSpec(0, 0, 1)], validate=False)
+
+
+def test_validate():
+    """Test the error codes given for each molecule."""
+    molecules = [Molecule.from_smiles('CCO')] + _invalid_molecules() + [Molecule([], [])]
+    codes = validate(molecules, threads=2)
+    assert codes.dtype == np.uint8
+    assert codes.tolist() == [VALID, HYPERVALENT_ATOM, DUPLICATE_BOND, IMPOSSIBLE_ISOTOPE, VALID]
+    assert ERROR_MESSAGES[HYPERVALENT_ATOM] == 'Hypervalent atom encountered'
+    assert validate([]).tolist() == []
+    with pytest.raises(TypeError):
+        validate(['CCO'])
+
+
+def test_trusted_sources(tmp_path):
+    """Test loading without validation from bytes, pickles and stores."""
+    molecule = Molecule.from_smiles('[13CH3][NH3+]')
+    assert Molecule.from_bytes(molecule.to_bytes(), validate=False) == molecule
+    assert pickle.loads(pickle.dumps(molecule)) == molecule
+
+    store = MoleculeStore(tmp_path / 'library.store', create=True)
+    store.append([molecule, Molecule.from_smiles('CCO')])
+    trusted = MoleculeStore(tmp_path / 'library.store', validate=False)
+    assert trusted[0] == molecule
+    assert validate(trusted[:]).tolist() == [VALID, VALID]
+    assert pickle.loads(pickle.dumps(trusted))[1] == store[1]
@@ -0,0 +1,50 @@
+"""
+Validation of molecules, as a separate step.
+
+Molecules are validated as they're built, unless they're built with
+``validate=False`` (by ``Molecule``, ``Molecule.from_arrays``,
+``Molecule.build_many``, ``Molecule.from_bytes`` or ``MoleculeStore``).
+This is much faster for molecules which are known to be valid, such as
+those written by ``oxmol``. Molecules from other sources can then be
+checked in bulk with ``validate``, which gives an error code per
+molecule rather than raising.
+
+The error codes are ``VALID`` or one of the kinds of invalid molecule,
+which are described by ``ERROR_MESSAGES``.
+
+"""
+from typing import Iterable, Optional
+import numpy as np
+from .oxmol import (
+    ERROR_MESSAGES as _ERROR_MESSAGES,
+    PyDefaultMolecule,
+    validate as _validate,
+)
+
+VALID = 0
+HYPERVALENT_ATOM = 1
+DUPLICATE_BOND = 2
+MISPLACED_BOND = 3
+IMPOSSIBLE_ISOTOPE = 4
+
+#: The message of the ``ValueError`` raised for each error code.
+ERROR_MESSAGES = dict(enumerate(_ERROR_MESSAGES, start=1))
+
+
+def validate(
+        molecules: Iterable[PyDefaultMolecule],
+        threads: Optional[int] = None
+) -> np.ndarray:
+    """
+    Validate many molecules in parallel, without holding the GIL. Each
+    is checked for duplicate bonds, impossible isotopes and hypervalent
+    atoms, as it would have been when it was built.
+
+    :param molecules: the molecules
+    :param threads: the number of threads to use, by default one per\
+    core
+    :return: a ``uint8`` array of error codes, in the same order, which\
+    is ``VALID`` (``0``) for valid molecules
+
+    """
+    return _validate(molecules, threads)
@@ -38,4 +38,5 @@ setup(
         "Typing :: Typed"
     ],
     python_requires='>=3.6',
+    install_requires=["numpy"],
 )
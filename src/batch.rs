@@ -0,0 +1,182 @@
+use std::ops::Range;
+
+use pyo3::exceptions;
+use pyo3::prelude::*;
+use pyo3::types::PyType;
+use rayon::prelude::*;
+
+use chemcore::molecule::Error;
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+use crate::columns::{AtomColumns,BondColumns,extract_column,extract_optional_column,molecule_spec_slice};
+use crate::default_molecule::PyDefaultMolecule;
+use crate::exceptions::{error_message,get_ValueError};
+use crate::parallel::run_without_gil;
+use crate::spec::{PyAtomSpec,PyBondSpec};
+
+pub enum BuildError {
+    InvalidSpec(&'static str),
+    InvalidMolecule(Error),
+}
+
+impl BuildError {
+    pub fn message(self) -> &'static str {
+        match self {
+            BuildError::InvalidSpec(message) => message,
+            BuildError::InvalidMolecule(error_type) => error_message(error_type),
+        }
+    }
+}
+
+pub type BuildResult = Result<PyDefaultMolecule, BuildError>;
+
+pub fn into_molecules(py: Python, results: Vec<BuildResult>, return_errors: bool) -> PyResult<Vec<PyObject>> {
+    let mut molecules = Vec::with_capacity(results.len());
+
+    for (index, result) in results.into_iter().enumerate() {
+        match result {
+            Ok(molecule) => molecules.push(Py::new(py, molecule)?.to_object(py)),
+            Err(build_error) => {
+                let message = format!("Record {}: {}", index, build_error.message());
+                if !return_errors {
+                    return Err(exceptions::ValueError::py_err(message));
+                }
+                let error = py.get_type::<exceptions::ValueError>().call1((message,))?;
+                molecules.push(PyObject::from(error));
+            }
+        }
+    }
+    Ok(molecules)
+}
+
+fn ranges(counts: &[u32], total: usize) -> PyResult<Vec<Range<usize>>> {
+    let mut ranges = Vec::with_capacity(counts.len());
+    let mut start = 0;
+
+    for count in counts {
+        let end = start + *count as usize;
+        ranges.push(start..end);
+        start = end;
+    }
+
+    if start != total {
+        return Err(get_ValueError("Counts do not sum to the array lengths."));
+    }
+    Ok(ranges)
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Create many molecules at once. The molecules are validated in
+    /// parallel, without holding the GIL.
+    ///
+    /// :param specs: an iterable of ``(atoms, bonds)`` tuples, as
+    ///     would be passed to the constructor
+    /// :param threads: the number of threads to use, by default one
+    ///     per core
+    /// :param return_errors: if ``True``, invalid records give a
+    ///     ``ValueError`` instance in the output rather than raising
+    /// :param validate: whether to validate the molecules (see
+    ///     ``Molecule``)
+    /// :return: a ``list`` of molecules, in the same order as ``specs``
+    #[classmethod]
+    #[args(threads = "None", return_errors = "false", validate = "true")]
+    fn build_many(
+        _cls: &PyType,
+        specs: &PyAny,
+        threads: Option<usize>,
+        return_errors: bool,
+        validate: bool
+    ) -> PyResult<Vec<PyObject>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+
+        let mut spec_molecules = Vec::new();
+        for item in specs.iter()? {
+            let (py_atoms, py_bonds): (Vec<PyAtomSpec>, Vec<PyBondSpec>) = item?.extract()?;
+            let atoms: Vec<Atom> = py_atoms.into_iter().map(|atom| atom.into()).collect();
+            let bonds: Vec<Bond> = py_bonds.into_iter().map(|bond| bond.into()).collect();
+            spec_molecules.push(Molecule{ atoms, bonds });
+        }
+
+        let results = run_without_gil(py, threads, || {
+            spec_molecules.into_par_iter()
+                .map(|molecule| {
+                    PyDefaultMolecule::build_with(molecule, validate).map_err(BuildError::InvalidMolecule)
+                })
+                .collect::<Vec<BuildResult>>()
+        })?;
+        into_molecules(py, results, return_errors)
+    }
+
+    /// Create many molecules at once from the concatenated columns of
+    /// each molecule (see ``from_arrays``). The molecules are validated
+    /// in parallel, without holding the GIL.
+    ///
+    /// :param atom_counts: the number of atoms in each molecule
+    /// :param bond_counts: the number of bonds in each molecule. Bond
+    ///     atom indices are relative to the first atom of their molecule
+    /// :param threads: the number of threads to use, by default one
+    ///     per core
+    /// :param return_errors: if ``True``, invalid records give a
+    ///     ``ValueError`` instance in the output rather than raising
+    /// :param validate: whether to validate the molecules (see
+    ///     ``Molecule``)
+    /// :return: a ``list`` of molecules, in the same order as
+    ///     ``atom_counts``
+    #[classmethod]
+    #[args(
+        hydrogens = "None",
+        charges = "None",
+        isotopes = "None",
+        parities = "None",
+        bond_counts = "None",
+        bond_src = "None",
+        bond_dst = "None",
+        bond_orders = "None",
+        bond_parities = "None",
+        threads = "None",
+        return_errors = "false",
+        validate = "true"
+    )]
+    fn build_many_from_arrays(
+        _cls: &PyType,
+        atom_counts: &PyAny,
+        elements: &PyAny,
+        hydrogens: Option<&PyAny>,
+        charges: Option<&PyAny>,
+        isotopes: Option<&PyAny>,
+        parities: Option<&PyAny>,
+        bond_counts: Option<&PyAny>,
+        bond_src: Option<&PyAny>,
+        bond_dst: Option<&PyAny>,
+        bond_orders: Option<&PyAny>,
+        bond_parities: Option<&PyAny>,
+        threads: Option<usize>,
+        return_errors: bool,
+        validate: bool
+    ) -> PyResult<Vec<PyObject>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+
+        let atom_counts: Vec<u32> = extract_column(py, atom_counts, "uint32", "atom_counts")?;
+        let bond_counts: Vec<u32> = extract_optional_column(py, bond_counts, "uint32", "bond_counts", atom_counts.len())?;
+        let atoms = AtomColumns::extract(py, elements, hydrogens, charges, isotopes, parities)?;
+        let bonds = BondColumns::extract(py, bond_src, bond_dst, bond_orders, bond_parities)?;
+
+        let atom_ranges = ranges(&atom_counts, atoms.len())?;
+        let bond_ranges = ranges(&bond_counts, bonds.len())?;
+
+        let results = run_without_gil(py, threads, || {
+            atom_ranges.into_par_iter()
+                .zip(bond_ranges.into_par_iter())
+                .map(|(atom_range, bond_range)| {
+                    let molecule = molecule_spec_slice(&atoms, atom_range, &bonds, bond_range)
+                        .map_err(BuildError::InvalidSpec)?;
+                    PyDefaultMolecule::build_with(molecule, validate).map_err(BuildError::InvalidMolecule)
+                })
+                .collect::<Vec<BuildResult>>()
+        })?;
+        into_molecules(py, results, return_errors)
+    }
+}
@@ -0,0 +1,308 @@
+use std::convert::TryFrom;
+
+use flate2::Crc;
+use pyo3::prelude::*;
+use pyo3::types::{PyBytes,PyType};
+
+use chemcore::molecule::Parity;
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+use crate::bond_order::PyBondOrder;
+use crate::canonical::bond_order_value;
+use crate::default_molecule::PyDefaultMolecule;
+use crate::element::PyElement;
+use crate::exceptions::{exception_from_error,get_ValueError};
+
+const MAGIC: &[u8; 3] = b"OXM";
+const VERSION: u8 = 1;
+
+const CHECKSUM: u8 = 1;
+const CHARGES: u8 = 1 << 1;
+const ISOTOPES: u8 = 1 << 2;
+const ATOM_PARITIES: u8 = 1 << 3;
+const BOND_PARITIES: u8 = 1 << 4;
+
+/// The fewest bytes a bond is encoded in: a byte for each atom index.
+const MIN_BOND_SIZE: usize = 2;
+
+const TRUNCATED: &str = "Molecule bytes are truncated.";
+
+fn push_varint(bytes: &mut Vec<u8>, mut value: usize) {
+    while value >= 0x80 {
+        bytes.push((value as u8 & 0x7f) | 0x80);
+        value >>= 7;
+    }
+    bytes.push(value as u8);
+}
+
+fn parity_code(parity: Option<Parity>) -> u8 {
+    match parity {
+        None => 0,
+        Some(Parity::Positive) => 1,
+        Some(Parity::Negative) => 2,
+    }
+}
+
+fn parity_from_code(code: u8) -> Result<Option<Parity>, &'static str> {
+    match code {
+        0 => Ok(None),
+        1 => Ok(Some(Parity::Positive)),
+        2 => Ok(Some(Parity::Negative)),
+        _ => Err("Unknown parity in molecule bytes."),
+    }
+}
+
+/// Pack two-bit codes, four to a byte.
+fn push_codes<I: Iterator<Item = u8>>(bytes: &mut Vec<u8>, codes: I) {
+    let mut byte = 0;
+    let mut n_codes = 0;
+    for code in codes {
+        byte |= code << (2 * (n_codes % 4));
+        n_codes += 1;
+        if n_codes % 4 == 0 {
+            bytes.push(byte);
+            byte = 0;
+        }
+    }
+    if n_codes % 4 != 0 {
+        bytes.push(byte);
+    }
+}
+
+/// Encode a molecule as bytes: a magic number and version, a flags byte,
+/// the numbers of atoms and bonds (as LEB128 varints) and then columns of
+/// atom and bond properties. Charges, isotopes and parities are only
+/// stored if any atom or bond has them; parities and bond orders are
+/// packed into two bits each, and bonds are stored as varint atom
+/// indices. If `checksum`, a CRC-32 of the preceding bytes is appended.
+pub fn encode(molecule: &Molecule, checksum: bool) -> Vec<u8> {
+    let atoms = &molecule.atoms;
+    let bonds = &molecule.bonds;
+
+    let mut flags = if checksum { CHECKSUM } else { 0 };
+    if atoms.iter().any(|atom| atom.ion != 0) {
+        flags |= CHARGES;
+    }
+    if atoms.iter().any(|atom| atom.isotope.is_some()) {
+        flags |= ISOTOPES;
+    }
+    if atoms.iter().any(|atom| atom.parity.is_some()) {
+        flags |= ATOM_PARITIES;
+    }
+    if bonds.iter().any(|bond| bond.parity.is_some()) {
+        flags |= BOND_PARITIES;
+    }
+
+    let mut bytes = Vec::with_capacity(8 + 2 * atoms.len() + 3 * bonds.len());
+    bytes.extend(MAGIC);
+    bytes.push(VERSION);
+    bytes.push(flags);
+    push_varint(&mut bytes, atoms.len());
+    push_varint(&mut bytes, bonds.len());
+
+    bytes.extend(atoms.iter().map(|atom| atom.element.atomic_number() as u8));
+    bytes.extend(atoms.iter().map(|atom| atom.hydrogens));
+    if flags & CHARGES != 0 {
+        bytes.extend(atoms.iter().map(|atom| atom.ion as u8));
+    }
+    if flags & ISOTOPES != 0 {
+        for atom in atoms {
+            bytes.extend(&atom.isotope.unwrap_or(0).to_le_bytes());
+        }
+    }
+    if flags & ATOM_PARITIES != 0 {
+        push_codes(&mut bytes, atoms.iter().map(|atom| parity_code(atom.parity)));
+    }
+
+    for bond in bonds {
+        push_varint(&mut bytes, bond.sid);
+        push_varint(&mut bytes, bond.tid);
+    }
+    push_codes(&mut bytes, bonds.iter().map(|bond| bond_order_value(bond.order)));
+    if flags & BOND_PARITIES != 0 {
+        push_codes(&mut bytes, bonds.iter().map(|bond| parity_code(bond.parity)));
+    }
+
+    if checksum {
+        let mut crc = Crc::new();
+        crc.update(&bytes);
+        bytes.extend(&crc.sum().to_le_bytes());
+    }
+    bytes
+}
+
+struct Reader<'a> {
+    bytes: &'a [u8],
+    position: usize,
+}
+
+impl<'a> Reader<'a> {
+    fn take(&mut self, n_bytes: usize) -> Result<&'a [u8], &'static str> {
+        let end = self.position.checked_add(n_bytes).ok_or(TRUNCATED)?;
+        let taken = self.bytes.get(self.position..end).ok_or(TRUNCATED)?;
+        self.position = end;
+        Ok(taken)
+    }
+
+    fn varint(&mut self) -> Result<usize, &'static str> {
+        let mut value = 0;
+        for shift in (0..64).step_by(7) {
+            let byte = self.take(1)?[0];
+            value |= ((byte & 0x7f) as usize) << shift;
+            if byte & 0x80 == 0 {
+                return Ok(value);
+            }
+        }
+        Err("Invalid integer in molecule bytes.")
+    }
+
+    fn codes(&mut self, n_codes: usize) -> Result<Vec<u8>, &'static str> {
+        let packed = self.take((n_codes + 3) / 4)?;
+        Ok((0..n_codes).map(|index| (packed[index / 4] >> (2 * (index % 4))) & 0b11).collect())
+    }
+}
+
+/// Decode bytes written by `encode`. A checksum only guards against
+/// accidental corruption, so everything read is still checked: counts
+/// against the bytes left, and bonds' atom indices against the atoms.
+pub fn decode(bytes: &[u8]) -> Result<Molecule, &'static str> {
+    if bytes.len() < 5 || &bytes[..3] != MAGIC {
+        return Err("Not an encoded molecule.");
+    }
+    if bytes[3] != VERSION {
+        return Err("Molecule bytes were written by an unsupported version.");
+    }
+    let flags = bytes[4];
+
+    let payload = match flags & CHECKSUM {
+        0 => bytes,
+        _ => {
+            if bytes.len() < 9 {
+                return Err(TRUNCATED);
+            }
+            let (payload, stored) = bytes.split_at(bytes.len() - 4);
+            let mut crc = Crc::new();
+            crc.update(payload);
+            if crc.sum().to_le_bytes() != stored {
+                return Err("Molecule bytes are corrupt (checksum mismatch).");
+            }
+            payload
+        }
+    };
+
+    let mut reader = Reader{ bytes: payload, position: 5 };
+    let n_atoms = reader.varint()?;
+    let n_bonds = reader.varint()?;
+
+    let elements = reader.take(n_atoms)?;
+    let hydrogens = reader.take(n_atoms)?;
+    let charges = match flags & CHARGES {
+        0 => None,
+        _ => Some(reader.take(n_atoms)?),
+    };
+    let isotopes = match flags & ISOTOPES {
+        0 => None,
+        _ => Some(reader.take(2 * n_atoms)?),
+    };
+    let atom_parities = match flags & ATOM_PARITIES {
+        0 => None,
+        _ => Some(reader.codes(n_atoms)?),
+    };
+
+    let mut atoms = Vec::with_capacity(n_atoms);
+    for index in 0..n_atoms {
+        let isotope = isotopes.map(|isotopes| u16::from_le_bytes([isotopes[2 * index], isotopes[2 * index + 1]]));
+        atoms.push(Atom {
+            element: PyElement::try_from(elements[index] as u16)?.element,
+            hydrogens: hydrogens[index],
+            ion: charges.map_or(0, |charges| charges[index] as i8),
+            isotope: isotope.filter(|isotope| *isotope != 0),
+            parity: match &atom_parities {
+                Some(parities) => parity_from_code(parities[index])?,
+                None => None,
+            },
+        });
+    }
+
+    // Each bond takes at least two bytes, so a larger count can't be
+    // right, and mustn't be allocated for.
+    if n_bonds > (payload.len() - reader.position) / MIN_BOND_SIZE {
+        return Err(TRUNCATED);
+    }
+    let mut atom_pairs = Vec::with_capacity(n_bonds);
+    for _ in 0..n_bonds {
+        let (sid, tid) = (reader.varint()?, reader.varint()?);
+        if sid >= n_atoms || tid >= n_atoms || sid == tid {
+            return Err("Invalid bond in molecule bytes.");
+        }
+        atom_pairs.push((sid, tid));
+    }
+    let orders = reader.codes(n_bonds)?;
+    let bond_parities = match flags & BOND_PARITIES {
+        0 => None,
+        _ => Some(reader.codes(n_bonds)?),
+    };
+    if reader.position != payload.len() {
+        return Err("Unexpected data after the encoded molecule.");
+    }
+
+    let mut bonds = Vec::with_capacity(n_bonds);
+    for (index, (sid, tid)) in atom_pairs.into_iter().enumerate() {
+        bonds.push(Bond {
+            sid,
+            tid,
+            order: PyBondOrder::try_from(orders[index])?.into(),
+            parity: match &bond_parities {
+                Some(parities) => parity_from_code(parities[index])?,
+                None => None,
+            },
+        });
+    }
+    Ok(Molecule{ atoms, bonds })
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Encode the molecule in a compact, versioned binary format: the
+    /// atoms' properties and the bonds are stored as packed small
+    /// integers, and properties no atom or bond has (e.g. charges) are
+    /// left out. This is also how molecules are pickled.
+    ///
+    /// :param checksum: whether to append a CRC-32, which is checked
+    ///     when decoding to detect accidental corruption
+    /// :return: the encoded molecule
+    #[args(checksum = "true")]
+    fn to_bytes(&self, checksum: bool) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let molecule = self.to_spec();
+        Ok(PyBytes::new(py, &encode(&molecule, checksum)).to_object(py))
+    }
+
+    /// Create a molecule from bytes written by ``Molecule.to_bytes``.
+    /// If the bytes carry a checksum, this is verified. The checksum
+    /// only detects accidental corruption, so the bytes are checked in
+    /// full either way.
+    ///
+    /// :param data: the encoded molecule
+    /// :param validate: whether to validate the molecule (see
+    ///     ``Molecule``). Pickled molecules aren't validated again.
+    /// :return: the molecule
+    /// :raises ValueError: if the data is truncated, corrupt or
+    ///     written by an unsupported version
+    #[classmethod]
+    #[args(validate = "true")]
+    fn from_bytes(_cls: &PyType, data: &[u8], validate: bool) -> PyResult<Self> {
+        let molecule = decode(data).map_err(get_ValueError)?;
+        PyDefaultMolecule::build_with(molecule, validate).map_err(exception_from_error)
+    }
+
+    fn __reduce__(&self) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let from_bytes = py.get_type::<PyDefaultMolecule>().getattr("from_bytes")?;
+        let molecule = self.to_spec();
+        let bytes = PyBytes::new(py, &encode(&molecule, true));
+        Ok((from_bytes, (bytes, false)).to_object(py))
+    }
+}
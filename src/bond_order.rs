@@ -2,11 +2,19 @@ use std::convert::TryFrom;
 
 use pyo3::class::{PyObjectProtocol, basic::CompareOp};
 use pyo3::prelude::*;
+use pyo3::exceptions;
+use once_cell::sync::OnceCell;
 
 use chemcore::molecule::BondOrder;
 
 use crate::exceptions::{get_ValueError, get_NotImplementedError};
 
+/// A bond order. This is a Python class representing a Rust enum. The bond
+/// orders represented in ``chemcore::molecule`` are ``Zero``, ``Single``,
+/// ``Double`` and ``Triple``.
+///
+/// :param order: an int in range(0, 4) representing the bond order as
+///     an ``int``.
 #[pyclass(subclass)]
 #[derive(Copy,Clone,Debug)]
 pub struct PyBondOrder {
@@ -40,6 +48,60 @@ impl Into<BondOrder> for PyBondOrder {
     }
 }
 
+/// One Python instance per bond order, indexed by the order as an int.
+static INTERNED: OnceCell<Vec<Py<PyBondOrder>>> = OnceCell::new();
+
+/// Create the interned bond order instances. Called once, when the
+/// module is initialised.
+pub fn intern_bond_orders(py: Python) -> PyResult<()> {
+    let mut bond_orders = Vec::with_capacity(4);
+    for order in 0..4 {
+        let bond_order = PyBondOrder::try_from(order).map_err(get_ValueError)?;
+        bond_orders.push(Py::new(py, bond_order)?);
+    }
+    let _ = INTERNED.set(bond_orders);
+    Ok(())
+}
+
+fn order_index(bond_order: BondOrder) -> usize {
+    match bond_order {
+        BondOrder::Zero => 0,
+        BondOrder::Single => 1,
+        BondOrder::Double => 2,
+        BondOrder::Triple => 3,
+    }
+}
+
+impl PyBondOrder {
+    /// The interned Python instance of a bond order, so that the same
+    /// order is always the same object.
+    pub fn interned(py: Python, bond_order: BondOrder) -> PyResult<Py<PyBondOrder>> {
+        match INTERNED.get() {
+            Some(bond_orders) => Ok(bond_orders[order_index(bond_order)].clone_ref(py)),
+            None => Py::new(py, PyBondOrder{ bond_order }),
+        }
+    }
+
+    fn is_interned(&self, other: &PyAny) -> bool {
+        match INTERNED.get() {
+            Some(bond_orders) => bond_orders[order_index(self.bond_order)].as_ptr() == other.as_ptr(),
+            None => false,
+        }
+    }
+}
+
+/// Convert a ``BondOrder`` or ``int`` to a bond order.
+pub fn extract_bond_order(value: &PyAny) -> PyResult<PyBondOrder> {
+    if let Ok(order) = value.extract::<PyBondOrder>() {
+        return Ok(order);
+    }
+    if let Ok(order) = value.extract::<i64>() {
+        let order = u8::try_from(order).unwrap_or(u8::MAX);
+        return PyBondOrder::try_from(order).map_err(get_ValueError);
+    }
+    Err(exceptions::TypeError::py_err(format!("Can't convert {} to PyBondOrder", value)))
+}
+
 #[pymethods]
 impl PyBondOrder {
     #[new]
@@ -50,19 +112,14 @@ impl PyBondOrder {
         }
     }
 
+    /// Get the bond order as an integer in range(0, 4).
     fn as_int(&self) -> PyResult<u8> {
-        let order = match self.bond_order {
-            BondOrder::Zero => 0,
-            BondOrder::Single => 1,
-            BondOrder::Double => 2,
-            BondOrder::Triple => 3,
-        };
-        Ok(order)
+        Ok(order_index(self.bond_order) as u8)
     }
 }
 
 #[pyproto]
-impl PyObjectProtocol for PyBondOrder {
+impl<'p> PyObjectProtocol<'p> for PyBondOrder {
     fn __repr__(&self) -> PyResult<String> {
         Ok(format!("PyBondOrder::{:?}", self.bond_order))
     }
@@ -81,12 +138,15 @@ impl PyObjectProtocol for PyBondOrder {
         Ok(self.as_int()? as isize)
     }
 
-    fn __richcmp__(&self, other: Self, op: CompareOp) -> PyResult<bool> {
-        let value = match op {
-            CompareOp::Eq => self.bond_order == other.bond_order,
-            CompareOp::Ne => self.bond_order != other.bond_order,
-            _ => return Err(get_NotImplementedError("Operator not implemented."))
+    fn __richcmp__(&self, other: &'p PyAny, op: CompareOp) -> PyResult<bool> {
+        let equal = self.is_interned(other) || match other.extract::<PyRef<PyBondOrder>>() {
+            Ok(other) => self.bond_order == other.bond_order,
+            Err(_) => false,
         };
-        Ok(value)
+        match op {
+            CompareOp::Eq => Ok(equal),
+            CompareOp::Ne => Ok(!equal),
+            _ => Err(get_NotImplementedError("Operator not implemented."))
+        }
     }
 }
\ No newline at end of file
@@ -0,0 +1,397 @@
+use pyo3::prelude::*;
+use pyo3::class::PyObjectProtocol;
+use pyo3::types::PyType;
+
+use chemcore::molecule::Error;
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+use crate::bond_order::extract_bond_order;
+use crate::canonical::bond_order_value;
+use crate::default_molecule::PyDefaultMolecule;
+use crate::element::extract_element;
+use crate::exceptions::{exception_from_error,get_ValueError,missing_atom,missing_bond};
+use crate::fragments::copy_atom;
+use crate::parity::extract_parity;
+use crate::validation::{check_bonded_atom,check_graph};
+
+struct BuilderAtom {
+    atom: Atom,
+    /// The bonds to this atom, as indices into the builder's bonds.
+    bonds: Vec<usize>,
+}
+
+/// An editable molecule, for making many similar molecules (e.g. R-group
+/// decoration or reaction products) without rebuilding each one from
+/// atom and bond specs.
+///
+/// Atoms and bonds are added and removed in constant (amortised) time.
+/// Atom IDs are kept when other atoms are removed, so they aren't
+/// necessarily the indices of the atoms in the frozen molecule (see
+/// ``atom_ids``). Each edit checks only the atoms it touches, raising
+/// ``ValueError`` and leaving the builder unchanged if it would make
+/// an invalid molecule, so the builder is always valid.
+#[pyclass(module = "oxmol.oxmol")]
+pub struct PyMoleculeBuilder {
+    atoms: Vec<Option<BuilderAtom>>,
+    bonds: Vec<Option<Bond>>,
+    n_atoms: usize,
+    n_bonds: usize,
+}
+
+impl PyMoleculeBuilder {
+    fn atom(&self, atom_id: usize) -> PyResult<&BuilderAtom> {
+        match self.atoms.get(atom_id) {
+            Some(Some(atom)) => Ok(atom),
+            _ => Err(missing_atom(atom_id)),
+        }
+    }
+
+    fn bond_between(&self, sid: usize, tid: usize) -> PyResult<Option<usize>> {
+        self.atom(tid)?;
+        let found = self.atom(sid)?.bonds.iter()
+            .copied()
+            .find(|bond| {
+                let bond = self.bonds[*bond].as_ref().expect("Atoms only list bonds which exist");
+                bond.sid == tid || bond.tid == tid
+            });
+        Ok(found)
+    }
+
+    fn existing_bond(&self, sid: usize, tid: usize) -> PyResult<usize> {
+        match self.bond_between(sid, tid)? {
+            Some(bond) => Ok(bond),
+            None => Err(missing_bond(sid, tid)),
+        }
+    }
+
+    fn bond_order_sum(&self, atom_id: usize) -> u16 {
+        match &self.atoms[atom_id] {
+            Some(atom) => atom.bonds.iter()
+                .map(|bond| bond_order_value(self.bonds[*bond].as_ref().unwrap().order) as u16)
+                .sum(),
+            None => 0,
+        }
+    }
+
+    /// Replace an atom, if it's still valid with its bonds.
+    fn set_atom(&mut self, atom_id: usize, atom: Atom) -> PyResult<()> {
+        self.atom(atom_id)?;
+        check_bonded_atom(&atom, self.bond_order_sum(atom_id)).map_err(exception_from_error)?;
+        if let Some(builder_atom) = &mut self.atoms[atom_id] {
+            builder_atom.atom = atom;
+        }
+        Ok(())
+    }
+
+    fn edit_atom<F: FnOnce(&mut Atom)>(&mut self, atom_id: usize, edit: F) -> PyResult<()> {
+        let mut atom = copy_atom(&self.atom(atom_id)?.atom);
+        edit(&mut atom);
+        self.set_atom(atom_id, atom)
+    }
+
+    fn push_bond(&mut self, bond: Bond) {
+        let index = self.bonds.len();
+        for atom_id in &[bond.sid, bond.tid] {
+            if let Some(atom) = &mut self.atoms[*atom_id] {
+                atom.bonds.push(index);
+            }
+        }
+        self.bonds.push(Some(bond));
+        self.n_bonds += 1;
+    }
+
+    fn take_bond(&mut self, index: usize) {
+        if let Some(bond) = self.bonds[index].take() {
+            for atom_id in &[bond.sid, bond.tid] {
+                if let Some(atom) = &mut self.atoms[*atom_id] {
+                    if let Some(position) = atom.bonds.iter().position(|other| *other == index) {
+                        atom.bonds.swap_remove(position);
+                    }
+                }
+            }
+            self.n_bonds -= 1;
+        }
+    }
+
+    /// The molecule, with atoms renumbered in order of their IDs, so
+    /// that parities are unchanged.
+    pub fn to_spec(&self) -> Molecule {
+        let mut indices = vec![0; self.atoms.len()];
+        let mut atoms = Vec::with_capacity(self.n_atoms);
+        for (atom_id, atom) in self.atoms.iter().enumerate() {
+            if let Some(atom) = atom {
+                indices[atom_id] = atoms.len();
+                atoms.push(copy_atom(&atom.atom));
+            }
+        }
+        let bonds = self.bonds.iter()
+            .filter_map(|bond| bond.as_ref())
+            .map(|bond| Bond{
+                sid: indices[bond.sid],
+                tid: indices[bond.tid],
+                order: bond.order,
+                parity: bond.parity,
+            })
+            .collect();
+        Molecule{ atoms, bonds }
+    }
+}
+
+#[pymethods]
+impl PyMoleculeBuilder {
+    #[new]
+    fn new() -> Self {
+        Self{ atoms: Vec::new(), bonds: Vec::new(), n_atoms: 0, n_bonds: 0 }
+    }
+
+    /// Start editing a copy of a molecule. Atom IDs are the molecule's
+    /// atom indices.
+    ///
+    /// :param molecule: the molecule to start from, which is validated
+    ///     if it was built with ``validate=False``
+    /// :return: a new builder
+    #[classmethod]
+    fn from_molecule(_cls: &PyType, molecule: PyRef<PyDefaultMolecule>) -> PyResult<Self> {
+        check_graph(molecule.graph()).map_err(exception_from_error)?;
+        let molecule = molecule.to_spec();
+        let mut builder = Self::new();
+        builder.atoms.reserve(molecule.atoms.len());
+        for atom in molecule.atoms {
+            builder.atoms.push(Some(BuilderAtom{ atom, bonds: Vec::new() }));
+        }
+        builder.n_atoms = builder.atoms.len();
+        builder.bonds.reserve(molecule.bonds.len());
+        for bond in molecule.bonds {
+            builder.push_bond(bond);
+        }
+        Ok(builder)
+    }
+
+    /// Add an atom.
+    ///
+    /// :param element: an ``Element``, ``int`` (atomic number), or
+    ///     ``str`` (element symbol)
+    /// :param hydrogens: the number of implicit hydrogen atoms
+    /// :param ion: the formal charge on the atom
+    /// :param isotope: an optional ``int``, the isotope of the atom
+    /// :param parity: an optional ``Parity`` or ``bool``, the chirality
+    /// :return: the new atom's ID
+    #[args(hydrogens = "0", ion = "0", isotope = "None", parity = "None")]
+    fn add_atom(
+        &mut self,
+        element: &PyAny,
+        hydrogens: u8,
+        ion: i8,
+        isotope: Option<u16>,
+        parity: Option<&PyAny>
+    ) -> PyResult<usize> {
+        let atom = Atom {
+            element: extract_element(element)?.element,
+            hydrogens,
+            ion,
+            isotope,
+            parity: extract_parity(parity)?.map(|parity| parity.parity),
+        };
+        check_bonded_atom(&atom, 0).map_err(exception_from_error)?;
+        self.atoms.push(Some(BuilderAtom{ atom, bonds: Vec::new() }));
+        self.n_atoms += 1;
+        Ok(self.atoms.len() - 1)
+    }
+
+    /// Add a bond between two atoms.
+    ///
+    /// :param sid: the ID of the first atom in the bond
+    /// :param tid: the ID of the last atom in the bond
+    /// :param order: a ``BondOrder`` or an ``int``, the order of the bond
+    /// :param parity: an optional ``Parity`` or ``bool``, the
+    ///     stereochemistry of the bond (only valid for double bonds)
+    /// :raises ValueError: if the atoms are already bonded, or the bond
+    ///     would make either atom hypervalent
+    #[args(parity = "None")]
+    fn add_bond(&mut self, sid: usize, tid: usize, order: &PyAny, parity: Option<&PyAny>) -> PyResult<()> {
+        if sid == tid {
+            return Err(get_ValueError("Can't bond atom to itself"));
+        }
+        if self.bond_between(sid, tid)?.is_some() {
+            return Err(exception_from_error(Error::DuplicateBond));
+        }
+        let order = extract_bond_order(order)?.bond_order;
+        let parity = extract_parity(parity)?.map(|parity| parity.parity);
+        for atom_id in &[sid, tid] {
+            let bond_order_sum = self.bond_order_sum(*atom_id) + bond_order_value(order) as u16;
+            check_bonded_atom(&self.atom(*atom_id)?.atom, bond_order_sum).map_err(exception_from_error)?;
+        }
+        self.push_bond(Bond{ sid, tid, order, parity });
+        Ok(())
+    }
+
+    /// Remove an atom and its bonds.
+    ///
+    /// :param atom_id: the atom's ID
+    fn remove_atom(&mut self, atom_id: usize) -> PyResult<()> {
+        let bonds = self.atom(atom_id)?.bonds.clone();
+        for bond in bonds {
+            self.take_bond(bond);
+        }
+        self.atoms[atom_id] = None;
+        self.n_atoms -= 1;
+        Ok(())
+    }
+
+    /// Remove the bond between two atoms.
+    ///
+    /// :param sid: the ID of one atom in the bond
+    /// :param tid: the ID of the other atom in the bond
+    fn remove_bond(&mut self, sid: usize, tid: usize) -> PyResult<()> {
+        let bond = self.existing_bond(sid, tid)?;
+        self.take_bond(bond);
+        Ok(())
+    }
+
+    /// Change an atom's element.
+    ///
+    /// :param atom_id: the atom's ID
+    /// :param element: an ``Element``, ``int`` (atomic number), or
+    ///     ``str`` (element symbol)
+    fn set_element(&mut self, atom_id: usize, element: &PyAny) -> PyResult<()> {
+        let element = extract_element(element)?.element;
+        self.edit_atom(atom_id, |atom| atom.element = element)
+    }
+
+    /// Change an atom's number of implicit hydrogens.
+    ///
+    /// :param atom_id: the atom's ID
+    /// :param hydrogens: the number of implicit hydrogen atoms
+    fn set_hydrogens(&mut self, atom_id: usize, hydrogens: u8) -> PyResult<()> {
+        self.edit_atom(atom_id, |atom| atom.hydrogens = hydrogens)
+    }
+
+    /// Change an atom's formal charge.
+    ///
+    /// :param atom_id: the atom's ID
+    /// :param ion: the formal charge
+    fn set_charge(&mut self, atom_id: usize, ion: i8) -> PyResult<()> {
+        self.edit_atom(atom_id, |atom| atom.ion = ion)
+    }
+
+    /// Change (or, with ``None``, clear) an atom's isotope.
+    ///
+    /// :param atom_id: the atom's ID
+    /// :param isotope: an optional ``int``, the isotope
+    fn set_isotope(&mut self, atom_id: usize, isotope: Option<u16>) -> PyResult<()> {
+        self.edit_atom(atom_id, |atom| atom.isotope = isotope)
+    }
+
+    /// Change (or, with ``None``, clear) an atom's parity.
+    ///
+    /// :param atom_id: the atom's ID
+    /// :param parity: an optional ``Parity`` or ``bool``, the chirality
+    fn set_atom_parity(&mut self, atom_id: usize, parity: Option<&PyAny>) -> PyResult<()> {
+        let parity = extract_parity(parity)?.map(|parity| parity.parity);
+        self.edit_atom(atom_id, |atom| atom.parity = parity)
+    }
+
+    /// Change the order of the bond between two atoms.
+    ///
+    /// :param sid: the ID of one atom in the bond
+    /// :param tid: the ID of the other atom in the bond
+    /// :param order: a ``BondOrder`` or an ``int``
+    /// :raises ValueError: if the new order would make either atom
+    ///     hypervalent
+    fn set_bond_order(&mut self, sid: usize, tid: usize, order: &PyAny) -> PyResult<()> {
+        let index = self.existing_bond(sid, tid)?;
+        let order = extract_bond_order(order)?.bond_order;
+        let bond = self.bonds[index].as_ref().unwrap();
+        let change = bond_order_value(order) as i32 - bond_order_value(bond.order) as i32;
+        for atom_id in &[sid, tid] {
+            let bond_order_sum = (self.bond_order_sum(*atom_id) as i32 + change) as u16;
+            check_bonded_atom(&self.atom(*atom_id)?.atom, bond_order_sum).map_err(exception_from_error)?;
+        }
+        if let Some(bond) = &mut self.bonds[index] {
+            bond.order = order;
+        }
+        Ok(())
+    }
+
+    /// Change (or, with ``None``, clear) the parity of the bond between
+    /// two atoms.
+    ///
+    /// :param sid: the ID of one atom in the bond
+    /// :param tid: the ID of the other atom in the bond
+    /// :param parity: an optional ``Parity`` or ``bool``
+    fn set_bond_parity(&mut self, sid: usize, tid: usize, parity: Option<&PyAny>) -> PyResult<()> {
+        let index = self.existing_bond(sid, tid)?;
+        let parity = extract_parity(parity)?.map(|parity| parity.parity);
+        if let Some(bond) = &mut self.bonds[index] {
+            bond.parity = parity;
+        }
+        Ok(())
+    }
+
+    /// Return how many atoms are in the builder.
+    fn order(&self) -> usize {
+        self.n_atoms
+    }
+
+    /// Return how many bonds are in the builder.
+    fn size(&self) -> usize {
+        self.n_bonds
+    }
+
+    /// Return the IDs of the atoms in the builder, in ascending order.
+    /// The atom with ID ``atom_ids()[i]`` becomes atom ``i`` of the
+    /// frozen molecule.
+    ///
+    /// :return: a ``list`` of atom IDs
+    fn atom_ids(&self) -> Vec<usize> {
+        (0..self.atoms.len()).filter(|atom_id| self.atoms[*atom_id].is_some()).collect()
+    }
+
+    /// Given an atom ID, return whether the atom is in the builder.
+    ///
+    /// :param atom_id: the atom's ID
+    /// :return: whether the atom exists
+    fn has_node(&self, atom_id: usize) -> bool {
+        self.atom(atom_id).is_ok()
+    }
+
+    /// Given two atom IDs, return whether they're bonded.
+    ///
+    /// :param sid: the ID of one atom
+    /// :param tid: the ID of the other atom
+    /// :return: whether the bond exists
+    fn has_edge(&self, sid: usize, tid: usize) -> PyResult<bool> {
+        Ok(self.bond_between(sid, tid)?.is_some())
+    }
+
+    /// Given an atom ID, return the IDs of the atoms bonded to it.
+    ///
+    /// :param atom_id: the atom's ID
+    /// :return: a ``list`` of atom IDs
+    fn neighbors(&self, atom_id: usize) -> PyResult<Vec<usize>> {
+        let neighbors = self.atom(atom_id)?.bonds.iter()
+            .map(|bond| {
+                let bond = self.bonds[*bond].as_ref().unwrap();
+                if bond.sid == atom_id { bond.tid } else { bond.sid }
+            })
+            .collect();
+        Ok(neighbors)
+    }
+
+    /// Make a molecule from the builder's atoms and bonds, renumbering
+    /// atoms in order of their IDs (see ``atom_ids``). The builder can
+    /// still be edited afterwards. Every edit has already been
+    /// validated, so the molecule isn't validated again.
+    ///
+    /// :return: a new molecule
+    fn freeze(&self) -> PyResult<PyDefaultMolecule> {
+        PyDefaultMolecule::build_with(self.to_spec(), false).map_err(exception_from_error)
+    }
+}
+
+#[pyproto]
+impl PyObjectProtocol for PyMoleculeBuilder {
+    fn __repr__(&self) -> PyResult<String> {
+        Ok(format!("PyMoleculeBuilder with {} atoms, {} bonds.", self.n_atoms, self.n_bonds))
+    }
+}
@@ -0,0 +1,313 @@
+use chemcore::molecule::{BondOrder,Parity};
+use chemcore::molecule::spec::{Bond,Molecule};
+
+use crate::fragments::copy_atom;
+use crate::graph::MolecularGraph;
+use crate::rings::{aromatic_atoms,smallest_rings};
+use crate::smiles::{assign_double_bonds,permutation_is_odd};
+
+/// The bond type aromatic bonds are ranked by, after the orders 0 to 3,
+/// so that ranks don't depend on the Kekulé structure.
+const AROMATIC_BOND: u8 = 4;
+
+pub fn bond_order_value(order: BondOrder) -> u8 {
+    match order {
+        BondOrder::Zero => 0,
+        BondOrder::Single => 1,
+        BondOrder::Double => 2,
+        BondOrder::Triple => 3,
+    }
+}
+
+pub fn adjacency(molecule: &Molecule) -> Vec<Vec<(usize, usize)>> {
+    let mut adjacency = vec![Vec::with_capacity(4); molecule.atoms.len()];
+    for (index, bond) in molecule.bonds.iter().enumerate() {
+        adjacency[bond.sid].push((bond.tid, index));
+        adjacency[bond.tid].push((bond.sid, index));
+    }
+    adjacency
+}
+
+fn rank_by_key<K: Ord>(keys: &[K]) -> Vec<usize> {
+    let mut order: Vec<usize> = (0..keys.len()).collect();
+    order.sort_by(|first, second| keys[*first].cmp(&keys[*second]));
+
+    let mut ranks = vec![0; keys.len()];
+    for (position, atom) in order.iter().enumerate() {
+        ranks[*atom] = match position {
+            0 => 0,
+            _ => {
+                let previous = order[position - 1];
+                match keys[previous] == keys[*atom] {
+                    true => ranks[previous],
+                    false => position,
+                }
+            }
+        };
+    }
+    ranks
+}
+
+fn count_classes(ranks: &[usize]) -> usize {
+    let mut seen = vec![false; ranks.len()];
+    for rank in ranks {
+        seen[*rank] = true;
+    }
+    seen.iter().filter(|seen| **seen).count()
+}
+
+/// Whether each bond is aromatic: a ring bond between atoms which
+/// `aromatic_atoms` marks.
+pub fn aromatic_bonds(molecule: &Molecule) -> Vec<bool> {
+    let graph = MolecularGraph::new(molecule);
+    let ring_bonds = graph.ring_bonds();
+    let aromatic = aromatic_atoms(&graph, &smallest_rings(&graph, &ring_bonds));
+    molecule.bonds.iter()
+        .zip(&ring_bonds)
+        .map(|(bond, in_ring)| *in_ring && aromatic[bond.sid] && aromatic[bond.tid])
+        .collect()
+}
+
+fn bond_type(molecule: &Molecule, aromatic: &[bool], bond: usize) -> u8 {
+    match aromatic[bond] {
+        true => AROMATIC_BOND,
+        false => bond_order_value(molecule.bonds[bond].order),
+    }
+}
+
+fn refine(
+    ranks: Vec<usize>,
+    molecule: &Molecule,
+    adjacency: &[Vec<(usize, usize)>],
+    aromatic: &[bool]
+) -> Vec<usize> {
+    let mut ranks = ranks;
+    let mut classes = count_classes(&ranks);
+
+    while classes < ranks.len() {
+        let keys: Vec<(usize, Vec<(usize, u8)>)> = adjacency.iter()
+            .enumerate()
+            .map(|(atom, neighbours)| {
+                let mut environment: Vec<(usize, u8)> = neighbours.iter()
+                    .map(|(neighbour, bond)| (ranks[*neighbour], bond_type(molecule, aromatic, *bond)))
+                    .collect();
+                environment.sort_unstable();
+                (ranks[atom], environment)
+            })
+            .collect();
+
+        let refined = rank_by_key(&keys);
+        let refined_classes = count_classes(&refined);
+        if refined_classes == classes {
+            break;
+        }
+        ranks = refined;
+        classes = refined_classes;
+    }
+    ranks
+}
+
+/// A parity relative to the ranks of the atoms it's given relative to,
+/// as `1` (positive) or `2` (negative), or `0` if there's no parity or
+/// two of the atoms are tied.
+fn ranked_parity(parity: Option<Parity>, flipped: bool) -> u8 {
+    match (parity, flipped) {
+        (None, _) => 0,
+        (Some(Parity::Positive), false) | (Some(Parity::Negative), true) => 1,
+        _ => 2,
+    }
+}
+
+/// An atom's stereo descriptors, relative to the current ranks rather
+/// than to atom indices: its own parity, then those of its double
+/// bonds. Atom parities are relative to the neighbours in ascending
+/// order, and bond parities to the lowest neighbour at each end.
+fn stereo_descriptors(
+    molecule: &Molecule,
+    adjacency: &[Vec<(usize, usize)>],
+    ranks: &[usize],
+    atom: usize
+) -> (u8, Vec<u8>) {
+    let mut neighbours: Vec<usize> = adjacency[atom].iter().map(|(neighbour, _)| *neighbour).collect();
+    neighbours.sort_unstable();
+    let neighbour_ranks: Vec<usize> = neighbours.iter().map(|neighbour| ranks[*neighbour]).collect();
+    let tied = neighbour_ranks.iter().enumerate()
+        .any(|(index, rank)| neighbour_ranks[index + 1..].contains(rank));
+    let atom_descriptor = match tied {
+        true => 0,
+        false => ranked_parity(molecule.atoms[atom].parity, permutation_is_odd(&neighbour_ranks)),
+    };
+
+    // The lowest neighbour of `end` other than `across`, by index and by
+    // rank, or `None` if the rank is tied.
+    let lowest = |end: usize, across: usize| {
+        let others: Vec<usize> = adjacency[end].iter()
+            .map(|(neighbour, _)| *neighbour)
+            .filter(|neighbour| *neighbour != across)
+            .collect();
+        let by_index = others.iter().copied().min()?;
+        let by_rank = others.iter().copied().min_by_key(|neighbour| ranks[*neighbour])?;
+        match others.iter().filter(|neighbour| ranks[**neighbour] == ranks[by_rank]).count() {
+            1 => Some(by_index != by_rank),
+            _ => None,
+        }
+    };
+    let mut bond_descriptors: Vec<u8> = adjacency[atom].iter()
+        .filter(|(_, bond)| molecule.bonds[*bond].parity.is_some())
+        .map(|(neighbour, bond)| {
+            match (lowest(atom, *neighbour), lowest(*neighbour, atom)) {
+                (Some(first), Some(second)) => ranked_parity(molecule.bonds[*bond].parity, first != second),
+                _ => 0,
+            }
+        })
+        .collect();
+    bond_descriptors.sort_unstable();
+    (atom_descriptor, bond_descriptors)
+}
+
+/// Split tied ranks by the atoms' stereo descriptors, refining after
+/// each split, until the descriptors split no more ties.
+fn refine_stereo(
+    ranks: Vec<usize>,
+    molecule: &Molecule,
+    adjacency: &[Vec<(usize, usize)>],
+    aromatic: &[bool]
+) -> Vec<usize> {
+    let mut ranks = ranks;
+    loop {
+        let keys: Vec<(usize, (u8, Vec<u8>))> = (0..ranks.len())
+            .map(|atom| (ranks[atom], stereo_descriptors(molecule, adjacency, &ranks, atom)))
+            .collect();
+        let split = rank_by_key(&keys);
+        if count_classes(&split) == count_classes(&ranks) {
+            return ranks;
+        }
+        ranks = refine(split, molecule, adjacency, aromatic);
+    }
+}
+
+/// The invariants atoms are first ranked by.
+fn atom_invariants(
+    molecule: &Molecule,
+    adjacency: &[Vec<(usize, usize)>],
+) -> Vec<(usize, u16, u16, i8, u8, u32, bool)> {
+    molecule.atoms.iter()
+        .zip(adjacency.iter())
+        .map(|(atom, neighbours)| {
+            let order_sum: u32 = neighbours.iter()
+                .map(|(_, bond)| bond_order_value(molecule.bonds[*bond].order) as u32)
+                .sum();
+            (
+                neighbours.len(),
+                atom.element.atomic_number(),
+                atom.isotope.unwrap_or(0),
+                atom.ion,
+                atom.hydrogens,
+                order_sum,
+                atom.parity.is_some(),
+            )
+        })
+        .collect()
+}
+
+/// Classes of equivalent atoms, as ranks which ties are left in: the
+/// ranks `canonical_ranks` starts from, before stereochemistry is used
+/// or ties are broken. For a molecule without parities, atoms in
+/// different classes are constitutionally distinct.
+pub fn symmetry_classes(molecule: &Molecule, aromatic: &[bool]) -> Vec<usize> {
+    let adjacency = adjacency(molecule);
+    refine(rank_by_key(&atom_invariants(molecule, &adjacency)), molecule, &adjacency, aromatic)
+}
+
+/// Rank the atoms of a molecule so that the ranks don't depend on the
+/// order the atoms were given in, or on its Kekulé structure. Atoms are
+/// first ranked by invariants (degree, element, isotope, charge,
+/// hydrogens, bond order sum and whether they are a stereocentre), and
+/// these ranks are refined by those of their neighbours (and the types
+/// of the bonds to them, with `aromatic` bonds as a type of their own)
+/// until they stop changing. Ties are then split by the atoms' parities
+/// relative to their neighbours' ranks, so that stereoisomers (such as
+/// the two centres of a meso compound) rank the same way whatever the
+/// atom order, and remaining ties are broken one at a time (refining
+/// again after each). The ranks returned are a permutation of
+/// `0..n_atoms`.
+pub fn canonical_ranks(molecule: &Molecule, aromatic: &[bool]) -> Vec<usize> {
+    let adjacency = adjacency(molecule);
+    let invariants = atom_invariants(molecule, &adjacency);
+
+    let mut ranks = refine(rank_by_key(&invariants), molecule, &adjacency, aromatic);
+
+    loop {
+        ranks = refine_stereo(ranks, molecule, &adjacency, aromatic);
+        let mut class_sizes = vec![0; ranks.len()];
+        for rank in &ranks {
+            class_sizes[*rank] += 1;
+        }
+        let tied = match class_sizes.iter().position(|size| *size > 1) {
+            Some(rank) => rank,
+            None => break,
+        };
+
+        let chosen = ranks.iter().position(|rank| *rank == tied).unwrap();
+        for (atom, rank) in ranks.iter_mut().enumerate() {
+            if *rank == tied && atom != chosen {
+                *rank += 1;
+            }
+        }
+        ranks = refine(ranks, molecule, &adjacency, aromatic);
+    }
+    ranks
+}
+
+/// A copy of a molecule with the double bonds of its `aromatic` bonds
+/// placed by the canonical `ranks` rather than as they were given, so
+/// that every Kekulé structure of a molecule is written the same way.
+/// Parities of aromatic bonds are dropped. If the bonds can't be
+/// placed again, the molecule's own Kekulé structure is kept.
+pub fn canonical_kekule(molecule: &Molecule, aromatic: &[bool], ranks: &[usize]) -> Molecule {
+    let mut orders: Vec<u8> = molecule.bonds.iter()
+        .map(|bond| bond_order_value(bond.order))
+        .collect();
+    if aromatic.iter().any(|aromatic| *aromatic) {
+        let mut needs_double = vec![false; molecule.atoms.len()];
+        for ((bond, order), aromatic) in molecule.bonds.iter().zip(&orders).zip(aromatic) {
+            if *order == 2 && *aromatic {
+                needs_double[ranks[bond.sid]] = true;
+                needs_double[ranks[bond.tid]] = true;
+            }
+        }
+        // Search the bonds in rank order, between atoms numbered by rank.
+        let mut by_rank: Vec<usize> = (0..molecule.bonds.len()).filter(|bond| aromatic[*bond]).collect();
+        let ranked_pair = |bond: usize| {
+            let (sid, tid) = (ranks[molecule.bonds[bond].sid], ranks[molecule.bonds[bond].tid]);
+            (sid.min(tid), sid.max(tid))
+        };
+        by_rank.sort_unstable_by_key(|bond| ranked_pair(*bond));
+        let pairs: Vec<(usize, usize)> = by_rank.iter().map(|bond| ranked_pair(*bond)).collect();
+        let mut ranked_orders = vec![1; by_rank.len()];
+        if assign_double_bonds(&needs_double, &pairs, &vec![true; pairs.len()], &mut ranked_orders) {
+            for (bond, order) in by_rank.iter().zip(ranked_orders) {
+                orders[*bond] = order;
+            }
+        }
+    }
+
+    Molecule {
+        atoms: molecule.atoms.iter().map(copy_atom).collect(),
+        bonds: molecule.bonds.iter()
+            .zip(orders)
+            .enumerate()
+            .map(|(index, (bond, order))| Bond {
+                sid: bond.sid,
+                tid: bond.tid,
+                order: match order {
+                    0 => BondOrder::Zero,
+                    1 => BondOrder::Single,
+                    2 => BondOrder::Double,
+                    _ => BondOrder::Triple,
+                },
+                parity: if aromatic[index] { None } else { bond.parity },
+            })
+            .collect(),
+    }
+}
@@ -0,0 +1,202 @@
+use std::cmp::Ordering;
+use std::convert::TryFrom;
+use std::ops::Range;
+
+use pyo3::buffer::{PyBuffer, Element as BufferElement};
+use pyo3::exceptions;
+use pyo3::prelude::*;
+
+use chemcore::molecule::Parity;
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+use crate::bond_order::PyBondOrder;
+use crate::element::PyElement;
+use crate::exceptions::get_ValueError;
+
+/// Convert a column to a one-dimensional array of `dtype`. Values which
+/// don't fit in `dtype` raise `ValueError` naming the column, rather
+/// than wrapping around.
+pub fn extract_column<T>(py: Python, values: &PyAny, dtype: &str, name: &str) -> PyResult<Vec<T>>
+    where T: BufferElement + Copy
+{
+    let numpy = py.import("numpy")?;
+    let values = numpy.call1("asarray", (values,))?;
+    if values.getattr("size")?.extract::<usize>()? > 0 {
+        let limits = numpy.call1("iinfo", (dtype,))?;
+        let below = values.call_method0("min")?.compare(limits.getattr("min")?)? == Ordering::Less;
+        let above = values.call_method0("max")?.compare(limits.getattr("max")?)? == Ordering::Greater;
+        if below || above {
+            let message = format!("Values of {} are out of range for {}.", name, dtype);
+            return Err(exceptions::ValueError::py_err(message));
+        }
+    }
+    let array = numpy.call1("ascontiguousarray", (values, dtype))?;
+    let buffer = PyBuffer::get(py, array)?;
+    if buffer.dimensions() != 1 {
+        return Err(get_ValueError("Expected a one-dimensional array."));
+    }
+    buffer.to_vec::<T>(py)
+}
+
+pub fn extract_optional_column<T>(
+    py: Python,
+    values: Option<&PyAny>,
+    dtype: &str,
+    name: &str,
+    length: usize
+) -> PyResult<Vec<T>>
+    where T: BufferElement + Copy + Default
+{
+    let column = match values {
+        Some(values) => extract_column(py, values, dtype, name)?,
+        None => vec![T::default(); length],
+    };
+    if column.len() != length {
+        return Err(get_ValueError("Array lengths do not match."));
+    }
+    Ok(column)
+}
+
+pub fn parity_from_int(value: i8) -> Result<Option<Parity>, &'static str> {
+    match value {
+        0 => Ok(None),
+        1 => Ok(Some(Parity::Positive)),
+        -1 => Ok(Some(Parity::Negative)),
+        _ => Err("Parity outside of expected values (-1, 0, 1)")
+    }
+}
+
+pub fn parity_to_int(parity: Option<Parity>) -> i8 {
+    match parity {
+        Some(Parity::Positive) => 1,
+        Some(Parity::Negative) => -1,
+        None => 0,
+    }
+}
+
+#[derive(Clone,Debug,Default)]
+pub struct AtomColumns {
+    pub elements: Vec<u8>,
+    pub hydrogens: Vec<u8>,
+    pub charges: Vec<i8>,
+    pub isotopes: Vec<u16>,
+    pub parities: Vec<i8>,
+}
+
+#[derive(Clone,Debug,Default)]
+pub struct BondColumns {
+    pub sids: Vec<u32>,
+    pub tids: Vec<u32>,
+    pub orders: Vec<u8>,
+    pub parities: Vec<i8>,
+}
+
+impl AtomColumns {
+    pub fn extract(
+        py: Python,
+        elements: &PyAny,
+        hydrogens: Option<&PyAny>,
+        charges: Option<&PyAny>,
+        isotopes: Option<&PyAny>,
+        parities: Option<&PyAny>
+    ) -> PyResult<Self> {
+        let elements: Vec<u8> = extract_column(py, elements, "uint8", "elements")?;
+        let n_atoms = elements.len();
+
+        Ok(Self {
+            elements,
+            hydrogens: extract_optional_column(py, hydrogens, "uint8", "hydrogens", n_atoms)?,
+            charges: extract_optional_column(py, charges, "int8", "charges", n_atoms)?,
+            isotopes: extract_optional_column(py, isotopes, "uint16", "isotopes", n_atoms)?,
+            parities: extract_optional_column(py, parities, "int8", "parities", n_atoms)?,
+        })
+    }
+
+    pub fn len(&self) -> usize {
+        self.elements.len()
+    }
+
+    pub fn atom(&self, index: usize) -> Result<Atom, &'static str> {
+        let element = PyElement::try_from(self.elements[index] as u16)?;
+        let isotope = match self.isotopes[index] {
+            0 => None,
+            isotope => Some(isotope)
+        };
+
+        Ok(Atom {
+            element: element.element,
+            hydrogens: self.hydrogens[index],
+            ion: self.charges[index],
+            isotope,
+            parity: parity_from_int(self.parities[index])?
+        })
+    }
+}
+
+impl BondColumns {
+    pub fn extract(
+        py: Python,
+        sids: Option<&PyAny>,
+        tids: Option<&PyAny>,
+        orders: Option<&PyAny>,
+        parities: Option<&PyAny>
+    ) -> PyResult<Self> {
+        if sids.is_some() != tids.is_some() {
+            return Err(get_ValueError("Bond start and target arrays must be given together."));
+        }
+
+        let sids: Vec<u32> = match sids {
+            Some(sids) => extract_column(py, sids, "uint32", "bond_src")?,
+            None => Vec::new(),
+        };
+        let n_bonds = sids.len();
+
+        Ok(Self {
+            sids,
+            tids: extract_optional_column(py, tids, "uint32", "bond_dst", n_bonds)?,
+            orders: match orders {
+                Some(_) => extract_optional_column(py, orders, "uint8", "bond_orders", n_bonds)?,
+                None => vec![1; n_bonds],
+            },
+            parities: extract_optional_column(py, parities, "int8", "bond_parities", n_bonds)?,
+        })
+    }
+
+    pub fn len(&self) -> usize {
+        self.sids.len()
+    }
+
+    pub fn bond(&self, index: usize) -> Result<Bond, &'static str> {
+        let (sid, tid) = (self.sids[index] as usize, self.tids[index] as usize);
+        if sid == tid {
+            return Err("Can't bond atom to itself");
+        }
+
+        Ok(Bond {
+            sid,
+            tid,
+            order: PyBondOrder::try_from(self.orders[index])?.into(),
+            parity: parity_from_int(self.parities[index])?
+        })
+    }
+}
+
+pub fn molecule_spec(atoms: &AtomColumns, bonds: &BondColumns) -> Result<Molecule, &'static str> {
+    molecule_spec_slice(atoms, 0..atoms.len(), bonds, 0..bonds.len())
+}
+
+pub fn molecule_spec_slice(
+    atoms: &AtomColumns,
+    atom_range: Range<usize>,
+    bonds: &BondColumns,
+    bond_range: Range<usize>
+) -> Result<Molecule, &'static str> {
+    let atoms = atom_range
+        .map(|index| atoms.atom(index))
+        .collect::<Result<Vec<Atom>, _>>()?;
+    let bonds = bond_range
+        .map(|index| bonds.bond(index))
+        .collect::<Result<Vec<Bond>, _>>()?;
+
+    Ok(Molecule{ atoms, bonds })
+}
@@ -1,31 +1,170 @@
-// use pyo3::class::PyObjectProtocol;
+// use pyo3::class::{PyObjectProtocol, basic::CompareOp};
 use std::convert::TryFrom;
+use std::mem;
 use pyo3::prelude::*;
-use pyo3::class::PyObjectProtocol;
+use pyo3::class::{PyObjectProtocol, basic::CompareOp};
+use pyo3::types::PyType;
+use numpy::{IntoPyArray,PyArray1,PyArray2};
+use ndarray::Array2;
+use once_cell::sync::OnceCell;
 
-use chemcore::molecule::DefaultMolecule;
-use chemcore::molecule::Molecule;
+use chemcore::molecule::Error;
+use chemcore::molecule::spec;
 
-use gamma::graph::Graph;
 use crate::exceptions::*;
 use crate::spec::{PyAtomSpec,PyBondSpec};
 use crate::element::PyElement;
 use crate::parity::PyParity;
 use crate::bond_order::PyBondOrder;
+use crate::columns::{AtomColumns,BondColumns,molecule_spec,parity_from_int};
+use crate::graph::MolecularGraph;
+use crate::isomorphism::{GraphHash,is_isomorphic};
+use crate::rings::RingInfo;
+use crate::molecule_adjacency::AdjacencyArrays;
+use crate::distances::distance_matrix;
+use crate::screen::{Screen,molecule_screen};
+use crate::validation::{check_bonds,check_graph};
 
-#[pyclass(subclass)]
+// The module is set so that pickle can find the class (see `__reduce__`).
+/// A molecular representation. This class follows the API of
+/// ``chemcore::molecule::DefaultMolecule``. Unless ``validate`` is
+/// ``False``, molecules are checked for the errors ``DefaultMolecule``
+/// rejects (see ``oxmol.validation``).
+///
+/// :param atoms: a ``list`` of ``PyAtomSpec``
+/// :param bonds: a ``list`` of ``PyBondSpec``
+/// :param validate: whether to check for hypervalent atoms, duplicate
+///     bonds and impossible isotopes. Only skip this for molecules
+///     which are known to be valid (e.g. those written by ``oxmol``):
+///     the results for invalid molecules are undefined. Bonds must
+///     always join two different atoms of the molecule.
+///
+/// Attributes
+///
+/// - ``nodes`` - a ``range`` of the atom indices
+/// - ``edges`` - a read-only ``numpy.ndarray`` of shape (n_bonds, 2)
+///     and dtype ``uint32``, the atom indices of each bond. This is
+///     created once and shared between accesses.
+///
+/// Molecules can be compared with ``==`` and used in sets and as
+/// ``dict`` keys. They're equal if there's a mapping between their
+/// atoms which keeps elements, charges, isotopes, hydrogens, bond
+/// orders and stereochemistry, regardless of atom order. The hash
+/// (see ``graph_hash``) is computed on first use and cached, and only
+/// molecules with the same hash are searched for a mapping.
+#[pyclass(subclass, module = "oxmol.oxmol")]
 pub struct PyDefaultMolecule {
-    default_molecule: DefaultMolecule,
-    #[pyo3(get)]
-    nodes: Vec<usize>,
-    #[pyo3(get)]
-    edges: Vec<(usize, usize)>,
+    graph: MolecularGraph,
+    cache: OnceCell<Box<MoleculeCache>>,
+}
+
+/// The values computed from a molecule on first use. These are boxed
+/// together, so a molecule which is never queried holds one pointer
+/// rather than room for each of them.
+#[derive(Default)]
+struct MoleculeCache {
+    edge_array: OnceCell<Py<PyArray2<u32>>>,
+    screen: OnceCell<Screen>,
+    rings: OnceCell<RingInfo>,
+    hash: OnceCell<GraphHash>,
+    adjacency: OnceCell<AdjacencyArrays>,
+    distances: OnceCell<Vec<u16>>,
+}
+
+impl MoleculeCache {
+    /// The bytes allocated for the cached values, not counting the
+    /// NumPy arrays, which Python owns.
+    fn heap_size(&self) -> usize {
+        mem::size_of::<Self>()
+            + self.rings.get().map_or(0, RingInfo::heap_size)
+            + self.hash.get().map_or(0, GraphHash::heap_size)
+            + self.distances.get().map_or(0, |distances| distances.capacity() * mem::size_of::<u16>())
+    }
+}
+
+impl PyDefaultMolecule {
+    pub fn build(molecule: spec::Molecule) -> Result<Self, Error> {
+        Self::build_with(molecule, true)
+    }
+
+    /// Build a molecule, checking it as `DefaultMolecule::build` would
+    /// if `validate` is set. Otherwise, only the bonds' atom indices
+    /// are checked.
+    pub fn build_with(molecule: spec::Molecule, validate: bool) -> Result<Self, Error> {
+        check_bonds(&molecule)?;
+        let graph = MolecularGraph::new(&molecule);
+        if validate {
+            check_graph(&graph)?;
+        }
+        Ok(PyDefaultMolecule{ graph, cache: OnceCell::new() })
+    }
+
+    pub fn to_spec(&self) -> spec::Molecule {
+        self.graph.to_spec()
+    }
+
+    pub fn graph(&self) -> &MolecularGraph {
+        &self.graph
+    }
+
+    fn cache(&self) -> &MoleculeCache {
+        self.cache.get_or_init(Default::default)
+    }
+
+    pub fn cached_screen(&self) -> &Screen {
+        self.cache().screen.get_or_init(|| molecule_screen(&self.graph))
+    }
+
+    pub fn cached_rings(&self) -> &RingInfo {
+        self.cache().rings.get_or_init(|| RingInfo::new(&self.graph))
+    }
+
+    pub fn cached_hash(&self) -> &GraphHash {
+        self.cache().hash.get_or_init(|| GraphHash::new(&self.graph))
+    }
+
+    pub fn cached_adjacency(&self, py: Python) -> PyResult<&AdjacencyArrays> {
+        self.cache().adjacency.get_or_try_init(|| AdjacencyArrays::new(py, &self.graph))
+    }
+
+    /// The topological distance matrix, row-major.
+    pub fn cached_distances(&self) -> &[u16] {
+        self.cache().distances.get_or_init(|| distance_matrix(&self.graph))
+    }
+
+    /// Cache a distance matrix computed elsewhere (by a batch), unless
+    /// one is already cached.
+    pub fn cache_distances(&self, distances: Vec<u16>) -> &[u16] {
+        self.cache().distances.get_or_init(|| distances)
+    }
+
+    /// Raise the same error as the per-atom accessors if there's no
+    /// atom with this index.
+    pub fn check_atom(&self, id: usize) -> PyResult<()> {
+        if id < self.graph.order() {
+            Ok(())
+        } else {
+            Err(missing_atom(id))
+        }
+    }
+
+    /// The index of the bond between two atoms, raising an error if
+    /// they aren't bonded.
+    fn bond(&self, sid: usize, tid: usize) -> PyResult<usize> {
+        self.check_atom(sid)?;
+        self.check_atom(tid)?;
+        match self.graph.bond_between(sid, tid) {
+            Some(bond) => Ok(bond),
+            None => Err(missing_bond(sid, tid)),
+        }
+    }
 }
 
 #[pymethods]
 impl PyDefaultMolecule {
     #[new]
-    fn new(py_atoms: Vec<PyAtomSpec>, py_bonds: Vec<PyBondSpec>) -> PyResult<Self> {
+    #[args(validate = "true")]
+    fn new(py_atoms: Vec<PyAtomSpec>, py_bonds: Vec<PyBondSpec>, validate: bool) -> PyResult<Self> {
         let mut atoms = Vec::new();
         let mut bonds = Vec::new();
 
@@ -39,149 +178,377 @@ impl PyDefaultMolecule {
             bonds.push(bond);
         }
 
-        let nodes = (0..atoms.len()).collect();
-
         let molecule = chemcore::molecule::spec::Molecule{atoms, bonds};
-        let default_molecule = match DefaultMolecule::build(molecule) {
+        match PyDefaultMolecule::build_with(molecule, validate) {
+            Ok(molecule) => Ok(molecule),
+            Err(error_type) => Err(exception_from_error(error_type))
+        }
+    }
+
+    /// Create a molecule from columns of integers, without creating an
+    /// ``AtomSpec`` or ``BondSpec`` for each atom and bond.
+    ///
+    /// The per-atom arrays must all be the same length, as must the
+    /// per-bond arrays. Arrays which aren't given are filled with
+    /// zeros (or, for ``bond_orders``, with single bonds).
+    ///
+    /// :param elements: the atomic numbers (``uint8``)
+    /// :param hydrogens: the number of virtual hydrogens (``uint8``)
+    /// :param charges: the formal charges (``int8``)
+    /// :param isotopes: the isotopes (``uint16``), ``0`` for no isotope
+    /// :param parities: the atom parities (``int8``), ``1`` for
+    ///     ``Parity(True)``, ``-1`` for ``Parity(False)`` and ``0`` for none
+    /// :param bond_src: the atom index of the start of each bond
+    ///     (``uint32``)
+    /// :param bond_dst: the atom index of the target of each bond
+    ///     (``uint32``)
+    /// :param bond_orders: the bond orders (``uint8``) in range(0, 4)
+    /// :param bond_parities: the bond parities (``int8``), encoded as
+    ///     for ``parities``
+    /// :param validate: whether to validate the molecule (see
+    ///     ``Molecule``)
+    /// :return: the molecule
+    #[classmethod]
+    #[args(
+        hydrogens = "None",
+        charges = "None",
+        isotopes = "None",
+        parities = "None",
+        bond_src = "None",
+        bond_dst = "None",
+        bond_orders = "None",
+        bond_parities = "None",
+        validate = "true"
+    )]
+    fn from_arrays(
+        _cls: &PyType,
+        elements: &PyAny,
+        hydrogens: Option<&PyAny>,
+        charges: Option<&PyAny>,
+        isotopes: Option<&PyAny>,
+        parities: Option<&PyAny>,
+        bond_src: Option<&PyAny>,
+        bond_dst: Option<&PyAny>,
+        bond_orders: Option<&PyAny>,
+        bond_parities: Option<&PyAny>,
+        validate: bool
+    ) -> PyResult<Self> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let atoms = AtomColumns::extract(py, elements, hydrogens, charges, isotopes, parities)?;
+        let bonds = BondColumns::extract(py, bond_src, bond_dst, bond_orders, bond_parities)?;
+
+        let molecule = match molecule_spec(&atoms, &bonds) {
             Ok(molecule) => molecule,
-            Err(error_type) => return Err(exception_from_error(error_type))
+            Err(error_message) => return Err(get_ValueError(error_message))
         };
-
-        let mut edges = Vec::new();
-        for (sid, tid) in default_molecule.edges() {
-            let edge = (*sid, *tid);
-            edges.push(edge);
+        match PyDefaultMolecule::build_with(molecule, validate) {
+            Ok(molecule) => Ok(molecule),
+            Err(error_type) => Err(exception_from_error(error_type))
         }
-        Ok(PyDefaultMolecule{ default_molecule, edges, nodes })
     }
 
+    #[getter]
+    fn nodes(&self) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+
+        let nodes = py.import("builtins")?.call1("range", (self.graph.order(),))?;
+        Ok(PyObject::from(nodes))
+    }
+
+    #[getter]
+    fn edges(&self) -> PyResult<Py<PyArray2<u32>>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+
+        let edge_array = self.cache().edge_array.get_or_try_init(|| -> PyResult<_> {
+            let mut indices = Vec::with_capacity(2 * self.graph.size());
+            for bond in &self.graph.bonds {
+                indices.push(bond.sid);
+                indices.push(bond.tid);
+            }
+
+            let array = match Array2::from_shape_vec((self.graph.size(), 2), indices) {
+                Ok(array) => array.into_pyarray(py),
+                Err(shape_error) => return Err(generic_exception(shape_error))
+            };
+            array.call_method1("setflags", (false,))?;
+            Ok(array.to_owned())
+        })?;
+        Ok(edge_array.clone_ref(py))
+    }
+
+    /// Return whether the molecule contains atoms.
     fn is_empty(&self) -> PyResult<bool> {
-        Ok(self.nodes.is_empty())
+        Ok(self.graph.order() == 0)
     }
 
+    /// Return how many atoms are in the molecule.
     fn order(&self) -> PyResult<usize> {
-        Ok(self.nodes.len())
+        Ok(self.graph.order())
     }
 
+    /// Return how many bonds are in the molecule.
     fn size(&self) -> PyResult<usize> {
-        Ok(self.edges.len())
+        Ok(self.graph.size())
     }
 
-    fn has_node(&self, id: usize) -> PyResult<bool> {
-        match self.nodes.get(id) {
-            Some(_) => Ok(true),
-            None => Ok(false),
-        }
+    /// Given an atom ID, return a ``bool`` indicating whether the atom
+    /// exists in the molecule.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: whether the atom exists in this molecule
+    fn has_node(&self, atom_id: usize) -> PyResult<bool> {
+        Ok(atom_id < self.graph.order())
     }
 
+    /// Given a start atom ID and target atom ID, return a bool indicating
+    /// whether a bond exists between the two atoms.
+    ///
+    /// :param sid: the atom index of the start of the bond
+    /// :param tid: the atom index of the target of the bond
+    /// :return: whether the bond exists in the molecule
     fn has_edge(&self, sid: usize, tid: usize) -> PyResult<bool> {
-        match self.default_molecule.has_edge(&sid, &tid) {
-            Ok(result) => Ok(result),
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
-        }
+        self.check_atom(sid)?;
+        self.check_atom(tid)?;
+        Ok(self.graph.bond_between(sid, tid).is_some())
     }
 
-    fn neighbors(&self, id: usize) -> PyResult<Vec<usize>> {
-        let mut neighbors = Vec::with_capacity(6);
+    /// Given an atom ID, return the indices of the atom's neighbors.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: a ``list`` of indices of the atom's direct connections
+    fn neighbors(&self, atom_id: usize) -> PyResult<Vec<usize>> {
+        self.check_atom(atom_id)?;
+        Ok(self.graph.neighbours(atom_id).iter().map(|neighbour| *neighbour as usize).collect())
+    }
 
-        match self.default_molecule.neighbors(&id) {
-            Ok(iterator) => {
-                for neighbor_id in iterator {
-                    neighbors.push(*neighbor_id);
-                }
-                Ok(neighbors)
-            },
-            Err(graph_error) => {
-                let error = exception_from_graph_error(graph_error);
-                Err(error)
-            }
-        }
+    /// Given an atom ID, return the number of explicit connections
+    /// the atom has.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: the number of connections that the atom has.
+    fn degree(&self, atom_id: usize) -> PyResult<usize> {
+        self.check_atom(atom_id)?;
+        Ok(self.graph.degree(atom_id))
     }
 
-    fn degree(&self, id: usize) -> PyResult<usize> {
-        match self.default_molecule.degree(&id) {
-            Ok(degree) => Ok(degree),
-            Err(graph_error) => Err(generic_exception(graph_error))
-        }
+    /// Given an atom ID, return the element of that atom.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: the element of the atom
+    fn element(&self, atom_id: usize) -> PyResult<Py<PyElement>> {
+        self.check_atom(atom_id)?;
+        let gil = Python::acquire_gil();
+        PyElement::interned(gil.python(), self.graph.element(atom_id))
     }
 
-    fn element(&self, id: usize) -> PyResult<PyElement> {
-        match self.default_molecule.element(&id) {
-            Ok(element) => Ok(PyElement::from(element)),
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
+    /// Given an atom ID, return the isotope of that atom if it has
+    /// been ascribed one. Otherwise, return ``None``.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: the isotope, if it has been set, otherwise ``None``
+    fn isotope(&self, atom_id: usize) -> PyResult<Option<u16>> {
+        self.check_atom(atom_id)?;
+        match self.graph.atoms[atom_id].isotope {
+            0 => Ok(None),
+            isotope => Ok(Some(isotope)),
         }
     }
 
-    fn isotope(&self, id: usize) -> PyResult<Option<u16>> {
-        match self.default_molecule.isotope(&id) {
-            Ok(isotope) => Ok(isotope),
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
-        }
+    /// Given an atom ID, return the number of nonbonding electrons the
+    /// atom has in its valence shell.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: the number of nonbonding electrons in the atom's
+    ///     valence shell
+    fn electrons(&self, atom_id: usize) -> PyResult<u8> {
+        self.check_atom(atom_id)?;
+        Ok(self.graph.electrons(atom_id))
     }
 
-    fn electrons(&self, id: usize) -> PyResult<u8> {
-        match self.default_molecule.electrons(&id) {
-            Ok(electrons) => Ok(electrons),
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
-        }
+    /// Given an atom ID, return the number of virtual hydrogens the
+    /// atom has.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: the number of virtual hydrogens on the atom
+    fn hydrogens(&self, atom_id: usize) -> PyResult<u8> {
+        self.check_atom(atom_id)?;
+        Ok(self.graph.atoms[atom_id].hydrogens)
     }
 
-    fn hydrogens(&self, id: usize) -> PyResult<u8> {
-        match self.default_molecule.hydrogens(&id) {
-            Ok(hydrogens) => Ok(hydrogens),
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
-        }
+    /// Given an atom ID, return the atom's formal charge.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: the atom's formal charge
+    fn charge(&self, atom_id: usize) -> PyResult<i8> {
+        self.check_atom(atom_id)?;
+        Ok(self.graph.atoms[atom_id].charge)
     }
 
-    fn charge(&self, id: usize) -> PyResult<i8> {
-        match self.default_molecule.charge(&id) {
-            Ok(charge) => Ok(charge),
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
+    /// Given an atom ID, return the atom's tetrahedral chirality.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: the tetrahedral chirality of the atom.
+    fn atom_parity(&self, atom_id: usize) -> PyResult<Option<Py<PyParity>>> {
+        self.check_atom(atom_id)?;
+        let gil = Python::acquire_gil();
+        match parity_from_int(self.graph.atoms[atom_id].parity).map_err(get_ValueError)? {
+            Some(parity) => Ok(Some(PyParity::interned(gil.python(), parity)?)),
+            None => Ok(None)
         }
     }
 
-    fn atom_parity(&self, id: usize) -> PyResult<Option<PyParity>> {
-        match self.default_molecule.atom_parity(&id) {
-            Ok(parity) => {
-                match parity {
-                    Some(parity) => Ok(Some(PyParity::from(parity))),
-                    None => Ok(None)
-                }
-            },
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
+    /// Given a start atom ID and target atom ID, return the order of
+    /// the bond between the two atoms.
+    ///
+    /// :param sid: the atom index of the start of the bond
+    /// :param tid: the atom index of the target of the bond
+    /// :return: the order of the bond between the atoms.
+    fn bond_order(&self, sid: usize, tid: usize) -> PyResult<Py<PyBondOrder>> {
+        let bond = self.bond(sid, tid)?;
+        let gil = Python::acquire_gil();
+        match PyBondOrder::try_from(self.graph.bonds[bond].order) {
+            Ok(bond_order) => PyBondOrder::interned(gil.python(), bond_order.bond_order),
+            Err(error_message) => Err(get_ValueError(error_message))
         }
     }
 
-    fn bond_order(&self, sid: usize, tid: usize) -> PyResult<PyBondOrder> {
-        match self.default_molecule.bond_order(&sid, &tid) {
-            Ok(bond_order) => {
-                match PyBondOrder::try_from(bond_order) {
-                    Ok(bond_order) => Ok(bond_order),
-                    Err(error_message) => Err(get_ValueError(error_message))
-                }
-            }
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
+    /// Given a start atom ID and target atom ID, return the
+    /// stereochemistry of the bond between the two atoms.
+    ///
+    /// :param sid: the atom index of the start of the bond
+    /// :param tid: the atom index of the target of the bond
+    /// :return: the stereochemistry of the bond between the atoms.
+    fn bond_parity(&self, sid: usize, tid: usize) -> PyResult<Option<Py<PyParity>>> {
+        let bond = self.bond(sid, tid)?;
+        let gil = Python::acquire_gil();
+        match parity_from_int(self.graph.bonds[bond].parity).map_err(get_ValueError)? {
+            Some(parity) => Ok(Some(PyParity::interned(gil.python(), parity)?)),
+            None => Ok(None)
         }
     }
 
-    fn bond_parity(&self, sid: usize, tid: usize) -> PyResult<Option<PyParity>> {
-        match self.default_molecule.bond_parity(&sid, &tid) {
-            Ok(parity) => {
-                match parity {
-                    Some(parity) => Ok(Some(PyParity::from(parity))),
-                    None => Ok(None)
-                }
-            }
-            Err(graph_error) => Err(exception_from_graph_error(graph_error))
+    /// Return the atomic number of every atom.
+    ///
+    /// :return: a ``uint8`` array, indexed by atom ID
+    fn atomic_numbers(&self) -> PyResult<Py<PyArray1<u8>>> {
+        let gil = Python::acquire_gil();
+        let atomic_numbers: Vec<u8> = self.graph.atoms.iter().map(|atom| atom.atomic_number).collect();
+        Ok(atomic_numbers.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return the formal charge of every atom.
+    ///
+    /// :return: an ``int8`` array, indexed by atom ID
+    fn charges(&self) -> PyResult<Py<PyArray1<i8>>> {
+        let gil = Python::acquire_gil();
+        let charges: Vec<i8> = self.graph.atoms.iter().map(|atom| atom.charge).collect();
+        Ok(charges.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return the number of virtual hydrogens on every atom.
+    ///
+    /// :return: a ``uint8`` array, indexed by atom ID
+    fn hydrogen_counts(&self) -> PyResult<Py<PyArray1<u8>>> {
+        let gil = Python::acquire_gil();
+        let hydrogens: Vec<u8> = self.graph.atoms.iter().map(|atom| atom.hydrogens).collect();
+        Ok(hydrogens.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return the isotope of every atom.
+    ///
+    /// :param masked: whether to mask atoms without an isotope,
+    ///     rather than filling them with ``0``
+    /// :return: a ``uint16`` array (or ``numpy.ma.MaskedArray``),
+    ///     indexed by atom ID
+    #[args(masked = "false")]
+    fn isotopes(&self, masked: bool) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let isotopes: Vec<u16> = self.graph.atoms.iter().map(|atom| atom.isotope).collect();
+        let isotopes = isotopes.into_pyarray(py);
+        if masked {
+            let masked_isotopes = py.import("numpy.ma")?.call1("masked_equal", (isotopes, 0))?;
+            Ok(PyObject::from(masked_isotopes))
+        } else {
+            Ok(PyObject::from(isotopes))
         }
     }
+
+    /// Return the number of nonbonding valence electrons on every atom.
+    ///
+    /// :return: a ``uint8`` array, indexed by atom ID
+    fn electron_counts(&self) -> PyResult<Py<PyArray1<u8>>> {
+        let electron_counts: Vec<u8> = (0..self.graph.order())
+            .map(|atom| self.graph.electrons(atom))
+            .collect();
+
+        let gil = Python::acquire_gil();
+        Ok(electron_counts.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return the tetrahedral chirality of every atom, as ``1`` for
+    /// ``Parity(True)``, ``-1`` for ``Parity(False)`` and ``0`` where
+    /// the atom has no parity.
+    ///
+    /// :return: an ``int8`` array, indexed by atom ID
+    fn atom_parities(&self) -> PyResult<Py<PyArray1<i8>>> {
+        let gil = Python::acquire_gil();
+        let atom_parities: Vec<i8> = self.graph.atoms.iter().map(|atom| atom.parity).collect();
+        Ok(atom_parities.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return the order of every bond, in the same order as ``edges``.
+    ///
+    /// :return: a ``uint8`` array, indexed by bond
+    fn bond_orders(&self) -> PyResult<Py<PyArray1<u8>>> {
+        let gil = Python::acquire_gil();
+        let bond_orders: Vec<u8> = self.graph.bonds.iter().map(|bond| bond.order).collect();
+        Ok(bond_orders.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return the stereochemistry of every bond, in the same order as
+    /// ``edges``, encoded as for ``atom_parities``.
+    ///
+    /// :return: an ``int8`` array, indexed by bond
+    fn bond_parities(&self) -> PyResult<Py<PyArray1<i8>>> {
+        let gil = Python::acquire_gil();
+        let bond_parities: Vec<i8> = self.graph.bonds.iter().map(|bond| bond.parity).collect();
+        Ok(bond_parities.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return a 64-bit hash of the molecule which doesn't depend on
+    /// the order of its atoms. Atoms are hashed from their element,
+    /// charge, isotope, hydrogens and degree, then repeatedly rehashed
+    /// with their neighbours and bond orders. Stereoisomers have the
+    /// same hash. This is computed on first use and cached, and backs
+    /// ``hash(molecule)``.
+    ///
+    /// :return: the hash, as an unsigned 64-bit ``int``
+    fn graph_hash(&self) -> PyResult<u64> {
+        Ok(self.cached_hash().hash)
+    }
+
+    /// Return the size of the molecule in bytes, including its atoms,
+    /// bonds and adjacency, and anything cached from it except NumPy
+    /// arrays (which are counted by ``sys.getsizeof`` on the arrays
+    /// themselves). This backs ``sys.getsizeof(molecule)``.
+    ///
+    /// :return: the size in bytes
+    fn __sizeof__(&self) -> usize {
+        mem::size_of::<PyCell<Self>>()
+            + self.graph.heap_size()
+            + self.cache.get().map_or(0, |cache| cache.heap_size())
+    }
 }
 
 #[pyproto]
-impl PyObjectProtocol for PyDefaultMolecule {
+impl<'p> PyObjectProtocol<'p> for PyDefaultMolecule {
     fn __repr__(&self) -> PyResult<String> {
-        let n_atoms = self.nodes.len();
-        let n_bonds = self.edges.len();
+        let n_atoms = self.graph.order();
+        let n_bonds = self.graph.size();
 
         Ok(format!(
             "PyDefaultMolecule with {} atoms, {} bonds.", 
@@ -189,4 +556,26 @@ impl PyObjectProtocol for PyDefaultMolecule {
             n_bonds
         ))
     }
-}
\ No newline at end of file
+
+    fn __hash__(&self) -> PyResult<isize> {
+        // -1 is reserved for errors.
+        match self.cached_hash().hash as isize {
+            -1 => Ok(-2),
+            hash => Ok(hash),
+        }
+    }
+
+    fn __richcmp__(&self, other: &'p PyAny, op: CompareOp) -> PyResult<bool> {
+        let equal = match other.extract::<PyRef<PyDefaultMolecule>>() {
+            Ok(other) => {
+                is_isomorphic(self.graph(), self.cached_hash(), other.graph(), other.cached_hash())
+            },
+            Err(_) => false,
+        };
+        match op {
+            CompareOp::Eq => Ok(equal),
+            CompareOp::Ne => Ok(!equal),
+            _ => Err(get_NotImplementedError("Operator not implemented."))
+        }
+    }
+}
@@ -0,0 +1,235 @@
+use std::collections::BTreeMap;
+use std::fmt::Write;
+
+use chemcore::molecule::Element;
+
+use crate::element::{average_mass,isotope_mass,monoisotopic_mass};
+use crate::graph::MolecularGraph;
+use crate::rings::{aromatic_atoms,smallest_rings};
+
+pub const NAMES: [&str; 8] = [
+    "molecular_weight",
+    "exact_mass",
+    "heavy_atoms",
+    "formal_charge",
+    "hbd",
+    "hba",
+    "rotatable_bonds",
+    "tpsa",
+];
+
+#[derive(Clone,Copy,Debug,PartialEq)]
+pub enum Descriptor {
+    MolecularWeight,
+    ExactMass,
+    HeavyAtoms,
+    FormalCharge,
+    Donors,
+    Acceptors,
+    RotatableBonds,
+    Tpsa,
+}
+
+const DESCRIPTORS: [Descriptor; 8] = [
+    Descriptor::MolecularWeight,
+    Descriptor::ExactMass,
+    Descriptor::HeavyAtoms,
+    Descriptor::FormalCharge,
+    Descriptor::Donors,
+    Descriptor::Acceptors,
+    Descriptor::RotatableBonds,
+    Descriptor::Tpsa,
+];
+
+impl Descriptor {
+    pub fn from_name(name: &str) -> Option<Self> {
+        NAMES.iter()
+            .position(|other| *other == name)
+            .map(|index| DESCRIPTORS[index])
+    }
+
+    pub fn all() -> Vec<Self> {
+        DESCRIPTORS.to_vec()
+    }
+}
+
+/// Implicit hydrogens and explicit hydrogen neighbours.
+fn total_hydrogens(graph: &MolecularGraph, atom: usize) -> usize {
+    let explicit = graph.neighbours(atom).iter()
+        .filter(|neighbour| graph.atoms[**neighbour as usize].atomic_number == 1)
+        .count();
+    graph.atoms[atom].hydrogens as usize + explicit
+}
+
+fn heavy_degree(graph: &MolecularGraph, atom: usize) -> usize {
+    graph.neighbours(atom).iter()
+        .filter(|neighbour| graph.atoms[**neighbour as usize].atomic_number != 1)
+        .count()
+}
+
+fn mass(graph: &MolecularGraph, monoisotopic: bool) -> f64 {
+    let element_mass = if monoisotopic { monoisotopic_mass } else { average_mass };
+    let hydrogen_mass = element_mass(Element::H);
+    graph.atoms.iter()
+        .enumerate()
+        .map(|(atom, record)| {
+            let element = graph.element(atom);
+            let atom_mass = match record.isotope {
+                0 => element_mass(element),
+                isotope => isotope_mass(element, isotope),
+            };
+            atom_mass + record.hydrogens as f64 * hydrogen_mass
+        })
+        .sum()
+}
+
+fn rotatable_bonds(graph: &MolecularGraph, ring_bonds: &[bool]) -> usize {
+    let in_triple_bond = |atom: usize| {
+        graph.incident_bonds(atom).iter().any(|bond| graph.bonds[*bond as usize].order == 3)
+    };
+    graph.bonds.iter()
+        .enumerate()
+        .filter(|(index, bond)| {
+            let (sid, tid) = bond.atoms();
+            bond.order == 1
+                && !ring_bonds[*index]
+                && heavy_degree(graph, sid) > 1
+                && heavy_degree(graph, tid) > 1
+                && !in_triple_bond(sid)
+                && !in_triple_bond(tid)
+        })
+        .count()
+}
+
+/// An atom's contribution to its polar surface area, from Ertl et al.'s
+/// table for nitrogen and oxygen (J. Med. Chem. 2000, 43, 3714). Atoms
+/// the table doesn't cover are estimated from their neighbours and
+/// hydrogens, and the adjustments for three-membered rings are left out.
+fn polar_surface_area(graph: &MolecularGraph, aromatic: &[bool], ring_bonds: &[bool], atom: usize) -> f64 {
+    let atomic_number = graph.atoms[atom].atomic_number;
+    if atomic_number != 7 && atomic_number != 8 {
+        return 0.0;
+    }
+
+    let hydrogens = total_hydrogens(graph, atom);
+    // Single, double, triple and aromatic bonds to heavy atoms.
+    let mut counts = [0; 4];
+    for (neighbour, bond) in graph.neighbour_bonds(atom) {
+        if graph.atoms[neighbour].atomic_number == 1 {
+            continue;
+        }
+        let kind = match graph.bonds[bond].order {
+            _ if ring_bonds[bond] && aromatic[atom] && aromatic[neighbour] => 3,
+            order => (order as usize).max(1) - 1,
+        };
+        counts[kind] += 1;
+    }
+
+    let area = match (atomic_number, graph.atoms[atom].charge, hydrogens, counts) {
+        (7, 0, 0, [3, 0, 0, 0]) => 3.24,
+        (7, 0, 0, [1, 1, 0, 0]) => 12.36,
+        (7, 0, 0, [0, 0, 1, 0]) => 23.79,
+        (7, 0, 0, [1, 2, 0, 0]) => 11.68,
+        (7, 0, 0, [0, 1, 1, 0]) => 13.60,
+        (7, 0, 1, [2, 0, 0, 0]) => 12.03,
+        (7, 0, 1, [0, 1, 0, 0]) => 23.85,
+        (7, 0, 2, [1, 0, 0, 0]) => 26.02,
+        (7, 0, 0, [0, 0, 0, 2]) => 12.89,
+        (7, 0, 0, [0, 0, 0, 3]) => 4.41,
+        (7, 0, 0, [1, 0, 0, 2]) => 4.93,
+        (7, 0, 0, [0, 1, 0, 2]) => 8.39,
+        (7, 0, 1, [0, 0, 0, 2]) => 15.79,
+        (7, 1, 0, [4, 0, 0, 0]) => 0.0,
+        (7, 1, 0, [2, 1, 0, 0]) => 3.01,
+        (7, 1, 0, [1, 0, 1, 0]) => 4.36,
+        (7, 1, 1, [3, 0, 0, 0]) => 4.44,
+        (7, 1, 1, [1, 1, 0, 0]) => 13.97,
+        (7, 1, 2, [2, 0, 0, 0]) => 16.61,
+        (7, 1, 2, [0, 1, 0, 0]) => 25.59,
+        (7, 1, 3, [1, 0, 0, 0]) => 27.64,
+        (7, 1, 0, [0, 0, 0, 3]) => 4.10,
+        (7, 1, 0, [1, 0, 0, 2]) => 3.88,
+        (7, 1, 1, [0, 0, 0, 2]) => 14.14,
+        (8, 0, 0, [2, 0, 0, 0]) => 9.23,
+        (8, 0, 0, [0, 1, 0, 0]) => 17.07,
+        (8, 0, 1, [1, 0, 0, 0]) => 20.23,
+        (8, 0, 0, [0, 0, 0, 2]) => 13.14,
+        (8, -1, 0, [1, 0, 0, 0]) => 23.06,
+        (7, _, _, _) => 30.5 - 8.2 * heavy_degree(graph, atom) as f64 + 1.5 * hydrogens as f64,
+        _ => 28.5 - 8.6 * heavy_degree(graph, atom) as f64 + 1.5 * hydrogens as f64,
+    };
+    area.max(0.0)
+}
+
+/// Compute descriptors of a molecule into `values`, in the same order.
+pub fn compute(graph: &MolecularGraph, descriptors: &[Descriptor], values: &mut [f64]) {
+    let needs_rings = descriptors.contains(&Descriptor::RotatableBonds) || descriptors.contains(&Descriptor::Tpsa);
+    let ring_bonds = match needs_rings {
+        true => graph.ring_bonds(),
+        false => Vec::new(),
+    };
+    let polar = |atomic_number: u8| atomic_number == 7 || atomic_number == 8;
+
+    for (descriptor, value) in descriptors.iter().zip(values.iter_mut()) {
+        *value = match descriptor {
+            Descriptor::MolecularWeight => mass(graph, false),
+            Descriptor::ExactMass => mass(graph, true),
+            Descriptor::HeavyAtoms => graph.atoms.iter().filter(|atom| atom.atomic_number != 1).count() as f64,
+            Descriptor::FormalCharge => graph.atoms.iter().map(|atom| atom.charge as i32).sum::<i32>() as f64,
+            Descriptor::Donors => {
+                (0..graph.order())
+                    .filter(|atom| polar(graph.atoms[*atom].atomic_number) && total_hydrogens(graph, *atom) > 0)
+                    .count() as f64
+            },
+            Descriptor::Acceptors => graph.atoms.iter().filter(|atom| polar(atom.atomic_number)).count() as f64,
+            Descriptor::RotatableBonds => rotatable_bonds(graph, &ring_bonds) as f64,
+            Descriptor::Tpsa => {
+                let aromatic = aromatic_atoms(graph, &smallest_rings(graph, &ring_bonds));
+                (0..graph.order())
+                    .map(|atom| polar_surface_area(graph, &aromatic, &ring_bonds, atom))
+                    .sum()
+            },
+        };
+    }
+}
+
+/// The molecular formula in Hill order: carbon, then hydrogen, then the
+/// other elements alphabetically (or every element alphabetically if
+/// there's no carbon), followed by any net charge.
+pub fn formula(graph: &MolecularGraph) -> String {
+    let mut counts: BTreeMap<String, usize> = BTreeMap::new();
+    for (atom, record) in graph.atoms.iter().enumerate() {
+        let symbol = format!("{:?}", graph.element(atom));
+        *counts.entry(symbol).or_insert(0) += 1;
+        if record.hydrogens > 0 {
+            *counts.entry("H".to_string()).or_insert(0) += record.hydrogens as usize;
+        }
+    }
+
+    let mut formula = String::new();
+    let mut write_count = |symbol: &str, count: usize| {
+        formula.push_str(symbol);
+        if count > 1 {
+            write!(formula, "{}", count).unwrap();
+        }
+    };
+    if let Some(carbons) = counts.remove("C") {
+        write_count("C", carbons);
+        if let Some(hydrogens) = counts.remove("H") {
+            write_count("H", hydrogens);
+        }
+    }
+    for (symbol, count) in counts {
+        write_count(&symbol, count);
+    }
+
+    let charge: i32 = graph.atoms.iter().map(|atom| atom.charge as i32).sum();
+    match charge {
+        0 => {},
+        1 => formula.push('+'),
+        -1 => formula.push('-'),
+        charge if charge > 0 => write!(formula, "+{}", charge).unwrap(),
+        charge => write!(formula, "-{}", -charge).unwrap(),
+    }
+    formula
+}
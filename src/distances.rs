@@ -0,0 +1,75 @@
+use std::collections::VecDeque;
+
+use crate::graph::MolecularGraph;
+
+/// The distance between atoms in different components.
+pub const UNREACHABLE: u16 = u16::MAX;
+
+/// The atoms reachable from `root`, in breadth-first order, visiting
+/// each atom's neighbours in ascending order.
+pub fn breadth_first_order(graph: &MolecularGraph, root: usize) -> Vec<u32> {
+    let mut order = Vec::new();
+    let mut visited = vec![false; graph.order()];
+    let mut queue = VecDeque::new();
+    visited[root] = true;
+    queue.push_back(root);
+    while let Some(atom) = queue.pop_front() {
+        order.push(atom as u32);
+        for neighbour in graph.neighbours(atom) {
+            let neighbour = *neighbour as usize;
+            if !visited[neighbour] {
+                visited[neighbour] = true;
+                queue.push_back(neighbour);
+            }
+        }
+    }
+    order
+}
+
+/// The atoms reachable from `root`, in depth-first (preorder) order,
+/// visiting each atom's neighbours in ascending order.
+pub fn depth_first_order(graph: &MolecularGraph, root: usize) -> Vec<u32> {
+    let mut order = Vec::new();
+    let mut visited = vec![false; graph.order()];
+    let mut stack = vec![root];
+    while let Some(atom) = stack.pop() {
+        if visited[atom] {
+            continue;
+        }
+        visited[atom] = true;
+        order.push(atom as u32);
+        // Pushed in reverse, so the lowest neighbour is visited first.
+        for neighbour in graph.neighbours(atom).iter().rev() {
+            let neighbour = *neighbour as usize;
+            if !visited[neighbour] {
+                stack.push(neighbour);
+            }
+        }
+    }
+    order
+}
+
+/// The number of bonds on the shortest path between every pair of
+/// atoms, row-major, by a breadth-first search from each atom. Atoms in
+/// different components are `UNREACHABLE`.
+pub fn distance_matrix(graph: &MolecularGraph) -> Vec<u16> {
+    let n_atoms = graph.order();
+    let mut distances = vec![UNREACHABLE; n_atoms * n_atoms];
+    let mut queue = VecDeque::with_capacity(n_atoms);
+    for root in 0..n_atoms {
+        let row = &mut distances[root * n_atoms..(root + 1) * n_atoms];
+        row[root] = 0;
+        queue.push_back(root);
+        while let Some(atom) = queue.pop_front() {
+            let distance = row[atom].saturating_add(1).min(UNREACHABLE - 1);
+            for neighbour in graph.neighbours(atom) {
+                let neighbour = *neighbour as usize;
+                if row[neighbour] == UNREACHABLE {
+                    row[neighbour] = distance;
+                    queue.push_back(neighbour);
+                }
+            }
+        }
+    }
+    distances
+}
@@ -1,12 +1,28 @@
 use std::convert::TryFrom;
 
+use crate::columns::extract_column;
 use crate::exceptions::{get_ValueError,get_NotImplementedError};
 
 use chemcore::molecule::Element;
+use numpy::IntoPyArray;
 use pyo3::class::{PyObjectProtocol, basic::CompareOp};
-use pyo3::types::PyType;
+use pyo3::exceptions;
+use once_cell::sync::OnceCell;
+use pyo3::types::{PyBytes,PyType};
 use pyo3::prelude::*;
 
+/// The mass difference between carbon-13 and carbon-12.
+const NUCLEON_MASS_DIFFERENCE: f64 = 1.003355;
+
+/// A chemical element. Represented in ``chemcore::molecule`` as a Rust
+/// enum.
+///
+/// :param atomic_number: an ``int``, the atomic number.
+///
+/// There's one shared instance of each element, which molecules, atom
+/// specs and ``from_symbol`` return, so these can be compared with
+/// ``is``. Calling ``Element`` makes a new (equal) instance. Bond
+/// orders and parities are shared in the same way.
 #[pyclass(subclass)]
 #[derive(Copy,Clone,Debug)]
 pub struct PyElement {
@@ -154,6 +170,274 @@ impl Into<Element> for PyElement {
     }
 }
 
+/// One Python instance per element, indexed by atomic number - 1.
+static INTERNED: OnceCell<Vec<Py<PyElement>>> = OnceCell::new();
+
+/// Create the interned element instances. Called once, when the module
+/// is initialised.
+pub fn intern_elements(py: Python) -> PyResult<()> {
+    let mut elements = Vec::with_capacity(118);
+    for atomic_number in 1..=118 {
+        let element = PyElement::try_from(atomic_number).map_err(get_ValueError)?;
+        elements.push(Py::new(py, element)?);
+    }
+    let _ = INTERNED.set(elements);
+    Ok(())
+}
+
+impl PyElement {
+    /// The interned Python instance of an element, so that the same
+    /// element is always the same object.
+    pub fn interned(py: Python, element: Element) -> PyResult<Py<PyElement>> {
+        match INTERNED.get() {
+            Some(elements) => Ok(elements[element.atomic_number() as usize - 1].clone_ref(py)),
+            None => Py::new(py, PyElement{ element }),
+        }
+    }
+
+    fn is_interned(&self, other: &PyAny) -> bool {
+        match INTERNED.get() {
+            Some(elements) => elements[self.element.atomic_number() as usize - 1].as_ptr() == other.as_ptr(),
+            None => false,
+        }
+    }
+}
+
+/// The standard atomic weight and the mass of the most abundant isotope
+/// of each element, in daltons, indexed by atomic number - 1. Elements
+/// without stable isotopes use the mass number and mass of their longest
+/// lived isotope.
+const MASSES: [(f64, f64); 118] = [
+    (1.008, 1.00782503207), (4.002602, 4.00260325415), (6.94, 7.016004548),
+    (9.012182, 9.012182201), (10.81, 11.009305406), (12.011, 12.0),
+    (14.007, 14.00307400478), (15.999, 15.99491461956), (18.998403, 18.998403224),
+    (20.1797, 19.99244017542), (22.989769, 22.98976928087), (24.305, 23.985041699),
+    (26.981539, 26.981538627), (28.085, 27.97692653246), (30.973762, 30.973761629),
+    (32.06, 31.972070999), (35.45, 34.968852682), (39.948, 39.96238312251),
+    (39.0983, 38.963706679), (40.078, 39.962590983), (44.955912, 44.955911909),
+    (47.867, 47.947946281), (50.9415, 50.943959507), (51.9961, 51.940507472),
+    (54.938045, 54.938045141), (55.845, 55.934937475), (58.933195, 58.933195048),
+    (58.6934, 57.935342907), (63.546, 62.929597474), (65.38, 63.929142222),
+    (69.723, 68.925573587), (72.63, 73.921177767), (74.9216, 74.921596478),
+    (78.971, 79.916521271), (79.904, 78.918337087), (83.798, 83.911506687),
+    (85.4678, 84.911789737), (87.62, 87.905612124), (88.90585, 88.905848295),
+    (91.224, 89.904704416), (92.90638, 92.906378058), (95.95, 97.905408169),
+    (98.0, 97.907216), (101.07, 101.904349312), (102.9055, 102.905504292),
+    (106.42, 105.903485715), (107.8682, 106.90509682), (112.411, 113.90335854),
+    (114.818, 114.903878484), (118.71, 119.902194676), (121.76, 120.903815686),
+    (127.6, 129.906224399), (126.90447, 126.904472681), (131.293, 131.904153457),
+    (132.905452, 132.905451933), (137.327, 137.905247237), (138.90547, 138.906353267),
+    (140.116, 139.905438706), (140.90765, 140.907652769), (144.242, 141.907723297),
+    (145.0, 144.912749), (150.36, 151.919732425), (151.964, 152.921230339),
+    (157.25, 157.924103912), (158.92535, 158.925346757), (162.5, 163.929174751),
+    (164.93032, 164.93032207), (167.259, 165.930293061), (168.93421, 168.93421325),
+    (173.054, 173.938862089), (174.9668, 174.940771819), (178.49, 179.946549953),
+    (180.94788, 180.947995763), (183.84, 183.950931188), (186.207, 186.955753109),
+    (190.23, 191.96148069), (192.217, 192.96292643), (195.084, 194.964791134),
+    (196.966569, 196.966568662), (200.59, 201.970643011), (204.38, 204.974427541),
+    (207.2, 207.976652071), (208.9804, 208.980398734), (209.0, 208.9824304),
+    (210.0, 209.987148), (222.0, 222.0175777), (223.0, 223.0197359),
+    (226.0, 226.0254098), (227.0, 227.0277521), (232.03806, 232.038055325),
+    (231.03588, 231.03588399), (238.02891, 238.050788247), (237.0, 237.0481734),
+    (244.0, 244.064204), (243.0, 243.0613811), (247.0, 247.070354),
+    (247.0, 247.070307), (251.0, 251.079587), (252.0, 252.08298),
+    (257.0, 257.095105), (258.0, 258.098431), (259.0, 259.10103),
+    (262.0, 262.10963), (267.0, 267.12179), (268.0, 268.12567),
+    (271.0, 271.13393), (272.0, 272.13826), (270.0, 270.13429),
+    (276.0, 276.15159), (281.0, 281.16451), (280.0, 280.16514),
+    (285.0, 285.17712), (284.0, 284.17873), (289.0, 289.19042),
+    (288.0, 288.19274), (293.0, 293.20449), (292.0, 292.20746),
+    (294.0, 294.21392),
+];
+
+/// The standard atomic weight of an element.
+pub fn average_mass(element: Element) -> f64 {
+    MASSES[element.atomic_number() as usize - 1].0
+}
+
+/// The mass of an element's most abundant isotope.
+pub fn monoisotopic_mass(element: Element) -> f64 {
+    MASSES[element.atomic_number() as usize - 1].1
+}
+
+/// The approximate mass of an isotope, from the most abundant isotope's
+/// mass and a neutron-ish mass difference per extra nucleon.
+pub fn isotope_mass(element: Element, mass_number: u16) -> f64 {
+    let reference = monoisotopic_mass(element);
+    reference + (mass_number as f64 - reference.round()) * NUCLEON_MASS_DIFFERENCE
+}
+
+/// The element symbols, indexed by atomic number - 1.
+const SYMBOLS: [&str; 118] = [
+    "H", "He", "Li", "Be", "B", "C", "N", "O", "F", "Ne",
+    "Na", "Mg", "Al", "Si", "P", "S", "Cl", "Ar", "K", "Ca",
+    "Sc", "Ti", "V", "Cr", "Mn", "Fe", "Co", "Ni", "Cu", "Zn",
+    "Ga", "Ge", "As", "Se", "Br", "Kr", "Rb", "Sr", "Y", "Zr",
+    "Nb", "Mo", "Tc", "Ru", "Rh", "Pd", "Ag", "Cd", "In", "Sn",
+    "Sb", "Te", "I", "Xe", "Cs", "Ba", "La", "Ce", "Pr", "Nd",
+    "Pm", "Sm", "Eu", "Gd", "Tb", "Dy", "Ho", "Er", "Tm", "Yb",
+    "Lu", "Hf", "Ta", "W", "Re", "Os", "Ir", "Pt", "Au", "Hg",
+    "Tl", "Pb", "Bi", "Po", "At", "Rn", "Fr", "Ra", "Ac", "Th",
+    "Pa", "U", "Np", "Pu", "Am", "Cm", "Bk", "Cf", "Es", "Fm",
+    "Md", "No", "Lr", "Rf", "Db", "Sg", "Bh", "Hs", "Mt", "Ds",
+    "Rg", "Cn", "Nh", "Fl", "Mc", "Lv", "Ts", "Og",
+];
+
+/// The number of slots in the symbol table: an uppercase first letter,
+/// then either no second letter or a lowercase one.
+const SYMBOL_SLOTS: usize = 26 * 27;
+
+/// The slot of a one or two letter symbol. Every such symbol has its
+/// own slot, so the table is a perfect hash. Anything else gets
+/// ``SYMBOL_SLOTS``, which is out of range.
+const fn symbol_slot(symbol: &[u8]) -> usize {
+    if symbol.is_empty() || symbol.len() > 2 || symbol[0] < b'A' || symbol[0] > b'Z' {
+        return SYMBOL_SLOTS;
+    }
+    let second = if symbol.len() == 2 {
+        if symbol[1] < b'a' || symbol[1] > b'z' {
+            return SYMBOL_SLOTS;
+        }
+        symbol[1] - b'a' + 1
+    } else {
+        0
+    };
+    (symbol[0] - b'A') as usize * 27 + second as usize
+}
+
+const fn symbol_table() -> [u8; SYMBOL_SLOTS] {
+    let mut table = [0; SYMBOL_SLOTS];
+    let mut index = 0;
+    while index < SYMBOLS.len() {
+        table[symbol_slot(SYMBOLS[index].as_bytes())] = index as u8 + 1;
+        index += 1;
+    }
+    table
+}
+
+/// The atomic number for each symbol slot, or 0 if it isn't a symbol.
+static SYMBOL_TABLE: [u8; SYMBOL_SLOTS] = symbol_table();
+
+/// Look up the atomic number of an element symbol.
+pub fn atomic_number_from_symbol(symbol: &[u8]) -> Option<u8> {
+    match SYMBOL_TABLE.get(symbol_slot(symbol)) {
+        Some(0) | None => None,
+        Some(atomic_number) => Some(*atomic_number),
+    }
+}
+
+pub fn element_from_symbol(symbol: &str) -> Result<Element, &'static str> {
+    match atomic_number_from_symbol(symbol.as_bytes()) {
+        Some(atomic_number) => Ok(PyElement::try_from(atomic_number as u16)?.element),
+        None => Err("Not an element symbol."),
+    }
+}
+
+fn lookup_symbol(symbol: &[u8]) -> PyResult<u8> {
+    match atomic_number_from_symbol(symbol) {
+        Some(atomic_number) => Ok(atomic_number),
+        None => Err(exceptions::ValueError::py_err(
+            format!("Not an element symbol: {:?}", String::from_utf8_lossy(symbol))
+        )),
+    }
+}
+
+/// Look up the symbols in a NumPy ``S`` (bytes) or ``U`` (UCS-4) array
+/// from its buffer, without making a Python string for each one.
+fn fixed_width_atomic_numbers(py: Python, array: &PyAny, unicode: bool) -> PyResult<Vec<u8>> {
+    let array = py.import("numpy")?.call1("ascontiguousarray", (array,))?;
+    let ndim: usize = array.getattr("ndim")?.extract()?;
+    if ndim != 1 {
+        return Err(get_ValueError("Expected a one-dimensional array."));
+    }
+    let size: usize = array.getattr("size")?.extract()?;
+    let itemsize: usize = array.getattr("itemsize")?.extract()?;
+    let data: &PyBytes = array.call_method0("tobytes")?.extract()?;
+    let data = data.as_bytes();
+
+    let mut atomic_numbers = Vec::with_capacity(size);
+    let mut symbol = Vec::with_capacity(2);
+    for index in 0..size {
+        let item = &data[index * itemsize..(index + 1) * itemsize];
+        symbol.clear();
+        if unicode {
+            for character in item.chunks_exact(4) {
+                match u32::from_ne_bytes([character[0], character[1], character[2], character[3]]) {
+                    0 => break,
+                    // Not ASCII, so not a symbol.
+                    character if character > 0x7f => symbol.push(0xff),
+                    character => symbol.push(character as u8),
+                }
+            }
+        } else {
+            symbol.extend(item.iter().take_while(|byte| **byte != 0));
+        }
+        atomic_numbers.push(lookup_symbol(&symbol)?);
+    }
+    Ok(atomic_numbers)
+}
+
+/// Look up a column of element symbols: whitespace-separated symbols in
+/// a ``str`` or ``bytes``, a NumPy string array or an iterable of
+/// ``str`` or ``bytes``.
+fn extract_atomic_numbers(py: Python, symbols: &PyAny) -> PyResult<Vec<u8>> {
+    if let Ok(symbols) = symbols.extract::<&PyBytes>() {
+        return symbols.as_bytes()
+            .split(|byte| byte.is_ascii_whitespace())
+            .filter(|symbol| !symbol.is_empty())
+            .map(lookup_symbol)
+            .collect();
+    }
+    if let Ok(symbols) = symbols.extract::<&str>() {
+        return symbols.split_whitespace().map(|symbol| lookup_symbol(symbol.as_bytes())).collect();
+    }
+    if let Ok(dtype) = symbols.getattr("dtype") {
+        let kind: String = dtype.getattr("kind")?.extract()?;
+        if kind == "S" || kind == "U" {
+            return fixed_width_atomic_numbers(py, symbols, kind == "U");
+        }
+    }
+
+    let mut atomic_numbers = Vec::new();
+    for symbol in symbols.iter()? {
+        let symbol = symbol?;
+        let atomic_number = match symbol.extract::<&PyBytes>() {
+            Ok(symbol) => lookup_symbol(symbol.as_bytes())?,
+            Err(_) => lookup_symbol(symbol.extract::<&str>()?.as_bytes())?,
+        };
+        atomic_numbers.push(atomic_number);
+    }
+    Ok(atomic_numbers)
+}
+
+fn interned_elements(py: Python, atomic_numbers: &[u8]) -> PyResult<Vec<Py<PyElement>>> {
+    atomic_numbers.iter()
+        .map(|atomic_number| {
+            let element = PyElement::try_from(*atomic_number as u16).map_err(get_ValueError)?;
+            PyElement::interned(py, element.element)
+        })
+        .collect()
+}
+
+/// Convert an ``Element``, atomic number or element symbol to an element,
+/// as accepted by the atom spec constructor.
+pub fn extract_element(value: &PyAny) -> PyResult<PyElement> {
+    if let Ok(element) = value.extract::<PyElement>() {
+        return Ok(element);
+    }
+    if let Ok(symbol) = value.extract::<&str>() {
+        return match element_from_symbol(symbol) {
+            Ok(element) => Ok(PyElement{ element }),
+            Err(error_msg) => Err(get_ValueError(error_msg)),
+        };
+    }
+    if let Ok(atomic_number) = value.extract::<i64>() {
+        let atomic_number = u16::try_from(atomic_number).unwrap_or(u16::MAX);
+        return PyElement::try_from(atomic_number).map_err(get_ValueError);
+    }
+    Err(exceptions::TypeError::py_err(format!("Can't convert {} to PyElement", value)))
+}
+
 #[pymethods]
 impl PyElement {
     #[new]
@@ -164,131 +448,56 @@ impl PyElement {
         }
     }
 
+    /// Create an element from its atomic symbol.
     #[classmethod]
-    fn from_symbol(_cls: &PyType, symbol: String) -> PyResult<Self> {
-        let element = match symbol.as_str() {
-            "H"  => Element::H,
-            "He" => Element::He,
-            "Li" => Element::Li,
-            "Be" => Element::Be,
-            "B"  => Element::B,
-            "C"  => Element::C,
-            "N"  => Element::N,
-            "O"  => Element::O,
-            "F"  => Element::F,
-            "Ne" => Element::Ne,
-            "Na" => Element::Na,
-            "Mg" => Element::Mg,
-            "Al" => Element::Al,
-            "Si" => Element::Si,
-            "P"  => Element::P,
-            "S"  => Element::S,
-            "Cl" => Element::Cl,
-            "Ar" => Element::Ar,
-            "K"  => Element::K,
-            "Ca" => Element::Ca,
-            "Sc" => Element::Sc,
-            "Ti" => Element::Ti,
-            "V"  => Element::V,
-            "Cr" => Element::Cr,
-            "Mn" => Element::Mn,
-            "Fe" => Element::Fe,
-            "Co" => Element::Co,
-            "Ni" => Element::Ni,
-            "Cu" => Element::Cu,
-            "Zn" => Element::Zn,
-            "Ga" => Element::Ga,
-            "Ge" => Element::Ge,
-            "As" => Element::As,
-            "Se" => Element::Se,
-            "Br" => Element::Br,
-            "Kr" => Element::Kr,
-            "Rb" => Element::Rb,
-            "Sr" => Element::Sr,
-            "Y"  => Element::Y,
-            "Zr" => Element::Zr,
-            "Nb" => Element::Nb,
-            "Mo" => Element::Mo,
-            "Tc" => Element::Tc,
-            "Ru" => Element::Ru,
-            "Rh" => Element::Rh,
-            "Pd" => Element::Pd,
-            "Ag" => Element::Ag,
-            "Cd" => Element::Cd,
-            "In" => Element::In,
-            "Sn" => Element::Sn,
-            "Sb" => Element::Sb,
-            "Te" => Element::Te,
-            "I"  => Element::I,
-            "Xe" => Element::Xe,
-            "Cs" => Element::Cs,
-            "Ba" => Element::Ba,
-            "La" => Element::La,
-            "Ce" => Element::Ce,
-            "Pr" => Element::Pr,
-            "Nd" => Element::Nd,
-            "Pm" => Element::Pm,
-            "Sm" => Element::Sm,
-            "Eu" => Element::Eu,
-            "Gd" => Element::Gd,
-            "Tb" => Element::Tb,
-            "Dy" => Element::Dy,
-            "Ho" => Element::Ho,
-            "Er" => Element::Er,
-            "Tm" => Element::Tm,
-            "Yb" => Element::Yb,
-            "Lu" => Element::Lu,
-            "Hf" => Element::Hf,
-            "Ta" => Element::Ta,
-            "W"  => Element::W,
-            "Re" => Element::Re,
-            "Os" => Element::Os,
-            "Ir" => Element::Ir,
-            "Pt" => Element::Pt,
-            "Au" => Element::Au,
-            "Hg" => Element::Hg,
-            "Tl" => Element::Tl,
-            "Pb" => Element::Pb,
-            "Bi" => Element::Bi,
-            "Po" => Element::Po,
-            "At" => Element::At,
-            "Rn" => Element::Rn,
-            "Fr" => Element::Fr,
-            "Ra" => Element::Ra,
-            "Ac" => Element::Ac,
-            "Th" => Element::Th,
-            "Pa" => Element::Pa,
-            "U"  => Element::U,
-            "Np" => Element::Np,
-            "Pu" => Element::Pu,
-            "Am" => Element::Am,
-            "Cm" => Element::Cm,
-            "Bk" => Element::Bk,
-            "Cf" => Element::Cf,
-            "Es" => Element::Es,
-            "Fm" => Element::Fm,
-            "Md" => Element::Md,
-            "No" => Element::No,
-            "Lr" => Element::Lr,
-            "Rf" => Element::Rf,
-            "Db" => Element::Db,
-            "Sg" => Element::Sg,
-            "Bh" => Element::Bh,
-            "Hs" => Element::Hs,
-            "Mt" => Element::Mt,
-            "Ds" => Element::Ds,
-            "Rg" => Element::Rg,
-            "Cn" => Element::Cn,
-            "Nh" => Element::Nh,
-            "Fl" => Element::Fl,
-            "Mc" => Element::Mc,
-            "Lv" => Element::Lv,
-            "Ts" => Element::Ts,
-            "Og" => Element::Og,            
-            _    => return Err(get_ValueError("Not an element symbol."))
-        };
+    fn from_symbol(_cls: &PyType, symbol: &str) -> PyResult<Py<PyElement>> {
+        let gil = Python::acquire_gil();
+        match element_from_symbol(symbol) {
+            Ok(element) => PyElement::interned(gil.python(), element),
+            Err(error_msg) => Err(get_ValueError(error_msg)),
+        }
+    }
 
-        Ok(Self{ element })
+    /// Convert a column of element symbols in one call, e.g. when
+    /// loading atoms from a table.
+    ///
+    /// :param symbols: the symbols, as a ``list`` (or other iterable)
+    ///     of ``str`` or ``bytes``, a NumPy string (``S`` or ``U``)
+    ///     array, or a ``str`` or ``bytes`` of symbols separated by
+    ///     whitespace
+    /// :param as_elements: if ``True``, return a ``list`` of (shared)
+    ///     elements rather than an array of atomic numbers
+    /// :return: a ``uint8`` array of atomic numbers, or a ``list`` of
+    ///     elements
+    /// :raises ValueError: if any symbol isn't an element symbol
+    #[classmethod]
+    #[args(as_elements = "false")]
+    fn from_symbols(_cls: &PyType, symbols: &PyAny, as_elements: bool) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let atomic_numbers = extract_atomic_numbers(py, symbols)?;
+        if as_elements {
+            Ok(interned_elements(py, &atomic_numbers)?.into_py(py))
+        } else {
+            Ok(PyObject::from(atomic_numbers.into_pyarray(py)))
+        }
+    }
+
+    /// Convert a column of atomic numbers to elements in one call.
+    ///
+    /// :param atomic_numbers: the atomic numbers, as anything
+    ///     ``numpy.ascontiguousarray`` accepts
+    /// :return: a ``list`` of (shared) elements
+    /// :raises ValueError: if any atomic number isn't in range(1, 119)
+    #[classmethod]
+    fn from_atomic_numbers(_cls: &PyType, atomic_numbers: &PyAny) -> PyResult<Vec<Py<PyElement>>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let atomic_numbers: Vec<u8> = extract_column::<i64>(py, atomic_numbers, "int64", "atomic_numbers")?
+            .into_iter()
+            .map(|atomic_number| u8::try_from(atomic_number).unwrap_or(0))
+            .collect();
+        interned_elements(py, &atomic_numbers)
     }
 
     fn valence_electrons(&self) -> u8 {
@@ -299,10 +508,18 @@ impl PyElement {
         self.element.atomic_number()
     }
 
+    fn average_mass(&self) -> f64 {
+        average_mass(self.element)
+    }
+
+    fn monoisotopic_mass(&self) -> f64 {
+        monoisotopic_mass(self.element)
+    }
+
 }
 
 #[pyproto]
-impl PyObjectProtocol for PyElement {
+impl<'p> PyObjectProtocol<'p> for PyElement {
     fn __repr__(&self) -> PyResult<String> {
         Ok(format!("PyElement::{:?}", self.element))
     }
@@ -311,12 +528,15 @@ impl PyObjectProtocol for PyElement {
         Ok(self.atomic_number() as isize)
     }
 
-    fn __richcmp__(&self, other: Self, op: CompareOp) -> PyResult<bool> {
-        let value = match op {
-            CompareOp::Eq => self.element == other.element,
-            CompareOp::Ne => self.element != other.element,
-            _ => return Err(get_NotImplementedError("Operator not implemented."))
+    fn __richcmp__(&self, other: &'p PyAny, op: CompareOp) -> PyResult<bool> {
+        let equal = self.is_interned(other) || match other.extract::<PyRef<PyElement>>() {
+            Ok(other) => self.element == other.element,
+            Err(_) => false,
         };
-        Ok(value)
+        match op {
+            CompareOp::Eq => Ok(equal),
+            CompareOp::Ne => Ok(!equal),
+            _ => Err(get_NotImplementedError("Operator not implemented."))
+        }
     }
 }
\ No newline at end of file
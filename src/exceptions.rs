@@ -1,7 +1,6 @@
 use pyo3::exceptions;
 use pyo3::PyErr;
 use chemcore::molecule::Error;
-use gamma::graph::Error as GraphError;
 
 #[allow(non_snake_case)]
 pub fn get_ValueError(error_message: &'static str) -> PyErr {
@@ -13,15 +12,31 @@ pub fn get_NotImplementedError(error_message: &'static str) -> PyErr {
     exceptions::NotImplementedError::py_err(error_message)
 }
 
-pub fn exception_from_error(error: Error) -> PyErr {
-    let error_message = match error {
-        Error::HypervalentAtom => "Hypervalent atom encountered",
-        Error::DuplicateBond => "Duplicate bond encountered",
-        Error::MisplacedBond => "Misplaced bond encountered",
-        Error::ImpossibleIsotope => "Impossible isotope encountered"
-    };
+/// The message for each error code (see `error_code`), from 1.
+pub const ERROR_MESSAGES: [&str; 4] = [
+    "Hypervalent atom encountered",
+    "Duplicate bond encountered",
+    "Misplaced bond encountered",
+    "Impossible isotope encountered",
+];
+
+/// A code for each kind of invalid molecule, with 0 reserved for valid
+/// molecules.
+pub fn error_code(error: Error) -> u8 {
+    match error {
+        Error::HypervalentAtom => 1,
+        Error::DuplicateBond => 2,
+        Error::MisplacedBond => 3,
+        Error::ImpossibleIsotope => 4
+    }
+}
+
+pub fn error_message(error: Error) -> &'static str {
+    ERROR_MESSAGES[error_code(error) as usize - 1]
+}
 
-    get_ValueError(error_message)
+pub fn exception_from_error(error: Error) -> PyErr {
+    get_ValueError(error_message(error))
 }
 
 pub fn generic_exception<T: std::fmt::Debug>(error: T) -> PyErr {
@@ -29,7 +44,10 @@ pub fn generic_exception<T: std::fmt::Debug>(error: T) -> PyErr {
     exceptions::Exception::py_err(error_message)
 }
 
-pub fn exception_from_graph_error(error: GraphError) -> PyErr {
-    let error_message = format!("Graph issue: {:?}", error);
-    exceptions::ValueError::py_err(error_message)
-}
\ No newline at end of file
+pub fn missing_atom(atom_id: usize) -> PyErr {
+    exceptions::ValueError::py_err(format!("No atom with ID {}", atom_id))
+}
+
+pub fn missing_bond(sid: usize, tid: usize) -> PyErr {
+    exceptions::ValueError::py_err(format!("No bond between atoms {} and {}", sid, tid))
+}
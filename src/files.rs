@@ -0,0 +1,81 @@
+use std::fs::File;
+use std::io::{self,BufRead,BufReader,BufWriter,Write};
+
+use flate2::Compression;
+use flate2::bufread::MultiGzDecoder;
+use flate2::write::GzEncoder;
+use pyo3::prelude::*;
+
+pub const BUFFER_SIZE: usize = 1 << 20;
+const GZIP_MAGIC: [u8; 2] = [0x1f, 0x8b];
+
+/// A path given as a ``str`` or any ``os.PathLike``, as ``open``
+/// accepts.
+pub fn extract_path(path: &PyAny) -> PyResult<String> {
+    let gil = Python::acquire_gil();
+    gil.python().import("os")?.call1("fspath", (path,))?.extract()
+}
+
+pub fn open_reader(path: &str) -> io::Result<Box<dyn BufRead + Send>> {
+    let mut reader = BufReader::with_capacity(BUFFER_SIZE, File::open(path)?);
+    let is_gzip = reader.fill_buf()?.starts_with(&GZIP_MAGIC);
+
+    if is_gzip {
+        let decoder = MultiGzDecoder::new(reader);
+        Ok(Box::new(BufReader::with_capacity(BUFFER_SIZE, decoder)))
+    } else {
+        Ok(Box::new(reader))
+    }
+}
+
+pub enum Output {
+    Plain(BufWriter<File>),
+    Gzip(BufWriter<GzEncoder<File>>),
+}
+
+impl Output {
+    pub fn create(path: &str, compress: bool) -> io::Result<Self> {
+        let file = File::create(path)?;
+        if compress {
+            let encoder = GzEncoder::new(file, Compression::default());
+            Ok(Output::Gzip(BufWriter::with_capacity(BUFFER_SIZE, encoder)))
+        } else {
+            Ok(Output::Plain(BufWriter::with_capacity(BUFFER_SIZE, file)))
+        }
+    }
+
+    /// Flush any buffered output and, for gzip, write the trailer. This
+    /// must be called to see errors which would otherwise be lost on drop.
+    pub fn finish(self) -> io::Result<()> {
+        match self {
+            Output::Plain(mut writer) => writer.flush(),
+            Output::Gzip(writer) => {
+                writer.into_inner()?.finish()?;
+                Ok(())
+            },
+        }
+    }
+}
+
+impl Write for Output {
+    fn write(&mut self, buf: &[u8]) -> io::Result<usize> {
+        match self {
+            Output::Plain(writer) => writer.write(buf),
+            Output::Gzip(writer) => writer.write(buf),
+        }
+    }
+
+    fn write_all(&mut self, buf: &[u8]) -> io::Result<()> {
+        match self {
+            Output::Plain(writer) => writer.write_all(buf),
+            Output::Gzip(writer) => writer.write_all(buf),
+        }
+    }
+
+    fn flush(&mut self) -> io::Result<()> {
+        match self {
+            Output::Plain(writer) => writer.flush(),
+            Output::Gzip(writer) => writer.flush(),
+        }
+    }
+}
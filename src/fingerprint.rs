@@ -0,0 +1,92 @@
+use std::collections::HashMap;
+
+use pyo3::prelude::*;
+use numpy::{IntoPyArray,PyArray1,PyArray2};
+use ndarray::Array2;
+use rayon::prelude::*;
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::exceptions::{generic_exception,get_ValueError};
+use crate::morgan::{count_identifiers,fold_into,morgan_identifiers};
+use crate::parallel::run_without_gil;
+use crate::query::{extract_molecules,molecule_graphs};
+
+fn check_n_bits(n_bits: usize) -> PyResult<()> {
+    match n_bits > 0 && n_bits % 8 == 0 {
+        true => Ok(()),
+        false => Err(get_ValueError("The number of bits must be a positive multiple of 8.")),
+    }
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Compute the molecule's folded Morgan fingerprint (see
+    /// ``oxmol.fingerprint``).
+    ///
+    /// :param radius: the number of bonds out from each atom to consider
+    /// :param n_bits: the length of the fingerprint, a multiple of 8
+    /// :param features: whether to compute an FCFP-style (rather than
+    ///     ECFP-style) fingerprint
+    /// :return: a ``uint8`` array of ``n_bits // 8`` packed bits
+    /// :raises ValueError: if ``n_bits`` isn't a positive multiple of 8
+    #[args(radius = "2", n_bits = "2048", features = "false")]
+    fn morgan_fingerprint(&self, radius: usize, n_bits: usize, features: bool) -> PyResult<Py<PyArray1<u8>>> {
+        check_n_bits(n_bits)?;
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let graph = self.graph();
+
+        let packed = py.allow_threads(|| {
+            let mut packed = vec![0; n_bits / 8];
+            fold_into(&morgan_identifiers(graph, radius, features), &mut packed);
+            packed
+        });
+        Ok(packed.into_pyarray(py).to_owned())
+    }
+
+    /// Compute the molecule's unfolded Morgan fingerprint, as counts of
+    /// each substructure's 32-bit identifier.
+    ///
+    /// :param radius: the number of bonds out from each atom to consider
+    /// :param features: whether to use FCFP-style (rather than
+    ///     ECFP-style) atom invariants
+    /// :return: a ``dict`` of identifier to the number of times the
+    ///     substructure occurs
+    #[args(radius = "2", features = "false")]
+    fn morgan_counts(&self, radius: usize, features: bool) -> PyResult<HashMap<u32, usize>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let graph = self.graph();
+
+        Ok(py.allow_threads(|| count_identifiers(&morgan_identifiers(graph, radius, features))))
+    }
+}
+
+#[pyfunction(radius = "2", n_bits = "2048", features = "false", threads = "None")]
+pub fn morgan_fingerprints(
+    molecules: &PyAny,
+    radius: usize,
+    n_bits: usize,
+    features: bool,
+    threads: Option<usize>
+) -> PyResult<Py<PyArray2<u8>>> {
+    check_n_bits(n_bits)?;
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+    let molecules = extract_molecules(molecules)?;
+    let graphs = molecule_graphs(&molecules);
+    let n_bytes = n_bits / 8;
+
+    let packed = run_without_gil(py, threads, || {
+        let mut packed = vec![0; graphs.len() * n_bytes];
+        packed.par_chunks_mut(n_bytes)
+            .zip(graphs.par_iter())
+            .for_each(|(row, graph)| fold_into(&morgan_identifiers(graph, radius, features), row));
+        packed
+    })?;
+
+    match Array2::from_shape_vec((graphs.len(), n_bytes), packed) {
+        Ok(array) => Ok(array.into_pyarray(py).to_owned()),
+        Err(shape_error) => Err(generic_exception(shape_error)),
+    }
+}
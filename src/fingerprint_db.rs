@@ -0,0 +1,289 @@
+use std::convert::TryInto;
+use std::fs::File;
+use std::io::{self,BufWriter,Seek,SeekFrom,Write};
+
+use memmap::Mmap;
+use pyo3::prelude::*;
+use pyo3::buffer::PyBuffer;
+use pyo3::class::{PyObjectProtocol,PySequenceProtocol};
+use pyo3::exceptions;
+use numpy::{IntoPyArray,PyArray1,PyArray2};
+use ndarray::Array2;
+
+use crate::exceptions::{generic_exception,get_ValueError};
+use crate::files::{BUFFER_SIZE,extract_path};
+use crate::parallel::run_without_gil;
+use crate::similarity::{Fingerprints,Hit,Metric,popcount};
+
+const MAGIC: &[u8; 8] = b"OXFPRINT";
+const VERSION: u32 = 1;
+const HEADER_SIZE: usize = 24;
+
+fn header(n_bits: usize, n_fingerprints: u64) -> Vec<u8> {
+    let mut header = Vec::with_capacity(HEADER_SIZE);
+    header.extend(MAGIC);
+    header.extend(&VERSION.to_le_bytes());
+    header.extend(&(n_bits as u32).to_le_bytes());
+    header.extend(&n_fingerprints.to_le_bytes());
+    header
+}
+
+/// Packed fingerprints as a contiguous buffer of `uint8`, and the number
+/// of bytes in each. A one-dimensional array is a single fingerprint.
+fn extract_fingerprints(py: Python, values: &PyAny) -> PyResult<(Vec<u8>, usize)> {
+    let numpy = py.import("numpy")?;
+    let array = numpy.call1("ascontiguousarray", (values, "uint8"))?;
+    let buffer = PyBuffer::get(py, array)?;
+    let n_bytes = match buffer.dimensions() {
+        1 => buffer.shape()[0],
+        2 => buffer.shape()[1],
+        _ => return Err(get_ValueError("Expected a one- or two-dimensional array of packed fingerprints.")),
+    };
+    if n_bytes == 0 {
+        return Err(get_ValueError("Fingerprints must have at least one byte."));
+    }
+    Ok((buffer.to_vec::<u8>(py)?, n_bytes))
+}
+
+fn extract_metric(metric: &str) -> PyResult<Metric> {
+    match Metric::from_name(metric) {
+        Some(metric) => Ok(metric),
+        None => Err(exceptions::ValueError::py_err(format!("Unknown similarity metric: {}", metric))),
+    }
+}
+
+/// Write packed fingerprints to a database file: a 24 byte header
+/// (magic, version, bits per fingerprint and number of fingerprints),
+/// each fingerprint in turn, then the number of bits set in each as
+/// little-endian `u16`. The counts are kept apart from the fingerprints
+/// so that searches can rule rows out without reading them.
+#[pyfunction]
+pub fn write_fingerprints(fingerprints: &PyAny, path: &str) -> PyResult<usize> {
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+
+    // The header is rewritten once the fingerprints have been counted.
+    let mut writer = BufWriter::with_capacity(BUFFER_SIZE, File::create(path)?);
+    writer.write_all(&header(0, 0))?;
+    let mut n_bytes = None;
+    let mut counts: Vec<u16> = Vec::new();
+
+    let mut write_batch = |batch: &PyAny| -> PyResult<()> {
+        let (rows, batch_bytes) = extract_fingerprints(py, batch)?;
+        if *n_bytes.get_or_insert(batch_bytes) != batch_bytes {
+            return Err(get_ValueError("Fingerprints must all be the same length."));
+        }
+        if batch_bytes * 8 > u16::MAX as usize {
+            return Err(get_ValueError("Fingerprints can be at most 65535 bits long."));
+        }
+        for row in rows.chunks_exact(batch_bytes) {
+            counts.push(popcount(row) as u16);
+        }
+        writer.write_all(&rows)?;
+        Ok(())
+    };
+
+    // A single array, or an iterable of arrays (e.g. batches).
+    if fingerprints.hasattr("shape")? {
+        write_batch(fingerprints)?;
+    } else {
+        for batch in fingerprints.iter()? {
+            write_batch(batch?)?;
+        }
+    }
+
+    let n_bytes = match n_bytes {
+        Some(n_bytes) => n_bytes,
+        None => return Err(get_ValueError("No fingerprints to write.")),
+    };
+    for count in &counts {
+        writer.write_all(&count.to_le_bytes())?;
+    }
+
+    let mut file = writer.into_inner().map_err(io::Error::from)?;
+    file.seek(SeekFrom::Start(0))?;
+    file.write_all(&header(n_bytes * 8, counts.len() as u64))?;
+    file.sync_all()?;
+    Ok(counts.len())
+}
+
+/// A memory-mapped database of packed fingerprints, paged in from disk
+/// as it is searched rather than read into memory.
+///
+/// :param path: the path to a database written by
+///     ``write_fingerprints``
+///
+/// Attributes
+///
+/// - ``n_bits`` - the number of bits in each fingerprint
+#[pyclass(module = "oxmol.oxmol")]
+pub struct PyFingerprintDatabase {
+    mmap: Mmap,
+    n_bytes: usize,
+    n_fingerprints: usize,
+}
+
+impl PyFingerprintDatabase {
+    fn fingerprints(&self) -> Fingerprints {
+        let counts_start = HEADER_SIZE + self.n_fingerprints * self.n_bytes;
+        Fingerprints {
+            rows: &self.mmap[HEADER_SIZE..counts_start],
+            counts: &self.mmap[counts_start..],
+            n_bytes: self.n_bytes,
+        }
+    }
+
+    fn extract_queries(&self, py: Python, queries: &PyAny) -> PyResult<Vec<u8>> {
+        let (queries, n_bytes) = extract_fingerprints(py, queries)?;
+        if n_bytes != self.n_bytes {
+            return Err(get_ValueError("The queries aren't the same length as the fingerprints."));
+        }
+        Ok(queries)
+    }
+}
+
+fn hit_arrays(py: Python, hits: Vec<Vec<Hit>>, width: usize) -> PyResult<(Py<PyArray2<u64>>, Py<PyArray2<f64>>)> {
+    let n_queries = hits.len();
+    let mut indices = Vec::with_capacity(n_queries * width);
+    let mut scores = Vec::with_capacity(n_queries * width);
+    for hit in hits.iter().flatten() {
+        indices.push(hit.index as u64);
+        scores.push(hit.score);
+    }
+    let indices = Array2::from_shape_vec((n_queries, width), indices).map_err(generic_exception)?;
+    let scores = Array2::from_shape_vec((n_queries, width), scores).map_err(generic_exception)?;
+    Ok((indices.into_pyarray(py).to_owned(), scores.into_pyarray(py).to_owned()))
+}
+
+#[pymethods]
+impl PyFingerprintDatabase {
+    #[new]
+    fn new(path: &PyAny) -> PyResult<Self> {
+        let file = File::open(extract_path(path)?)?;
+        // The database is only read, and must not be changed while open.
+        let mmap = unsafe { Mmap::map(&file)? };
+
+        let valid_header = mmap.len() >= HEADER_SIZE
+            && &mmap[..8] == MAGIC
+            && mmap[8..12] == VERSION.to_le_bytes();
+        if !valid_header {
+            return Err(get_ValueError("Not a fingerprint database, or written by another version."));
+        }
+        let n_bits = u32::from_le_bytes(mmap[12..16].try_into().unwrap()) as usize;
+        let n_fingerprints = u64::from_le_bytes(mmap[16..24].try_into().unwrap()) as usize;
+        let n_bytes = n_bits / 8;
+        if n_bytes == 0 || n_bits % 8 != 0 {
+            return Err(get_ValueError("The fingerprint database's header is invalid."));
+        }
+        if mmap.len() != HEADER_SIZE + n_fingerprints * (n_bytes + 2) {
+            return Err(get_ValueError("The fingerprint database is truncated."));
+        }
+        Ok(Self{ mmap, n_bytes, n_fingerprints })
+    }
+
+    #[getter]
+    fn n_bits(&self) -> PyResult<usize> {
+        Ok(8 * self.n_bytes)
+    }
+
+    /// Find the most similar fingerprints to each query.
+    ///
+    /// :param queries: the packed query fingerprints
+    /// :param k: the number of fingerprints to find for each query.
+    ///     This is reduced to the size of the database if it is smaller
+    /// :param metric: ``'tanimoto'`` or ``'dice'``
+    /// :param threads: the number of threads to use, by default one
+    ///     per core
+    /// :return: ``uint64`` indices and ``float64`` scores, each of
+    ///     shape (n_queries, k), best first. Ties are broken by lowest
+    ///     index
+    #[args(k = "10", metric = "\"tanimoto\"", threads = "None")]
+    fn top_k(
+        &self,
+        queries: &PyAny,
+        k: usize,
+        metric: &str,
+        threads: Option<usize>
+    ) -> PyResult<(Py<PyArray2<u64>>, Py<PyArray2<f64>>)> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let queries = self.extract_queries(py, queries)?;
+        let metric = extract_metric(metric)?;
+        if k == 0 {
+            return Err(get_ValueError("k must be positive."));
+        }
+
+        let width = k.min(self.n_fingerprints);
+        let fingerprints = self.fingerprints();
+        let hits = run_without_gil(py, threads, || fingerprints.top_k_search(&queries, metric, width))?;
+        hit_arrays(py, hits, width)
+    }
+
+    /// Find every fingerprint at least a threshold similarity to each
+    /// query.
+    ///
+    /// :param queries: the packed query fingerprints
+    /// :param threshold: the lowest score to return, greater than 0
+    ///     and at most 1
+    /// :param metric: ``'tanimoto'`` or ``'dice'``
+    /// :param threads: the number of threads to use, by default one
+    ///     per core
+    /// :return: three arrays with an element per hit: the ``uint64``
+    ///     index of the query, the ``uint64`` index of the fingerprint
+    ///     and the ``float64`` score. These are ordered by query, then
+    ///     best first
+    #[args(threshold = "0.7", metric = "\"tanimoto\"", threads = "None")]
+    fn threshold(
+        &self,
+        queries: &PyAny,
+        threshold: f64,
+        metric: &str,
+        threads: Option<usize>
+    ) -> PyResult<(Py<PyArray1<u64>>, Py<PyArray1<u64>>, Py<PyArray1<f64>>)> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let queries = self.extract_queries(py, queries)?;
+        let metric = extract_metric(metric)?;
+        if !(threshold > 0.0 && threshold <= 1.0) {
+            return Err(get_ValueError("The threshold must be greater than 0 and at most 1."));
+        }
+
+        let fingerprints = self.fingerprints();
+        let hits = run_without_gil(py, threads, || fingerprints.threshold_search(&queries, metric, threshold))?;
+
+        let n_hits = hits.iter().map(|query_hits| query_hits.len()).sum();
+        let mut query_indices = Vec::with_capacity(n_hits);
+        let mut indices = Vec::with_capacity(n_hits);
+        let mut scores = Vec::with_capacity(n_hits);
+        for (query, query_hits) in hits.iter().enumerate() {
+            for hit in query_hits {
+                query_indices.push(query as u64);
+                indices.push(hit.index as u64);
+                scores.push(hit.score);
+            }
+        }
+        Ok((
+            query_indices.into_pyarray(py).to_owned(),
+            indices.into_pyarray(py).to_owned(),
+            scores.into_pyarray(py).to_owned(),
+        ))
+    }
+}
+
+#[pyproto]
+impl PySequenceProtocol for PyFingerprintDatabase {
+    fn __len__(&self) -> PyResult<usize> {
+        Ok(self.n_fingerprints)
+    }
+}
+
+#[pyproto]
+impl PyObjectProtocol for PyFingerprintDatabase {
+    fn __repr__(&self) -> PyResult<String> {
+        Ok(format!(
+            "PyFingerprintDatabase with {} fingerprints of {} bits.",
+            self.n_fingerprints,
+            8 * self.n_bytes
+        ))
+    }
+}
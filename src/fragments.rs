@@ -0,0 +1,121 @@
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+pub const FRAGMENT_SIZES: [&str; 2] = ["heavy_atoms", "atoms"];
+
+/// How to choose the largest fragment.
+#[derive(Clone,Copy,Debug,PartialEq)]
+pub enum FragmentSize {
+    HeavyAtoms,
+    Atoms,
+}
+
+impl FragmentSize {
+    pub fn from_name(name: &str) -> Option<Self> {
+        match name {
+            "heavy_atoms" => Some(FragmentSize::HeavyAtoms),
+            "atoms" => Some(FragmentSize::Atoms),
+            _ => None,
+        }
+    }
+}
+
+fn find_root(parents: &mut [usize], mut atom: usize) -> usize {
+    while parents[atom] != atom {
+        parents[atom] = parents[parents[atom]];
+        atom = parents[atom];
+    }
+    atom
+}
+
+/// Label each atom with its connected component, numbering components
+/// in order of their lowest atom. Returns the labels and the number of
+/// components.
+pub fn component_labels(n_atoms: usize, bonds: impl IntoIterator<Item = (usize, usize)>) -> (Vec<u32>, usize) {
+    let mut parents: Vec<usize> = (0..n_atoms).collect();
+    for (sid, tid) in bonds {
+        let source_root = find_root(&mut parents, sid);
+        let target_root = find_root(&mut parents, tid);
+        // Keep the lower atom as the root, so roots are found in order.
+        if source_root < target_root {
+            parents[target_root] = source_root;
+        } else {
+            parents[source_root] = target_root;
+        }
+    }
+
+    let mut labels = vec![0; n_atoms];
+    let mut n_components = 0;
+    for atom in 0..n_atoms {
+        let root = find_root(&mut parents, atom);
+        labels[atom] = if root == atom {
+            n_components += 1;
+            n_components as u32 - 1
+        } else {
+            labels[root]
+        };
+    }
+    (labels, n_components)
+}
+
+/// The component with the most atoms (or heavy atoms), preferring the
+/// first of any with the same size.
+pub fn largest_component(molecule: &Molecule, labels: &[u32], n_components: usize, size: FragmentSize) -> usize {
+    let mut sizes = vec![0; n_components];
+    for (atom, label) in molecule.atoms.iter().zip(labels) {
+        let counted = match size {
+            FragmentSize::HeavyAtoms => atom.element.atomic_number() != 1,
+            FragmentSize::Atoms => true,
+        };
+        sizes[*label as usize] += counted as usize;
+    }
+    let mut largest = 0;
+    for (component, size) in sizes.iter().enumerate() {
+        if *size > sizes[largest] {
+            largest = component;
+        }
+    }
+    largest
+}
+
+pub fn copy_atom(atom: &Atom) -> Atom {
+    Atom{
+        element: atom.element,
+        hydrogens: atom.hydrogens,
+        ion: atom.ion,
+        isotope: atom.isotope,
+        parity: atom.parity,
+    }
+}
+
+/// Split a molecule into one molecule per component, or just the one
+/// given. Atoms keep their relative order, so parities remain valid.
+pub fn split_fragments(molecule: &Molecule, labels: &[u32], n_components: usize, only: Option<usize>) -> Vec<Molecule> {
+    let wanted = |label: u32| only.map_or(true, |component| label as usize == component);
+    let mut fragments: Vec<Molecule> = (0..n_components)
+        .map(|_| Molecule{ atoms: Vec::new(), bonds: Vec::new() })
+        .collect();
+
+    let mut indices = vec![0; molecule.atoms.len()];
+    for (index, atom) in molecule.atoms.iter().enumerate() {
+        if wanted(labels[index]) {
+            let atoms = &mut fragments[labels[index] as usize].atoms;
+            indices[index] = atoms.len();
+            atoms.push(copy_atom(atom));
+        }
+    }
+    for bond in &molecule.bonds {
+        if wanted(labels[bond.sid]) {
+            fragments[labels[bond.sid] as usize].bonds.push(Bond{
+                sid: indices[bond.sid],
+                tid: indices[bond.tid],
+                order: bond.order,
+                parity: bond.parity,
+            });
+        }
+    }
+
+    match only {
+        Some(component) => vec![fragments.swap_remove(component)],
+        None => fragments,
+    }
+}
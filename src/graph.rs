@@ -0,0 +1,264 @@
+use std::convert::TryFrom;
+use std::mem;
+use std::ops::Range;
+
+use chemcore::molecule::Element;
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+use crate::bond_order::PyBondOrder;
+use crate::canonical::bond_order_value;
+use crate::columns::{parity_from_int,parity_to_int};
+use crate::element::PyElement;
+use crate::validation::nonbonding_electrons;
+
+/// An atom's properties, packed into six bytes.
+#[derive(Clone,Copy,Debug,PartialEq)]
+pub struct AtomRecord {
+    /// The mass number, or 0 if the atom has no isotope.
+    pub isotope: u16,
+    pub atomic_number: u8,
+    pub hydrogens: u8,
+    pub charge: i8,
+    /// Encoded as for `parity_to_int`.
+    pub parity: i8,
+}
+
+/// A bond's atoms and properties, packed into twelve bytes.
+#[derive(Clone,Copy,Debug,PartialEq)]
+pub struct BondRecord {
+    pub sid: u32,
+    pub tid: u32,
+    pub order: u8,
+    /// Encoded as for `parity_to_int`.
+    pub parity: i8,
+}
+
+impl BondRecord {
+    pub fn atoms(&self) -> (usize, usize) {
+        (self.sid as usize, self.tid as usize)
+    }
+}
+
+/// A flat, read-only store of a molecule's atoms and bonds, with the
+/// neighbours of each atom stored contiguously (compressed sparse row
+/// format). This is how `PyDefaultMolecule` holds its molecule. Bonds
+/// must join two different atoms (see `validation::check_bonds`), but
+/// nothing else is checked here.
+///
+/// Atoms and bonds are packed records, and atom and bond indices are
+/// stored as `u32`, so that millions of molecules can be held in
+/// memory: each atom takes 10 bytes and each bond 28, in five
+/// allocations.
+pub struct MolecularGraph {
+    pub atoms: Vec<AtomRecord>,
+    pub bonds: Vec<BondRecord>,
+    offsets: Vec<u32>,
+    neighbours: Vec<u32>,
+    incident_bonds: Vec<u32>,
+}
+
+impl MolecularGraph {
+    pub fn new(molecule: &Molecule) -> Self {
+        let n_atoms = molecule.atoms.len();
+
+        let mut offsets = vec![0; n_atoms + 1];
+        for bond in &molecule.bonds {
+            offsets[bond.sid + 1] += 1;
+            offsets[bond.tid + 1] += 1;
+        }
+        for atom in 0..n_atoms {
+            offsets[atom + 1] += offsets[atom];
+        }
+
+        // Each atom's (neighbour, bond) pairs, placed in its slice and
+        // then sorted by neighbour.
+        let mut next: Vec<u32> = offsets[..n_atoms].to_vec();
+        let mut entries = vec![(0, 0); 2 * molecule.bonds.len()];
+        for (index, bond) in molecule.bonds.iter().enumerate() {
+            for (atom, neighbour) in &[(bond.sid, bond.tid), (bond.tid, bond.sid)] {
+                entries[next[*atom] as usize] = (*neighbour as u32, index as u32);
+                next[*atom] += 1;
+            }
+        }
+        for atom in 0..n_atoms {
+            entries[offsets[atom] as usize..offsets[atom + 1] as usize].sort_unstable();
+        }
+
+        Self {
+            atoms: molecule.atoms.iter()
+                .map(|atom| AtomRecord {
+                    isotope: atom.isotope.unwrap_or(0),
+                    atomic_number: atom.element.atomic_number() as u8,
+                    hydrogens: atom.hydrogens,
+                    charge: atom.ion,
+                    parity: parity_to_int(atom.parity),
+                })
+                .collect(),
+            bonds: molecule.bonds.iter()
+                .map(|bond| BondRecord {
+                    sid: bond.sid as u32,
+                    tid: bond.tid as u32,
+                    order: bond_order_value(bond.order),
+                    parity: parity_to_int(bond.parity),
+                })
+                .collect(),
+            offsets,
+            neighbours: entries.iter().map(|(neighbour, _)| *neighbour).collect(),
+            incident_bonds: entries.iter().map(|(_, bond)| *bond).collect(),
+        }
+    }
+
+    /// The atoms and bonds, as they would be given to build the graph.
+    pub fn to_spec(&self) -> Molecule {
+        let atoms = (0..self.order())
+            .map(|atom| {
+                let record = &self.atoms[atom];
+                Atom {
+                    element: self.element(atom),
+                    hydrogens: record.hydrogens,
+                    ion: record.charge,
+                    isotope: if record.isotope == 0 { None } else { Some(record.isotope) },
+                    parity: parity_from_int(record.parity).expect("parities are encoded by parity_to_int"),
+                }
+            })
+            .collect();
+        let bonds = self.bonds.iter()
+            .map(|bond| Bond {
+                sid: bond.sid as usize,
+                tid: bond.tid as usize,
+                order: PyBondOrder::try_from(bond.order).expect("bond orders are in range").into(),
+                parity: parity_from_int(bond.parity).expect("parities are encoded by parity_to_int"),
+            })
+            .collect();
+        Molecule{ atoms, bonds }
+    }
+
+    pub fn element(&self, atom: usize) -> Element {
+        PyElement::try_from(self.atoms[atom].atomic_number as u16)
+            .expect("molecules only hold valid elements")
+            .element
+    }
+
+    /// The sum of the orders of an atom's bonds.
+    pub fn bond_order_sum(&self, atom: usize) -> u16 {
+        self.incident_bonds(atom).iter()
+            .map(|bond| self.bonds[*bond as usize].order as u16)
+            .sum()
+    }
+
+    /// The number of nonbonding valence electrons on an atom, or zero
+    /// for a hypervalent atom (in a molecule built without validation).
+    pub fn electrons(&self, atom: usize) -> u8 {
+        let record = &self.atoms[atom];
+        nonbonding_electrons(self.element(atom), record.charge, record.hydrogens, self.bond_order_sum(atom))
+            .unwrap_or(0)
+    }
+
+    /// The bytes allocated for the atoms, bonds and adjacency.
+    pub fn heap_size(&self) -> usize {
+        self.atoms.capacity() * mem::size_of::<AtomRecord>()
+            + self.bonds.capacity() * mem::size_of::<BondRecord>()
+            + (self.offsets.capacity() + self.neighbours.capacity() + self.incident_bonds.capacity())
+                * mem::size_of::<u32>()
+    }
+
+    pub fn order(&self) -> usize {
+        self.atoms.len()
+    }
+
+    pub fn size(&self) -> usize {
+        self.bonds.len()
+    }
+
+    pub fn degree(&self, atom: usize) -> usize {
+        (self.offsets[atom + 1] - self.offsets[atom]) as usize
+    }
+
+    fn neighbour_range(&self, atom: usize) -> Range<usize> {
+        self.offsets[atom] as usize..self.offsets[atom + 1] as usize
+    }
+
+    /// The neighbours of an atom, in ascending order.
+    pub fn neighbours(&self, atom: usize) -> &[u32] {
+        &self.neighbours[self.neighbour_range(atom)]
+    }
+
+    /// The bonds to each of `neighbours(atom)`, in the same order.
+    pub fn incident_bonds(&self, atom: usize) -> &[u32] {
+        &self.incident_bonds[self.neighbour_range(atom)]
+    }
+
+    /// Each of an atom's neighbours, in ascending order, with the bond
+    /// to it.
+    pub fn neighbour_bonds(&self, atom: usize) -> impl DoubleEndedIterator<Item = (usize, usize)> + '_ {
+        self.neighbours(atom).iter()
+            .zip(self.incident_bonds(atom))
+            .map(|(neighbour, bond)| (*neighbour as usize, *bond as usize))
+    }
+
+    /// The whole adjacency: the offset of each atom's neighbours (with
+    /// one past the end), then every atom's neighbours and the bonds
+    /// to them.
+    pub fn adjacency(&self) -> (&[u32], &[u32], &[u32]) {
+        (&self.offsets, &self.neighbours, &self.incident_bonds)
+    }
+
+    pub fn bond_between(&self, sid: usize, tid: usize) -> Option<usize> {
+        self.neighbours(sid)
+            .binary_search(&(tid as u32))
+            .ok()
+            .map(|position| self.incident_bonds(sid)[position] as usize)
+    }
+
+    /// Whether each bond is in a ring, i.e. isn't a bridge. Bridges are
+    /// found with Tarjan's depth-first search, iteratively so that long
+    /// chains can't overflow the stack.
+    pub fn ring_bonds(&self) -> Vec<bool> {
+        let n_atoms = self.order();
+        let mut in_ring = vec![true; self.size()];
+        let mut discovered = vec![usize::MAX; n_atoms];
+        let mut low = vec![0; n_atoms];
+        let mut time = 0;
+        // (atom, bond to its parent, position in its neighbours)
+        let mut stack: Vec<(usize, usize, usize)> = Vec::new();
+
+        for root in 0..n_atoms {
+            if discovered[root] != usize::MAX {
+                continue;
+            }
+            discovered[root] = time;
+            low[root] = time;
+            time += 1;
+            stack.push((root, usize::MAX, 0));
+
+            while let Some((atom, parent_bond, position)) = stack.last().copied() {
+                if position < self.degree(atom) {
+                    stack.last_mut().unwrap().2 += 1;
+                    let neighbour = self.neighbours(atom)[position] as usize;
+                    let bond = self.incident_bonds(atom)[position] as usize;
+                    if bond == parent_bond {
+                        continue;
+                    }
+                    if discovered[neighbour] == usize::MAX {
+                        discovered[neighbour] = time;
+                        low[neighbour] = time;
+                        time += 1;
+                        stack.push((neighbour, bond, 0));
+                    } else {
+                        low[atom] = low[atom].min(discovered[neighbour]);
+                    }
+                    continue;
+                }
+
+                stack.pop();
+                if let Some((parent, _, _)) = stack.last().copied() {
+                    low[parent] = low[parent].min(low[atom]);
+                    if low[atom] > discovered[parent] {
+                        in_ring[parent_bond] = false;
+                    }
+                }
+            }
+        }
+        in_ring
+    }
+}
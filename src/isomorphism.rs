@@ -0,0 +1,261 @@
+use std::collections::VecDeque;
+use std::mem;
+
+use crate::graph::MolecularGraph;
+use crate::smiles::permutation_is_odd;
+
+const NOT_MAPPED: usize = usize::MAX;
+
+/// A hash of a molecule which doesn't depend on the order of its atoms,
+/// with the refined atom invariants it was made from. Atoms of
+/// isomorphic molecules can only correspond if their classes match.
+pub struct GraphHash {
+    pub hash: u64,
+    pub atom_classes: Vec<u64>,
+}
+
+/// Combine a value into a hash (with the splitmix64 finaliser).
+fn mix(hash: u64, value: u64) -> u64 {
+    let mut mixed = (hash.rotate_left(5) ^ value).wrapping_add(0x9e37_79b9_7f4a_7c15);
+    mixed = (mixed ^ (mixed >> 30)).wrapping_mul(0xbf58_476d_1ce4_e5b9);
+    mixed = (mixed ^ (mixed >> 27)).wrapping_mul(0x94d0_49bb_1331_11eb);
+    mixed ^ (mixed >> 31)
+}
+
+fn count_classes(classes: &[u64]) -> usize {
+    let mut sorted = classes.to_vec();
+    sorted.sort_unstable();
+    sorted.dedup();
+    sorted.len()
+}
+
+impl GraphHash {
+    /// Hash a molecule by iterative refinement (as in Morgan's
+    /// algorithm): atoms start from their element, charge, isotope,
+    /// hydrogens, degree and whether they have a parity, and are
+    /// rehashed with their neighbours' classes and bond orders until
+    /// the number of classes stops growing. The molecule's hash is
+    /// made from the sorted atom classes.
+    pub fn new(graph: &MolecularGraph) -> Self {
+        let mut classes: Vec<u64> = graph.atoms.iter()
+            .enumerate()
+            .map(|(atom, record)| {
+                [
+                    record.atomic_number as u64,
+                    record.charge as u8 as u64,
+                    record.isotope as u64,
+                    record.hydrogens as u64,
+                    graph.degree(atom) as u64,
+                    (record.parity != 0) as u64,
+                ].iter().fold(0, |hash, value| mix(hash, *value))
+            })
+            .collect();
+        let mut n_classes = count_classes(&classes);
+
+        let mut environment = Vec::new();
+        loop {
+            let refined: Vec<u64> = (0..graph.order())
+                .map(|atom| {
+                    environment.clear();
+                    for (neighbour, bond) in graph.neighbour_bonds(atom) {
+                        let bond = &graph.bonds[bond];
+                        let bond_invariant = bond.order as u64 | ((bond.parity != 0) as u64) << 8;
+                        environment.push(mix(classes[neighbour], bond_invariant));
+                    }
+                    environment.sort_unstable();
+                    environment.iter().fold(mix(classes[atom], 0), |hash, value| mix(hash, *value))
+                })
+                .collect();
+            let refined_classes = count_classes(&refined);
+            classes = refined;
+            if refined_classes == n_classes {
+                break;
+            }
+            n_classes = refined_classes;
+        }
+
+        let mut sorted = classes.clone();
+        sorted.sort_unstable();
+        let hash = sorted.iter().fold(mix(graph.order() as u64, graph.size() as u64), |hash, class| mix(hash, *class));
+        Self{ hash, atom_classes: classes }
+    }
+
+    /// The bytes allocated for the atom classes.
+    pub fn heap_size(&self) -> usize {
+        self.atom_classes.capacity() * mem::size_of::<u64>()
+    }
+}
+
+/// A search for a mapping from the atoms of one molecule onto those of
+/// another, visiting the first molecule's atoms breadth first so that
+/// candidates come from the neighbours of an atom already mapped.
+struct Matcher<'a> {
+    first: &'a MolecularGraph,
+    first_classes: &'a [u64],
+    second: &'a MolecularGraph,
+    second_classes: &'a [u64],
+    /// Atoms in search order, with the atom they were reached from.
+    order: Vec<(usize, Option<usize>)>,
+    mapping: Vec<usize>,
+    used: Vec<bool>,
+}
+
+impl<'a> Matcher<'a> {
+    fn new(first: &'a MolecularGraph, first_hash: &'a GraphHash, second: &'a MolecularGraph, second_hash: &'a GraphHash) -> Self {
+        let mut order = Vec::with_capacity(first.order());
+        let mut visited = vec![false; first.order()];
+        let mut queue = VecDeque::new();
+        for root in 0..first.order() {
+            if visited[root] {
+                continue;
+            }
+            visited[root] = true;
+            order.push((root, None));
+            queue.push_back(root);
+            while let Some(atom) = queue.pop_front() {
+                for neighbour in first.neighbours(atom) {
+                    let neighbour = *neighbour as usize;
+                    if !visited[neighbour] {
+                        visited[neighbour] = true;
+                        order.push((neighbour, Some(atom)));
+                        queue.push_back(neighbour);
+                    }
+                }
+            }
+        }
+
+        Self {
+            first,
+            first_classes: &first_hash.atom_classes,
+            second,
+            second_classes: &second_hash.atom_classes,
+            order,
+            mapping: vec![NOT_MAPPED; first.order()],
+            used: vec![false; second.order()],
+        }
+    }
+
+    fn atoms_match(&self, atom: usize, candidate: usize) -> bool {
+        let (first, second) = (&self.first.atoms[atom], &self.second.atoms[candidate]);
+        self.first_classes[atom] == self.second_classes[candidate]
+            && first.atomic_number == second.atomic_number
+            && first.charge == second.charge
+            && first.isotope == second.isotope
+            && first.hydrogens == second.hydrogens
+            && self.first.degree(atom) == self.second.degree(candidate)
+    }
+
+    /// Whether the bonds to each mapped neighbour are in the second
+    /// molecule, with the same order.
+    fn bonds_match(&self, atom: usize, candidate: usize) -> bool {
+        self.first.neighbour_bonds(atom)
+            .filter(|(neighbour, _)| self.mapping[*neighbour] != NOT_MAPPED)
+            .all(|(neighbour, bond)| {
+                match self.second.bond_between(candidate, self.mapping[neighbour]) {
+                    Some(other) => self.first.bonds[bond].order == self.second.bonds[other].order,
+                    None => false,
+                }
+            })
+    }
+
+    /// Whether an atom's parity, relative to its virtual hydrogen and
+    /// then its neighbours in ascending order, is kept by the mapping.
+    fn atom_parity_matches(&self, atom: usize) -> bool {
+        let parity = self.first.atoms[atom].parity;
+        let other = self.second.atoms[self.mapping[atom]].parity;
+        if parity == 0 || other == 0 {
+            return parity == other;
+        }
+        let mapped: Vec<usize> = self.first.neighbours(atom).iter()
+            .map(|neighbour| self.mapping[*neighbour as usize])
+            .collect();
+        match permutation_is_odd(&mapped) {
+            true => parity == -other,
+            false => parity == other,
+        }
+    }
+
+    /// Whether a double bond's parity, relative to the lowest neighbour
+    /// at each end, is kept by the mapping.
+    fn bond_parity_matches(&self, bond: usize) -> bool {
+        let (sid, tid) = self.first.bonds[bond].atoms();
+        let (mapped_sid, mapped_tid) = (self.mapping[sid], self.mapping[tid]);
+        let other_bond = match self.second.bond_between(mapped_sid, mapped_tid) {
+            Some(other_bond) => other_bond,
+            None => return false,
+        };
+        let parity = self.first.bonds[bond].parity;
+        let other = self.second.bonds[other_bond].parity;
+        if parity == 0 || other == 0 {
+            return parity == other;
+        }
+
+        let lowest = |graph: &MolecularGraph, atom: usize, across: usize| {
+            graph.neighbours(atom).iter()
+                .map(|neighbour| *neighbour as usize)
+                .find(|neighbour| *neighbour != across)
+        };
+        let mut flipped = false;
+        for (atom, across, mapped, mapped_across) in [(sid, tid, mapped_sid, mapped_tid), (tid, sid, mapped_tid, mapped_sid)].iter() {
+            let reference = lowest(self.first, *atom, *across).map(|neighbour| self.mapping[neighbour]);
+            if reference != lowest(self.second, *mapped, *mapped_across) {
+                flipped = !flipped;
+            }
+        }
+        match flipped {
+            true => parity == -other,
+            false => parity == other,
+        }
+    }
+
+    fn stereo_matches(&self) -> bool {
+        (0..self.first.order()).all(|atom| self.atom_parity_matches(atom))
+            && (0..self.first.size()).all(|bond| self.bond_parity_matches(bond))
+    }
+
+    fn try_candidate(&mut self, depth: usize, candidate: usize) -> bool {
+        let atom = self.order[depth].0;
+        if self.used[candidate] || !self.atoms_match(atom, candidate) || !self.bonds_match(atom, candidate) {
+            return false;
+        }
+        self.mapping[atom] = candidate;
+        self.used[candidate] = true;
+        if self.extend(depth + 1) {
+            return true;
+        }
+        self.used[candidate] = false;
+        self.mapping[atom] = NOT_MAPPED;
+        false
+    }
+
+    fn extend(&mut self, depth: usize) -> bool {
+        let (atom, parent) = match self.order.get(depth) {
+            Some(step) => *step,
+            None => return self.stereo_matches(),
+        };
+        let candidates: Vec<usize> = match parent {
+            Some(parent) => {
+                self.second.neighbours(self.mapping[parent]).iter()
+                    .map(|neighbour| *neighbour as usize)
+                    .collect()
+            },
+            None => {
+                (0..self.second.order())
+                    .filter(|candidate| self.second_classes[*candidate] == self.first_classes[atom])
+                    .collect()
+            },
+        };
+        candidates.into_iter().any(|candidate| self.try_candidate(depth, candidate))
+    }
+}
+
+/// Whether two molecules are the same: whether there's a mapping
+/// between their atoms which keeps elements, charges, isotopes,
+/// hydrogens, bonds and stereochemistry. Molecules with different
+/// hashes are rejected without searching.
+pub fn is_isomorphic(first: &MolecularGraph, first_hash: &GraphHash, second: &MolecularGraph, second_hash: &GraphHash) -> bool {
+    if first.order() != second.order() || first.size() != second.size() || first_hash.hash != second_hash.hash {
+        return false;
+    }
+    Matcher::new(first, first_hash, second, second_hash).extend(0)
+}
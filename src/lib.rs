@@ -1,19 +1,80 @@
 use pyo3::prelude::*;
+use pyo3::wrap_pyfunction;
 
 mod exceptions;
 mod element;
 mod bond_order;
 mod parity;
 mod spec;
+mod columns;
+mod parallel;
+mod files;
+mod smiles;
+mod canonical;
+mod smiles_writer;
+mod graph;
+mod screen;
+mod substructure;
 mod default_molecule;
+mod batch;
+mod smiles_io;
+mod query;
+mod screen_index;
+mod morgan;
+mod fingerprint;
+mod similarity;
+mod fingerprint_db;
+mod binary;
+mod store;
+mod molfile;
+mod sdf_io;
+mod descriptors;
+mod molecule_descriptors;
+mod rings;
+mod molecule_rings;
+mod fragments;
+mod molecule_fragments;
+mod isomorphism;
+mod molecule_adjacency;
+mod distances;
+mod molecule_distances;
+mod validation;
+mod molecule_validation;
+mod builder;
 
 #[pymodule]
-fn oxmol(_py: Python, m: &PyModule) -> PyResult<()> {
+fn oxmol(py: Python, m: &PyModule) -> PyResult<()> {
+    element::intern_elements(py)?;
+    parity::intern_parities(py)?;
+    bond_order::intern_bond_orders(py)?;
     m.add_class::<element::PyElement>()?;
     m.add_class::<parity::PyParity>()?;
     m.add_class::<bond_order::PyBondOrder>()?;
     m.add_class::<spec::PyAtomSpec>()?;
     m.add_class::<spec::PyBondSpec>()?;
     m.add_class::<default_molecule::PyDefaultMolecule>()?;
+    m.add_class::<smiles_io::PySmilesReader>()?;
+    m.add_class::<query::PyQuery>()?;
+    m.add_class::<screen_index::PyScreenIndex>()?;
+    m.add_class::<screen_index::PySearchResult>()?;
+    m.add_class::<fingerprint_db::PyFingerprintDatabase>()?;
+    m.add_class::<store::PyMoleculeStore>()?;
+    m.add_class::<store::PyMoleculeStoreIterator>()?;
+    m.add_class::<sdf_io::PySdfReader>()?;
+    m.add_class::<builder::PyMoleculeBuilder>()?;
+    m.add_wrapped(wrap_pyfunction!(smiles_io::read_smiles))?;
+    m.add_wrapped(wrap_pyfunction!(smiles_io::write_smiles))?;
+    m.add_wrapped(wrap_pyfunction!(fingerprint::morgan_fingerprints))?;
+    m.add_wrapped(wrap_pyfunction!(fingerprint_db::write_fingerprints))?;
+    m.add_wrapped(wrap_pyfunction!(sdf_io::read_sdf))?;
+    m.add_wrapped(wrap_pyfunction!(sdf_io::write_sdf))?;
+    m.add_wrapped(wrap_pyfunction!(sdf_io::parse_sd_data))?;
+    m.add_wrapped(wrap_pyfunction!(molecule_descriptors::compute_descriptors))?;
+    m.add_wrapped(wrap_pyfunction!(molecule_fragments::largest_fragments))?;
+    m.add_wrapped(wrap_pyfunction!(molecule_distances::distance_matrices))?;
+    m.add_wrapped(wrap_pyfunction!(molecule_validation::validate))?;
+    m.add("DESCRIPTOR_NAMES", descriptors::NAMES.to_vec())?;
+    m.add("FRAGMENT_SIZES", fragments::FRAGMENT_SIZES.to_vec())?;
+    m.add("ERROR_MESSAGES", exceptions::ERROR_MESSAGES.to_vec())?;
     Ok(())
 }
\ No newline at end of file
@@ -0,0 +1,111 @@
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+use numpy::{IntoPyArray,PyArray1,PyArray2};
+use ndarray::Array2;
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::graph::MolecularGraph;
+
+/// A molecule's adjacency in compressed sparse row (CSR) format, as
+/// read-only NumPy arrays which are shared between calls.
+pub struct AdjacencyArrays {
+    indptr: Py<PyArray1<u32>>,
+    indices: Py<PyArray1<u32>>,
+    bond_orders: Py<PyArray1<u8>>,
+}
+
+fn read_only<T: numpy::Element>(py: Python, values: Vec<T>) -> PyResult<Py<PyArray1<T>>> {
+    let array = values.into_pyarray(py);
+    array.call_method1("setflags", (false,))?;
+    Ok(array.to_owned())
+}
+
+impl AdjacencyArrays {
+    pub fn new(py: Python, graph: &MolecularGraph) -> PyResult<Self> {
+        let (offsets, neighbours, incident_bonds) = graph.adjacency();
+        Ok(Self {
+            indptr: read_only(py, offsets.to_vec())?,
+            indices: read_only(py, neighbours.to_vec())?,
+            bond_orders: read_only(py, incident_bonds.iter().map(|bond| graph.bonds[*bond as usize].order).collect())?,
+        })
+    }
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Return the connectivity in compressed sparse row (CSR) format.
+    /// The neighbours of atom ``i`` are
+    /// ``indices[indptr[i]:indptr[i + 1]]``, in ascending order, and
+    /// ``bond_orders`` holds the order of the bond to each. Each bond
+    /// appears twice, once from either end. The arrays are made on
+    /// first use, and are read-only and shared between calls.
+    ///
+    /// :return: a ``tuple`` of ``indptr`` (``uint32``, of length
+    ///     ``order() + 1``), ``indices`` (``uint32``) and
+    ///     ``bond_orders`` (``uint8``)
+    fn adjacency_csr(&self) -> PyResult<(Py<PyArray1<u32>>, Py<PyArray1<u32>>, Py<PyArray1<u8>>)> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let adjacency = self.cached_adjacency(py)?;
+        Ok((
+            adjacency.indptr.clone_ref(py),
+            adjacency.indices.clone_ref(py),
+            adjacency.bond_orders.clone_ref(py),
+        ))
+    }
+
+    /// Return the dense adjacency matrix.
+    ///
+    /// :param weighted: if ``True``, bonded atoms hold the bond order
+    ///     (so zero-order bonds are ``0``), otherwise ``1``
+    /// :return: a symmetric ``uint8`` array of shape (n_atoms, n_atoms)
+    #[args(weighted = "false")]
+    fn adjacency_matrix(&self, weighted: bool) -> PyResult<Py<PyArray2<u8>>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let graph = self.graph();
+        let n_atoms = graph.order();
+
+        let mut matrix = Array2::zeros((n_atoms, n_atoms));
+        for bond in &graph.bonds {
+            let (sid, tid) = bond.atoms();
+            let value = if weighted { bond.order } else { 1 };
+            matrix[[sid, tid]] = value;
+            matrix[[tid, sid]] = value;
+        }
+        Ok(matrix.into_pyarray(py).to_owned())
+    }
+
+    /// Return the adjacency matrix as a ``scipy.sparse.csr_matrix``,
+    /// from copies of the ``adjacency_csr`` arrays.
+    ///
+    /// :param weighted: if ``True``, bonded atoms hold the bond order
+    ///     (zero-order bonds are stored as explicit zeros), otherwise
+    ///     ``1``
+    /// :return: a symmetric ``uint8`` sparse matrix of shape (n_atoms,
+    ///     n_atoms)
+    /// :raises ImportError: if SciPy isn't installed
+    #[args(weighted = "false")]
+    fn to_scipy_sparse(&self, weighted: bool) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let sparse = py.import("scipy.sparse")?;
+        let graph = self.graph();
+        let adjacency = self.cached_adjacency(py)?;
+
+        let (_, _, incident_bonds) = graph.adjacency();
+        let data: Vec<u8> = match weighted {
+            true => incident_bonds.iter().map(|bond| graph.bonds[*bond as usize].order).collect(),
+            false => vec![1; incident_bonds.len()],
+        };
+        let kwargs = PyDict::new(py);
+        kwargs.set_item("shape", (graph.order(), graph.order()))?;
+        kwargs.set_item("copy", true)?;
+        let matrix = sparse.call(
+            "csr_matrix",
+            ((data.into_pyarray(py), adjacency.indices.as_ref(py), adjacency.indptr.as_ref(py)),),
+            Some(kwargs)
+        )?;
+        Ok(PyObject::from(matrix))
+    }
+}
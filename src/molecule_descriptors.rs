@@ -0,0 +1,91 @@
+use pyo3::prelude::*;
+use pyo3::exceptions;
+use pyo3::types::PyDict;
+use numpy::{IntoPyArray,PyArray2};
+use ndarray::Array2;
+use rayon::prelude::*;
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::descriptors::{Descriptor,NAMES,compute,formula};
+use crate::exceptions::generic_exception;
+use crate::parallel::run_without_gil;
+use crate::query::{extract_molecules,molecule_graphs};
+
+fn extract_descriptors(names: Option<Vec<String>>) -> PyResult<(Vec<Descriptor>, Vec<String>)> {
+    let names = match names {
+        Some(names) => names,
+        None => NAMES.iter().map(|name| name.to_string()).collect(),
+    };
+    let mut descriptors = Vec::with_capacity(names.len());
+    for name in &names {
+        match Descriptor::from_name(name) {
+            Some(descriptor) => descriptors.push(descriptor),
+            None => return Err(exceptions::ValueError::py_err(format!("Unknown descriptor: {}", name))),
+        }
+    }
+    Ok((descriptors, names))
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Compute descriptors of the molecule (see ``oxmol.descriptors``).
+    ///
+    /// :param names: the descriptors to compute, by default all of
+    ///     ``DESCRIPTOR_NAMES``
+    /// :return: a ``dict`` of descriptor name to value, in the order of
+    ///     ``names``
+    /// :raises ValueError: if a name isn't a known descriptor
+    #[args(names = "None")]
+    fn descriptors(&self, names: Option<Vec<String>>) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let (descriptors, names) = extract_descriptors(names)?;
+        let graph = self.graph();
+
+        let mut values = vec![0.0; descriptors.len()];
+        compute(graph, &descriptors, &mut values);
+        let dict = PyDict::new(py);
+        for (name, value) in names.into_iter().zip(values) {
+            dict.set_item(name, value)?;
+        }
+        Ok(dict.to_object(py))
+    }
+
+    /// Get the molecular formula in Hill order (carbon, hydrogen, then
+    /// the other elements alphabetically), followed by any net charge,
+    /// e.g. ``'C2H3O2-'``.
+    ///
+    /// :return: the formula
+    fn formula(&self) -> PyResult<String> {
+        Ok(formula(self.graph()))
+    }
+}
+
+#[pyfunction(names = "None", threads = "None")]
+pub fn compute_descriptors(
+    molecules: &PyAny,
+    names: Option<Vec<String>>,
+    threads: Option<usize>
+) -> PyResult<Py<PyArray2<f64>>> {
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+    let (descriptors, _) = extract_descriptors(names)?;
+    let molecules = extract_molecules(molecules)?;
+    let graphs = molecule_graphs(&molecules);
+    let width = descriptors.len();
+
+    let values = run_without_gil(py, threads, || {
+        let mut values = vec![0.0; graphs.len() * width];
+        if width > 0 {
+            values.par_chunks_mut(width)
+                .zip(graphs.par_iter())
+                .for_each(|(row, graph)| compute(graph, &descriptors, row));
+        }
+        values
+    })?;
+
+    match Array2::from_shape_vec((graphs.len(), width), values) {
+        Ok(array) => Ok(array.into_pyarray(py).to_owned()),
+        Err(shape_error) => Err(generic_exception(shape_error)),
+    }
+}
@@ -0,0 +1,100 @@
+use pyo3::prelude::*;
+use numpy::{IntoPyArray,PyArray1,PyArray2};
+use ndarray::Array2;
+use rayon::prelude::*;
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::distances::{UNREACHABLE,breadth_first_order,depth_first_order,distance_matrix};
+use crate::exceptions::generic_exception;
+use crate::parallel::run_without_gil;
+use crate::query::{extract_molecules,molecule_graphs};
+
+fn matrix_array(py: Python, n_atoms: usize, distances: &[u16]) -> PyResult<Py<PyArray2<u16>>> {
+    match Array2::from_shape_vec((n_atoms, n_atoms), distances.to_vec()) {
+        Ok(array) => Ok(array.into_pyarray(py).to_owned()),
+        Err(shape_error) => Err(generic_exception(shape_error)),
+    }
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Given an atom ID, return the atoms reachable from it in
+    /// breadth-first order, visiting neighbours in ascending order.
+    ///
+    /// :param atom_id: the atom index to start from
+    /// :return: a ``uint32`` array of atom indices, starting with
+    ///     ``atom_id``
+    fn bfs(&self, atom_id: usize) -> PyResult<Py<PyArray1<u32>>> {
+        self.check_atom(atom_id)?;
+        let gil = Python::acquire_gil();
+        let order = breadth_first_order(self.graph(), atom_id);
+        Ok(order.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Given an atom ID, return the atoms reachable from it in
+    /// depth-first (preorder) order, visiting neighbours in ascending
+    /// order.
+    ///
+    /// :param atom_id: the atom index to start from
+    /// :return: a ``uint32`` array of atom indices, starting with
+    ///     ``atom_id``
+    fn dfs(&self, atom_id: usize) -> PyResult<Py<PyArray1<u32>>> {
+        self.check_atom(atom_id)?;
+        let gil = Python::acquire_gil();
+        let order = depth_first_order(self.graph(), atom_id);
+        Ok(order.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return the topological distance (the number of bonds on the
+    /// shortest path) between every pair of atoms. This is computed on
+    /// first use and cached, and each call returns a new copy.
+    ///
+    /// :return: a ``uint16`` array of shape (n_atoms, n_atoms), where
+    ///     atoms in different fragments are ``65535`` apart
+    fn distance_matrix(&self) -> PyResult<Py<PyArray2<u16>>> {
+        let gil = Python::acquire_gil();
+        let distances = self.cached_distances();
+        matrix_array(gil.python(), self.graph().order(), distances)
+    }
+
+    /// Given an atom ID, return the atoms at most ``k`` bonds away,
+    /// using the cached distance matrix.
+    ///
+    /// :param atom_id: the atom index
+    /// :param k: the largest distance to include
+    /// :return: a ``uint32`` array of atom indices in ascending order,
+    ///     including ``atom_id``
+    fn atoms_within(&self, atom_id: usize, k: u16) -> PyResult<Py<PyArray1<u32>>> {
+        self.check_atom(atom_id)?;
+        let gil = Python::acquire_gil();
+        let n_atoms = self.graph().order();
+        let row = &self.cached_distances()[atom_id * n_atoms..(atom_id + 1) * n_atoms];
+        let atoms: Vec<u32> = row.iter()
+            .enumerate()
+            .filter(|(_, distance)| **distance <= k && **distance != UNREACHABLE)
+            .map(|(atom, _)| atom as u32)
+            .collect();
+        Ok(atoms.into_pyarray(gil.python()).to_owned())
+    }
+}
+
+#[pyfunction(threads = "None")]
+pub fn distance_matrices(molecules: &PyAny, threads: Option<usize>) -> PyResult<Vec<Py<PyArray2<u16>>>> {
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+    let molecules = extract_molecules(molecules)?;
+    let graphs = molecule_graphs(&molecules);
+
+    let matrices = run_without_gil(py, threads, || {
+        graphs.par_iter()
+            .map(|graph| distance_matrix(graph))
+            .collect::<Vec<Vec<u16>>>()
+    })?;
+
+    let mut arrays = Vec::with_capacity(matrices.len());
+    for ((molecule, graph), distances) in molecules.iter().zip(&graphs).zip(matrices) {
+        let distances = molecule.cache_distances(distances);
+        arrays.push(matrix_array(py, graph.order(), distances)?);
+    }
+    Ok(arrays)
+}
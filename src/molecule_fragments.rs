@@ -0,0 +1,109 @@
+use pyo3::prelude::*;
+use pyo3::exceptions;
+use numpy::{IntoPyArray,PyArray1};
+use rayon::prelude::*;
+
+use chemcore::molecule::spec::Molecule;
+
+use crate::batch::{BuildError,BuildResult,into_molecules};
+use crate::default_molecule::PyDefaultMolecule;
+use crate::exceptions::exception_from_error;
+use crate::fragments::{FragmentSize,component_labels,largest_component,split_fragments};
+use crate::graph::BondRecord;
+use crate::parallel::run_without_gil;
+use crate::query::extract_molecules;
+
+fn extract_size(by: &str) -> PyResult<FragmentSize> {
+    match FragmentSize::from_name(by) {
+        Some(size) => Ok(size),
+        None => Err(exceptions::ValueError::py_err(format!("Unknown fragment size: {}", by))),
+    }
+}
+
+fn edge_pairs(molecule: &Molecule) -> Vec<(usize, usize)> {
+    molecule.bonds.iter().map(|bond| (bond.sid, bond.tid)).collect()
+}
+
+/// The largest fragment of a molecule, or the whole molecule if it's
+/// in one piece (or empty).
+fn largest_fragment_spec(molecule: Molecule, size: FragmentSize) -> Molecule {
+    let (labels, n_components) = component_labels(molecule.atoms.len(), edge_pairs(&molecule));
+    if n_components < 2 {
+        return molecule;
+    }
+    let component = largest_component(&molecule, &labels, n_components, size);
+    split_fragments(&molecule, &labels, n_components, Some(component)).remove(0)
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Label every atom with the connected component (fragment) it's
+    /// in. Components are numbered from ``0`` in order of their lowest
+    /// atom index.
+    ///
+    /// :return: a ``uint32`` array, indexed by atom ID
+    fn connected_components(&self) -> PyResult<Py<PyArray1<u32>>> {
+        let gil = Python::acquire_gil();
+        let graph = self.graph();
+        let (labels, _) = component_labels(graph.order(), graph.bonds.iter().map(BondRecord::atoms));
+        Ok(labels.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Split the molecule into a molecule per connected component, in
+    /// the order of ``connected_components``. Each fragment's atoms
+    /// keep their relative order.
+    ///
+    /// :return: a ``list`` of molecules
+    fn fragments(&self) -> PyResult<Vec<PyDefaultMolecule>> {
+        let molecule = self.to_spec();
+        let (labels, n_components) = component_labels(molecule.atoms.len(), edge_pairs(&molecule));
+
+        let mut fragments = Vec::with_capacity(n_components);
+        // Fragments of a built molecule are as valid as it is, so they
+        // aren't checked again.
+        for fragment in split_fragments(&molecule, &labels, n_components, None) {
+            fragments.push(PyDefaultMolecule::build_with(fragment, false).map_err(exception_from_error)?);
+        }
+        Ok(fragments)
+    }
+
+    /// Get the largest connected component, e.g. to strip salts and
+    /// solvents. Ties go to the first fragment.
+    ///
+    /// :param by: how to measure size, one of ``FRAGMENT_SIZES``:
+    ///     ``'heavy_atoms'`` or ``'atoms'``
+    /// :return: a new molecule
+    /// :raises ValueError: if ``by`` isn't a known size
+    #[args(by = "\"heavy_atoms\"")]
+    fn largest_fragment(&self, by: &str) -> PyResult<PyDefaultMolecule> {
+        let size = extract_size(by)?;
+        let fragment = largest_fragment_spec(self.to_spec(), size);
+        PyDefaultMolecule::build_with(fragment, false).map_err(exception_from_error)
+    }
+}
+
+#[pyfunction(by = "\"heavy_atoms\"", threads = "None")]
+pub fn largest_fragments(
+    molecules: &PyAny,
+    by: &str,
+    threads: Option<usize>
+) -> PyResult<Vec<PyObject>> {
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+    let size = extract_size(by)?;
+
+    let mut specs = Vec::new();
+    for molecule in extract_molecules(molecules)? {
+        specs.push(molecule.to_spec());
+    }
+
+    let results = run_without_gil(py, threads, || {
+        specs.into_par_iter()
+            .map(|molecule| {
+                PyDefaultMolecule::build_with(largest_fragment_spec(molecule, size), false)
+                    .map_err(BuildError::InvalidMolecule)
+            })
+            .collect::<Vec<BuildResult>>()
+    })?;
+    into_molecules(py, results, false)
+}
@@ -0,0 +1,61 @@
+use pyo3::prelude::*;
+use numpy::{IntoPyArray,PyArray1};
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::rings::aromatic_atoms;
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Given an atom ID, return whether the atom is in a ring. Rings
+    /// are perceived on first use and cached.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: whether the atom is in a ring
+    fn is_in_ring(&self, atom_id: usize) -> PyResult<bool> {
+        self.check_atom(atom_id)?;
+        Ok(self.cached_rings().is_in_ring(atom_id))
+    }
+
+    /// Given an atom ID, return the sizes of the rings the atom is in,
+    /// from the smallest set of smallest rings.
+    ///
+    /// :param atom_id: the atom index
+    /// :return: a ``list`` of ring sizes in ascending order, which is
+    ///     empty if the atom isn't in a ring
+    fn ring_sizes(&self, atom_id: usize) -> PyResult<Vec<usize>> {
+        self.check_atom(atom_id)?;
+        Ok(self.cached_rings().atom_ring_sizes[atom_id].clone())
+    }
+
+    /// Return the smallest set of smallest rings (a minimum cycle
+    /// basis). Each ring is listed in ring order, from its lowest atom
+    /// index towards the lower of that atom's ring neighbours, and the
+    /// rings are sorted by size.
+    ///
+    /// :return: a ``list`` of rings, as ``list`` of atom indices
+    fn rings(&self) -> PyResult<Vec<Vec<usize>>> {
+        Ok(self.cached_rings().rings.clone())
+    }
+
+    /// Return whether every bond is in a ring, in the same order as
+    /// ``edges``.
+    ///
+    /// :return: a ``bool`` array, indexed by bond
+    fn ring_bond_flags(&self) -> PyResult<Py<PyArray1<bool>>> {
+        let gil = Python::acquire_gil();
+        let ring_bonds = self.cached_rings().ring_bonds.clone();
+        Ok(ring_bonds.into_pyarray(gil.python()).to_owned())
+    }
+
+    /// Return whether every atom is aromatic, by Hückel's rule: an atom
+    /// is aromatic if it's in a ring of the smallest set of smallest
+    /// rings (or in two such rings which share a bond) whose atoms are
+    /// all conjugated, and which has 4n + 2 π electrons.
+    ///
+    /// :return: a ``bool`` array, indexed by atom
+    fn aromatic_atom_flags(&self) -> PyResult<Py<PyArray1<bool>>> {
+        let gil = Python::acquire_gil();
+        let aromatic = aromatic_atoms(self.graph(), &self.cached_rings().rings);
+        Ok(aromatic.into_pyarray(gil.python()).to_owned())
+    }
+}
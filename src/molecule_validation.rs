@@ -0,0 +1,23 @@
+use pyo3::prelude::*;
+use numpy::{IntoPyArray,PyArray1};
+use rayon::prelude::*;
+
+use crate::exceptions::error_code;
+use crate::parallel::run_without_gil;
+use crate::query::{extract_molecules,molecule_graphs};
+use crate::validation::check_graph;
+
+#[pyfunction(threads = "None")]
+pub fn validate(molecules: &PyAny, threads: Option<usize>) -> PyResult<Py<PyArray1<u8>>> {
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+    let molecules = extract_molecules(molecules)?;
+    let graphs = molecule_graphs(&molecules);
+
+    let codes = run_without_gil(py, threads, || {
+        graphs.par_iter()
+            .map(|graph| check_graph(graph).map_or_else(error_code, |_| 0))
+            .collect::<Vec<u8>>()
+    })?;
+    Ok(codes.into_pyarray(py).to_owned())
+}
@@ -0,0 +1,701 @@
+use std::fmt;
+use std::fmt::Write;
+
+use chemcore::molecule::{BondOrder,Element,Parity};
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+use crate::canonical::{aromatic_bonds,bond_order_value,symmetry_classes};
+use crate::element::{average_mass,element_from_symbol};
+use crate::graph::MolecularGraph;
+use crate::smiles::{assign_double_bonds,implicit_hydrogens,permutation_is_odd};
+
+const HYDROGEN: usize = usize::MAX;
+const MAX_ENTRIES: usize = 999;
+const PROPERTIES_PER_LINE: usize = 8;
+const COLLINEAR: f64 = 1e-3;
+
+#[derive(Debug)]
+pub struct MolfileError {
+    pub line: usize,
+    pub message: &'static str,
+}
+
+impl fmt::Display for MolfileError {
+    fn fmt(&self, f: &mut fmt::Formatter) -> fmt::Result {
+        write!(f, "Invalid molfile at line {}: {}", self.line, self.message)
+    }
+}
+
+struct Lines<'a> {
+    lines: std::str::Lines<'a>,
+    number: usize,
+}
+
+impl<'a> Lines<'a> {
+    fn error<T>(&self, message: &'static str) -> Result<T, MolfileError> {
+        Err(MolfileError{ line: self.number, message })
+    }
+
+    fn next(&mut self) -> Result<&'a str, MolfileError> {
+        match self.lines.next() {
+            Some(line) => {
+                self.number += 1;
+                Ok(line)
+            },
+            None => self.error("Unexpected end of record"),
+        }
+    }
+
+    fn integer(&self, line: &str, start: usize, end: usize) -> Result<i32, MolfileError> {
+        match field(line, start, end) {
+            "" => Ok(0),
+            value => value.parse().or_else(|_| self.error("Invalid number")),
+        }
+    }
+
+    fn coordinate(&self, line: &str, start: usize) -> Result<f64, MolfileError> {
+        field(line, start, start + 10).parse().or_else(|_| self.error("Invalid coordinate"))
+    }
+}
+
+/// A fixed-width field, which may run past the end of a short line.
+fn field(line: &str, start: usize, end: usize) -> &str {
+    line.get(start..end.min(line.len())).unwrap_or("").trim()
+}
+
+struct MolAtom {
+    element: Element,
+    position: [f64; 3],
+    charge: i8,
+    isotope: Option<u16>,
+    mass_difference: i32,
+    parity: i32,
+    valence: i32,
+    radical: u8,
+}
+
+struct MolBond {
+    sid: usize,
+    tid: usize,
+    kind: i32,
+    stereo: i32,
+}
+
+fn parse_atom(lines: &Lines, line: &str) -> Result<MolAtom, MolfileError> {
+    let position = [
+        lines.coordinate(line, 0)?,
+        lines.coordinate(line, 10)?,
+        lines.coordinate(line, 20)?,
+    ];
+    let (element, isotope) = match field(line, 31, 34) {
+        "D" => (Element::H, Some(2)),
+        "T" => (Element::H, Some(3)),
+        symbol => match element_from_symbol(symbol) {
+            Ok(element) => (element, None),
+            Err(_) => return lines.error("Unsupported atom symbol"),
+        },
+    };
+    let (charge, radical) = match lines.integer(line, 36, 39)? {
+        0 => (0, 0),
+        1 => (3, 0),
+        2 => (2, 0),
+        3 => (1, 0),
+        4 => (0, 2),
+        5 => (-1, 0),
+        6 => (-2, 0),
+        7 => (-3, 0),
+        _ => return lines.error("Invalid charge code"),
+    };
+    let valence = lines.integer(line, 48, 51)?;
+    if valence < 0 || valence > 15 {
+        return lines.error("Invalid valence");
+    }
+
+    Ok(MolAtom {
+        element,
+        position,
+        charge,
+        isotope,
+        mass_difference: lines.integer(line, 34, 36)?,
+        parity: lines.integer(line, 39, 42)?,
+        valence,
+        radical,
+    })
+}
+
+fn parse_bond(lines: &Lines, line: &str, n_atoms: usize) -> Result<MolBond, MolfileError> {
+    let sid = lines.integer(line, 0, 3)?;
+    let tid = lines.integer(line, 3, 6)?;
+    let in_range = |atom: i32| atom >= 1 && atom as usize <= n_atoms;
+    if !in_range(sid) || !in_range(tid) || sid == tid {
+        return lines.error("Invalid bond atoms");
+    }
+    let kind = lines.integer(line, 6, 9)?;
+    if kind < 1 || kind > 4 {
+        return lines.error("Unsupported bond type");
+    }
+
+    Ok(MolBond {
+        sid: sid as usize - 1,
+        tid: tid as usize - 1,
+        kind,
+        stereo: lines.integer(line, 9, 12)?,
+    })
+}
+
+/// Read the `M  CHG`, `M  ISO` and `M  RAD` entries of a property line as
+/// (zero-based atom, value) pairs.
+fn property_entries(lines: &Lines, line: &str, n_atoms: usize) -> Result<Vec<(usize, i32)>, MolfileError> {
+    let mut values = Vec::new();
+    for value in line.get(6..).unwrap_or("").split_whitespace() {
+        values.push(value.parse::<i32>().or_else(|_| lines.error("Invalid number"))?);
+    }
+    let n_entries = values.first().copied().unwrap_or(0);
+    if n_entries < 0 || values.len() != 1 + 2 * n_entries as usize {
+        return lines.error("Invalid property line");
+    }
+
+    let mut entries = Vec::with_capacity(n_entries as usize);
+    for pair in values[1..].chunks_exact(2) {
+        if pair[0] < 1 || pair[0] as usize > n_atoms {
+            return lines.error("Property of an atom which doesn't exist");
+        }
+        entries.push((pair[0] as usize - 1, pair[1]));
+    }
+    Ok(entries)
+}
+
+/// Read the property block up to `M  END`. Charge, radical and isotope
+/// properties supersede every corresponding value in the atom block.
+fn parse_properties(lines: &mut Lines, atoms: &mut [MolAtom]) -> Result<(), MolfileError> {
+    let mut seen_charges = false;
+    let mut seen_isotopes = false;
+
+    loop {
+        let line = lines.next()?;
+        if line.starts_with("M  END") {
+            return Ok(());
+        }
+
+        if line.starts_with("M  CHG") || line.starts_with("M  RAD") {
+            if !seen_charges {
+                for atom in atoms.iter_mut() {
+                    atom.charge = 0;
+                    atom.radical = 0;
+                }
+                seen_charges = true;
+            }
+            for (atom, value) in property_entries(lines, line, atoms.len())? {
+                match line.starts_with("M  CHG") {
+                    true if value.abs() <= 15 => atoms[atom].charge = value as i8,
+                    false if value >= 0 && value <= 3 => atoms[atom].radical = value as u8,
+                    _ => return lines.error("Invalid property value"),
+                }
+            }
+        } else if line.starts_with("M  ISO") {
+            if !seen_isotopes {
+                for atom in atoms.iter_mut() {
+                    atom.mass_difference = 0;
+                }
+                seen_isotopes = true;
+            }
+            for (atom, value) in property_entries(lines, line, atoms.len())? {
+                if value < 1 || value > u16::MAX as i32 {
+                    return lines.error("Invalid property value");
+                }
+                atoms[atom].isotope = Some(value as u16);
+            }
+        } else if line.starts_with("A  ") || line.starts_with("G  ") {
+            // Atom aliases and group abbreviations continue on the next line.
+            lines.next()?;
+        } else if line.starts_with("S  SKP") {
+            let n_lines = lines.integer(line, 6, 9)?;
+            for _ in 0..n_lines {
+                lines.next()?;
+            }
+        }
+    }
+}
+
+/// The neighbours an atom's parity is relative to: its implicit hydrogen
+/// (if any) first, then the other neighbours by ascending index.
+fn parity_order(neighbours: &[usize], hydrogens: u8) -> Vec<usize> {
+    let mut order = Vec::with_capacity(4);
+    if hydrogens > 0 {
+        order.push(HYDROGEN);
+    }
+    let mut sorted = neighbours.to_vec();
+    sorted.sort_unstable();
+    order.extend(sorted);
+    order
+}
+
+/// The neighbours an MDL parity is relative to, reordered so that the
+/// parity reads in the same sense as ours. MDL numbers the neighbours by
+/// ascending index with hydrogens last and views the centre with the last
+/// behind, so its parity 1 (clockwise) is anticlockwise viewed from the
+/// last neighbour towards the centre.
+fn mdl_order(atoms: &[Atom], neighbours: &[usize], hydrogens: u8) -> Vec<usize> {
+    let mut sorted = neighbours.to_vec();
+    sorted.sort_unstable_by_key(|neighbour| (atoms[*neighbour].element == Element::H, *neighbour));
+    if hydrogens > 0 {
+        sorted.push(HYDROGEN);
+    }
+    let last = sorted.pop().unwrap();
+    sorted.insert(0, last);
+    sorted
+}
+
+/// Express a parity relative to the neighbours in `from` relative to the
+/// same neighbours in the order `to`.
+fn reorder_parity(parity: Parity, from: &[usize], to: &[usize]) -> Parity {
+    let positions: Vec<usize> = to.iter()
+        .map(|neighbour| from.iter().position(|other| other == neighbour).unwrap())
+        .collect();
+    match (permutation_is_odd(&positions), parity) {
+        (false, parity) => parity,
+        (true, Parity::Positive) => Parity::Negative,
+        (true, Parity::Negative) => Parity::Positive,
+    }
+}
+
+fn subtract(first: [f64; 3], second: [f64; 3]) -> [f64; 3] {
+    [first[0] - second[0], first[1] - second[1], first[2] - second[2]]
+}
+
+fn dot(first: [f64; 3], second: [f64; 3]) -> f64 {
+    first[0] * second[0] + first[1] * second[1] + first[2] * second[2]
+}
+
+fn determinant(a: [f64; 3], b: [f64; 3], c: [f64; 3]) -> f64 {
+    a[0] * (b[1] * c[2] - b[2] * c[1])
+        - a[1] * (b[0] * c[2] - b[2] * c[0])
+        + a[2] * (b[0] * c[1] - b[1] * c[0])
+}
+
+/// The parity of a stereocentre from its neighbours' positions. In a 2D
+/// drawing, each in-plane bond is a unit vector and wedged and hashed
+/// bonds from the centre rise above and fall below the plane.
+fn geometric_parity(
+    atoms: &[MolAtom],
+    bonds: &[MolBond],
+    incident: &[Vec<usize>],
+    centre: usize,
+    order: &[usize],
+    three_dimensional: bool
+) -> Option<Parity> {
+    let vectors: Vec<[f64; 3]> = order.iter()
+        .filter(|neighbour| **neighbour != HYDROGEN)
+        .map(|&neighbour| {
+            let vector = subtract(atoms[neighbour].position, atoms[centre].position);
+            if three_dimensional {
+                return vector;
+            }
+            let length = (vector[0] * vector[0] + vector[1] * vector[1]).sqrt().max(f64::EPSILON);
+            let height = incident[centre].iter()
+                .map(|bond| &bonds[*bond])
+                .find(|bond| bond.sid == centre && bond.tid == neighbour)
+                .map_or(0.0, |bond| match bond.stereo {
+                    1 => 1.0,
+                    6 => -1.0,
+                    _ => 0.0,
+                });
+            [vector[0] / length, vector[1] / length, height]
+        })
+        .collect();
+
+    let volume = match vectors.len() {
+        3 => determinant(vectors[0], vectors[1], vectors[2]),
+        _ => determinant(
+            subtract(vectors[1], vectors[0]),
+            subtract(vectors[2], vectors[0]),
+            subtract(vectors[3], vectors[0])
+        ),
+    };
+    if volume > COLLINEAR {
+        Some(Parity::Positive)
+    } else if volume < -COLLINEAR {
+        Some(Parity::Negative)
+    } else {
+        None
+    }
+}
+
+/// The parity of a non-ring double bond from the positions of the lowest
+/// index neighbour at each end: positive if they're on the same side.
+fn double_bond_parity(
+    atoms: &[MolAtom],
+    neighbours: &[Vec<usize>],
+    sid: usize,
+    tid: usize
+) -> Option<Parity> {
+    let lowest = |atom: usize, partner: usize| {
+        neighbours[atom].iter().copied().filter(|neighbour| *neighbour != partner).min()
+    };
+    let (first, second) = (lowest(sid, tid)?, lowest(tid, sid)?);
+
+    let axis = subtract(atoms[tid].position, atoms[sid].position);
+    let axis_length = dot(axis, axis);
+    if axis_length < COLLINEAR {
+        return None;
+    }
+    let perpendicular = |vector: [f64; 3]| {
+        let scale = dot(vector, axis) / axis_length;
+        [vector[0] - scale * axis[0], vector[1] - scale * axis[1], vector[2] - scale * axis[2]]
+    };
+    let first = perpendicular(subtract(atoms[first].position, atoms[sid].position));
+    let second = perpendicular(subtract(atoms[second].position, atoms[tid].position));
+
+    let alignment = dot(first, second);
+    if alignment > COLLINEAR {
+        Some(Parity::Positive)
+    } else if alignment < -COLLINEAR {
+        Some(Parity::Negative)
+    } else {
+        None
+    }
+}
+
+/// Whether the `atoms` are all in different symmetry `classes`.
+fn all_distinct(classes: &[usize], atoms: &[usize]) -> bool {
+    atoms.iter()
+        .enumerate()
+        .all(|(index, atom)| atoms[..index].iter().all(|other| classes[*other] != classes[*atom]))
+}
+
+/// Whether each end of the double bond between `first` and `second` has
+/// different substituents, so that its geometry matters.
+fn distinct_ends(classes: &[usize], neighbours: &[Vec<usize>], first: usize, second: usize) -> bool {
+    [(first, second), (second, first)].iter().all(|(end, other_end)| {
+        let substituents: Vec<usize> = neighbours[*end].iter()
+            .copied()
+            .filter(|atom| atom != other_end)
+            .collect();
+        all_distinct(classes, &substituents)
+    })
+}
+
+/// Parse a V2000 molfile, returning the molecule and its name. Implicit
+/// hydrogens are added to atoms by their default valences (adjusted for
+/// charge and radicals) unless the atom block gives a valence. Atom
+/// parities come from wedged bonds, or the atom block's parities if a
+/// centre has none; double bond parities come from the coordinates.
+pub fn parse_molfile(molfile: &str) -> Result<(Molecule, String), MolfileError> {
+    let mut lines = Lines{ lines: molfile.lines(), number: 0 };
+    let name = lines.next()?.trim().to_string();
+    lines.next()?;
+    lines.next()?;
+
+    let counts = lines.next()?;
+    if field(counts, 33, 39) == "V3000" {
+        return lines.error("V3000 molfiles aren't supported");
+    }
+    let n_atoms = lines.integer(counts, 0, 3)? as usize;
+    let n_bonds = lines.integer(counts, 3, 6)? as usize;
+
+    let mut atoms = Vec::with_capacity(n_atoms);
+    for _ in 0..n_atoms {
+        let line = lines.next()?;
+        atoms.push(parse_atom(&lines, line)?);
+    }
+    let mut bonds = Vec::with_capacity(n_bonds);
+    for _ in 0..n_bonds {
+        let line = lines.next()?;
+        bonds.push(parse_bond(&lines, line, n_atoms)?);
+    }
+    parse_properties(&mut lines, &mut atoms)?;
+
+    // Atom block mass differences are relative to the rounded atomic weight.
+    for atom in atoms.iter_mut() {
+        if atom.mass_difference != 0 && atom.isotope.is_none() {
+            let mass_number = average_mass(atom.element).round() as i32 + atom.mass_difference;
+            if mass_number < 1 {
+                return lines.error("Invalid mass difference");
+            }
+            atom.isotope = Some(mass_number as u16);
+        }
+    }
+
+    let aromatic: Vec<bool> = bonds.iter().map(|bond| bond.kind == 4).collect();
+    let mut orders: Vec<u8> = bonds.iter().map(|bond| if bond.kind == 4 { 1 } else { bond.kind as u8 }).collect();
+    let mut neighbours = vec![Vec::new(); n_atoms];
+    let mut incident = vec![Vec::new(); n_atoms];
+    for (index, bond) in bonds.iter().enumerate() {
+        neighbours[bond.sid].push(bond.tid);
+        neighbours[bond.tid].push(bond.sid);
+        incident[bond.sid].push(index);
+        incident[bond.tid].push(index);
+    }
+
+    let order_sum = |orders: &[u8], atom: usize| -> u16 {
+        incident[atom].iter().map(|bond| u16::from(orders[*bond])).sum()
+    };
+    let default_hydrogens = |atom: &MolAtom, bonded: u16| {
+        let atomic_number = atom.element.atomic_number() as i16 - atom.charge as i16;
+        let unpaired = match atom.radical {
+            2 => 1,
+            1 | 3 => 2,
+            _ => 0,
+        };
+        implicit_hydrogens(atomic_number, bonded).unwrap_or(0).saturating_sub(unpaired)
+    };
+
+    if aromatic.iter().any(|aromatic| *aromatic) {
+        let needs_double: Vec<bool> = (0..n_atoms)
+            .map(|atom| {
+                incident[atom].iter().any(|bond| aromatic[*bond])
+                    && default_hydrogens(&atoms[atom], order_sum(&orders, atom)) > 0
+            })
+            .collect();
+        let pairs: Vec<(usize, usize)> = bonds.iter().map(|bond| (bond.sid, bond.tid)).collect();
+        if !assign_double_bonds(&needs_double, &pairs, &aromatic, &mut orders) {
+            return lines.error("Can't kekulize aromatic system");
+        }
+    }
+
+    let mut spec_atoms: Vec<Atom> = atoms.iter()
+        .enumerate()
+        .map(|(index, atom)| {
+            let bonded = order_sum(&orders, index);
+            let hydrogens = match atom.valence {
+                0 => default_hydrogens(atom, bonded),
+                15 => 0,
+                valence => (valence as u16).saturating_sub(bonded) as u8,
+            };
+            Atom {
+                element: atom.element,
+                hydrogens,
+                ion: atom.charge,
+                isotope: atom.isotope,
+                parity: None,
+            }
+        })
+        .collect();
+
+    let mut molecule = Molecule {
+        atoms: spec_atoms,
+        bonds: bonds.iter()
+            .zip(orders.iter())
+            .map(|(bond, order)| {
+                let order = match order {
+                    2 => BondOrder::Double,
+                    3 => BondOrder::Triple,
+                    _ => BondOrder::Single,
+                };
+                Bond{ sid: bond.sid, tid: bond.tid, order, parity: None }
+            })
+            .collect(),
+    };
+
+    // Only atoms and bonds whose neighbours are constitutionally
+    // distinct are stereogenic, whatever the file says about them.
+    let classes = symmetry_classes(&molecule, &aromatic_bonds(&molecule));
+
+    let three_dimensional = atoms.iter().any(|atom| atom.position[2] != 0.0);
+    for centre in 0..n_atoms {
+        let hydrogens = molecule.atoms[centre].hydrogens;
+        if neighbours[centre].len() + hydrogens as usize != 4 || hydrogens > 1
+            || !all_distinct(&classes, &neighbours[centre]) {
+            continue;
+        }
+        let order = parity_order(&neighbours[centre], hydrogens);
+        let either = incident[centre].iter().any(|bond| bonds[*bond].sid == centre && bonds[*bond].stereo == 4);
+        let wedged = incident[centre].iter()
+            .any(|bond| bonds[*bond].sid == centre && (bonds[*bond].stereo == 1 || bonds[*bond].stereo == 6));
+
+        let parity = if either {
+            None
+        } else if wedged || three_dimensional {
+            geometric_parity(&atoms, &bonds, &incident, centre, &order, three_dimensional)
+        } else {
+            let mdl_parity = match atoms[centre].parity {
+                1 => Parity::Negative,
+                2 => Parity::Positive,
+                _ => continue,
+            };
+            let mdl = mdl_order(&molecule.atoms, &neighbours[centre], hydrogens);
+            Some(reorder_parity(mdl_parity, &mdl, &order))
+        };
+        molecule.atoms[centre].parity = parity;
+    }
+
+    let ring_bonds = MolecularGraph::new(&molecule).ring_bonds();
+    for (index, bond) in bonds.iter().enumerate() {
+        let either = bond.stereo == 3 || [bond.sid, bond.tid].iter()
+            .any(|atom| incident[*atom].iter().any(|other| bonds[*other].stereo == 4));
+        if orders[index] == 2 && !aromatic[index] && !ring_bonds[index] && !either
+            && distinct_ends(&classes, &neighbours, bond.sid, bond.tid) {
+            molecule.bonds[index].parity = double_bond_parity(&atoms, &neighbours, bond.sid, bond.tid);
+        }
+    }
+
+    Ok((molecule, name))
+}
+
+/// Split an SD record into its molfile, up to and including `M  END`, and
+/// the data items which follow.
+pub fn split_record(record: &str) -> (&str, &str) {
+    let mut start = 0;
+    while start < record.len() {
+        let end = record[start..].find('\n').map_or(record.len(), |end| start + end + 1);
+        if record[start..].starts_with("M  END") {
+            return (&record[..end], &record[end..]);
+        }
+        start = end;
+    }
+    (record, "")
+}
+
+/// Parse SD data items: a header line naming the item in angle brackets,
+/// then its value up to a blank line.
+pub fn parse_data(data: &str) -> Vec<(String, String)> {
+    let mut items = Vec::new();
+    let mut lines = data.lines();
+
+    while let Some(line) = lines.next() {
+        if !line.starts_with('>') {
+            continue;
+        }
+        let name = match line.find('<') {
+            Some(start) => {
+                let name = &line[start + 1..];
+                &name[..name.find('>').unwrap_or(name.len())]
+            },
+            None => line[1..].trim(),
+        };
+        let mut value = String::new();
+        for line in &mut lines {
+            if line.trim().is_empty() {
+                break;
+            }
+            if !value.is_empty() {
+                value.push('\n');
+            }
+            value.push_str(line);
+        }
+        items.push((name.to_string(), value));
+    }
+    items
+}
+
+fn charge_code(charge: i8) -> u8 {
+    match charge {
+        3 => 1,
+        2 => 2,
+        1 => 3,
+        -1 => 5,
+        -2 => 6,
+        -3 => 7,
+        _ => 0,
+    }
+}
+
+fn write_properties(output: &mut String, tag: &str, entries: &[(usize, i32)]) {
+    for line in entries.chunks(PROPERTIES_PER_LINE) {
+        write!(output, "M  {}{:>3}", tag, line.len()).unwrap();
+        for (atom, value) in line {
+            write!(output, " {:>3} {:>3}", atom + 1, value).unwrap();
+        }
+        output.push('\n');
+    }
+}
+
+/// Write a molecule as a V2000 molfile. There are no coordinates, so
+/// atom parities are written to the atom block, and double bond parities
+/// can't be written. Atoms whose hydrogens differ from their default
+/// valence have their valence written too.
+pub fn write_molfile(molecule: &Molecule, name: &str, output: &mut String) -> Result<(), &'static str> {
+    let atoms = &molecule.atoms;
+    let bonds = &molecule.bonds;
+    if atoms.len() > MAX_ENTRIES || bonds.len() > MAX_ENTRIES {
+        return Err("Molfiles can't hold more than 999 atoms or bonds.");
+    }
+
+    let mut neighbours = vec![Vec::new(); atoms.len()];
+    let mut order_sums = vec![0u16; atoms.len()];
+    for bond in bonds {
+        let order = bond_order_value(bond.order);
+        if order == 0 {
+            return Err("Molfiles can't hold zero-order bonds.");
+        }
+        neighbours[bond.sid].push(bond.tid);
+        neighbours[bond.tid].push(bond.sid);
+        order_sums[bond.sid] += u16::from(order);
+        order_sums[bond.tid] += u16::from(order);
+    }
+
+    let chiral = atoms.iter().any(|atom| atom.parity.is_some()) as u8;
+    writeln!(output, "{}", name.lines().next().unwrap_or("")).unwrap();
+    output.push_str("  oxmol             2D\n\n");
+    writeln!(output, "{:>3}{:>3}  0  0{:>3}  0  0  0  0  0999 V2000", atoms.len(), bonds.len(), chiral).unwrap();
+
+    for (index, atom) in atoms.iter().enumerate() {
+        let parity = match atom.parity {
+            Some(parity) if neighbours[index].len() + atom.hydrogens as usize == 4 && atom.hydrogens <= 1 => {
+                let order = parity_order(&neighbours[index], atom.hydrogens);
+                let mdl = mdl_order(atoms, &neighbours[index], atom.hydrogens);
+                match reorder_parity(parity, &order, &mdl) {
+                    Parity::Negative => 1,
+                    Parity::Positive => 2,
+                }
+            },
+            _ => 0,
+        };
+        let atomic_number = atom.element.atomic_number() as i16 - atom.ion as i16;
+        let default_hydrogens = implicit_hydrogens(atomic_number, order_sums[index]).unwrap_or(0);
+        let valence = match atom.hydrogens == default_hydrogens {
+            true => 0,
+            false => match order_sums[index] + u16::from(atom.hydrogens) {
+                0 => 15,
+                valence => valence,
+            },
+        };
+        let symbol = format!("{:?}", atom.element);
+        writeln!(
+            output,
+            "    0.0000    0.0000    0.0000 {:<3} 0{:>3}{:>3}  0  0{:>3}  0  0  0  0  0  0",
+            symbol,
+            charge_code(atom.ion),
+            parity,
+            valence
+        ).unwrap();
+    }
+
+    for bond in bonds {
+        writeln!(output, "{:>3}{:>3}{:>3}  0", bond.sid + 1, bond.tid + 1, bond_order_value(bond.order)).unwrap();
+    }
+
+    let charges: Vec<(usize, i32)> = atoms.iter()
+        .enumerate()
+        .filter(|(_, atom)| atom.ion != 0)
+        .map(|(index, atom)| (index, atom.ion as i32))
+        .collect();
+    let isotopes: Vec<(usize, i32)> = atoms.iter()
+        .enumerate()
+        .filter_map(|(index, atom)| atom.isotope.map(|isotope| (index, isotope as i32)))
+        .collect();
+    write_properties(output, "CHG", &charges);
+    write_properties(output, "ISO", &isotopes);
+    output.push_str("M  END\n");
+    Ok(())
+}
+
+/// Write a molecule and its data items as an SD record.
+pub fn write_record(
+    molecule: &Molecule,
+    name: &str,
+    data: &[(String, String)]
+) -> Result<String, &'static str> {
+    let mut output = String::with_capacity(128 + 70 * molecule.atoms.len() + 16 * molecule.bonds.len());
+    write_molfile(molecule, name, &mut output)?;
+    for (key, value) in data {
+        writeln!(output, "> <{}>", key).unwrap();
+        let value = value.trim_end_matches(|c| c == '\n' || c == '\r');
+        if !value.is_empty() {
+            writeln!(output, "{}", value).unwrap();
+        }
+        output.push('\n');
+    }
+    output.push_str("$$$$\n");
+    Ok(output)
+}
@@ -0,0 +1,209 @@
+use std::collections::{HashMap,HashSet};
+
+use crate::graph::{AtomRecord,MolecularGraph};
+use crate::rings::{aromatic_atoms,smallest_rings};
+use crate::screen::fnv1a;
+
+const HALOGENS: [u8; 4] = [9, 17, 35, 53];
+
+const DONOR: u8 = 1;
+const ACCEPTOR: u8 = 1 << 1;
+const AROMATIC: u8 = 1 << 2;
+const HALOGEN: u8 = 1 << 3;
+const BASIC: u8 = 1 << 4;
+const ACIDIC: u8 = 1 << 5;
+
+/// The bond type hashed for aromatic bonds, after the orders 0 to 3.
+const AROMATIC_BOND: u8 = 4;
+
+fn hash_identifier(bytes: &[u8]) -> u32 {
+    let hash = fnv1a(bytes.iter().copied());
+    (hash ^ (hash >> 32)) as u32
+}
+
+fn has_double_bond_to_heteroatom(graph: &MolecularGraph, atom: usize) -> bool {
+    graph.neighbour_bonds(atom)
+        .any(|(neighbour, bond)| {
+            graph.bonds[bond].order == 2 && [7, 8, 16].contains(&graph.atoms[neighbour].atomic_number)
+        })
+}
+
+/// Pharmacophoric features of each atom, for FCFP-style fingerprints.
+fn atom_features(graph: &MolecularGraph, aromatic: &[bool]) -> Vec<u8> {
+    let n_atoms = graph.order();
+
+    (0..n_atoms)
+        .map(|atom| {
+            let AtomRecord { atomic_number, charge, hydrogens, .. } = graph.atoms[atom];
+            let only_single_bonds = graph.incident_bonds(atom).iter()
+                .all(|bond| graph.bonds[*bond as usize].order == 1);
+            let conjugated_neighbour = graph.neighbours(atom).iter().any(|neighbour| {
+                let neighbour = *neighbour as usize;
+                aromatic[neighbour]
+                    || graph.incident_bonds(neighbour).iter().any(|bond| graph.bonds[*bond as usize].order > 1)
+            });
+
+            let mut features = 0;
+            if (atomic_number == 7 || atomic_number == 8) && hydrogens > 0 {
+                features |= DONOR;
+            }
+            let acceptor = match atomic_number {
+                8 => charge <= 0,
+                7 => charge == 0 && !(only_single_bonds && conjugated_neighbour && !aromatic[atom]),
+                _ => false,
+            };
+            if acceptor {
+                features |= ACCEPTOR;
+            }
+            if aromatic[atom] {
+                features |= AROMATIC;
+            }
+            if HALOGENS.contains(&atomic_number) {
+                features |= HALOGEN;
+            }
+            let basic = atomic_number == 7
+                && (charge > 0 || (charge == 0 && only_single_bonds && !conjugated_neighbour && !aromatic[atom]));
+            if basic {
+                features |= BASIC;
+            }
+            let acidic = match atomic_number {
+                8 | 16 => {
+                    charge < 0 || (hydrogens > 0 && graph.neighbours(atom).iter()
+                        .any(|neighbour| has_double_bond_to_heteroatom(graph, *neighbour as usize)))
+                },
+                _ => false,
+            };
+            if acidic {
+                features |= ACIDIC;
+            }
+            features
+        })
+        .collect()
+}
+
+fn initial_identifiers(graph: &MolecularGraph, ring_bonds: &[bool], aromatic: &[bool], features: bool) -> Vec<u32> {
+    if features {
+        return atom_features(graph, aromatic).iter()
+            .map(|features| hash_identifier(&[*features]))
+            .collect();
+    }
+
+    (0..graph.order())
+        .map(|atom| {
+            let record = &graph.atoms[atom];
+            let in_ring = graph.incident_bonds(atom).iter().any(|bond| ring_bonds[*bond as usize]);
+            let isotope = record.isotope.to_le_bytes();
+            hash_identifier(&[
+                record.atomic_number,
+                graph.degree(atom) as u8,
+                record.hydrogens,
+                record.charge as u8,
+                isotope[0],
+                isotope[1],
+                in_ring as u8,
+            ])
+        })
+        .collect()
+}
+
+/// The identifiers of the circular substructures of a molecule, as in
+/// the Morgan algorithm used for ECFP: each atom starts with a hash of
+/// its invariants (element, degree counting explicit hydrogen atoms,
+/// hydrogens, charge, isotope and ring membership; or its pharmacophoric
+/// features, for FCFP), and at each iteration up to `radius` hashes its
+/// identifier together with its neighbours' identifiers and bond types.
+/// Ring bonds between aromatic atoms (see `aromatic_atoms`) have a type
+/// of their own rather than their order, so that every Kekulé structure
+/// of a molecule gives the same identifiers.
+///
+/// An identifier is returned for every atom at every radius, except
+/// that an environment covering the same bonds as one found before
+/// (e.g. once an atom's environment covers the whole molecule) is left
+/// out. Repeated substructures give repeated identifiers.
+pub fn morgan_identifiers(graph: &MolecularGraph, radius: usize, features: bool) -> Vec<u32> {
+    let n_atoms = graph.order();
+    let n_words = (graph.size() + 63) / 64;
+    let ring_bonds = graph.ring_bonds();
+    let aromatic = aromatic_atoms(graph, &smallest_rings(graph, &ring_bonds));
+    let bond_types: Vec<u8> = graph.bonds.iter()
+        .zip(&ring_bonds)
+        .map(|(bond, in_ring)| {
+            match *in_ring && aromatic[bond.sid as usize] && aromatic[bond.tid as usize] {
+                true => AROMATIC_BOND,
+                false => bond.order,
+            }
+        })
+        .collect();
+    let mut identifiers = initial_identifiers(graph, &ring_bonds, &aromatic, features);
+    let mut found = identifiers.clone();
+
+    let mut environments = vec![vec![0u64; n_words]; n_atoms];
+    let mut seen: HashSet<Vec<u64>> = HashSet::new();
+    let mut bytes = Vec::new();
+
+    for iteration in 1..=radius {
+        let mut next_environments = environments.clone();
+        let mut next_identifiers = Vec::with_capacity(n_atoms);
+        for atom in 0..n_atoms {
+            let mut neighbours: Vec<(u8, u32)> = graph.neighbour_bonds(atom)
+                .map(|(neighbour, bond)| (bond_types[bond], identifiers[neighbour]))
+                .collect();
+            neighbours.sort_unstable();
+
+            bytes.clear();
+            bytes.extend(&(iteration as u32).to_le_bytes());
+            bytes.extend(&identifiers[atom].to_le_bytes());
+            for (bond_type, identifier) in &neighbours {
+                bytes.push(*bond_type);
+                bytes.extend(&identifier.to_le_bytes());
+            }
+            next_identifiers.push(hash_identifier(&bytes));
+
+            let environment = &mut next_environments[atom];
+            for (neighbour, bond) in graph.neighbour_bonds(atom) {
+                environment[bond / 64] |= 1 << (bond % 64);
+                for (word, neighbour_word) in environment.iter_mut().zip(&environments[neighbour]) {
+                    *word |= neighbour_word;
+                }
+            }
+        }
+
+        // Of the environments covering the same bonds, keep the one with
+        // the lowest identifier, and only if it wasn't found at a smaller
+        // radius.
+        let mut candidates: Vec<(&Vec<u64>, u32)> = next_environments.iter()
+            .zip(&next_identifiers)
+            .filter(|(environment, _)| environment.iter().any(|word| *word != 0))
+            .map(|(environment, identifier)| (environment, *identifier))
+            .collect();
+        candidates.sort_unstable();
+        for (environment, identifier) in candidates {
+            if seen.insert(environment.clone()) {
+                found.push(identifier);
+            }
+        }
+
+        identifiers = next_identifiers;
+        environments = next_environments;
+    }
+    found
+}
+
+/// Fold identifiers into `n_bits` bits (a multiple of 8), packed with
+/// the first bit in the most significant bit of the first byte (as
+/// `numpy.unpackbits` expects).
+pub fn fold_into(identifiers: &[u32], packed: &mut [u8]) {
+    let n_bits = 8 * packed.len();
+    for identifier in identifiers {
+        let bit = *identifier as usize % n_bits;
+        packed[bit / 8] |= 0x80 >> (bit % 8);
+    }
+}
+
+pub fn count_identifiers(identifiers: &[u32]) -> HashMap<u32, usize> {
+    let mut counts = HashMap::new();
+    for identifier in identifiers {
+        *counts.entry(*identifier).or_insert(0) += 1;
+    }
+    counts
+}
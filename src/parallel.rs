@@ -0,0 +1,55 @@
+use std::collections::HashMap;
+use std::sync::{Arc,Mutex,PoisonError};
+
+use once_cell::sync::OnceCell;
+use pyo3::prelude::*;
+use rayon::{ThreadPool,ThreadPoolBuilder};
+
+use crate::exceptions::{generic_exception,get_ValueError};
+
+/// Thread pools by their number of threads. Building a pool starts its
+/// threads, which costs more than many of the operations run on it, so
+/// pools are kept for the life of the process.
+static POOLS: OnceCell<Mutex<HashMap<usize, Arc<ThreadPool>>>> = OnceCell::new();
+
+/// The thread pool to run an operation on, or `None` to use the global
+/// pool (if `threads` is `None`, or the global pool's size).
+pub fn thread_pool(threads: Option<usize>) -> PyResult<Option<Arc<ThreadPool>>> {
+    match threads {
+        None => Ok(None),
+        Some(0) => Err(get_ValueError("The number of threads must be positive.")),
+        Some(threads) if threads == rayon::current_num_threads() => Ok(None),
+        Some(threads) => {
+            let mut pools = POOLS.get_or_init(Default::default)
+                .lock()
+                .unwrap_or_else(PoisonError::into_inner);
+            if let Some(pool) = pools.get(&threads) {
+                return Ok(Some(Arc::clone(pool)));
+            }
+            match ThreadPoolBuilder::new().num_threads(threads).build() {
+                Ok(pool) => {
+                    let pool = Arc::new(pool);
+                    pools.insert(threads, Arc::clone(&pool));
+                    Ok(Some(pool))
+                },
+                Err(build_error) => Err(generic_exception(build_error))
+            }
+        }
+    }
+}
+
+pub fn install<T, F>(pool: Option<&ThreadPool>, operation: F) -> T
+    where T: Send, F: FnOnce() -> T + Send
+{
+    match pool {
+        Some(pool) => pool.install(operation),
+        None => operation(),
+    }
+}
+
+pub fn run_without_gil<T, F>(py: Python, threads: Option<usize>, operation: F) -> PyResult<T>
+    where T: Send, F: FnOnce() -> T + Send
+{
+    let pool = thread_pool(threads)?;
+    Ok(py.allow_threads(|| install(pool.as_deref(), operation)))
+}
@@ -3,7 +3,28 @@ use crate::exceptions::get_NotImplementedError;
 use chemcore::molecule::Parity;
 use pyo3::class::{PyObjectProtocol, basic::CompareOp};
 use pyo3::prelude::*;
+use pyo3::exceptions;
+use once_cell::sync::OnceCell;
 
+/// A stereochemical atom or bond parity, represented using a Rust enum.
+/// `This parity is laid out in the minimal API description.`__
+///
+/// The enum refers to 'Positive' or 'Negative', which are represented
+/// using Python's ``True`` and ``False`` respectively.
+///
+/// For tetrahedral chirality:
+///
+/// - ``True`` represents clockwise
+/// - ``False`` represents anticlockwise
+///
+/// For E/Z double bond stereochemistry:
+///
+/// - ``True`` represents syn
+/// - ``False`` represents anti
+///
+/// :param parity: The atom or bond parity.
+///
+/// __ https://depth-first.com/articles/2020/04/06/a-minimal-molecule-api/
 #[pyclass(subclass)]
 #[derive(Copy,Clone,Debug)]
 pub struct PyParity {
@@ -33,6 +54,60 @@ impl Into<Parity> for PyParity {
     }
 }
 
+/// The two Python parity instances, positive then negative.
+static INTERNED: OnceCell<Vec<Py<PyParity>>> = OnceCell::new();
+
+/// Create the interned parity instances. Called once, when the module
+/// is initialised.
+pub fn intern_parities(py: Python) -> PyResult<()> {
+    let parities = vec![
+        Py::new(py, PyParity::from(Parity::Positive))?,
+        Py::new(py, PyParity::from(Parity::Negative))?,
+    ];
+    let _ = INTERNED.set(parities);
+    Ok(())
+}
+
+fn parity_index(parity: Parity) -> usize {
+    match parity {
+        Parity::Positive => 0,
+        Parity::Negative => 1,
+    }
+}
+
+impl PyParity {
+    /// The interned Python instance of a parity, so that the same
+    /// parity is always the same object.
+    pub fn interned(py: Python, parity: Parity) -> PyResult<Py<PyParity>> {
+        match INTERNED.get() {
+            Some(parities) => Ok(parities[parity_index(parity)].clone_ref(py)),
+            None => Py::new(py, PyParity{ parity }),
+        }
+    }
+
+    fn is_interned(&self, other: &PyAny) -> bool {
+        match INTERNED.get() {
+            Some(parities) => parities[parity_index(self.parity)].as_ptr() == other.as_ptr(),
+            None => false,
+        }
+    }
+}
+
+/// Convert an optional ``Parity`` or ``bool`` to a parity.
+pub fn extract_parity(value: Option<&PyAny>) -> PyResult<Option<PyParity>> {
+    let value = match value {
+        Some(value) if !value.is_none() => value,
+        _ => return Ok(None),
+    };
+    if let Ok(parity) = value.extract::<PyParity>() {
+        return Ok(Some(parity));
+    }
+    if let Ok(positive) = value.extract::<bool>() {
+        return Ok(Some(PyParity::from(positive)));
+    }
+    Err(exceptions::TypeError::py_err(format!("Can't convert {} to PyParity", value)))
+}
+
 #[pymethods]
 impl PyParity {
     #[new]
@@ -42,7 +117,7 @@ impl PyParity {
 }
 
 #[pyproto]
-impl PyObjectProtocol for PyParity {
+impl<'p> PyObjectProtocol<'p> for PyParity {
     fn __repr__(&self) -> PyResult<String> {
         Ok(format!("Parity::{:?}", self.parity))
     }
@@ -54,12 +129,15 @@ impl PyObjectProtocol for PyParity {
         }
     }
 
-    fn __richcmp__(&self, other: Self, op: CompareOp) -> PyResult<bool> {
-        let value = match op {
-            CompareOp::Eq => self.parity == other.parity,
-            CompareOp::Ne => self.parity != other.parity,
-            _ => return Err(get_NotImplementedError("Operator not implemented."))
+    fn __richcmp__(&self, other: &'p PyAny, op: CompareOp) -> PyResult<bool> {
+        let equal = self.is_interned(other) || match other.extract::<PyRef<PyParity>>() {
+            Ok(other) => self.parity == other.parity,
+            Err(_) => false,
         };
-        Ok(value)
+        match op {
+            CompareOp::Eq => Ok(equal),
+            CompareOp::Ne => Ok(!equal),
+            _ => Err(get_NotImplementedError("Operator not implemented."))
+        }
     }
 }
\ No newline at end of file
@@ -0,0 +1,158 @@
+use pyo3::prelude::*;
+use pyo3::class::PyObjectProtocol;
+use pyo3::exceptions;
+use numpy::{IntoPyArray,PyArray1};
+use rayon::prelude::*;
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::graph::MolecularGraph;
+use crate::parallel::run_without_gil;
+use crate::smiles::parse_with_aromatic_bonds;
+use crate::substructure::CompiledQuery;
+
+/// A compiled substructure query.
+///
+/// Atoms match on element, and on charge and isotope where these are
+/// set in the query. Bonds match on bond order, except that bonds
+/// which are aromatic in a SMILES query match ring bonds between
+/// aromatic atoms, and their atoms match aromatic atoms, whatever the
+/// Kekulé structure (so ``c1ccccc1`` matches benzene rings, but not
+/// cyclohexane or p-benzoquinone). Aromatic atoms are those
+/// ``Molecule.aromatic_atom_flags`` gives. Stereochemistry is ignored.
+///
+/// :param pattern: a SMILES string, or a molecule
+#[pyclass(subclass, module = "oxmol.oxmol")]
+pub struct PyQuery {
+    pub query: CompiledQuery,
+}
+
+pub fn extract_molecules<'p>(molecules: &'p PyAny) -> PyResult<Vec<PyRef<'p, PyDefaultMolecule>>> {
+    let mut extracted = Vec::new();
+    for molecule in molecules.iter()? {
+        extracted.push(molecule?.extract::<PyRef<PyDefaultMolecule>>()?);
+    }
+    Ok(extracted)
+}
+
+pub fn molecule_graphs<'a>(molecules: &'a [PyRef<PyDefaultMolecule>]) -> Vec<&'a MolecularGraph> {
+    molecules.iter().map(|molecule| molecule.graph()).collect()
+}
+
+#[pymethods]
+impl PyQuery {
+    #[new]
+    fn new(pattern: &PyAny) -> PyResult<Self> {
+        if let Ok(smiles) = pattern.extract::<&str>() {
+            return match parse_with_aromatic_bonds(smiles) {
+                Ok((molecule, aromatic_bonds)) => {
+                    Ok(Self{ query: CompiledQuery::new(&molecule, Some(&aromatic_bonds)) })
+                },
+                Err(smiles_error) => Err(exceptions::ValueError::py_err(smiles_error.to_string()))
+            };
+        }
+
+        let molecule = pattern.extract::<PyRef<PyDefaultMolecule>>()?;
+        Ok(Self{ query: CompiledQuery::new(&molecule.to_spec(), None) })
+    }
+
+    /// Return the number of atoms in the query.
+    fn order(&self) -> PyResult<usize> {
+        Ok(self.query.order())
+    }
+
+    /// Return the number of bonds in the query.
+    fn size(&self) -> PyResult<usize> {
+        Ok(self.query.size())
+    }
+
+    /// Return whether the query matches part of a molecule.
+    ///
+    /// :param molecule: the molecule to search
+    /// :return: whether there is at least one match
+    fn has_match(&self, molecule: PyRef<PyDefaultMolecule>) -> PyResult<bool> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let graph = molecule.graph();
+
+        Ok(py.allow_threads(|| self.query.has_match(graph)))
+    }
+
+    /// Find the matches of the query in a molecule.
+    ///
+    /// :param molecule: the molecule to search
+    /// :param unique: if ``True``, only return one match for each set
+    ///     of molecule atoms, rather than one for every symmetry of the
+    ///     query
+    /// :param max_matches: the maximum number of matches to return
+    /// :return: a ``list`` of matches, each a ``list`` giving the
+    ///     molecule atom matched by each query atom
+    #[args(unique = "true", max_matches = "None")]
+    fn matches(
+        &self,
+        molecule: PyRef<PyDefaultMolecule>,
+        unique: bool,
+        max_matches: Option<usize>
+    ) -> PyResult<Vec<Vec<usize>>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let graph = molecule.graph();
+
+        Ok(py.allow_threads(|| self.query.matches(graph, unique, max_matches)))
+    }
+
+    /// Match the query against many molecules in parallel, without
+    /// holding the GIL.
+    ///
+    /// :param molecules: the molecules to search
+    /// :param threads: the number of threads to use, by default one
+    ///     per core
+    /// :param return_matches: if ``True``, return the matches in each
+    ///     molecule (see ``matches``) rather than a mask
+    /// :param unique: as for ``matches``
+    /// :param max_matches: as for ``matches``, per molecule
+    /// :return: a ``bool`` array, ``True`` where a molecule matches, or
+    ///     a ``list`` of the matches in each molecule
+    #[args(threads = "None", return_matches = "false", unique = "true", max_matches = "None")]
+    fn match_many(
+        &self,
+        molecules: &PyAny,
+        threads: Option<usize>,
+        return_matches: bool,
+        unique: bool,
+        max_matches: Option<usize>
+    ) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let molecules = extract_molecules(molecules)?;
+        let graphs = molecule_graphs(&molecules);
+        let query = &self.query;
+
+        if return_matches {
+            let matches: Vec<Vec<Vec<usize>>> = run_without_gil(py, threads, || {
+                graphs.par_iter()
+                    .map(|graph| query.matches(graph, unique, max_matches))
+                    .collect()
+            })?;
+            Ok(matches.to_object(py))
+        } else {
+            let mask: Vec<bool> = run_without_gil(py, threads, || {
+                graphs.par_iter()
+                    .map(|graph| query.has_match(graph))
+                    .collect()
+            })?;
+            let mask: &PyArray1<bool> = mask.into_pyarray(py);
+            Ok(mask.to_object(py))
+        }
+    }
+}
+
+#[pyproto]
+impl PyObjectProtocol for PyQuery {
+    fn __repr__(&self) -> PyResult<String> {
+        Ok(format!(
+            "PyQuery with {} atoms, {} bonds.",
+            self.query.order(),
+            self.query.size()
+        ))
+    }
+}
@@ -0,0 +1,243 @@
+use std::collections::VecDeque;
+use std::mem;
+
+use crate::fragments::component_labels;
+use crate::graph::{BondRecord,MolecularGraph};
+
+/// A molecule's smallest set of smallest rings (a minimum cycle basis),
+/// with per-atom and per-bond lookups.
+pub struct RingInfo {
+    /// Each ring's atoms in ring order, starting from its lowest atom
+    /// and heading towards the lower of that atom's two ring neighbours.
+    pub rings: Vec<Vec<usize>>,
+    /// Whether each bond is in a ring.
+    pub ring_bonds: Vec<bool>,
+    /// The sizes of the rings each atom is in, in ascending order.
+    pub atom_ring_sizes: Vec<Vec<usize>>,
+}
+
+impl RingInfo {
+    pub fn new(graph: &MolecularGraph) -> Self {
+        let ring_bonds = graph.ring_bonds();
+        let rings = smallest_rings(graph, &ring_bonds);
+
+        let mut atom_ring_sizes = vec![Vec::new(); graph.order()];
+        for ring in &rings {
+            for atom in ring {
+                atom_ring_sizes[*atom].push(ring.len());
+            }
+        }
+        for sizes in &mut atom_ring_sizes {
+            sizes.sort_unstable();
+        }
+        Self{ rings, ring_bonds, atom_ring_sizes }
+    }
+
+    pub fn is_in_ring(&self, atom: usize) -> bool {
+        !self.atom_ring_sizes[atom].is_empty()
+    }
+
+    /// The bytes allocated for the rings.
+    pub fn heap_size(&self) -> usize {
+        let nested = |lists: &[Vec<usize>]| -> usize {
+            lists.iter().map(|list| list.capacity() * mem::size_of::<usize>()).sum()
+        };
+        self.rings.capacity() * mem::size_of::<Vec<usize>>() + nested(&self.rings)
+            + self.ring_bonds.capacity()
+            + self.atom_ring_sizes.capacity() * mem::size_of::<Vec<usize>>() + nested(&self.atom_ring_sizes)
+    }
+}
+
+/// A candidate ring: its bonds as a bitset, and its atoms in order.
+struct Cycle {
+    bonds: Vec<u64>,
+    atoms: Vec<usize>,
+}
+
+/// The number of independent rings: bonds - atoms + components.
+fn cycle_rank(graph: &MolecularGraph) -> usize {
+    let (_, n_components) = component_labels(graph.order(), graph.bonds.iter().map(BondRecord::atoms));
+    graph.size() + n_components - graph.order()
+}
+
+/// Find a minimum cycle basis with Horton's algorithm: every ring of a
+/// minimum basis is made of a bond and the shortest paths from some
+/// atom to either end of it, so those candidates are sorted by size and
+/// kept if they're independent of the smaller ones (by Gaussian
+/// elimination over GF(2)). Only ring bonds are searched.
+pub fn smallest_rings(graph: &MolecularGraph, ring_bonds: &[bool]) -> Vec<Vec<usize>> {
+    let rank = cycle_rank(graph);
+    if rank == 0 {
+        return Vec::new();
+    }
+
+    let words = (graph.size() + 63) / 64;
+    let ring_atoms: Vec<usize> = (0..graph.order())
+        .filter(|atom| graph.incident_bonds(*atom).iter().any(|bond| ring_bonds[*bond as usize]))
+        .collect();
+
+    let mut candidates = Vec::new();
+    let mut parent = vec![usize::MAX; graph.order()];
+    let mut parent_bond = vec![usize::MAX; graph.order()];
+    let mut queue = VecDeque::new();
+    for root in &ring_atoms {
+        // Breadth-first search over ring bonds, recording the tree.
+        let mut visited = vec![*root];
+        parent[*root] = *root;
+        queue.push_back(*root);
+        while let Some(atom) = queue.pop_front() {
+            for (neighbour, bond) in graph.neighbour_bonds(atom) {
+                if ring_bonds[bond] && parent[neighbour] == usize::MAX {
+                    parent[neighbour] = atom;
+                    parent_bond[neighbour] = bond;
+                    visited.push(neighbour);
+                    queue.push_back(neighbour);
+                }
+            }
+        }
+
+        let path = |mut atom: usize| {
+            let mut atoms = vec![atom];
+            while atom != *root {
+                atom = parent[atom];
+                atoms.push(atom);
+            }
+            atoms
+        };
+        for (bond, record) in graph.bonds.iter().enumerate() {
+            let (sid, tid) = record.atoms();
+            if !ring_bonds[bond] || parent[sid] == usize::MAX || parent_bond[sid] == bond || parent_bond[tid] == bond {
+                continue;
+            }
+            let source_path = path(sid);
+            let target_path = path(tid);
+            // The paths may only meet at the root.
+            if source_path.iter().filter(|atom| target_path.contains(atom)).count() > 1 {
+                continue;
+            }
+
+            let mut atoms: Vec<usize> = source_path.into_iter().rev().collect();
+            atoms.extend(target_path.into_iter().take_while(|atom| atom != root));
+            let mut bonds = vec![0u64; words];
+            bonds[bond / 64] |= 1 << (bond % 64);
+            for atom in &atoms {
+                if atom != root {
+                    let tree_bond = parent_bond[*atom];
+                    bonds[tree_bond / 64] |= 1 << (tree_bond % 64);
+                }
+            }
+            candidates.push(Cycle{ bonds, atoms });
+        }
+
+        for atom in visited {
+            parent[atom] = usize::MAX;
+            parent_bond[atom] = usize::MAX;
+        }
+    }
+
+    candidates.sort_unstable_by(|a, b| {
+        a.atoms.len().cmp(&b.atoms.len()).then_with(|| a.bonds.cmp(&b.bonds))
+    });
+    candidates.dedup_by(|a, b| a.bonds == b.bonds);
+
+    // Rows of the basis in echelon form, with the bit each one clears.
+    let mut basis: Vec<(usize, Vec<u64>)> = Vec::with_capacity(rank);
+    let mut rings = Vec::with_capacity(rank);
+    for candidate in candidates {
+        let mut reduced = candidate.bonds.clone();
+        for (pivot, row) in &basis {
+            if reduced[pivot / 64] & (1 << (pivot % 64)) != 0 {
+                for (word, row_word) in reduced.iter_mut().zip(row) {
+                    *word ^= row_word;
+                }
+            }
+        }
+        let pivot = match reduced.iter().position(|word| *word != 0) {
+            Some(word) => 64 * word + reduced[word].trailing_zeros() as usize,
+            None => continue,
+        };
+        basis.push((pivot, reduced));
+        rings.push(normalise(candidate.atoms));
+        if rings.len() == rank {
+            break;
+        }
+    }
+    rings.sort_unstable_by(|a, b| a.len().cmp(&b.len()).then_with(|| a.cmp(b)));
+    rings
+}
+
+/// Rotate a ring to start from its lowest atom, heading towards the
+/// lower of that atom's neighbours in the ring.
+fn normalise(mut atoms: Vec<usize>) -> Vec<usize> {
+    let start = (0..atoms.len()).min_by_key(|index| atoms[*index]).unwrap_or(0);
+    atoms.rotate_left(start);
+    if atoms.len() > 2 && atoms[atoms.len() - 1] < atoms[1] {
+        atoms[1..].reverse();
+    }
+    atoms
+}
+
+/// The π electrons an atom gives a ring whose atoms are flagged in
+/// `in_ring`, or `None` if the atom can't be conjugated with it (it's
+/// sp3, or has a triple or cumulated double bond).
+fn pi_electrons(graph: &MolecularGraph, atom: usize, in_ring: &[bool]) -> Option<u8> {
+    let (mut ring_double_bonds, mut other_double_bonds) = (0, 0);
+    for (neighbour, bond) in graph.neighbour_bonds(atom) {
+        match graph.bonds[bond].order {
+            1 => {},
+            2 if in_ring[neighbour] => ring_double_bonds += 1,
+            2 => other_double_bonds += 1,
+            _ => return None,
+        }
+    }
+    let record = &graph.atoms[atom];
+    match (ring_double_bonds, other_double_bonds) {
+        (1, 0) => Some(1),
+        // An exocyclic double bond, as for the carbonyl of 2-pyridone.
+        (0, 1) => Some(0),
+        // A lone pair, as for pyrrole's nitrogen or furan's oxygen.
+        (0, 0) if graph.electrons(atom) >= 2 => Some(2),
+        // An empty p orbital, as for tropylium's cation.
+        (0, 0) if record.charge > 0 && graph.neighbours(atom).len() + record.hydrogens as usize == 3 => Some(0),
+        _ => None,
+    }
+}
+
+/// Whether each atom is aromatic, given the `smallest_rings`. `chemcore`
+/// doesn't perceive aromaticity, so this applies Hückel's rule to the
+/// Kekulé structure: an atom is aromatic if it's in a ring (or in two
+/// rings fused by a bond, for the alternative Kekulé structures of
+/// naphthalene and the like) whose every atom is conjugated and which
+/// has 4n + 2 π electrons.
+pub fn aromatic_atoms(graph: &MolecularGraph, rings: &[Vec<usize>]) -> Vec<bool> {
+    let mut aromatic = vec![false; graph.order()];
+    let mut in_ring = vec![false; graph.order()];
+    let mut check = |atoms: &[usize]| {
+        for atom in atoms {
+            in_ring[*atom] = true;
+        }
+        let electrons: Option<usize> = atoms.iter()
+            .map(|atom| pi_electrons(graph, *atom, &in_ring).map(usize::from))
+            .sum();
+        if electrons.map_or(false, |electrons| electrons % 4 == 2) {
+            for atom in atoms {
+                aromatic[*atom] = true;
+            }
+        }
+        for atom in atoms {
+            in_ring[*atom] = false;
+        }
+    };
+
+    for (index, ring) in rings.iter().enumerate() {
+        check(ring);
+        for other in &rings[index + 1..] {
+            if ring.iter().filter(|atom| other.contains(atom)).count() >= 2 {
+                let mut fused = ring.clone();
+                fused.extend(other.iter().filter(|atom| !ring.contains(atom)));
+                check(&fused);
+            }
+        }
+    }
+    aromatic
+}
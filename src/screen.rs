@@ -0,0 +1,132 @@
+use crate::graph::MolecularGraph;
+
+pub const SCREEN_WORDS: usize = 16;
+pub const SCREEN_BITS: usize = 64 * SCREEN_WORDS;
+const MAX_PATH_BONDS: usize = 5;
+const MAX_ELEMENT_COUNT: usize = 16;
+
+const ELEMENT_PATH: u8 = 1;
+const BOND_ORDER_PATH: u8 = 2;
+const ELEMENT_COUNT: u8 = 3;
+
+/// A screening fingerprint: a bitset of hashed structural features,
+/// chosen so that whenever a query matches a molecule, every bit set in
+/// the query's screen is also set in the molecule's.
+pub type Screen = [u64; SCREEN_WORDS];
+
+pub fn fnv1a<I: Iterator<Item = u8>>(bytes: I) -> u64 {
+    let mut hash: u64 = 0xcbf2_9ce4_8422_2325;
+    for byte in bytes {
+        hash ^= byte as u64;
+        hash = hash.wrapping_mul(0x0100_0000_01b3);
+    }
+    hash
+}
+
+fn set_feature<I: Iterator<Item = u8>>(screen: &mut Screen, kind: u8, bytes: I) {
+    let bit = (fnv1a(std::iter::once(kind).chain(bytes)) % SCREEN_BITS as u64) as usize;
+    screen[bit / 64] |= 1 << (bit % 64);
+}
+
+/// Set a path feature, hashing the path in whichever direction is
+/// lexicographically smaller so that both directions give the same bit.
+fn set_path_feature(screen: &mut Screen, kind: u8, path: &[u8]) {
+    if path.iter().cmp(path.iter().rev()) == std::cmp::Ordering::Greater {
+        set_feature(screen, kind, path.iter().rev().copied());
+    } else {
+        set_feature(screen, kind, path.iter().copied());
+    }
+}
+
+struct PathWalker<'a> {
+    graph: &'a MolecularGraph,
+    exact_bonds: &'a dyn Fn(usize) -> bool,
+    visited: Vec<bool>,
+    elements: Vec<u8>,
+    labelled: Vec<u8>,
+    n_inexact: usize,
+}
+
+impl<'a> PathWalker<'a> {
+    fn record(&self, screen: &mut Screen) {
+        set_path_feature(screen, ELEMENT_PATH, &self.elements);
+        if self.n_inexact == 0 {
+            set_path_feature(screen, BOND_ORDER_PATH, &self.labelled);
+        }
+    }
+
+    fn walk(&mut self, atom: usize, screen: &mut Screen) {
+        self.record(screen);
+        if self.labelled.len() / 2 == MAX_PATH_BONDS {
+            return;
+        }
+
+        let graph = self.graph;
+        for (neighbour, bond) in graph.neighbour_bonds(atom) {
+            if self.visited[neighbour] {
+                continue;
+            }
+            let exact = (self.exact_bonds)(bond);
+            let element = graph.atoms[neighbour].atomic_number;
+
+            self.visited[neighbour] = true;
+            self.elements.extend(&[0, element]);
+            self.labelled.extend(&[graph.bonds[bond].order, element]);
+            if !exact {
+                self.n_inexact += 1;
+            }
+
+            self.walk(neighbour, screen);
+
+            if !exact {
+                self.n_inexact -= 1;
+            }
+            self.labelled.truncate(self.labelled.len() - 2);
+            self.elements.truncate(self.elements.len() - 2);
+            self.visited[neighbour] = false;
+        }
+    }
+}
+
+/// Compute the screen of a graph. The features are the element counts
+/// (as "at least n atoms of element e", up to 16) and every simple path
+/// of up to five bonds, both with and without bond orders. Bonds for
+/// which `exact_bonds` is false (aromatic bonds in a query, which match
+/// more than one order) only contribute to the paths without orders.
+pub fn compute_screen(graph: &MolecularGraph, exact_bonds: &dyn Fn(usize) -> bool) -> Screen {
+    let mut screen = [0; SCREEN_WORDS];
+
+    let mut element_counts = [0usize; 256];
+    for atom in &graph.atoms {
+        element_counts[atom.atomic_number as usize] += 1;
+    }
+    for (atomic_number, count) in element_counts.iter().enumerate() {
+        for at_least in 1..=(*count).min(MAX_ELEMENT_COUNT) {
+            set_feature(&mut screen, ELEMENT_COUNT, [atomic_number as u8, at_least as u8].iter().copied());
+        }
+    }
+
+    let mut walker = PathWalker {
+        graph,
+        exact_bonds,
+        visited: vec![false; graph.order()],
+        elements: Vec::with_capacity(2 * MAX_PATH_BONDS + 1),
+        labelled: Vec::with_capacity(2 * MAX_PATH_BONDS + 1),
+        n_inexact: 0,
+    };
+    for atom in 0..graph.order() {
+        let element = graph.atoms[atom].atomic_number;
+        walker.visited[atom] = true;
+        walker.elements.push(element);
+        walker.labelled.push(element);
+        walker.walk(atom, &mut screen);
+        walker.elements.clear();
+        walker.labelled.clear();
+        walker.visited[atom] = false;
+    }
+    screen
+}
+
+pub fn molecule_screen(graph: &MolecularGraph) -> Screen {
+    compute_screen(graph, &|_| true)
+}
@@ -0,0 +1,330 @@
+use std::convert::TryInto;
+use std::fs::File;
+use std::io::{self,BufWriter,Seek,SeekFrom,Write};
+
+use memmap::Mmap;
+use pyo3::prelude::*;
+use pyo3::class::{PyObjectProtocol,PySequenceProtocol};
+use pyo3::types::PyType;
+use numpy::{IntoPyArray,PyArray1};
+use rayon::prelude::*;
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::exceptions::get_ValueError;
+use crate::files::{BUFFER_SIZE,extract_path};
+use crate::parallel::{install,thread_pool};
+use crate::query::{PyQuery,molecule_graphs};
+use crate::screen::{SCREEN_WORDS,Screen,molecule_screen};
+
+const MAGIC: &[u8; 8] = b"OXSCREEN";
+const VERSION: u32 = 1;
+const HEADER_SIZE: usize = 24;
+const ROW_SIZE: usize = 8 * SCREEN_WORDS;
+const BUILD_CHUNK_SIZE: usize = 10_000;
+
+fn header(n_molecules: u64) -> Vec<u8> {
+    let mut header = Vec::with_capacity(HEADER_SIZE);
+    header.extend(MAGIC);
+    header.extend(&VERSION.to_le_bytes());
+    header.extend(&(SCREEN_WORDS as u32).to_le_bytes());
+    header.extend(&n_molecules.to_le_bytes());
+    header
+}
+
+fn row_contains(row: &[u8], query: &Screen) -> bool {
+    row.chunks_exact(8).zip(query.iter()).all(|(word, query_word)| {
+        let word = u64::from_le_bytes(word.try_into().unwrap());
+        word & query_word == *query_word
+    })
+}
+
+// Screens for a collection of molecules, stored in a file which is
+// memory-mapped rather than read: a 24 byte header (magic, version,
+// words per screen and number of molecules) followed by each screen as
+// little-endian `u64` words.
+/// A memory-mapped file of molecule screens.
+///
+/// :param path: the path to an index written by ``ScreenIndex.build``
+#[pyclass(module = "oxmol.oxmol")]
+pub struct PyScreenIndex {
+    mmap: Mmap,
+    n_molecules: usize,
+}
+
+impl PyScreenIndex {
+    fn open(path: &str) -> PyResult<Self> {
+        let file = File::open(path)?;
+        // The index is only read, and must not be changed while open.
+        let mmap = unsafe { Mmap::map(&file)? };
+
+        let valid_header = mmap.len() >= HEADER_SIZE
+            && &mmap[..8] == MAGIC
+            && mmap[8..12] == VERSION.to_le_bytes()
+            && mmap[12..16] == (SCREEN_WORDS as u32).to_le_bytes();
+        if !valid_header {
+            return Err(get_ValueError("Not a screen index, or written by another version."));
+        }
+
+        let n_molecules = u64::from_le_bytes(mmap[16..24].try_into().unwrap()) as usize;
+        if mmap.len() != HEADER_SIZE + n_molecules * ROW_SIZE {
+            return Err(get_ValueError("The screen index is truncated."));
+        }
+        Ok(Self{ mmap, n_molecules })
+    }
+
+    fn screen_candidates(&self, query: &Screen) -> Vec<usize> {
+        self.mmap[HEADER_SIZE..]
+            .par_chunks(ROW_SIZE)
+            .enumerate()
+            .filter(|(_, row)| row_contains(row, query))
+            .map(|(index, _)| index)
+            .collect()
+    }
+}
+
+#[pymethods]
+impl PyScreenIndex {
+    #[new]
+    fn new(path: &PyAny) -> PyResult<Self> {
+        PyScreenIndex::open(&extract_path(path)?)
+    }
+
+    /// Compute the screens of molecules and write them to an index
+    /// file, overwriting it if it exists. The molecules are consumed
+    /// in chunks, so this can be given a generator over a large library.
+    ///
+    /// :param molecules: the molecules to index. Their order gives the
+    ///     indices used by ``search``
+    /// :param path: the path to write the index to
+    /// :param threads: the number of threads to compute screens with,
+    ///     by default one per core
+    /// :return: the index, opened
+    #[classmethod]
+    #[args(threads = "None")]
+    fn build(_cls: &PyType, molecules: &PyAny, path: &PyAny, threads: Option<usize>) -> PyResult<Self> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let path = extract_path(path)?;
+        let pool = thread_pool(threads)?;
+
+        let mut file = File::create(&path)?;
+        file.write_all(&header(0))?;
+        let mut writer = BufWriter::with_capacity(BUFFER_SIZE, file);
+
+        let mut n_molecules = 0;
+        let mut chunk = Vec::with_capacity(BUILD_CHUNK_SIZE);
+        let mut items = molecules.iter()?;
+        loop {
+            let item = items.next();
+            let finished = item.is_none();
+            if let Some(item) = item {
+                chunk.push(item?.extract::<PyRef<PyDefaultMolecule>>()?);
+            }
+            if chunk.len() < BUILD_CHUNK_SIZE && !finished {
+                continue;
+            }
+
+            let graphs = molecule_graphs(&chunk);
+            let screens: Vec<Screen> = py.allow_threads(|| {
+                install(pool.as_deref(), || graphs.par_iter().map(|graph| molecule_screen(graph)).collect())
+            });
+            for screen in &screens {
+                for word in screen {
+                    writer.write_all(&word.to_le_bytes())?;
+                }
+            }
+            n_molecules += chunk.len();
+            chunk.clear();
+
+            if finished {
+                break;
+            }
+        }
+
+        let mut file = writer.into_inner().map_err(io::Error::from)?;
+        file.seek(SeekFrom::Start(0))?;
+        file.write_all(&header(n_molecules as u64))?;
+        file.sync_all()?;
+        drop(file);
+
+        PyScreenIndex::open(&path)
+    }
+
+    /// Screen every molecule in the index against a query.
+    ///
+    /// :param query: the query
+    /// :param threads: the number of threads to use, by default one
+    ///     per core
+    /// :return: a ``uint64`` array of the indices of the molecules
+    ///     whose screens contain the query's
+    #[args(threads = "None")]
+    fn candidates(&self, query: PyRef<PyQuery>, threads: Option<usize>) -> PyResult<Py<PyArray1<u64>>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let pool = thread_pool(threads)?;
+
+        let candidates: Vec<u64> = py.allow_threads(|| {
+            install(pool.as_deref(), || self.screen_candidates(&query.query.screen))
+        })
+            .into_iter()
+            .map(|index| index as u64)
+            .collect();
+        Ok(candidates.into_pyarray(py).to_owned())
+    }
+
+    /// Find the molecules matching a query: screen them with the index,
+    /// then run the matcher (in parallel, without holding the GIL) on
+    /// the candidates.
+    ///
+    /// :param query: the query
+    /// :param molecules: the molecules the index was built from, in
+    ///     the same order. Only the candidates are accessed
+    /// :param threads: the number of threads to use, by default one
+    ///     per core
+    /// :return: the matching molecules, with screening statistics
+    #[args(threads = "None")]
+    fn search(&self, query: PyRef<PyQuery>, molecules: &PyAny, threads: Option<usize>) -> PyResult<PySearchResult> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let pool = thread_pool(threads)?;
+        if molecules.len()? != self.n_molecules {
+            return Err(get_ValueError("The number of molecules doesn't match the index."));
+        }
+
+        let compiled = &query.query;
+        let candidates = py.allow_threads(|| {
+            install(pool.as_deref(), || self.screen_candidates(&compiled.screen))
+        });
+
+        let mut candidate_molecules = Vec::with_capacity(candidates.len());
+        for index in &candidates {
+            candidate_molecules.push(molecules.get_item(*index)?.extract::<PyRef<PyDefaultMolecule>>()?);
+        }
+        let graphs = molecule_graphs(&candidate_molecules);
+
+        let hits: Vec<u64> = py.allow_threads(|| {
+            install(pool.as_deref(), || {
+                candidates.par_iter()
+                    .zip(graphs.par_iter())
+                    .filter(|(_, graph)| compiled.has_match(graph))
+                    .map(|(index, _)| *index as u64)
+                    .collect()
+            })
+        });
+
+        Ok(PySearchResult {
+            hits,
+            n_molecules: self.n_molecules,
+            n_candidates: candidates.len(),
+        })
+    }
+}
+
+fn screen_array(py: Python, screen: &Screen) -> Py<PyArray1<u64>> {
+    screen.to_vec().into_pyarray(py).to_owned()
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Return the molecule's substructure screen (see
+    /// ``oxmol.screen``). This is computed on first use and cached.
+    ///
+    /// :return: a ``uint64`` array of 16 words
+    fn screen(&self) -> PyResult<Py<PyArray1<u64>>> {
+        let gil = Python::acquire_gil();
+        Ok(screen_array(gil.python(), self.cached_screen()))
+    }
+}
+
+#[pymethods]
+impl PyQuery {
+    /// Return the query's screen (see ``oxmol.screen``). Features
+    /// which depend on the orders of aromatic bonds are left out, as
+    /// these match more than one bond order.
+    ///
+    /// :return: a ``uint64`` array of 16 words
+    fn screen(&self) -> PyResult<Py<PyArray1<u64>>> {
+        let gil = Python::acquire_gil();
+        Ok(screen_array(gil.python(), &self.query.screen))
+    }
+}
+
+#[pyproto]
+impl PySequenceProtocol for PyScreenIndex {
+    fn __len__(&self) -> PyResult<usize> {
+        Ok(self.n_molecules)
+    }
+}
+
+#[pyproto]
+impl PyObjectProtocol for PyScreenIndex {
+    fn __repr__(&self) -> PyResult<String> {
+        Ok(format!("PyScreenIndex with {} molecules.", self.n_molecules))
+    }
+}
+
+/// The result of searching a ``ScreenIndex``: the molecules matching a
+/// query, and how many were rejected by the screen before running the
+/// matcher.
+///
+/// Attributes
+///
+/// - ``hits`` - a ``uint64`` array of the indices of the matching
+///     molecules, in ascending order
+/// - ``n_hits`` - the number of matching molecules
+/// - ``n_molecules`` - the number of molecules in the index
+/// - ``n_candidates`` - the number of molecules which passed the
+///     screen, and were checked with the exact matcher
+/// - ``pruning_ratio`` - the fraction of the molecules rejected by the
+///     screen alone
+/// - ``hit_ratio`` - the fraction of the candidates which matched
+#[pyclass(module = "oxmol.oxmol")]
+pub struct PySearchResult {
+    hits: Vec<u64>,
+    #[pyo3(get)]
+    n_molecules: usize,
+    #[pyo3(get)]
+    n_candidates: usize,
+}
+
+#[pymethods]
+impl PySearchResult {
+    #[getter]
+    fn hits(&self) -> PyResult<Py<PyArray1<u64>>> {
+        let gil = Python::acquire_gil();
+        Ok(self.hits.clone().into_pyarray(gil.python()).to_owned())
+    }
+
+    #[getter]
+    fn n_hits(&self) -> PyResult<usize> {
+        Ok(self.hits.len())
+    }
+
+    #[getter]
+    fn pruning_ratio(&self) -> PyResult<f64> {
+        match self.n_molecules {
+            0 => Ok(0.0),
+            n_molecules => Ok(1.0 - self.n_candidates as f64 / n_molecules as f64),
+        }
+    }
+
+    #[getter]
+    fn hit_ratio(&self) -> PyResult<f64> {
+        match self.n_candidates {
+            0 => Ok(0.0),
+            n_candidates => Ok(self.hits.len() as f64 / n_candidates as f64),
+        }
+    }
+}
+
+#[pyproto]
+impl PyObjectProtocol for PySearchResult {
+    fn __repr__(&self) -> PyResult<String> {
+        Ok(format!(
+            "PySearchResult with {} hits from {} candidates ({} molecules screened).",
+            self.hits.len(),
+            self.n_candidates,
+            self.n_molecules
+        ))
+    }
+}
@@ -0,0 +1,405 @@
+use std::collections::VecDeque;
+use std::io::{self,BufRead,Write};
+use std::mem;
+use std::sync::Arc;
+use std::sync::mpsc::{self,Receiver,SyncSender};
+use std::thread;
+
+use pyo3::prelude::*;
+use pyo3::class::PyIterProtocol;
+use pyo3::exceptions;
+use pyo3::types::{PyBytes,PyDict,PyType};
+use rayon::ThreadPool;
+use rayon::prelude::*;
+
+use chemcore::molecule::spec::Molecule;
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::exceptions::*;
+use crate::files::{Output,open_reader};
+use crate::molfile::{parse_data,parse_molfile,split_record,write_molfile,write_record};
+use crate::parallel::{install,thread_pool};
+
+const CHUNK_SIZE: usize = 1_000;
+const WRITE_BATCH_SIZE: usize = 1_000;
+const QUEUED_BATCHES: usize = 8;
+
+type WriteBatch = Vec<(Molecule, String, Vec<(String, String)>)>;
+
+#[derive(Clone,Copy,PartialEq)]
+enum DataFormat {
+    Skip,
+    Dict,
+    Bytes,
+}
+
+enum RecordData {
+    Skipped,
+    Items(Vec<(String, String)>),
+    Raw(String),
+}
+
+struct Record {
+    line_number: usize,
+    name: String,
+    data: RecordData,
+    result: Result<PyDefaultMolecule, String>,
+}
+
+fn build_record(line_number: usize, text: &str, data_format: DataFormat) -> Record {
+    let (molfile, data) = split_record(text);
+    let data = match data_format {
+        DataFormat::Skip => RecordData::Skipped,
+        DataFormat::Dict => RecordData::Items(parse_data(data)),
+        DataFormat::Bytes => RecordData::Raw(data.to_string()),
+    };
+
+    match parse_molfile(molfile) {
+        Ok((molecule, name)) => {
+            let result = PyDefaultMolecule::build(molecule)
+                .map_err(|error_type| format!("Line {}: {}", line_number, error_message(error_type)));
+            Record{ line_number, name, data, result }
+        },
+        Err(molfile_error) => {
+            let message = format!("Line {}: {}", line_number + molfile_error.line - 1, molfile_error.message);
+            Record{ line_number, name: String::new(), data, result: Err(message) }
+        },
+    }
+}
+
+/// Read up to `n_records` records, each ended by a `$$$$` line, and parse
+/// them in parallel.
+fn read_records(
+    lines: &mut (dyn BufRead + Send),
+    line_number: &mut usize,
+    n_records: usize,
+    data_format: DataFormat
+) -> io::Result<Vec<Record>> {
+    let mut chunk = Vec::with_capacity(n_records);
+    let mut text = String::new();
+    let mut start = *line_number + 1;
+    let mut line = String::new();
+
+    while chunk.len() < n_records {
+        line.clear();
+        let at_end = lines.read_line(&mut line)? == 0;
+        if at_end || line.starts_with("$$$$") {
+            // A final record may be missing its terminator.
+            if !text.trim().is_empty() {
+                chunk.push((start, mem::take(&mut text)));
+            }
+            text.clear();
+            if at_end {
+                break;
+            }
+            start = *line_number + 2;
+        } else {
+            text.push_str(&line);
+        }
+        *line_number += 1;
+    }
+
+    Ok(chunk.par_iter().map(|(line_number, text)| build_record(*line_number, text, data_format)).collect())
+}
+
+fn data_object(py: Python, data: RecordData) -> PyResult<PyObject> {
+    match data {
+        RecordData::Skipped => Ok(py.None()),
+        RecordData::Items(items) => {
+            let dict = PyDict::new(py);
+            for (key, value) in items {
+                dict.set_item(key, value)?;
+            }
+            Ok(dict.to_object(py))
+        },
+        RecordData::Raw(raw) => Ok(PyBytes::new(py, raw.as_bytes()).to_object(py)),
+    }
+}
+
+#[pyclass]
+pub struct PySdfReader {
+    lines: Box<dyn BufRead + Send>,
+    line_number: usize,
+    batch_size: Option<usize>,
+    names: bool,
+    data_format: DataFormat,
+    skip_invalid: bool,
+    pool: Option<Arc<ThreadPool>>,
+    pending: VecDeque<Record>,
+    exhausted: bool,
+}
+
+impl PySdfReader {
+    fn fill(&mut self, py: Python) -> PyResult<()> {
+        if !self.pending.is_empty() || self.exhausted {
+            return Ok(());
+        }
+
+        let n_records = self.batch_size.unwrap_or(CHUNK_SIZE);
+        let lines = &mut self.lines;
+        let line_number = &mut self.line_number;
+        let data_format = self.data_format;
+        let pool = self.pool.as_deref();
+        let records = py.allow_threads(move || {
+            install(pool, || read_records(lines.as_mut(), line_number, n_records, data_format))
+        })?;
+
+        self.exhausted = records.len() < n_records;
+        self.pending.extend(records);
+        Ok(())
+    }
+
+    fn next_molecule(&mut self, py: Python) -> PyResult<Option<PyObject>> {
+        loop {
+            self.fill(py)?;
+            let record = match self.pending.pop_front() {
+                Some(record) => record,
+                None => return Ok(None),
+            };
+
+            match record.result {
+                Ok(molecule) => {
+                    let molecule = Py::new(py, molecule)?;
+                    let item = match (self.names, self.data_format) {
+                        (false, DataFormat::Skip) => molecule.to_object(py),
+                        (true, DataFormat::Skip) => (molecule, record.name).to_object(py),
+                        (false, _) => (molecule, data_object(py, record.data)?).to_object(py),
+                        (true, _) => (molecule, record.name, data_object(py, record.data)?).to_object(py),
+                    };
+                    return Ok(Some(item));
+                },
+                Err(message) => {
+                    if !self.skip_invalid {
+                        return Err(exceptions::ValueError::py_err(message));
+                    }
+                },
+            }
+        }
+    }
+}
+
+#[pyproto]
+impl PyIterProtocol for PySdfReader {
+    fn __iter__(slf: PyRef<Self>) -> PyResult<Py<PySdfReader>> {
+        Ok(slf.into())
+    }
+
+    fn __next__(mut slf: PyRefMut<Self>) -> PyResult<Option<PyObject>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let reader = &mut *slf;
+
+        let batch_size = match reader.batch_size {
+            Some(batch_size) => batch_size,
+            None => return reader.next_molecule(py),
+        };
+
+        let mut batch = Vec::with_capacity(batch_size);
+        while batch.len() < batch_size {
+            match reader.next_molecule(py)? {
+                Some(item) => batch.push(item),
+                None => break,
+            }
+        }
+
+        match batch.is_empty() {
+            true => Ok(None),
+            false => Ok(Some(batch.to_object(py))),
+        }
+    }
+}
+
+#[pyfunction(batch_size = "None", names = "false", data = "None", skip_invalid = "false", threads = "None")]
+pub fn read_sdf(
+    path: &str,
+    batch_size: Option<usize>,
+    names: bool,
+    data: Option<&str>,
+    skip_invalid: bool,
+    threads: Option<usize>
+) -> PyResult<Py<PySdfReader>> {
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+
+    if batch_size == Some(0) {
+        return Err(get_ValueError("The batch size must be positive."));
+    }
+    let data_format = match data {
+        None => DataFormat::Skip,
+        Some("dict") => DataFormat::Dict,
+        Some("bytes") => DataFormat::Bytes,
+        Some(_) => return Err(get_ValueError("Data must be read as \"dict\" or \"bytes\".")),
+    };
+
+    let reader = PySdfReader {
+        lines: open_reader(path)?,
+        line_number: 0,
+        batch_size,
+        names,
+        data_format,
+        skip_invalid,
+        pool: thread_pool(threads)?,
+        pending: VecDeque::new(),
+        exhausted: false,
+    };
+    Py::new(py, reader)
+}
+
+/// Parse the data items of an SD record read with `data="bytes"`.
+#[pyfunction]
+pub fn parse_sd_data(data: &[u8]) -> PyResult<PyObject> {
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+    let data = match std::str::from_utf8(data) {
+        Ok(data) => data,
+        Err(_) => return Err(get_ValueError("SD data must be UTF-8.")),
+    };
+    data_object(py, RecordData::Items(parse_data(data)))
+}
+
+enum WriteError {
+    Io(io::Error),
+    Record(usize, &'static str),
+}
+
+impl From<io::Error> for WriteError {
+    fn from(io_error: io::Error) -> Self {
+        WriteError::Io(io_error)
+    }
+}
+
+fn write_batches(
+    receiver: Receiver<WriteBatch>,
+    mut output: Output,
+    pool: Option<Arc<ThreadPool>>
+) -> Result<usize, WriteError> {
+    let mut n_written = 0;
+
+    for batch in receiver {
+        let records: Vec<Result<String, &'static str>> = install(pool.as_deref(), || {
+            batch.par_iter()
+                .map(|(molecule, name, data)| write_record(molecule, name, data))
+                .collect()
+        });
+
+        for record in records {
+            match record {
+                Ok(record) => output.write_all(record.as_bytes())?,
+                Err(error_message) => return Err(WriteError::Record(n_written, error_message)),
+            }
+            n_written += 1;
+        }
+    }
+
+    output.finish()?;
+    Ok(n_written)
+}
+
+fn extract_data(data: &PyAny) -> PyResult<Vec<(String, String)>> {
+    let mut items = Vec::new();
+    for item in data.call_method0("items")?.iter()? {
+        let (key, value) = item?.extract::<(String, &PyAny)>()?;
+        items.push((key, value.str()?.extract::<String>()?));
+    }
+    Ok(items)
+}
+
+fn send_molecules(py: Python, molecules: &PyAny, sender: &SyncSender<WriteBatch>) -> PyResult<()> {
+    let mut batch = Vec::with_capacity(WRITE_BATCH_SIZE);
+
+    for item in molecules.iter()? {
+        let item = item?;
+        let (molecule, name, data) = match item.extract::<PyRef<PyDefaultMolecule>>() {
+            Ok(molecule) => (molecule, String::new(), Vec::new()),
+            Err(_) => match item.extract::<(PyRef<PyDefaultMolecule>, String)>() {
+                Ok((molecule, name)) => (molecule, name, Vec::new()),
+                Err(_) => {
+                    let (molecule, name, data) = item.extract::<(PyRef<PyDefaultMolecule>, String, &PyAny)>()?;
+                    (molecule, name, extract_data(data)?)
+                },
+            },
+        };
+        batch.push((molecule.to_spec(), name, data));
+
+        if batch.len() == WRITE_BATCH_SIZE {
+            let full_batch = mem::replace(&mut batch, Vec::with_capacity(WRITE_BATCH_SIZE));
+            // The writer only hangs up after an error, which is raised
+            // once it has been joined.
+            if py.allow_threads(|| sender.send(full_batch)).is_err() {
+                return Ok(());
+            }
+        }
+    }
+
+    if !batch.is_empty() {
+        py.allow_threads(|| sender.send(batch)).ok();
+    }
+    Ok(())
+}
+
+#[pyfunction(compress = "None", threads = "None")]
+pub fn write_sdf(
+    molecules: &PyAny,
+    path: &str,
+    compress: Option<bool>,
+    threads: Option<usize>
+) -> PyResult<usize> {
+    let py = molecules.py();
+    let compress = compress.unwrap_or_else(|| path.ends_with(".gz"));
+    let pool = thread_pool(threads)?;
+    let output = Output::create(path, compress)?;
+
+    let (sender, receiver) = mpsc::sync_channel(QUEUED_BATCHES);
+    let writer = thread::spawn(move || write_batches(receiver, output, pool));
+    let sent = send_molecules(py, molecules, &sender);
+    drop(sender);
+
+    let written = py.allow_threads(|| writer.join());
+    sent?;
+    match written {
+        Ok(Ok(n_written)) => Ok(n_written),
+        Ok(Err(WriteError::Io(io_error))) => Err(io_error.into()),
+        Ok(Err(WriteError::Record(index, error_message))) => {
+            let message = format!("Record {}: {}", index, error_message);
+            Err(exceptions::ValueError::py_err(message))
+        },
+        Err(panic) => Err(generic_exception(panic)),
+    }
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Create a molecule from a V2000 molfile, as described in
+    /// ``oxmol.sdf``. Anything after the ``M  END`` line is ignored.
+    ///
+    /// :param molfile: the text of the molfile
+    /// :return: the molecule
+    #[classmethod]
+    fn from_molfile(_cls: &PyType, molfile: &str) -> PyResult<Self> {
+        let molecule = match parse_molfile(split_record(molfile).0) {
+            Ok((molecule, _)) => molecule,
+            Err(molfile_error) => return Err(exceptions::ValueError::py_err(molfile_error.to_string()))
+        };
+
+        match PyDefaultMolecule::build(molecule) {
+            Ok(molecule) => Ok(molecule),
+            Err(error_type) => Err(exception_from_error(error_type))
+        }
+    }
+
+    /// Write the molecule as a V2000 molfile, as described in
+    /// ``oxmol.sdf``. Atoms are all placed at the origin.
+    ///
+    /// :param name: the name to write on the header's first line
+    /// :return: the molfile, ending with the ``M  END`` line
+    #[args(name = "\"\"")]
+    fn to_molfile(&self, name: &str) -> PyResult<String> {
+        let molecule = self.to_spec();
+
+        let mut molfile = String::new();
+        match write_molfile(&molecule, name, &mut molfile) {
+            Ok(()) => Ok(molfile),
+            Err(error_message) => Err(get_ValueError(error_message))
+        }
+    }
+}
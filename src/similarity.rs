@@ -0,0 +1,225 @@
+use std::cmp::{Ordering,Reverse};
+use std::collections::BinaryHeap;
+use std::convert::TryInto;
+
+use rayon::prelude::*;
+
+/// The number of rows each task searches.
+const CHUNK_ROWS: usize = 16_384;
+
+#[derive(Clone,Copy,Debug,PartialEq)]
+pub enum Metric {
+    Tanimoto,
+    Dice,
+}
+
+impl Metric {
+    pub fn from_name(name: &str) -> Option<Self> {
+        match name.to_ascii_lowercase().as_str() {
+            "tanimoto" => Some(Metric::Tanimoto),
+            "dice" => Some(Metric::Dice),
+            _ => None,
+        }
+    }
+
+    /// The similarity of fingerprints with `a` and `b` bits set, of which
+    /// `common` are set in both. Two empty fingerprints score 0.
+    pub fn score(self, a: u32, b: u32, common: u32) -> f64 {
+        let (numerator, denominator) = match self {
+            Metric::Tanimoto => (common, a + b - common),
+            Metric::Dice => (2 * common, a + b),
+        };
+        match denominator {
+            0 => 0.0,
+            denominator => numerator as f64 / denominator as f64,
+        }
+    }
+
+    /// The highest score possible for fingerprints with `a` and `b` bits
+    /// set, when every bit of the smaller is set in the larger.
+    pub fn max_score(self, a: u32, b: u32) -> f64 {
+        self.score(a, b, a.min(b))
+    }
+}
+
+pub fn popcount(fingerprint: &[u8]) -> u32 {
+    let words = fingerprint.chunks_exact(8);
+    let remainder: u32 = words.remainder().iter().map(|byte| byte.count_ones()).sum();
+    words.map(|word| u64::from_ne_bytes(word.try_into().unwrap()).count_ones()).sum::<u32>() + remainder
+}
+
+pub fn common_bits(first: &[u8], second: &[u8]) -> u32 {
+    let first_words = first.chunks_exact(8);
+    let second_words = second.chunks_exact(8);
+    let remainder: u32 = first_words.remainder().iter()
+        .zip(second_words.remainder())
+        .map(|(a, b)| (a & b).count_ones())
+        .sum();
+    first_words.zip(second_words)
+        .map(|(a, b)| {
+            let a = u64::from_ne_bytes(a.try_into().unwrap());
+            let b = u64::from_ne_bytes(b.try_into().unwrap());
+            (a & b).count_ones()
+        })
+        .sum::<u32>() + remainder
+}
+
+#[derive(Clone,Copy,Debug)]
+pub struct Hit {
+    pub score: f64,
+    pub index: usize,
+}
+
+/// Hits order by score, then by lowest index, so that the greatest hit
+/// is the best. Scores are never NaN.
+impl Ord for Hit {
+    fn cmp(&self, other: &Self) -> Ordering {
+        self.score.partial_cmp(&other.score)
+            .unwrap_or(Ordering::Equal)
+            .then_with(|| other.index.cmp(&self.index))
+    }
+}
+
+impl PartialOrd for Hit {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> {
+        Some(self.cmp(other))
+    }
+}
+
+impl PartialEq for Hit {
+    fn eq(&self, other: &Self) -> bool {
+        self.cmp(other) == Ordering::Equal
+    }
+}
+
+impl Eq for Hit {}
+
+/// Packed fingerprints with the same number of bytes, and the number of
+/// bits set in each (little-endian `u16`), as stored in a fingerprint
+/// database.
+pub struct Fingerprints<'a> {
+    pub rows: &'a [u8],
+    pub counts: &'a [u8],
+    pub n_bytes: usize,
+}
+
+impl<'a> Fingerprints<'a> {
+    pub fn len(&self) -> usize {
+        self.counts.len() / 2
+    }
+
+    fn count(&self, index: usize) -> u32 {
+        u16::from_le_bytes([self.counts[2 * index], self.counts[2 * index + 1]]) as u32
+    }
+
+    fn row(&self, index: usize) -> &[u8] {
+        &self.rows[index * self.n_bytes..(index + 1) * self.n_bytes]
+    }
+
+    fn chunks(&self) -> impl ParallelIterator<Item = std::ops::Range<usize>> {
+        let n_rows = self.len();
+        (0..(n_rows + CHUNK_ROWS - 1) / CHUNK_ROWS)
+            .into_par_iter()
+            .map(move |chunk| chunk * CHUNK_ROWS..((chunk + 1) * CHUNK_ROWS).min(n_rows))
+    }
+
+    /// Find the rows scoring at least `threshold` against each query
+    /// (packed contiguously), best first. Rows whose bit counts rule out
+    /// the threshold aren't read.
+    pub fn threshold_search(&self, queries: &[u8], metric: Metric, threshold: f64) -> Vec<Vec<Hit>> {
+        let query_rows: Vec<&[u8]> = queries.chunks_exact(self.n_bytes).collect();
+        let query_counts: Vec<u32> = query_rows.iter().map(|query| popcount(query)).collect();
+        let n_queries = query_rows.len();
+
+        let mut hits = self.chunks()
+            .map(|rows| {
+                let mut hits = vec![Vec::new(); n_queries];
+                // Each row is read once for all of the queries.
+                for row in rows {
+                    let count = self.count(row);
+                    for query in 0..n_queries {
+                        if metric.max_score(query_counts[query], count) < threshold {
+                            continue;
+                        }
+                        let common = common_bits(query_rows[query], self.row(row));
+                        let score = metric.score(query_counts[query], count, common);
+                        if score >= threshold {
+                            hits[query].push(Hit{ score, index: row });
+                        }
+                    }
+                }
+                hits
+            })
+            .reduce(
+                || vec![Vec::new(); n_queries],
+                |mut first, second| {
+                    for (first_hits, second_hits) in first.iter_mut().zip(second) {
+                        first_hits.extend(second_hits);
+                    }
+                    first
+                }
+            );
+        for query_hits in &mut hits {
+            query_hits.par_sort_unstable_by(|a, b| b.cmp(a));
+        }
+        hits
+    }
+
+    /// Find the `k` best scoring rows for each query (packed
+    /// contiguously), best first. Each task keeps the best hits it has
+    /// found so far, and once it has `k` of them skips rows whose bit
+    /// counts rule out beating the worst.
+    pub fn top_k_search(&self, queries: &[u8], metric: Metric, k: usize) -> Vec<Vec<Hit>> {
+        let query_rows: Vec<&[u8]> = queries.chunks_exact(self.n_bytes).collect();
+        let query_counts: Vec<u32> = query_rows.iter().map(|query| popcount(query)).collect();
+        let n_queries = query_rows.len();
+        let new_heaps = || vec![BinaryHeap::<Reverse<Hit>>::with_capacity(k + 1); n_queries];
+
+        let heaps = self.chunks()
+            .map(|rows| {
+                let mut heaps = new_heaps();
+                let mut worst_scores = vec![f64::NEG_INFINITY; n_queries];
+                for row in rows {
+                    let count = self.count(row);
+                    for query in 0..n_queries {
+                        // Rows are visited in ascending order, so a later
+                        // row scoring the same as the worst hit can't
+                        // replace it.
+                        if metric.max_score(query_counts[query], count) <= worst_scores[query] {
+                            continue;
+                        }
+                        let common = common_bits(query_rows[query], self.row(row));
+                        let score = metric.score(query_counts[query], count, common);
+                        let heap = &mut heaps[query];
+                        heap.push(Reverse(Hit{ score, index: row }));
+                        if heap.len() > k {
+                            heap.pop();
+                        }
+                        if heap.len() == k {
+                            worst_scores[query] = heap.peek().unwrap().0.score;
+                        }
+                    }
+                }
+                heaps
+            })
+            .reduce(new_heaps, |mut first, second| {
+                for (first_heap, second_heap) in first.iter_mut().zip(second) {
+                    for hit in second_heap {
+                        first_heap.push(hit);
+                        if first_heap.len() > k {
+                            first_heap.pop();
+                        }
+                    }
+                }
+                first
+            });
+
+        heaps.into_iter()
+            .map(|heap| {
+                let mut hits: Vec<Hit> = heap.into_iter().map(|Reverse(hit)| hit).collect();
+                hits.sort_unstable_by(|a, b| b.cmp(a));
+                hits
+            })
+            .collect()
+    }
+}
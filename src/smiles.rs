@@ -0,0 +1,701 @@
+use std::fmt;
+
+use chemcore::molecule::{BondOrder,Element,Parity};
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+use crate::element::element_from_symbol;
+
+const HYDROGEN: usize = usize::MAX;
+const MAX_KEKULE_STEPS: usize = 100_000;
+
+#[derive(Debug)]
+pub struct SmilesError {
+    pub position: usize,
+    pub message: &'static str,
+}
+
+impl fmt::Display for SmilesError {
+    fn fmt(&self, f: &mut fmt::Formatter) -> fmt::Result {
+        write!(f, "Invalid SMILES at position {}: {}", self.position, self.message)
+    }
+}
+
+pub fn default_valences(atomic_number: i16) -> &'static [u8] {
+    match atomic_number {
+        5  => &[3],
+        6  => &[4],
+        7  => &[3, 5],
+        8  => &[2],
+        9  => &[1],
+        14 => &[4],
+        15 => &[3, 5],
+        16 => &[2, 4, 6],
+        17 => &[1],
+        33 => &[3, 5],
+        34 => &[2, 4, 6],
+        35 => &[1],
+        52 => &[2, 4, 6],
+        53 => &[1],
+        _  => &[],
+    }
+}
+
+pub fn implicit_hydrogens(atomic_number: i16, bond_order_sum: u16) -> Option<u8> {
+    default_valences(atomic_number)
+        .iter()
+        .find(|valence| u16::from(**valence) >= bond_order_sum)
+        .map(|valence| (u16::from(*valence) - bond_order_sum) as u8)
+}
+
+#[derive(Copy,Clone,Debug,PartialEq)]
+enum BondKind {
+    Implicit,
+    Single,
+    Double,
+    Triple,
+    Aromatic,
+    Up,
+    Down,
+}
+
+impl BondKind {
+    fn is_directional(self) -> bool {
+        self == BondKind::Up || self == BondKind::Down
+    }
+}
+
+struct ParsedAtom {
+    element: Element,
+    aromatic: bool,
+    bracket: bool,
+    isotope: Option<u16>,
+    hydrogens: u8,
+    charge: i8,
+    clockwise: Option<bool>,
+    neighbours: Vec<usize>,
+}
+
+impl ParsedAtom {
+    fn organic(element: Element, aromatic: bool) -> Self {
+        Self {
+            element,
+            aromatic,
+            bracket: false,
+            isotope: None,
+            hydrogens: 0,
+            charge: 0,
+            clockwise: None,
+            neighbours: Vec::with_capacity(4),
+        }
+    }
+}
+
+struct ParsedBond {
+    sid: usize,
+    tid: usize,
+    kind: BondKind,
+}
+
+struct RingOpening {
+    atom: usize,
+    kind: Option<BondKind>,
+    slot: usize,
+}
+
+struct Parser<'a> {
+    bytes: &'a [u8],
+    position: usize,
+    atoms: Vec<ParsedAtom>,
+    bonds: Vec<ParsedBond>,
+    rings: Vec<Option<RingOpening>>,
+    branches: Vec<usize>,
+    previous: Option<usize>,
+    pending_bond: Option<BondKind>,
+}
+
+impl<'a> Parser<'a> {
+    fn new(smiles: &'a str) -> Self {
+        Self {
+            bytes: smiles.as_bytes(),
+            position: 0,
+            atoms: Vec::new(),
+            bonds: Vec::new(),
+            rings: (0..100).map(|_| None).collect(),
+            branches: Vec::new(),
+            previous: None,
+            pending_bond: None,
+        }
+    }
+
+    fn error<T>(&self, message: &'static str) -> Result<T, SmilesError> {
+        Err(SmilesError{ position: self.position, message })
+    }
+
+    fn peek(&self) -> Option<u8> {
+        self.bytes.get(self.position).copied()
+    }
+
+    fn parse(&mut self) -> Result<(), SmilesError> {
+        while let Some(character) = self.peek() {
+            match character {
+                b'(' => {
+                    if self.previous.is_none() || self.pending_bond.is_some() {
+                        return self.error("Unexpected branch");
+                    }
+                    self.branches.push(self.previous.unwrap());
+                    self.position += 1;
+                },
+                b')' => {
+                    if self.pending_bond.is_some() {
+                        return self.error("Bond without a target atom");
+                    }
+                    match self.branches.pop() {
+                        Some(atom) => self.previous = Some(atom),
+                        None => return self.error("Unopened branch"),
+                    }
+                    self.position += 1;
+                },
+                b'.' => {
+                    if self.pending_bond.is_some() {
+                        return self.error("Bond without a target atom");
+                    }
+                    self.previous = None;
+                    self.position += 1;
+                },
+                b'-' | b'=' | b'#' | b':' | b'/' | b'\\' => {
+                    if self.pending_bond.is_some() {
+                        return self.error("Consecutive bond symbols");
+                    }
+                    self.pending_bond = Some(match character {
+                        b'-' => BondKind::Single,
+                        b'=' => BondKind::Double,
+                        b'#' => BondKind::Triple,
+                        b':' => BondKind::Aromatic,
+                        b'/' => BondKind::Up,
+                        _ => BondKind::Down,
+                    });
+                    self.position += 1;
+                },
+                b'$' => return self.error("Quadruple bonds are not supported"),
+                b'0'..=b'9' | b'%' => self.parse_ring_bond()?,
+                b'[' => {
+                    let atom = self.parse_bracket_atom()?;
+                    self.add_atom(atom)?;
+                },
+                _ => {
+                    let atom = self.parse_organic_atom()?;
+                    self.add_atom(atom)?;
+                },
+            }
+        }
+
+        if self.pending_bond.is_some() {
+            return self.error("Bond without a target atom");
+        }
+        if !self.branches.is_empty() {
+            return self.error("Unclosed branch");
+        }
+        if self.rings.iter().any(|ring| ring.is_some()) {
+            return self.error("Unclosed ring");
+        }
+        Ok(())
+    }
+
+    fn add_atom(&mut self, mut atom: ParsedAtom) -> Result<(), SmilesError> {
+        let id = self.atoms.len();
+
+        match self.previous {
+            Some(previous) => {
+                let kind = self.pending_bond.take().unwrap_or(BondKind::Implicit);
+                self.bonds.push(ParsedBond{ sid: previous, tid: id, kind });
+                self.atoms[previous].neighbours.push(id);
+                atom.neighbours.push(previous);
+            },
+            None => {
+                if self.pending_bond.is_some() {
+                    return self.error("Bond without a source atom");
+                }
+            }
+        }
+        if atom.hydrogens > 0 {
+            atom.neighbours.push(HYDROGEN);
+        }
+
+        self.atoms.push(atom);
+        self.previous = Some(id);
+        Ok(())
+    }
+
+    fn parse_ring_bond(&mut self) -> Result<(), SmilesError> {
+        let atom = match self.previous {
+            Some(atom) => atom,
+            None => return self.error("Ring bond without an atom"),
+        };
+
+        let number = match self.peek() {
+            Some(b'%') => {
+                let digits = self.bytes.get(self.position + 1..self.position + 3);
+                match digits {
+                    Some(&[tens, units]) if tens.is_ascii_digit() && units.is_ascii_digit() => {
+                        self.position += 3;
+                        ((tens - b'0') * 10 + (units - b'0')) as usize
+                    },
+                    _ => return self.error("Invalid ring bond number"),
+                }
+            },
+            Some(digit) => {
+                self.position += 1;
+                (digit - b'0') as usize
+            },
+            None => return self.error("Invalid ring bond number"),
+        };
+
+        let kind = self.pending_bond.take();
+        match self.rings[number].take() {
+            None => {
+                let slot = self.atoms[atom].neighbours.len();
+                self.atoms[atom].neighbours.push(atom);
+                self.rings[number] = Some(RingOpening{ atom, kind, slot });
+            },
+            Some(opening) => {
+                if opening.atom == atom {
+                    return self.error("Ring bond from an atom to itself");
+                }
+
+                let (sid, tid, kind) = match (opening.kind, kind) {
+                    (Some(opening_kind), Some(closing_kind)) => {
+                        let consistent = opening_kind == closing_kind
+                            || (opening_kind.is_directional() && closing_kind.is_directional());
+                        if !consistent {
+                            return self.error("Conflicting ring bond symbols");
+                        }
+                        (opening.atom, atom, opening_kind)
+                    },
+                    (Some(opening_kind), None) => (opening.atom, atom, opening_kind),
+                    (None, Some(closing_kind)) => (atom, opening.atom, closing_kind),
+                    (None, None) => (opening.atom, atom, BondKind::Implicit),
+                };
+
+                self.atoms[opening.atom].neighbours[opening.slot] = atom;
+                self.atoms[atom].neighbours.push(opening.atom);
+                self.bonds.push(ParsedBond{ sid, tid, kind });
+            },
+        }
+        Ok(())
+    }
+
+    fn parse_organic_atom(&mut self) -> Result<ParsedAtom, SmilesError> {
+        let next = self.bytes.get(self.position + 1).copied();
+        let (symbol, aromatic, length) = match (self.peek(), next) {
+            (Some(b'B'), Some(b'r')) => ("Br", false, 2),
+            (Some(b'C'), Some(b'l')) => ("Cl", false, 2),
+            (Some(b'B'), _) => ("B", false, 1),
+            (Some(b'C'), _) => ("C", false, 1),
+            (Some(b'N'), _) => ("N", false, 1),
+            (Some(b'O'), _) => ("O", false, 1),
+            (Some(b'P'), _) => ("P", false, 1),
+            (Some(b'S'), _) => ("S", false, 1),
+            (Some(b'F'), _) => ("F", false, 1),
+            (Some(b'I'), _) => ("I", false, 1),
+            (Some(b'b'), _) => ("B", true, 1),
+            (Some(b'c'), _) => ("C", true, 1),
+            (Some(b'n'), _) => ("N", true, 1),
+            (Some(b'o'), _) => ("O", true, 1),
+            (Some(b'p'), _) => ("P", true, 1),
+            (Some(b's'), _) => ("S", true, 1),
+            (Some(b'*'), _) => return self.error("Wildcard atoms are not supported"),
+            _ => return self.error("Unexpected character"),
+        };
+
+        let element = match element_from_symbol(symbol) {
+            Ok(element) => element,
+            Err(error_message) => return self.error(error_message),
+        };
+        self.position += length;
+        Ok(ParsedAtom::organic(element, aromatic))
+    }
+
+    fn parse_number(&mut self) -> Option<u32> {
+        let start = self.position;
+        let mut number: u32 = 0;
+        while let Some(digit) = self.peek() {
+            if !digit.is_ascii_digit() || self.position - start >= 5 {
+                break;
+            }
+            number = number * 10 + (digit - b'0') as u32;
+            self.position += 1;
+        }
+
+        if self.position == start {
+            None
+        } else {
+            Some(number)
+        }
+    }
+
+    fn parse_bracket_symbol(&mut self) -> Result<(Element, bool), SmilesError> {
+        let first = match self.peek() {
+            Some(character) => character,
+            None => return self.error("Unclosed bracket atom"),
+        };
+        let second = self.bytes.get(self.position + 1).copied();
+
+        if first.is_ascii_uppercase() {
+            if let Some(second) = second.filter(|second| second.is_ascii_lowercase()) {
+                let symbol = [first, second];
+                let symbol = std::str::from_utf8(&symbol).unwrap_or("");
+                if let Ok(element) = element_from_symbol(symbol) {
+                    self.position += 2;
+                    return Ok((element, false));
+                }
+            }
+            let symbol = [first];
+            let symbol = std::str::from_utf8(&symbol).unwrap_or("");
+            match element_from_symbol(symbol) {
+                Ok(element) => {
+                    self.position += 1;
+                    Ok((element, false))
+                },
+                Err(error_message) => self.error(error_message),
+            }
+        } else {
+            let (symbol, length) = match (first, second) {
+                (b's', Some(b'e')) => ("Se", 2),
+                (b'a', Some(b's')) => ("As", 2),
+                (b't', Some(b'e')) => ("Te", 2),
+                (b'b', _) => ("B", 1),
+                (b'c', _) => ("C", 1),
+                (b'n', _) => ("N", 1),
+                (b'o', _) => ("O", 1),
+                (b'p', _) => ("P", 1),
+                (b's', _) => ("S", 1),
+                (b'*', _) => return self.error("Wildcard atoms are not supported"),
+                _ => return self.error("Not an element symbol."),
+            };
+            match element_from_symbol(symbol) {
+                Ok(element) => {
+                    self.position += length;
+                    Ok((element, true))
+                },
+                Err(error_message) => self.error(error_message),
+            }
+        }
+    }
+
+    fn parse_bracket_atom(&mut self) -> Result<ParsedAtom, SmilesError> {
+        self.position += 1;
+
+        let isotope = match self.parse_number() {
+            Some(isotope) if isotope > u16::MAX as u32 => return self.error("Isotope too large"),
+            Some(isotope) => Some(isotope as u16),
+            None => None,
+        };
+        let (element, aromatic) = self.parse_bracket_symbol()?;
+        let mut atom = ParsedAtom::organic(element, aromatic);
+        atom.bracket = true;
+        atom.isotope = isotope;
+
+        if self.peek() == Some(b'@') {
+            self.position += 1;
+            let bytes = self.bytes;
+            let rest = &bytes[self.position..];
+            atom.clockwise = if rest.starts_with(b"@") {
+                self.position += 1;
+                Some(true)
+            } else if rest.starts_with(b"TH1") {
+                self.position += 3;
+                Some(false)
+            } else if rest.starts_with(b"TH2") {
+                self.position += 3;
+                Some(true)
+            } else if [b"AL", b"SP", b"TB", b"OH"].iter().any(|class| rest.starts_with(*class)) {
+                self.position += 2;
+                self.parse_number();
+                None
+            } else {
+                Some(false)
+            };
+        }
+
+        if self.peek() == Some(b'H') {
+            self.position += 1;
+            atom.hydrogens = match self.parse_number() {
+                Some(hydrogens) if hydrogens > 9 => return self.error("Too many hydrogens"),
+                Some(hydrogens) => hydrogens as u8,
+                None => 1,
+            };
+        }
+
+        if let Some(sign) = self.peek().filter(|sign| *sign == b'+' || *sign == b'-') {
+            self.position += 1;
+            let magnitude = match self.parse_number() {
+                Some(magnitude) => magnitude,
+                None => {
+                    let mut magnitude = 1;
+                    while self.peek() == Some(sign) {
+                        magnitude += 1;
+                        self.position += 1;
+                    }
+                    magnitude
+                }
+            };
+            if magnitude > 15 {
+                return self.error("Charge too large");
+            }
+            atom.charge = if sign == b'+' { magnitude as i8 } else { -(magnitude as i8) };
+        }
+
+        if self.peek() == Some(b':') {
+            self.position += 1;
+            if self.parse_number().is_none() {
+                return self.error("Invalid atom class");
+            }
+        }
+
+        if self.peek() != Some(b']') {
+            return self.error("Unclosed bracket atom");
+        }
+        self.position += 1;
+        Ok(atom)
+    }
+}
+
+fn kekulize_search(
+    adjacency: &[Vec<(usize, usize)>],
+    needs_double: &[bool],
+    mates: &mut Vec<Option<usize>>,
+    steps: &mut usize
+) -> bool {
+    *steps += 1;
+    if *steps > MAX_KEKULE_STEPS {
+        return false;
+    }
+
+    let mut chosen = None;
+    let mut fewest = usize::MAX;
+    for atom in 0..adjacency.len() {
+        if !needs_double[atom] || mates[atom].is_some() {
+            continue;
+        }
+        let available = adjacency[atom].iter()
+            .filter(|(neighbour, _)| mates[*neighbour].is_none())
+            .count();
+        if available < fewest {
+            chosen = Some(atom);
+            fewest = available;
+            if available <= 1 {
+                break;
+            }
+        }
+    }
+
+    let atom = match chosen {
+        Some(atom) => atom,
+        None => return true,
+    };
+
+    for &(neighbour, bond) in &adjacency[atom] {
+        if mates[neighbour].is_some() {
+            continue;
+        }
+        mates[atom] = Some(bond);
+        mates[neighbour] = Some(bond);
+        if kekulize_search(adjacency, needs_double, mates, steps) {
+            return true;
+        }
+        mates[atom] = None;
+        mates[neighbour] = None;
+    }
+    false
+}
+
+fn kekulize(atoms: &[ParsedAtom], bonds: &[ParsedBond], aromatic: &[bool], orders: &mut [u8]) -> bool {
+    let mut order_sums = vec![0u16; atoms.len()];
+    for (bond, order) in bonds.iter().zip(orders.iter()) {
+        order_sums[bond.sid] += u16::from(*order);
+        order_sums[bond.tid] += u16::from(*order);
+    }
+
+    let needs_double: Vec<bool> = atoms.iter()
+        .zip(order_sums.iter())
+        .map(|(atom, order_sum)| {
+            if !atom.aromatic {
+                return false;
+            }
+            let atomic_number = atom.element.atomic_number() as i16 - atom.charge as i16;
+            let bonded = order_sum + u16::from(atom.hydrogens);
+            match implicit_hydrogens(atomic_number, bonded) {
+                Some(free_valence) => free_valence > 0,
+                None => false,
+            }
+        })
+        .collect();
+
+    let pairs: Vec<(usize, usize)> = bonds.iter().map(|bond| (bond.sid, bond.tid)).collect();
+    assign_double_bonds(&needs_double, &pairs, aromatic, orders)
+}
+
+/// Make one aromatic bond double at each atom which `needs_double`,
+/// returning false if that's impossible. `bonds` are pairs of atom
+/// indices.
+pub fn assign_double_bonds(
+    needs_double: &[bool],
+    bonds: &[(usize, usize)],
+    aromatic: &[bool],
+    orders: &mut [u8]
+) -> bool {
+    let mut adjacency = vec![Vec::new(); needs_double.len()];
+    for (index, &(sid, tid)) in bonds.iter().enumerate() {
+        if aromatic[index] && needs_double[sid] && needs_double[tid] {
+            adjacency[sid].push((tid, index));
+            adjacency[tid].push((sid, index));
+        }
+    }
+
+    let mut mates = vec![None; needs_double.len()];
+    let mut steps = 0;
+    if !kekulize_search(&adjacency, needs_double, &mut mates, &mut steps) {
+        return false;
+    }
+    for bond in mates.into_iter().filter_map(|bond| bond) {
+        orders[bond] = 2;
+    }
+    true
+}
+
+pub fn permutation_is_odd(values: &[usize]) -> bool {
+    let mut inversions = 0;
+    for (index, value) in values.iter().enumerate() {
+        inversions += values[index + 1..].iter().filter(|other| *other < value).count();
+    }
+    inversions % 2 == 1
+}
+
+fn atom_parity(atom: &ParsedAtom) -> Option<Parity> {
+    let clockwise = atom.clockwise?;
+    let ranks: Vec<usize> = atom.neighbours.iter()
+        .map(|neighbour| if *neighbour == HYDROGEN { 0 } else { neighbour + 1 })
+        .collect();
+
+    match clockwise != permutation_is_odd(&ranks) {
+        true => Some(Parity::Positive),
+        false => Some(Parity::Negative),
+    }
+}
+
+fn outward_direction(bond: &ParsedBond, atom: usize) -> bool {
+    let up = bond.kind == BondKind::Up;
+    if bond.sid == atom { up } else { !up }
+}
+
+fn bond_parity(
+    atoms: &[ParsedAtom],
+    bonds: &[ParsedBond],
+    incident: &[Vec<usize>],
+    index: usize
+) -> Option<Parity> {
+    let bond = &bonds[index];
+    let mut directions = [false; 2];
+    let mut reversed = false;
+
+    for (side, (atom, partner)) in [(bond.sid, bond.tid), (bond.tid, bond.sid)].iter().enumerate() {
+        let marked = incident[*atom].iter()
+            .map(|other| &bonds[*other])
+            .find(|other| other.kind.is_directional())?;
+        let substituent = if marked.sid == *atom { marked.tid } else { marked.sid };
+        let lowest = atoms[*atom].neighbours.iter()
+            .filter(|neighbour| **neighbour != HYDROGEN && *neighbour != partner)
+            .min()?;
+
+        directions[side] = outward_direction(marked, *atom);
+        if substituent != *lowest {
+            reversed = !reversed;
+        }
+    }
+
+    match (directions[0] == directions[1]) != reversed {
+        true => Some(Parity::Positive),
+        false => Some(Parity::Negative),
+    }
+}
+
+pub fn parse(smiles: &str) -> Result<Molecule, SmilesError> {
+    let (molecule, _) = parse_with_aromatic_bonds(smiles)?;
+    Ok(molecule)
+}
+
+/// Parse a SMILES string, also returning whether each bond was aromatic
+/// before kekulization.
+pub fn parse_with_aromatic_bonds(smiles: &str) -> Result<(Molecule, Vec<bool>), SmilesError> {
+    let mut parser = Parser::new(smiles);
+    parser.parse()?;
+    let Parser{ atoms, bonds, .. } = parser;
+
+    let aromatic: Vec<bool> = bonds.iter()
+        .map(|bond| {
+            match bond.kind {
+                BondKind::Aromatic => true,
+                BondKind::Implicit => atoms[bond.sid].aromatic && atoms[bond.tid].aromatic,
+                _ => false,
+            }
+        })
+        .collect();
+    let mut orders: Vec<u8> = bonds.iter()
+        .map(|bond| {
+            match bond.kind {
+                BondKind::Double => 2,
+                BondKind::Triple => 3,
+                _ => 1,
+            }
+        })
+        .collect();
+
+    if !kekulize(&atoms, &bonds, &aromatic, &mut orders) {
+        return Err(SmilesError{ position: smiles.len(), message: "Can't kekulize aromatic system" });
+    }
+
+    let mut order_sums = vec![0u16; atoms.len()];
+    let mut incident = vec![Vec::new(); atoms.len()];
+    for (index, (bond, order)) in bonds.iter().zip(orders.iter()).enumerate() {
+        order_sums[bond.sid] += u16::from(*order);
+        order_sums[bond.tid] += u16::from(*order);
+        incident[bond.sid].push(index);
+        incident[bond.tid].push(index);
+    }
+
+    let spec_atoms = atoms.iter()
+        .zip(order_sums.iter())
+        .map(|(atom, order_sum)| {
+            let hydrogens = match atom.bracket {
+                true => atom.hydrogens,
+                false => {
+                    let atomic_number = atom.element.atomic_number() as i16;
+                    implicit_hydrogens(atomic_number, *order_sum).unwrap_or(0)
+                },
+            };
+            Atom {
+                element: atom.element,
+                hydrogens,
+                ion: atom.charge,
+                isotope: atom.isotope,
+                parity: atom_parity(atom),
+            }
+        })
+        .collect();
+
+    let spec_bonds = bonds.iter()
+        .zip(orders.iter())
+        .enumerate()
+        .map(|(index, (bond, order))| {
+            let (order, parity) = match order {
+                2 if !aromatic[index] => (BondOrder::Double, bond_parity(&atoms, &bonds, &incident, index)),
+                2 => (BondOrder::Double, None),
+                3 => (BondOrder::Triple, None),
+                _ => (BondOrder::Single, None),
+            };
+            Bond{ sid: bond.sid, tid: bond.tid, order, parity }
+        })
+        .collect();
+
+    Ok((Molecule{ atoms: spec_atoms, bonds: spec_bonds }, aromatic))
+}
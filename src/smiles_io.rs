@@ -0,0 +1,337 @@
+use std::collections::VecDeque;
+use std::io::{self,BufRead,Write};
+use std::mem;
+use std::sync::Arc;
+use std::sync::mpsc::{self,Receiver,SyncSender};
+use std::thread;
+
+use pyo3::prelude::*;
+use pyo3::class::PyIterProtocol;
+use pyo3::exceptions;
+use pyo3::types::PyType;
+use rayon::ThreadPool;
+use rayon::prelude::*;
+
+use chemcore::molecule::spec::Molecule;
+
+use crate::default_molecule::PyDefaultMolecule;
+use crate::exceptions::*;
+use crate::files::{Output,open_reader};
+use crate::parallel::{install,thread_pool};
+use crate::smiles::parse;
+use crate::smiles_writer;
+
+const CHUNK_SIZE: usize = 10_000;
+const WRITE_BATCH_SIZE: usize = 1_000;
+const QUEUED_BATCHES: usize = 8;
+
+type WriteBatch = Vec<(Molecule, String)>;
+
+struct Record {
+    line_number: usize,
+    name: String,
+    result: Result<PyDefaultMolecule, String>,
+}
+
+fn build_record(line_number: usize, line: &str) -> Record {
+    let mut fields = line.trim().splitn(2, char::is_whitespace);
+    let smiles = fields.next().unwrap_or("");
+    let name = fields.next().unwrap_or("").trim().to_string();
+
+    let result = match parse(smiles) {
+        Ok(molecule) => {
+            PyDefaultMolecule::build(molecule)
+                .map_err(|error_type| error_message(error_type).to_string())
+        },
+        Err(smiles_error) => Err(smiles_error.to_string()),
+    };
+    Record{ line_number, name, result }
+}
+
+fn read_records(
+    lines: &mut (dyn BufRead + Send),
+    line_number: &mut usize,
+    n_records: usize
+) -> io::Result<Vec<Record>> {
+    let mut chunk = Vec::with_capacity(n_records);
+    let mut line = String::new();
+
+    while chunk.len() < n_records {
+        line.clear();
+        if lines.read_line(&mut line)? == 0 {
+            break;
+        }
+        *line_number += 1;
+        if !line.trim().is_empty() {
+            chunk.push((*line_number, line.clone()));
+        }
+    }
+
+    Ok(chunk.par_iter().map(|(line_number, line)| build_record(*line_number, line)).collect())
+}
+
+#[pyclass]
+pub struct PySmilesReader {
+    lines: Box<dyn BufRead + Send>,
+    line_number: usize,
+    batch_size: Option<usize>,
+    names: bool,
+    skip_invalid: bool,
+    pool: Option<Arc<ThreadPool>>,
+    pending: VecDeque<Record>,
+    exhausted: bool,
+}
+
+impl PySmilesReader {
+    fn fill(&mut self, py: Python) -> PyResult<()> {
+        if !self.pending.is_empty() || self.exhausted {
+            return Ok(());
+        }
+
+        let n_records = self.batch_size.unwrap_or(CHUNK_SIZE);
+        let lines = &mut self.lines;
+        let line_number = &mut self.line_number;
+        let pool = self.pool.as_deref();
+        let records = py.allow_threads(move || {
+            install(pool, || read_records(lines.as_mut(), line_number, n_records))
+        })?;
+
+        self.exhausted = records.len() < n_records;
+        self.pending.extend(records);
+        Ok(())
+    }
+
+    fn next_molecule(&mut self, py: Python) -> PyResult<Option<PyObject>> {
+        loop {
+            self.fill(py)?;
+            let record = match self.pending.pop_front() {
+                Some(record) => record,
+                None => return Ok(None),
+            };
+
+            match record.result {
+                Ok(molecule) => {
+                    let molecule = Py::new(py, molecule)?;
+                    let item = match self.names {
+                        true => (molecule, record.name).to_object(py),
+                        false => molecule.to_object(py),
+                    };
+                    return Ok(Some(item));
+                },
+                Err(message) => {
+                    if !self.skip_invalid {
+                        let message = format!("Line {}: {}", record.line_number, message);
+                        return Err(exceptions::ValueError::py_err(message));
+                    }
+                },
+            }
+        }
+    }
+}
+
+#[pyproto]
+impl PyIterProtocol for PySmilesReader {
+    fn __iter__(slf: PyRef<Self>) -> PyResult<Py<PySmilesReader>> {
+        Ok(slf.into())
+    }
+
+    fn __next__(mut slf: PyRefMut<Self>) -> PyResult<Option<PyObject>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let reader = &mut *slf;
+
+        let batch_size = match reader.batch_size {
+            Some(batch_size) => batch_size,
+            None => return reader.next_molecule(py),
+        };
+
+        let mut batch = Vec::with_capacity(batch_size);
+        while batch.len() < batch_size {
+            match reader.next_molecule(py)? {
+                Some(item) => batch.push(item),
+                None => break,
+            }
+        }
+
+        match batch.is_empty() {
+            true => Ok(None),
+            false => Ok(Some(batch.to_object(py))),
+        }
+    }
+}
+
+#[pyfunction(batch_size = "None", names = "false", skip_invalid = "false", threads = "None")]
+pub fn read_smiles(
+    path: &str,
+    batch_size: Option<usize>,
+    names: bool,
+    skip_invalid: bool,
+    threads: Option<usize>
+) -> PyResult<Py<PySmilesReader>> {
+    let gil = Python::acquire_gil();
+    let py = gil.python();
+
+    if batch_size == Some(0) {
+        return Err(get_ValueError("The batch size must be positive."));
+    }
+
+    let reader = PySmilesReader {
+        lines: open_reader(path)?,
+        line_number: 0,
+        batch_size,
+        names,
+        skip_invalid,
+        pool: thread_pool(threads)?,
+        pending: VecDeque::new(),
+        exhausted: false,
+    };
+    Py::new(py, reader)
+}
+
+enum WriteError {
+    Io(io::Error),
+    Record(usize, &'static str),
+}
+
+impl From<io::Error> for WriteError {
+    fn from(io_error: io::Error) -> Self {
+        WriteError::Io(io_error)
+    }
+}
+
+fn write_batches(
+    receiver: Receiver<WriteBatch>,
+    mut output: Output,
+    canonical: bool,
+    pool: Option<Arc<ThreadPool>>
+) -> Result<usize, WriteError> {
+    let mut n_written = 0;
+
+    for batch in receiver {
+        let lines: Vec<Result<String, &'static str>> = install(pool.as_deref(), || {
+            batch.par_iter()
+                .map(|(molecule, name)| {
+                    let smiles = smiles_writer::write(molecule, canonical)?;
+                    match name.is_empty() {
+                        true => Ok(smiles),
+                        false => Ok(format!("{} {}", smiles, name)),
+                    }
+                })
+                .collect()
+        });
+
+        for line in lines {
+            match line {
+                Ok(line) => {
+                    output.write_all(line.as_bytes())?;
+                    output.write_all(b"\n")?;
+                },
+                Err(error_message) => return Err(WriteError::Record(n_written, error_message)),
+            }
+            n_written += 1;
+        }
+    }
+
+    output.finish()?;
+    Ok(n_written)
+}
+
+fn send_molecules(py: Python, molecules: &PyAny, sender: &SyncSender<WriteBatch>) -> PyResult<()> {
+    let mut batch = Vec::with_capacity(WRITE_BATCH_SIZE);
+
+    for item in molecules.iter()? {
+        let item = item?;
+        let (molecule, name) = match item.extract::<PyRef<PyDefaultMolecule>>() {
+            Ok(molecule) => (molecule, String::new()),
+            Err(_) => item.extract::<(PyRef<PyDefaultMolecule>, String)>()?,
+        };
+        batch.push((molecule.to_spec(), name));
+
+        if batch.len() == WRITE_BATCH_SIZE {
+            let full_batch = mem::replace(&mut batch, Vec::with_capacity(WRITE_BATCH_SIZE));
+            // The writer only hangs up after an error, which is raised
+            // once it has been joined.
+            if py.allow_threads(|| sender.send(full_batch)).is_err() {
+                return Ok(());
+            }
+        }
+    }
+
+    if !batch.is_empty() {
+        py.allow_threads(|| sender.send(batch)).ok();
+    }
+    Ok(())
+}
+
+#[pyfunction(compress = "None", canonical = "true", threads = "None")]
+pub fn write_smiles(
+    molecules: &PyAny,
+    path: &str,
+    compress: Option<bool>,
+    canonical: bool,
+    threads: Option<usize>
+) -> PyResult<usize> {
+    let py = molecules.py();
+    let compress = compress.unwrap_or_else(|| path.ends_with(".gz"));
+    let pool = thread_pool(threads)?;
+    let output = Output::create(path, compress)?;
+
+    let (sender, receiver) = mpsc::sync_channel(QUEUED_BATCHES);
+    let writer = thread::spawn(move || write_batches(receiver, output, canonical, pool));
+    let sent = send_molecules(py, molecules, &sender);
+    drop(sender);
+
+    let written = py.allow_threads(|| writer.join());
+    sent?;
+    match written {
+        Ok(Ok(n_written)) => Ok(n_written),
+        Ok(Err(WriteError::Io(io_error))) => Err(io_error.into()),
+        Ok(Err(WriteError::Record(index, error_message))) => {
+            let message = format!("Record {}: {}", index, error_message);
+            Err(exceptions::ValueError::py_err(message))
+        },
+        Err(panic) => Err(generic_exception(panic)),
+    }
+}
+
+#[pymethods]
+impl PyDefaultMolecule {
+    /// Create a molecule from a SMILES string. Aromatic systems are
+    /// kekulized, and stereochemistry is stored as described in
+    /// ``oxmol.smiles``.
+    ///
+    /// :param smiles: the SMILES string
+    /// :return: the molecule
+    #[classmethod]
+    fn from_smiles(_cls: &PyType, smiles: &str) -> PyResult<Self> {
+        let molecule = match parse(smiles) {
+            Ok(molecule) => molecule,
+            Err(smiles_error) => return Err(exceptions::ValueError::py_err(smiles_error.to_string()))
+        };
+
+        match PyDefaultMolecule::build(molecule) {
+            Ok(molecule) => Ok(molecule),
+            Err(error_type) => Err(exception_from_error(error_type))
+        }
+    }
+
+    /// Write the molecule as (Kekulé) SMILES. Stereochemistry is
+    /// written with the conventions described in ``oxmol.smiles``.
+    ///
+    /// :param canonical: if ``True``, the atoms are written in an order
+    ///     which depends only on the molecule's structure, so the same
+    ///     molecule always gives the same SMILES however its atoms were
+    ///     numbered. Otherwise, they are written in index order
+    /// :return: the SMILES string
+    /// :raises ValueError: if the molecule has zero-order bonds, or
+    ///     more than 99 rings open at once
+    #[args(canonical = "true")]
+    fn to_smiles(&self, canonical: bool) -> PyResult<String> {
+        let molecule = self.to_spec();
+
+        match smiles_writer::write(&molecule, canonical) {
+            Ok(smiles) => Ok(smiles),
+            Err(error_message) => Err(get_ValueError(error_message))
+        }
+    }
+}
@@ -0,0 +1,451 @@
+use std::cmp::Reverse;
+use std::collections::VecDeque;
+use std::fmt::Write;
+
+use chemcore::molecule::{BondOrder,Element,Parity};
+use chemcore::molecule::spec::Molecule;
+
+use crate::canonical::{adjacency,aromatic_bonds,bond_order_value,canonical_kekule,canonical_ranks};
+use crate::smiles::implicit_hydrogens;
+
+const HYDROGEN: usize = usize::MAX;
+
+/// The highest ring bond number SMILES can write (as `%99`).
+const MAX_RING_NUMBER: usize = 99;
+
+fn is_organic(element: Element) -> bool {
+    match element.atomic_number() {
+        5 | 6 | 7 | 8 | 9 | 15 | 16 | 17 | 35 | 53 => true,
+        _ => false,
+    }
+}
+
+fn permutation_is_odd(values: &[usize]) -> bool {
+    let mut inversions = 0;
+    for (index, value) in values.iter().enumerate() {
+        inversions += values[index + 1..].iter().filter(|other| *other < value).count();
+    }
+    inversions % 2 == 1
+}
+
+/// The order the atoms are written in, found by a depth-first search
+/// which visits neighbours in rank order. Bonds which close rings are
+/// written as ring bond numbers at both of their atoms.
+struct Traversal {
+    order: Vec<usize>,
+    position: Vec<usize>,
+    parent: Vec<Option<usize>>,
+    parent_bond: Vec<usize>,
+    children: Vec<Vec<usize>>,
+    ring_bonds: Vec<Vec<usize>>,
+    is_ring_bond: Vec<bool>,
+}
+
+impl Traversal {
+    fn new(molecule: &Molecule, adjacency: &[Vec<(usize, usize)>], ranks: &[usize]) -> Self {
+        let n_atoms = molecule.atoms.len();
+        let mut traversal = Traversal {
+            order: Vec::with_capacity(n_atoms),
+            position: vec![usize::MAX; n_atoms],
+            parent: vec![None; n_atoms],
+            parent_bond: vec![usize::MAX; n_atoms],
+            children: vec![Vec::new(); n_atoms],
+            ring_bonds: vec![Vec::new(); n_atoms],
+            is_ring_bond: vec![false; molecule.bonds.len()],
+        };
+
+        // Following multiple bonds first keeps them out of ring closures
+        // and puts them in branches, as in C1=CC=CC=C1 and CC(=O)O.
+        let mut sorted_adjacency: Vec<Vec<(usize, usize)>> = adjacency.to_vec();
+        for neighbours in sorted_adjacency.iter_mut() {
+            neighbours.sort_by_key(|(neighbour, bond)| {
+                (Reverse(bond_order_value(molecule.bonds[*bond].order)), ranks[*neighbour])
+            });
+        }
+
+        let mut roots: Vec<usize> = (0..n_atoms).collect();
+        roots.sort_by_key(|atom| ranks[*atom]);
+        let mut stack: Vec<(usize, usize)> = Vec::new();
+
+        for root in roots {
+            if traversal.position[root] != usize::MAX {
+                continue;
+            }
+            traversal.visit(root);
+            stack.push((root, 0));
+
+            while let Some((atom, next)) = stack.pop() {
+                let (neighbour, bond) = match sorted_adjacency[atom].get(next) {
+                    Some(edge) => *edge,
+                    None => continue,
+                };
+                stack.push((atom, next + 1));
+
+                if bond == traversal.parent_bond[atom] || traversal.is_ring_bond[bond] {
+                    continue;
+                }
+                if traversal.position[neighbour] == usize::MAX {
+                    traversal.visit(neighbour);
+                    traversal.parent[neighbour] = Some(atom);
+                    traversal.children[atom].push(neighbour);
+                    traversal.parent_bond[neighbour] = bond;
+                    stack.push((neighbour, 0));
+                } else {
+                    traversal.is_ring_bond[bond] = true;
+                    traversal.ring_bonds[neighbour].push(bond);
+                    traversal.ring_bonds[atom].push(bond);
+                }
+            }
+        }
+
+        // At each atom, ring bonds which close come before those which
+        // open, and the latter are numbered in the order they close.
+        for atom in 0..n_atoms {
+            let position = &traversal.position;
+            let other = |bond: &usize| {
+                let bond = &molecule.bonds[*bond];
+                if bond.sid == atom { bond.tid } else { bond.sid }
+            };
+            traversal.ring_bonds[atom].sort_by_key(|bond| {
+                let partner = other(bond);
+                (position[partner] > position[atom], position[partner])
+            });
+        }
+        traversal
+    }
+
+    fn visit(&mut self, atom: usize) {
+        self.position[atom] = self.order.len();
+        self.order.push(atom);
+    }
+
+    fn other(molecule: &Molecule, bond: usize, atom: usize) -> usize {
+        let bond = &molecule.bonds[bond];
+        if bond.sid == atom { bond.tid } else { bond.sid }
+    }
+
+    /// The neighbours of an atom in the order they appear in the SMILES,
+    /// with any virtual hydrogens where a bracket atom's hydrogens go.
+    fn written_neighbours(&self, molecule: &Molecule, atom: usize) -> Vec<usize> {
+        let mut neighbours = Vec::with_capacity(4);
+        if let Some(parent) = self.parent[atom] {
+            neighbours.push(parent);
+        }
+        if molecule.atoms[atom].hydrogens > 0 {
+            neighbours.push(HYDROGEN);
+        }
+        for bond in &self.ring_bonds[atom] {
+            neighbours.push(Self::other(molecule, *bond, atom));
+        }
+        neighbours.extend(&self.children[atom]);
+        neighbours
+    }
+}
+
+/// Choose '/' or '\' for the single bonds next to each stereo double
+/// bond. The direction of every marked bond is a variable, and each
+/// double bond's parity constrains pairs of these to be the same or
+/// opposite; the constraints are satisfied by propagating from the first
+/// bond written in each connected set of marked bonds.
+fn bond_directions(
+    molecule: &Molecule,
+    adjacency: &[Vec<(usize, usize)>],
+    traversal: &Traversal
+) -> Vec<Option<bool>> {
+    let n_bonds = molecule.bonds.len();
+    let position = &traversal.position;
+    let mut constraints: Vec<Vec<(usize, bool)>> = vec![Vec::new(); n_bonds];
+    let mut marked = vec![false; n_bonds];
+
+    // Whether the marked bond's written direction points away from `atom`
+    // in the same sense as its symbol.
+    let written_from = |bond: usize, atom: usize| {
+        let other = Traversal::other(molecule, bond, atom);
+        position[atom] < position[other]
+    };
+
+    for bond in &molecule.bonds {
+        let parity = match (bond.order, bond.parity) {
+            (BondOrder::Double, Some(parity)) => parity,
+            _ => continue,
+        };
+
+        let mut ends = Vec::with_capacity(2);
+        for (atom, partner) in [(bond.sid, bond.tid), (bond.tid, bond.sid)].iter() {
+            let lowest = adjacency[*atom].iter()
+                .map(|(neighbour, _)| *neighbour)
+                .filter(|neighbour| neighbour != partner)
+                .min();
+            let substituents: Vec<(usize, usize)> = adjacency[*atom].iter()
+                .filter(|(neighbour, bond)| {
+                    neighbour != partner && molecule.bonds[*bond].order == BondOrder::Single
+                })
+                .copied()
+                .collect();
+            if let (Some(lowest), false) = (lowest, substituents.is_empty()) {
+                ends.push((*atom, lowest, substituents));
+            }
+        }
+        if ends.len() != 2 {
+            continue;
+        }
+
+        for (atom, _, substituents) in &ends {
+            for pair in substituents.windows(2) {
+                let (first, second) = (pair[0].1, pair[1].1);
+                let same_symbol = written_from(first, *atom) != written_from(second, *atom);
+                constraints[first].push((second, same_symbol));
+                constraints[second].push((first, same_symbol));
+            }
+            for (_, bond) in substituents {
+                marked[*bond] = true;
+            }
+        }
+
+        let (first_atom, first_lowest, first_substituents) = &ends[0];
+        let (second_atom, second_lowest, second_substituents) = &ends[1];
+        let (first_neighbour, first_bond) = first_substituents[0];
+        let (second_neighbour, second_bond) = second_substituents[0];
+
+        let reversed = (first_neighbour != *first_lowest) != (second_neighbour != *second_lowest);
+        let syn = (parity == Parity::Positive) != reversed;
+        let same_symbol = syn
+            != (written_from(first_bond, *first_atom) != written_from(second_bond, *second_atom));
+        constraints[first_bond].push((second_bond, same_symbol));
+        constraints[second_bond].push((first_bond, same_symbol));
+    }
+
+    let mut marked_bonds: Vec<usize> = (0..n_bonds).filter(|bond| marked[*bond]).collect();
+    marked_bonds.sort_by_key(|bond| {
+        let bond = &molecule.bonds[*bond];
+        (position[bond.sid].max(position[bond.tid]), position[bond.sid].min(position[bond.tid]))
+    });
+
+    let mut directions: Vec<Option<bool>> = vec![None; n_bonds];
+    let mut queue = VecDeque::new();
+    for start in marked_bonds {
+        if directions[start].is_some() {
+            continue;
+        }
+        directions[start] = Some(true);
+        queue.push_back(start);
+
+        while let Some(bond) = queue.pop_front() {
+            let direction = directions[bond].unwrap();
+            for (other, same) in &constraints[bond] {
+                if directions[*other].is_none() {
+                    directions[*other] = Some(direction == *same);
+                    queue.push_back(*other);
+                }
+            }
+        }
+    }
+    directions
+}
+
+struct Writer<'a> {
+    molecule: &'a Molecule,
+    traversal: Traversal,
+    directions: Vec<Option<bool>>,
+    order_sums: Vec<u16>,
+    ring_numbers: Vec<Option<usize>>,
+    free_numbers: Vec<bool>,
+    output: String,
+}
+
+impl<'a> Writer<'a> {
+    fn write_bond(&mut self, bond: usize) {
+        let symbol = match (self.directions[bond], self.molecule.bonds[bond].order) {
+            (Some(true), _) => "/",
+            (Some(false), _) => "\\",
+            (None, BondOrder::Double) => "=",
+            (None, BondOrder::Triple) => "#",
+            (None, _) => "",
+        };
+        self.output.push_str(symbol);
+    }
+
+    fn write_atom(&mut self, atom: usize) {
+        let spec = &self.molecule.atoms[atom];
+        let atomic_number = spec.element.atomic_number() as i16;
+        let organic = is_organic(spec.element)
+            && spec.isotope.is_none()
+            && spec.ion == 0
+            && spec.parity.is_none()
+            && implicit_hydrogens(atomic_number, self.order_sums[atom]).unwrap_or(0) == spec.hydrogens;
+
+        if organic {
+            write!(self.output, "{:?}", spec.element).unwrap();
+            return;
+        }
+
+        self.output.push('[');
+        if let Some(isotope) = spec.isotope {
+            write!(self.output, "{}", isotope).unwrap();
+        }
+        write!(self.output, "{:?}", spec.element).unwrap();
+
+        if let Some(parity) = spec.parity {
+            let neighbours = self.traversal.written_neighbours(self.molecule, atom);
+            let ranks: Vec<usize> = neighbours.iter()
+                .map(|neighbour| if *neighbour == HYDROGEN { 0 } else { neighbour + 1 })
+                .collect();
+            let clockwise = (parity == Parity::Positive) != permutation_is_odd(&ranks);
+            self.output.push_str(if clockwise { "@@" } else { "@" });
+        }
+
+        match spec.hydrogens {
+            0 => (),
+            1 => self.output.push('H'),
+            hydrogens => write!(self.output, "H{}", hydrogens).unwrap(),
+        }
+        match spec.ion {
+            0 => (),
+            1 => self.output.push('+'),
+            -1 => self.output.push('-'),
+            charge => write!(self.output, "{:+}", charge).unwrap(),
+        }
+        self.output.push(']');
+    }
+
+    fn write_ring_number(&mut self, number: usize) {
+        match number {
+            0..=9 => write!(self.output, "{}", number).unwrap(),
+            _ => write!(self.output, "%{}", number).unwrap(),
+        }
+    }
+
+    fn write_ring_bonds(&mut self, atom: usize) -> Result<(), &'static str> {
+        let mut closed = Vec::new();
+        let ring_bonds = self.traversal.ring_bonds[atom].clone();
+
+        for bond in ring_bonds {
+            match self.ring_numbers[bond] {
+                Some(number) => {
+                    self.write_ring_number(number);
+                    closed.push(number);
+                },
+                None => {
+                    // The lowest free number is reused, so only molecules
+                    // with more than 99 rings open at once can run out.
+                    let number = match self.free_numbers.iter().position(|free| *free) {
+                        Some(number) => number,
+                        None if self.free_numbers.len() <= MAX_RING_NUMBER => {
+                            self.free_numbers.push(true);
+                            self.free_numbers.len() - 1
+                        },
+                        None => return Err("SMILES can't have more than 99 rings open at once"),
+                    };
+                    self.free_numbers[number] = false;
+                    self.ring_numbers[bond] = Some(number);
+                    self.write_bond(bond);
+                    self.write_ring_number(number);
+                },
+            }
+        }
+        for number in closed {
+            self.free_numbers[number] = true;
+        }
+        Ok(())
+    }
+
+    fn write_component(&mut self, root: usize) -> Result<(), &'static str> {
+        let mut steps = vec![Step::Atom(root, None)];
+
+        while let Some(step) = steps.pop() {
+            let (atom, bond) = match step {
+                Step::Open => {
+                    self.output.push('(');
+                    continue;
+                },
+                Step::Close => {
+                    self.output.push(')');
+                    continue;
+                },
+                Step::Atom(atom, bond) => (atom, bond),
+            };
+
+            if let Some(bond) = bond {
+                self.write_bond(bond);
+            }
+            self.write_atom(atom);
+            self.write_ring_bonds(atom)?;
+
+            // Every child but the last is written as a branch.
+            let children = &self.traversal.children[atom];
+            let parent_bond = &self.traversal.parent_bond;
+            for (index, child) in children.iter().enumerate().rev() {
+                let is_branch = index + 1 < children.len();
+                if is_branch {
+                    steps.push(Step::Close);
+                }
+                steps.push(Step::Atom(*child, Some(parent_bond[*child])));
+                if is_branch {
+                    steps.push(Step::Open);
+                }
+            }
+        }
+        Ok(())
+    }
+}
+
+enum Step {
+    Atom(usize, Option<usize>),
+    Open,
+    Close,
+}
+
+/// Write a molecule as Kekulé SMILES. If `canonical` is set, the atoms
+/// are written in an order which depends only on the structure of the
+/// molecule (see `canonical_ranks`), and aromatic rings' double bonds
+/// are placed by those ranks (see `canonical_kekule`), so equal
+/// molecules give equal strings; otherwise, they are written in index
+/// order, as given.
+pub fn write(molecule: &Molecule, canonical: bool) -> Result<String, &'static str> {
+    if molecule.bonds.iter().any(|bond| bond.order == BondOrder::Zero) {
+        return Err("Zero-order bonds can't be written as SMILES");
+    }
+
+    let kekule;
+    let (molecule, ranks) = match canonical {
+        true => {
+            let aromatic = aromatic_bonds(molecule);
+            let ranks = canonical_ranks(molecule, &aromatic);
+            kekule = canonical_kekule(molecule, &aromatic, &ranks);
+            (&kekule, ranks)
+        },
+        false => (molecule, (0..molecule.atoms.len()).collect()),
+    };
+    let adjacency = adjacency(molecule);
+    let traversal = Traversal::new(molecule, &adjacency, &ranks);
+    let directions = bond_directions(molecule, &adjacency, &traversal);
+    let order_sums = adjacency.iter()
+        .map(|neighbours| {
+            neighbours.iter()
+                .map(|(_, bond)| u16::from(bond_order_value(molecule.bonds[*bond].order)))
+                .sum()
+        })
+        .collect();
+
+    let roots: Vec<usize> = traversal.order.iter()
+        .copied()
+        .filter(|atom| traversal.parent[*atom].is_none())
+        .collect();
+    let mut writer = Writer {
+        molecule,
+        traversal,
+        directions,
+        order_sums,
+        ring_numbers: vec![None; molecule.bonds.len()],
+        free_numbers: vec![false; 1],
+        output: String::with_capacity(2 * molecule.atoms.len()),
+    };
+
+    for (index, root) in roots.into_iter().enumerate() {
+        if index > 0 {
+            writer.output.push('.');
+        }
+        writer.write_component(root)?;
+    }
+    Ok(writer.output)
+}
@@ -4,15 +4,26 @@ use pyo3::prelude::*;
 use chemcore::molecule::spec::{Atom,Bond};
 
 use crate::exceptions::get_ValueError;
-use crate::element::PyElement;
-use crate::bond_order::PyBondOrder;
-use crate::parity::PyParity;
-
-
+use crate::element::{PyElement,extract_element};
+use crate::bond_order::{PyBondOrder,extract_bond_order};
+use crate::parity::{PyParity,extract_parity};
+
+
+/// An atom specification, used to create a Molecule instance.
+///
+/// :param element: an ``Element``, ``int`` (atomic number), or
+///     ``str`` (element symbol).
+/// :param hydrogens: an ``int``, the number of implicit hydrogen
+///     atoms.
+/// :param ion: an optional ``int``, the formal charge on the atom.
+/// :param isotope: an optional ``int``, the isotope of the atom.
+/// :param parity: an optional ``Parity`` or ``bool``, the chirality.
+///
+/// *Attributes*
+/// See Parameters.
 #[pyclass(subclass)]
 #[derive(Copy,Clone,Debug)]
 pub struct PyAtomSpec {
-    #[pyo3(get)]
     pub element: PyElement,
     #[pyo3(get)]
     pub hydrogens: u8,
@@ -20,7 +31,6 @@ pub struct PyAtomSpec {
     pub ion: i8,
     #[pyo3(get)]
     pub isotope: Option<u16>,
-    #[pyo3(get)]
     pub parity: Option<PyParity>
 }
 
@@ -57,8 +67,32 @@ impl From<Atom> for PyAtomSpec {
 #[pymethods]
 impl PyAtomSpec {
     #[new]
-    fn new(element: PyElement, hydrogens: u8, ion: i8, isotope: Option<u16>, parity: Option<PyParity>) -> Self {
-        Self {element, hydrogens, ion, isotope, parity}
+    #[args(hydrogens = "0", ion = "0", isotope = "None", parity = "None")]
+    fn new(
+        element: &PyAny,
+        hydrogens: u8,
+        ion: i8,
+        isotope: Option<u16>,
+        parity: Option<&PyAny>
+    ) -> PyResult<Self> {
+        let element = extract_element(element)?;
+        let parity = extract_parity(parity)?;
+        Ok(Self {element, hydrogens, ion, isotope, parity})
+    }
+
+    #[getter]
+    fn element(&self) -> PyResult<Py<PyElement>> {
+        let gil = Python::acquire_gil();
+        PyElement::interned(gil.python(), self.element.element)
+    }
+
+    #[getter]
+    fn parity(&self) -> PyResult<Option<Py<PyParity>>> {
+        let gil = Python::acquire_gil();
+        match self.parity {
+            Some(parity) => Ok(Some(PyParity::interned(gil.python(), parity.parity)?)),
+            None => Ok(None),
+        }
     }
 }
 
@@ -83,6 +117,16 @@ impl PyObjectProtocol for PyAtomSpec {
 }
 
 
+/// A bond specification, used to create a molecule instance.
+///
+/// :param sid: an ``int``, the atom ID of the first atom in the bond.
+/// :param tid: an ``int``, the atom ID of the last atom in the bond.
+/// :param order: a ``BondOrder`` or an ``int``, the order of the bond.
+/// :param parity: an optional ``Parity`` or ``bool``, the
+///     stereochemistry of the bond (only valid for double bonds).
+///
+/// *Attributes*
+/// See Parameters.
 #[pyclass(subclass)]
 #[derive(Copy,Clone,Debug)]
 pub struct PyBondSpec {
@@ -90,9 +134,7 @@ pub struct PyBondSpec {
     pub sid: usize,
     #[pyo3(get)]
     pub tid: usize,
-    #[pyo3(get)]
     pub order: PyBondOrder,
-    #[pyo3(get)]
     pub parity: Option<PyParity>
 }
 
@@ -127,13 +169,31 @@ impl Into<Bond> for PyBondSpec {
 #[pymethods]
 impl PyBondSpec {
     #[new]
-    fn new(sid: usize, tid: usize, order: PyBondOrder, parity: Option<PyParity>) -> PyResult<Self> {
+    #[args(parity = "None")]
+    fn new(sid: usize, tid: usize, order: &PyAny, parity: Option<&PyAny>) -> PyResult<Self> {
         if sid == tid {
             return Err(get_ValueError("Can't bond atom to itself"));
         }
+        let order = extract_bond_order(order)?;
+        let parity = extract_parity(parity)?;
 
         Ok(PyBondSpec{sid, tid, order, parity})
     }
+
+    #[getter]
+    fn order(&self) -> PyResult<Py<PyBondOrder>> {
+        let gil = Python::acquire_gil();
+        PyBondOrder::interned(gil.python(), self.order.bond_order)
+    }
+
+    #[getter]
+    fn parity(&self) -> PyResult<Option<Py<PyParity>>> {
+        let gil = Python::acquire_gil();
+        match self.parity {
+            Some(parity) => Ok(Some(PyParity::interned(gil.python(), parity.parity)?)),
+            None => Ok(None),
+        }
+    }
 }
 
 #[pyproto]
@@ -0,0 +1,475 @@
+use std::collections::VecDeque;
+use std::convert::{TryFrom,TryInto};
+use std::fs::{self,File,OpenOptions};
+use std::io::{self,BufWriter,Seek,SeekFrom,Write};
+use std::os::raw::c_long;
+use std::path::{Path,PathBuf};
+use std::sync::Arc;
+
+use memmap::Mmap;
+use pyo3::prelude::*;
+use pyo3::class::{PyIterProtocol,PyMappingProtocol,PyObjectProtocol};
+use pyo3::exceptions;
+use pyo3::types::PySlice;
+use rayon::ThreadPool;
+use rayon::prelude::*;
+
+use chemcore::molecule::spec::{Atom,Bond,Molecule};
+
+use crate::bond_order::PyBondOrder;
+use crate::canonical::bond_order_value;
+use crate::columns::{parity_from_int,parity_to_int};
+use crate::default_molecule::PyDefaultMolecule;
+use crate::element::PyElement;
+use crate::exceptions::{error_message,get_ValueError};
+use crate::files::{BUFFER_SIZE,extract_path};
+use crate::parallel::{install,thread_pool};
+
+const MAGIC: &[u8; 8] = b"OXSTORE\0";
+const VERSION: u32 = 1;
+/// The offsets file starts with the magic, version and four reserved
+/// bytes, followed by the end of each molecule's atoms and bonds in the
+/// columns (as `u64`).
+const HEADER_SIZE: usize = 16;
+const OFFSET_SIZE: usize = 16;
+/// How many molecules are built at a time while iterating.
+const ITER_BATCH_SIZE: usize = 1024;
+
+const OFFSETS: &str = "offsets.bin";
+/// The atom columns and bond columns, with the size of their values.
+const ATOM_COLUMNS: [(&str, usize); 5] = [
+    ("elements.bin", 1),
+    ("hydrogens.bin", 1),
+    ("charges.bin", 1),
+    ("isotopes.bin", 2),
+    ("atom_parities.bin", 1),
+];
+const BOND_COLUMNS: [(&str, usize); 4] = [
+    ("bond_src.bin", 4),
+    ("bond_dst.bin", 4),
+    ("bond_orders.bin", 1),
+    ("bond_parities.bin", 1),
+];
+
+/// A memory-mapped file, which may be empty (as empty files can't be
+/// mapped).
+struct Column(Option<Mmap>);
+
+impl Column {
+    fn open(path: &Path, min_size: usize) -> PyResult<Self> {
+        let file = File::open(path)?;
+        let size = file.metadata()?.len() as usize;
+        if size < min_size {
+            return Err(get_ValueError("The molecule store is truncated."));
+        }
+        if size == 0 {
+            return Ok(Column(None));
+        }
+        // The store is append-only, so mapped data is never changed.
+        Ok(Column(Some(unsafe { Mmap::map(&file)? })))
+    }
+
+    fn bytes(&self) -> &[u8] {
+        match &self.0 {
+            Some(mmap) => &mmap[..],
+            None => &[],
+        }
+    }
+}
+
+fn read_u32(column: &[u8], index: usize) -> usize {
+    u32::from_le_bytes(column[4 * index..4 * index + 4].try_into().unwrap()) as usize
+}
+
+/// A snapshot of a store's columns. Appending to a store maps the files
+/// again, so iterators over the old snapshot are unaffected.
+struct StoreColumns {
+    offsets: Column,
+    elements: Column,
+    hydrogens: Column,
+    charges: Column,
+    isotopes: Column,
+    atom_parities: Column,
+    bond_src: Column,
+    bond_dst: Column,
+    bond_orders: Column,
+    bond_parities: Column,
+    n_molecules: usize,
+    n_atoms: usize,
+    n_bonds: usize,
+    /// Whether molecules are validated as they're built.
+    validate: bool,
+}
+
+impl StoreColumns {
+    fn open(path: &Path, validate: bool) -> PyResult<Self> {
+        let offsets = Column::open(&path.join(OFFSETS), 0)?;
+        let bytes = offsets.bytes();
+        let valid_header = bytes.len() >= HEADER_SIZE
+            && &bytes[..8] == MAGIC
+            && bytes[8..12] == VERSION.to_le_bytes();
+        if !valid_header || (bytes.len() - HEADER_SIZE) % OFFSET_SIZE != 0 {
+            return Err(get_ValueError("Not a molecule store, or written by another version."));
+        }
+        let n_molecules = (bytes.len() - HEADER_SIZE) / OFFSET_SIZE;
+        let (n_atoms, n_bonds) = end_offsets(bytes, n_molecules);
+
+        let mut atom_columns = Vec::with_capacity(ATOM_COLUMNS.len());
+        for (file_name, width) in &ATOM_COLUMNS {
+            atom_columns.push(Column::open(&path.join(file_name), n_atoms * width)?);
+        }
+        let mut bond_columns = Vec::with_capacity(BOND_COLUMNS.len());
+        for (file_name, width) in &BOND_COLUMNS {
+            bond_columns.push(Column::open(&path.join(file_name), n_bonds * width)?);
+        }
+
+        let mut atom_columns = atom_columns.into_iter();
+        let mut bond_columns = bond_columns.into_iter();
+        Ok(StoreColumns {
+            offsets,
+            elements: atom_columns.next().unwrap(),
+            hydrogens: atom_columns.next().unwrap(),
+            charges: atom_columns.next().unwrap(),
+            isotopes: atom_columns.next().unwrap(),
+            atom_parities: atom_columns.next().unwrap(),
+            bond_src: bond_columns.next().unwrap(),
+            bond_dst: bond_columns.next().unwrap(),
+            bond_orders: bond_columns.next().unwrap(),
+            bond_parities: bond_columns.next().unwrap(),
+            n_molecules,
+            n_atoms,
+            n_bonds,
+            validate,
+        })
+    }
+
+    fn end(&self, n_molecules: usize) -> (usize, usize) {
+        end_offsets(self.offsets.bytes(), n_molecules)
+    }
+
+    fn molecule_spec(&self, index: usize) -> Result<Molecule, &'static str> {
+        let (atom_start, bond_start) = self.end(index);
+        let (atom_end, bond_end) = self.end(index + 1);
+        if atom_start > atom_end || bond_start > bond_end || atom_end > self.n_atoms || bond_end > self.n_bonds {
+            return Err("Invalid offsets in the molecule store.");
+        }
+        let n_atoms = atom_end - atom_start;
+
+        let elements = self.elements.bytes();
+        let hydrogens = self.hydrogens.bytes();
+        let charges = self.charges.bytes();
+        let isotopes = self.isotopes.bytes();
+        let atom_parities = self.atom_parities.bytes();
+        let mut atoms = Vec::with_capacity(n_atoms);
+        for index in atom_start..atom_end {
+            let isotope = u16::from_le_bytes([isotopes[2 * index], isotopes[2 * index + 1]]);
+            atoms.push(Atom {
+                element: PyElement::try_from(elements[index] as u16)?.element,
+                hydrogens: hydrogens[index],
+                ion: charges[index] as i8,
+                isotope: if isotope == 0 { None } else { Some(isotope) },
+                parity: parity_from_int(atom_parities[index] as i8)?,
+            });
+        }
+
+        let bond_src = self.bond_src.bytes();
+        let bond_dst = self.bond_dst.bytes();
+        let bond_orders = self.bond_orders.bytes();
+        let bond_parities = self.bond_parities.bytes();
+        let mut bonds = Vec::with_capacity(bond_end - bond_start);
+        for index in bond_start..bond_end {
+            let (sid, tid) = (read_u32(bond_src, index), read_u32(bond_dst, index));
+            if sid >= n_atoms || tid >= n_atoms || sid == tid {
+                return Err("Invalid bond in the molecule store.");
+            }
+            bonds.push(Bond {
+                sid,
+                tid,
+                order: PyBondOrder::try_from(bond_orders[index])?.into(),
+                parity: parity_from_int(bond_parities[index] as i8)?,
+            });
+        }
+        Ok(Molecule{ atoms, bonds })
+    }
+
+    fn molecule(&self, index: usize) -> Result<PyDefaultMolecule, String> {
+        self.molecule_spec(index)
+            .and_then(|molecule| PyDefaultMolecule::build_with(molecule, self.validate).map_err(error_message))
+            .map_err(|message| format!("Molecule {}: {}", index, message))
+    }
+
+    /// Build molecules in parallel, without holding the GIL.
+    fn molecules(&self, py: Python, indices: &[usize], pool: Option<&ThreadPool>) -> PyResult<Vec<PyObject>> {
+        let molecules: Result<Vec<PyDefaultMolecule>, String> = py.allow_threads(|| {
+            install(pool, || indices.par_iter().map(|index| self.molecule(*index)).collect())
+        });
+        molecules.map_err(exceptions::ValueError::py_err)?
+            .into_iter()
+            .map(|molecule| Ok(Py::new(py, molecule)?.to_object(py)))
+            .collect()
+    }
+}
+
+fn end_offsets(offsets: &[u8], n_molecules: usize) -> (usize, usize) {
+    if n_molecules == 0 {
+        return (0, 0);
+    }
+    let start = HEADER_SIZE + (n_molecules - 1) * OFFSET_SIZE;
+    let row = &offsets[start..start + OFFSET_SIZE];
+    (
+        u64::from_le_bytes(row[..8].try_into().unwrap()) as usize,
+        u64::from_le_bytes(row[8..].try_into().unwrap()) as usize,
+    )
+}
+
+fn create_store(path: &Path) -> io::Result<()> {
+    fs::create_dir_all(path)?;
+    for (file_name, _) in ATOM_COLUMNS.iter().chain(BOND_COLUMNS.iter()) {
+        File::create(path.join(file_name))?;
+    }
+    let mut offsets = File::create(path.join(OFFSETS))?;
+    offsets.write_all(MAGIC)?;
+    offsets.write_all(&VERSION.to_le_bytes())?;
+    offsets.write_all(&[0; 4])?;
+    offsets.sync_all()
+}
+
+/// Open a column to append to, first dropping anything written by an
+/// append which didn't complete.
+fn open_for_append(path: &Path, committed_size: usize) -> io::Result<BufWriter<File>> {
+    let mut file = OpenOptions::new().write(true).open(path)?;
+    file.set_len(committed_size as u64)?;
+    file.seek(SeekFrom::End(0))?;
+    Ok(BufWriter::with_capacity(BUFFER_SIZE, file))
+}
+
+fn finish(writer: BufWriter<File>) -> io::Result<()> {
+    writer.into_inner().map_err(io::Error::from)?.sync_all()
+}
+
+// A directory of columnar atom and bond arrays, with the offsets of
+// each molecule's atoms and bonds. These are memory-mapped, so molecules
+// are read (through the page cache, which processes share) only as
+// they're needed.
+/// A memory-mapped, append-only store of molecules.
+///
+/// ``len(store)`` is the number of molecules. ``store[i]`` returns a
+/// molecule (negative indices count from the end), and ``store[i:j]``
+/// a ``list`` of molecules, built in parallel. Iterating over the
+/// store builds molecules in batches, in parallel, without loading the
+/// whole store.
+///
+/// :param path: the directory of the store
+/// :param create: whether to create an empty store if there isn't one
+///     at ``path``
+/// :param validate: whether to validate molecules as they're built.
+///     This can be turned off if the stored molecules were validated
+///     before they were appended (see ``Molecule``)
+///
+/// Attributes
+///
+/// - ``path`` - the directory of the store
+#[pyclass(module = "oxmol.oxmol")]
+pub struct PyMoleculeStore {
+    path: PathBuf,
+    columns: Arc<StoreColumns>,
+    validate: bool,
+}
+
+impl PyMoleculeStore {
+    fn get_index(&self, index: isize) -> PyResult<usize> {
+        let n_molecules = self.columns.n_molecules as isize;
+        let index = if index < 0 { index + n_molecules } else { index };
+        if index < 0 || index >= n_molecules {
+            return Err(exceptions::IndexError::py_err("Molecule store index out of range"));
+        }
+        Ok(index as usize)
+    }
+
+    fn write_molecules(&self, py: Python, molecules: &PyAny) -> PyResult<usize> {
+        let n_molecules = self.columns.n_molecules;
+        let (mut n_atoms, mut n_bonds) = self.columns.end(n_molecules);
+
+        let mut atom_writers = Vec::with_capacity(ATOM_COLUMNS.len());
+        for (file_name, width) in &ATOM_COLUMNS {
+            atom_writers.push(open_for_append(&self.path.join(file_name), n_atoms * width)?);
+        }
+        let mut bond_writers = Vec::with_capacity(BOND_COLUMNS.len());
+        for (file_name, width) in &BOND_COLUMNS {
+            bond_writers.push(open_for_append(&self.path.join(file_name), n_bonds * width)?);
+        }
+        let mut offsets = Vec::new();
+
+        for molecule in molecules.iter()? {
+            let molecule = molecule?.extract::<PyRef<PyDefaultMolecule>>()?;
+            let molecule = molecule.to_spec();
+
+            for atom in &molecule.atoms {
+                atom_writers[0].write_all(&[atom.element.atomic_number() as u8])?;
+                atom_writers[1].write_all(&[atom.hydrogens])?;
+                atom_writers[2].write_all(&[atom.ion as u8])?;
+                atom_writers[3].write_all(&atom.isotope.unwrap_or(0).to_le_bytes())?;
+                atom_writers[4].write_all(&[parity_to_int(atom.parity) as u8])?;
+            }
+            for bond in &molecule.bonds {
+                bond_writers[0].write_all(&(bond.sid as u32).to_le_bytes())?;
+                bond_writers[1].write_all(&(bond.tid as u32).to_le_bytes())?;
+                bond_writers[2].write_all(&[bond_order_value(bond.order)])?;
+                bond_writers[3].write_all(&[parity_to_int(bond.parity) as u8])?;
+            }
+
+            n_atoms += molecule.atoms.len();
+            n_bonds += molecule.bonds.len();
+            offsets.extend(&(n_atoms as u64).to_le_bytes());
+            offsets.extend(&(n_bonds as u64).to_le_bytes());
+        }
+
+        // The offsets are written last, once the columns are on disk, so
+        // that an interrupted append leaves the molecules already stored.
+        py.allow_threads(|| -> io::Result<()> {
+            for writer in atom_writers.into_iter().chain(bond_writers) {
+                finish(writer)?;
+            }
+            let path = self.path.join(OFFSETS);
+            let mut offsets_file = open_for_append(&path, HEADER_SIZE + n_molecules * OFFSET_SIZE)?;
+            offsets_file.write_all(&offsets)?;
+            finish(offsets_file)
+        })?;
+        Ok(offsets.len() / OFFSET_SIZE)
+    }
+}
+
+#[pymethods]
+impl PyMoleculeStore {
+    #[new]
+    #[args(create = "false", validate = "true")]
+    fn new(path: &PyAny, create: bool, validate: bool) -> PyResult<Self> {
+        let path = PathBuf::from(extract_path(path)?);
+        if create && !path.join(OFFSETS).exists() {
+            create_store(&path)?;
+        }
+        let columns = Arc::new(StoreColumns::open(&path, validate)?);
+        Ok(Self{ path, columns, validate })
+    }
+
+    /// Append molecules to the end of the store. Molecules already in
+    /// the store keep their indices.
+    ///
+    /// :param molecules: the molecules to add
+    /// :return: the number of molecules added
+    fn append(&mut self, molecules: &PyAny) -> PyResult<usize> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let n_appended = self.write_molecules(py, molecules)?;
+        self.columns = Arc::new(StoreColumns::open(&self.path, self.validate)?);
+        Ok(n_appended)
+    }
+
+    #[getter]
+    fn path(&self) -> PyResult<String> {
+        Ok(self.path.to_string_lossy().into_owned())
+    }
+
+    /// Build the molecules at several indices, in parallel.
+    ///
+    /// :param indices: the indices of the molecules
+    /// :param threads: the number of threads to use, by default one
+    ///     per core
+    /// :return: the molecules, in the same order as ``indices``
+    /// :raises IndexError: if an index is out of range
+    #[args(threads = "None")]
+    fn get_many(&self, indices: &PyAny, threads: Option<usize>) -> PyResult<Vec<PyObject>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let mut checked = Vec::new();
+        for index in indices.iter()? {
+            checked.push(self.get_index(index?.extract()?)?);
+        }
+        let pool = thread_pool(threads)?;
+        self.columns.molecules(py, &checked, pool.as_deref())
+    }
+
+    fn __reduce__(&self) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let cls = py.get_type::<PyMoleculeStore>();
+        Ok((cls, (self.path()?, false, self.validate)).to_object(py))
+    }
+}
+
+#[pyproto]
+impl PyMappingProtocol for PyMoleculeStore {
+    fn __len__(&self) -> PyResult<usize> {
+        Ok(self.columns.n_molecules)
+    }
+
+    fn __getitem__(&self, key: &PyAny) -> PyResult<PyObject> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+
+        if let Ok(slice) = key.cast_as::<PySlice>() {
+            let indices = slice.indices(self.columns.n_molecules as c_long)?;
+            let indices: Vec<usize> = (0..indices.slicelength)
+                .map(|position| (indices.start + position * indices.step) as usize)
+                .collect();
+            return Ok(self.columns.molecules(py, &indices, None)?.to_object(py));
+        }
+
+        let index = self.get_index(key.extract()?)?;
+        let molecule = self.columns.molecule(index).map_err(exceptions::ValueError::py_err)?;
+        Ok(Py::new(py, molecule)?.to_object(py))
+    }
+}
+
+#[pyproto]
+impl PyIterProtocol for PyMoleculeStore {
+    fn __iter__(slf: PyRef<Self>) -> PyResult<Py<PyMoleculeStoreIterator>> {
+        let gil = Python::acquire_gil();
+        let iterator = PyMoleculeStoreIterator {
+            columns: Arc::clone(&slf.columns),
+            position: 0,
+            pending: VecDeque::new(),
+        };
+        Py::new(gil.python(), iterator)
+    }
+}
+
+#[pyproto]
+impl PyObjectProtocol for PyMoleculeStore {
+    fn __repr__(&self) -> PyResult<String> {
+        Ok(format!(
+            "PyMoleculeStore at {} with {} molecules.",
+            self.path.display(),
+            self.columns.n_molecules
+        ))
+    }
+}
+
+/// Iterates over a store's molecules, building them in batches.
+#[pyclass]
+pub struct PyMoleculeStoreIterator {
+    columns: Arc<StoreColumns>,
+    position: usize,
+    pending: VecDeque<PyObject>,
+}
+
+#[pyproto]
+impl PyIterProtocol for PyMoleculeStoreIterator {
+    fn __iter__(slf: PyRef<Self>) -> PyResult<Py<PyMoleculeStoreIterator>> {
+        Ok(slf.into())
+    }
+
+    fn __next__(mut slf: PyRefMut<Self>) -> PyResult<Option<PyObject>> {
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let iterator = &mut *slf;
+
+        if iterator.pending.is_empty() {
+            let end = (iterator.position + ITER_BATCH_SIZE).min(iterator.columns.n_molecules);
+            let indices: Vec<usize> = (iterator.position..end).collect();
+            iterator.pending.extend(iterator.columns.molecules(py, &indices, None)?);
+            iterator.position = end;
+        }
+        Ok(iterator.pending.pop_front())
+    }
+}
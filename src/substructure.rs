@@ -0,0 +1,320 @@
+use std::collections::HashSet;
+
+use chemcore::molecule::spec::Molecule;
+
+use crate::graph::MolecularGraph;
+use crate::rings::{aromatic_atoms,smallest_rings};
+use crate::screen::{Screen,compute_screen};
+
+const NOT_MAPPED: usize = usize::MAX;
+
+struct AtomPredicate {
+    atomic_number: u8,
+    charge: Option<i8>,
+    isotope: Option<u16>,
+    degree: usize,
+    aromatic: bool,
+}
+
+impl AtomPredicate {
+    fn matches(&self, target: &Target, atom: usize) -> bool {
+        let record = &target.graph.atoms[atom];
+        if record.atomic_number != self.atomic_number || target.graph.degree(atom) < self.degree {
+            return false;
+        }
+        if self.aromatic && !target.aromatic_atoms[atom] {
+            return false;
+        }
+        if let Some(charge) = self.charge {
+            if record.charge != charge {
+                return false;
+            }
+        }
+        if let Some(isotope) = self.isotope {
+            if record.isotope != isotope {
+                return false;
+            }
+        }
+        true
+    }
+}
+
+/// The bond orders a query bond matches, as a bit mask over the order,
+/// or `AROMATIC` for aromatic query bonds.
+type BondPredicate = u8;
+
+const AROMATIC: BondPredicate = 1 << 4;
+
+fn bond_predicate(order: u8, aromatic: bool) -> BondPredicate {
+    match aromatic {
+        true => AROMATIC,
+        false => 1 << order,
+    }
+}
+
+/// A molecule being searched, with its aromatic atoms and bonds if the
+/// query has any aromatic atoms (and empty otherwise). Aromatic bonds
+/// are ring bonds between aromatic atoms.
+struct Target<'a> {
+    graph: &'a MolecularGraph,
+    aromatic_atoms: Vec<bool>,
+    aromatic_bonds: Vec<bool>,
+}
+
+impl<'a> Target<'a> {
+    fn new(graph: &'a MolecularGraph, aromatic: bool) -> Self {
+        if !aromatic {
+            return Self{ graph, aromatic_atoms: Vec::new(), aromatic_bonds: Vec::new() };
+        }
+        let ring_bonds = graph.ring_bonds();
+        let aromatic_atoms = aromatic_atoms(graph, &smallest_rings(graph, &ring_bonds));
+        let aromatic_bonds = graph.bonds.iter()
+            .zip(&ring_bonds)
+            .map(|(bond, in_ring)| *in_ring && aromatic_atoms[bond.sid as usize] && aromatic_atoms[bond.tid as usize])
+            .collect();
+        Self{ graph, aromatic_atoms, aromatic_bonds }
+    }
+
+    fn bond_matches(&self, predicate: BondPredicate, bond: usize) -> bool {
+        match predicate {
+            AROMATIC => self.aromatic_bonds[bond],
+            orders => orders & (1 << self.graph.bonds[bond].order) != 0,
+        }
+    }
+}
+
+/// One step of the search: map `atom` to a target atom. Candidates are
+/// the neighbours of the target atom mapped to `parent` (or every
+/// target atom, at the start of a component), and must be bonded to the
+/// targets of each of `bonds` (query atoms mapped in earlier steps).
+struct Step {
+    atom: usize,
+    parent: Option<(usize, BondPredicate)>,
+    bonds: Vec<(usize, BondPredicate)>,
+}
+
+/// A substructure query, compiled once so that it can be matched
+/// against many molecules. Matching is a depth-first search over the
+/// query atoms in a fixed order (in the style of VF2 and RI): each query
+/// atom after the first in its component is connected to an earlier one,
+/// so candidates come from the neighbours of an atom already matched and
+/// most partial matches are pruned as soon as a bond is missing.
+///
+/// Atoms match on element, and on charge and isotope where the query
+/// sets them; the target atom needs at least as many bonds as the query
+/// atom. Bonds match on order, except that bonds which were aromatic in
+/// a SMILES query match aromatic bonds (see `aromatic_atoms`), and
+/// their atoms match aromatic atoms.
+pub struct CompiledQuery {
+    atoms: Vec<AtomPredicate>,
+    aromatic: bool,
+    n_bonds: usize,
+    steps: Vec<Step>,
+    element_counts: Vec<(u8, usize)>,
+    pub screen: Screen,
+}
+
+fn start_priority(atom: &AtomPredicate) -> (bool, usize, u8) {
+    (atom.atomic_number != 6, atom.degree, atom.atomic_number)
+}
+
+impl CompiledQuery {
+    pub fn new(molecule: &Molecule, aromatic_bonds: Option<&[bool]>) -> Self {
+        let graph = MolecularGraph::new(molecule);
+        let is_aromatic = |bond: usize| aromatic_bonds.map_or(false, |aromatic| aromatic[bond]);
+
+        let atoms: Vec<AtomPredicate> = molecule.atoms.iter()
+            .enumerate()
+            .map(|(index, atom)| {
+                AtomPredicate {
+                    atomic_number: graph.atoms[index].atomic_number,
+                    charge: if atom.ion == 0 { None } else { Some(atom.ion) },
+                    isotope: atom.isotope,
+                    degree: graph.degree(index),
+                    aromatic: graph.incident_bonds(index).iter().any(|bond| is_aromatic(*bond as usize)),
+                }
+            })
+            .collect();
+
+        let predicate = |bond: usize| bond_predicate(graph.bonds[bond].order, is_aromatic(bond));
+        let n_atoms = atoms.len();
+        let mut ordered = vec![false; n_atoms];
+        let mut connections = vec![0; n_atoms];
+        let mut steps = Vec::with_capacity(n_atoms);
+
+        while steps.len() < n_atoms {
+            // Prefer the atom with the most bonds to atoms already
+            // ordered, then the most constrained. A new component starts
+            // with its most unusual atom.
+            let atom = (0..n_atoms)
+                .filter(|atom| !ordered[*atom])
+                .max_by_key(|atom| (connections[*atom], start_priority(&atoms[*atom]), usize::MAX - atom))
+                .unwrap();
+
+            let mut bonds: Vec<(usize, BondPredicate)> = graph.neighbour_bonds(atom)
+                .filter(|(neighbour, _)| ordered[*neighbour])
+                .map(|(neighbour, bond)| (neighbour, predicate(bond)))
+                .collect();
+            let parent = match bonds.is_empty() {
+                true => None,
+                false => Some(bonds.remove(0)),
+            };
+
+            ordered[atom] = true;
+            for neighbour in graph.neighbours(atom) {
+                connections[*neighbour as usize] += 1;
+            }
+            steps.push(Step{ atom, parent, bonds });
+        }
+
+        let mut element_counts: Vec<(u8, usize)> = Vec::new();
+        for atom in &atoms {
+            match element_counts.iter_mut().find(|(element, _)| *element == atom.atomic_number) {
+                Some((_, count)) => *count += 1,
+                None => element_counts.push((atom.atomic_number, 1)),
+            }
+        }
+
+        let aromatic = atoms.iter().any(|atom| atom.aromatic);
+        let screen = compute_screen(&graph, &|bond| !is_aromatic(bond));
+        CompiledQuery{ atoms, aromatic, n_bonds: graph.size(), steps, element_counts, screen }
+    }
+
+    pub fn order(&self) -> usize {
+        self.atoms.len()
+    }
+
+    pub fn size(&self) -> usize {
+        self.n_bonds
+    }
+
+    fn could_match(&self, target: &MolecularGraph) -> bool {
+        if target.order() < self.atoms.len() || target.size() < self.n_bonds {
+            return false;
+        }
+        self.element_counts.iter().all(|(element, count)| {
+            target.atoms.iter().filter(|atom| atom.atomic_number == *element).count() >= *count
+        })
+    }
+
+    /// Call `found` with each mapping from query atoms to target atoms,
+    /// until it returns `false`.
+    fn search<F>(&self, target: &MolecularGraph, found: &mut F)
+        where F: FnMut(&[usize]) -> bool
+    {
+        if !self.could_match(target) {
+            return;
+        }
+        let target = Target::new(target, self.aromatic);
+        let mut mapping = vec![NOT_MAPPED; self.atoms.len()];
+        let mut used = vec![false; target.graph.order()];
+        self.extend(&target, 0, &mut mapping, &mut used, found);
+    }
+
+    fn bonds_match(&self, target: &Target, step: &Step, mapping: &[usize], candidate: usize) -> bool {
+        step.bonds.iter().all(|(neighbour, predicate)| {
+            match target.graph.bond_between(candidate, mapping[*neighbour]) {
+                Some(bond) => target.bond_matches(*predicate, bond),
+                None => false,
+            }
+        })
+    }
+
+    fn try_candidate<F>(
+        &self,
+        target: &Target,
+        depth: usize,
+        candidate: usize,
+        mapping: &mut Vec<usize>,
+        used: &mut Vec<bool>,
+        found: &mut F
+    ) -> bool
+        where F: FnMut(&[usize]) -> bool
+    {
+        let step = &self.steps[depth];
+        if used[candidate]
+            || !self.atoms[step.atom].matches(target, candidate)
+            || !self.bonds_match(target, step, mapping, candidate)
+        {
+            return true;
+        }
+
+        mapping[step.atom] = candidate;
+        used[candidate] = true;
+        let carry_on = self.extend(target, depth + 1, mapping, used, found);
+        used[candidate] = false;
+        mapping[step.atom] = NOT_MAPPED;
+        carry_on
+    }
+
+    fn extend<F>(
+        &self,
+        target: &Target,
+        depth: usize,
+        mapping: &mut Vec<usize>,
+        used: &mut Vec<bool>,
+        found: &mut F
+    ) -> bool
+        where F: FnMut(&[usize]) -> bool
+    {
+        let step = match self.steps.get(depth) {
+            Some(step) => step,
+            None => return found(mapping),
+        };
+
+        match step.parent {
+            Some((parent, predicate)) => {
+                let parent_target = mapping[parent];
+                for (candidate, bond) in target.graph.neighbour_bonds(parent_target) {
+                    if !target.bond_matches(predicate, bond) {
+                        continue;
+                    }
+                    if !self.try_candidate(target, depth, candidate, mapping, used, found) {
+                        return false;
+                    }
+                }
+            },
+            None => {
+                for candidate in 0..target.graph.order() {
+                    if !self.try_candidate(target, depth, candidate, mapping, used, found) {
+                        return false;
+                    }
+                }
+            },
+        }
+        true
+    }
+
+    pub fn has_match(&self, target: &MolecularGraph) -> bool {
+        let mut matched = false;
+        self.search(target, &mut |_| {
+            matched = true;
+            false
+        });
+        matched
+    }
+
+    /// Find mappings from query atoms to target atoms. If `unique`, only
+    /// the first mapping onto each set of target atoms is kept, so that
+    /// symmetric queries don't give one match per automorphism.
+    pub fn matches(&self, target: &MolecularGraph, unique: bool, max_matches: Option<usize>) -> Vec<Vec<usize>> {
+        let mut matches = Vec::new();
+        let mut seen = HashSet::new();
+        if max_matches == Some(0) {
+            return matches;
+        }
+
+        self.search(target, &mut |mapping| {
+            if unique {
+                let mut atoms = mapping.to_vec();
+                atoms.sort_unstable();
+                if !seen.insert(atoms) {
+                    return true;
+                }
+            }
+            matches.push(mapping.to_vec());
+            max_matches.map_or(true, |max_matches| matches.len() < max_matches)
+        });
+        matches
+    }
+}
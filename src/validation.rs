@@ -0,0 +1,67 @@
+use chemcore::molecule::{Element,Error};
+use chemcore::molecule::spec::{Atom,Molecule};
+
+use crate::graph::MolecularGraph;
+
+/// The number of nonbonding valence electrons an atom has left, given
+/// the sum of the orders of its bonds, or `HypervalentAtom` if it has
+/// more bonds (and hydrogens) than valence electrons. This is the rule
+/// `DefaultMolecule::build` applies.
+pub fn nonbonding_electrons(element: Element, ion: i8, hydrogens: u8, bond_order_sum: u16) -> Result<u8, Error> {
+    let electrons = element.valence_electrons() as i32
+        - ion as i32
+        - hydrogens as i32
+        - bond_order_sum as i32;
+    if electrons < 0 {
+        Err(Error::HypervalentAtom)
+    } else {
+        Ok(electrons as u8)
+    }
+}
+
+/// Check the parts of an atom which don't depend on its bonds: that its
+/// isotope has at least as many nucleons as protons.
+pub fn check_atom(atom: &Atom) -> Result<(), Error> {
+    match atom.isotope {
+        Some(isotope) if isotope < atom.element.atomic_number() => Err(Error::ImpossibleIsotope),
+        _ => Ok(()),
+    }
+}
+
+/// Check an atom, given the sum of the orders of its bonds.
+pub fn check_bonded_atom(atom: &Atom, bond_order_sum: u16) -> Result<(), Error> {
+    check_atom(atom)?;
+    nonbonding_electrons(atom.element, atom.ion, atom.hydrogens, bond_order_sum).map(|_| ())
+}
+
+/// Check that each bond joins two different atoms of the molecule. This
+/// is the one check made even when validation is skipped, as the graph
+/// can't be built otherwise.
+pub fn check_bonds(molecule: &Molecule) -> Result<(), Error> {
+    let n_atoms = molecule.atoms.len();
+    for bond in &molecule.bonds {
+        if bond.sid >= n_atoms || bond.tid >= n_atoms || bond.sid == bond.tid {
+            return Err(Error::MisplacedBond);
+        }
+    }
+    Ok(())
+}
+
+/// Check a molecule's graph for the errors `DefaultMolecule::build`
+/// rejects: duplicate bonds, impossible isotopes and hypervalent atoms.
+pub fn check_graph(graph: &MolecularGraph) -> Result<(), Error> {
+    for atom in 0..graph.order() {
+        // Neighbours are sorted, so a repeated bond gives a repeated
+        // neighbour.
+        if graph.neighbours(atom).windows(2).any(|pair| pair[0] == pair[1]) {
+            return Err(Error::DuplicateBond);
+        }
+    }
+    for (atom, record) in graph.atoms.iter().enumerate() {
+        if record.isotope != 0 && record.isotope < record.atomic_number as u16 {
+            return Err(Error::ImpossibleIsotope);
+        }
+        nonbonding_electrons(graph.element(atom), record.charge, record.hydrogens, graph.bond_order_sum(atom))?;
+    }
+    Ok(())
+}